@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Office HTML预览转换对比测试
+
+对目录中的每个 DOCX/PPTX 文件比较两种生成HTML预览的方式（均不使用缓存）：
+- direct: 直接解析 OOXML 生成HTML（utils.ooxml_html）
+- via-pdf: Office→PDF（Microsoft Office 或 LibreOffice）→ PDF转HTML引擎
+输出各自的耗时和输出目录大小。没有可用的 Office 转换程序时只测试 direct。
+
+用法:
+    python benchmarks/office_html_benchmark.py --corpus ./office_docs [--modes direct,via-pdf] [--repeat 1]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# 添加项目根目录到Python路径，以便导入模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.ooxml_html import OOXML_HTML_EXTENSIONS, convert_ooxml_to_html
+from src.utils.office_converters import convert_office_to_pdf, get_office_converter, get_office_converter_names
+from src.utils.pdf_html_engines import get_default_pdf_engine
+from src.utils.temp_artifacts import get_temp_artifact_manager
+
+MODES = ("direct", "via-pdf")
+
+
+def _dir_size(path):
+    """目录中全部文件的总大小（字节）"""
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def _convert_direct(file_path):
+    """直接转换一次，返回 (耗时, 输出大小)"""
+    manager = get_temp_artifact_manager()
+    start = time.perf_counter()
+    _html_filename, output_dir = convert_ooxml_to_html(file_path, use_cache=False)
+    elapsed = time.perf_counter() - start
+    try:
+        return elapsed, _dir_size(output_dir)
+    finally:
+        manager.remove(output_dir)
+
+
+def _convert_via_pdf(file_path, pdf_engine):
+    """经过PDF转换一次，返回 (耗时, 输出大小)"""
+    manager = get_temp_artifact_manager()
+    start = time.perf_counter()
+    pdf_path, pdf_dir = convert_office_to_pdf(file_path, use_cache=False)
+    try:
+        _html_filename, output_dir = pdf_engine.convert(pdf_path, use_cache=False)
+    finally:
+        manager.remove(pdf_dir)
+    elapsed = time.perf_counter() - start
+    try:
+        return elapsed, _dir_size(output_dir)
+    finally:
+        manager.remove(output_dir)
+
+
+def _find_documents(corpus):
+    if os.path.isfile(corpus):
+        return [corpus]
+    documents = []
+    for root, _dirs, files in os.walk(corpus):
+        documents.extend(os.path.join(root, name) for name in files
+                         if os.path.splitext(name)[1].lower() in OOXML_HTML_EXTENSIONS and not name.startswith("~$"))
+    return sorted(documents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Office HTML预览转换对比测试")
+    parser.add_argument("--corpus", required=True, help="DOCX/PPTX 文件或包含它们的目录")
+    parser.add_argument("--modes", default=",".join(MODES), help="逗号分隔的测试项")
+    parser.add_argument("--repeat", type=int, default=1, help="每项重复次数（取中位数）")
+    args = parser.parse_args()
+
+    documents = _find_documents(args.corpus)
+    if not documents:
+        print(f"未在 {args.corpus} 中找到 DOCX/PPTX 文件")
+        return
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    for mode in list(modes):
+        if mode not in MODES:
+            print(f"未知的测试项: {mode}")
+            modes.remove(mode)
+    pdf_engine = None
+    if "via-pdf" in modes:
+        if not get_office_converter_names(available_only=True):
+            print("跳过 via-pdf：没有可用的 Office 转换程序（Microsoft Office 或 LibreOffice）")
+            modes.remove("via-pdf")
+        else:
+            pdf_engine = get_default_pdf_engine()
+            converter = get_office_converter()
+            print(f"via-pdf 使用: {converter.display_name} + {pdf_engine.display_name}")
+            # 预热不计入耗时
+            converter.warm_up()
+    if not modes:
+        print("没有可执行的测试项")
+        return
+
+    print(f"{'文件':<32} {'方式':<8} {'耗时(s)':>8} {'输出(KB)':>10}")
+    totals = {mode: [0.0, 0, 0] for mode in modes}  # 耗时, 大小, 失败数
+    for file_path in documents:
+        label = os.path.basename(file_path)[:32]
+        for mode in modes:
+            runs = []
+            try:
+                for _ in range(max(1, args.repeat)):
+                    if mode == "direct":
+                        runs.append(_convert_direct(file_path))
+                    else:
+                        runs.append(_convert_via_pdf(file_path, pdf_engine))
+            except Exception as e:
+                totals[mode][2] += 1
+                print(f"{label:<32} {mode:<8} 失败: {e}")
+                continue
+            elapsed = statistics.median(run[0] for run in runs)
+            size = runs[0][1]
+            print(f"{label:<32} {mode:<8} {elapsed:>8.2f} {size / 1024:>10.1f}")
+            totals[mode][0] += elapsed
+            totals[mode][1] += size
+
+    print("\n合计")
+    for mode, (elapsed, size, failures) in totals.items():
+        print(f"  {mode:<8} 总耗时: {elapsed:.2f}s  输出: {size / 1024 / 1024:.2f}MB  失败: {failures}")
+    if len(totals) == 2 and totals["direct"][0] > 0:
+        print(f"  直接转换速度为经过PDF的 {totals['via-pdf'][0] / totals['direct'][0]:.1f} 倍")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+PDF转HTML性能测试
+
+对同一个PDF分别使用 1、2、4 … 个并行进程执行 pdf2htmlEX 分段转换，
+输出每种并行度的耗时、加速比和各阶段耗时，并测量转换缓存命中时的加载耗时。
+需要项目根目录下的 pdf2htmlEX-win32-0.13.6 以及 PyMuPDF（用于读取页数）。
+
+用法:
+    python benchmarks/pdf_conversion_benchmark.py --pdf lecture.pdf [--workers 1,2,4,8] [--repeat 1]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import statistics
+
+# 添加项目根目录到Python路径，以便导入模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.pdf2html_converter import PDF2HTMLConverter
+
+
+def _convert_once(converter, pdf_path, workers, use_cache=False):
+    """执行一次转换，返回 (耗时, 输出目录)"""
+    start = time.perf_counter()
+    _html_filename, output_dir = converter.convert_pdf_to_html(
+        pdf_path, use_cache=use_cache, parallel=workers > 1, max_workers=workers)
+    return time.perf_counter() - start, output_dir
+
+
+def bench_scaling(converter, pdf_path, worker_counts, repeat):
+    """测量不同并行度下的转换耗时"""
+    page_count = converter.get_page_count(pdf_path)
+    print(f"PDF: {pdf_path}  页数: {page_count or '未知'}  CPU核心数: {os.cpu_count()}")
+    print(f"{'进程数':>6} {'分段数':>6} {'耗时(s)':>10} {'加速比':>8} {'并行效率':>8}")
+
+    baseline = None
+    for workers in worker_counts:
+        ranges = converter.plan_ranges(pdf_path, workers) if workers > 1 else []
+        timings = []
+        for _ in range(repeat):
+            elapsed, output_dir = _convert_once(converter, pdf_path, workers)
+            timings.append(elapsed)
+            shutil.rmtree(output_dir, ignore_errors=True)
+        elapsed = statistics.median(timings)
+        if baseline is None:
+            baseline = elapsed
+        speedup = baseline / elapsed if elapsed > 0 else 0.0
+        print(f"{workers:>6} {max(1, len(ranges)):>6} {elapsed:>10.2f} {speedup:>8.2f}x {speedup / workers:>8.0%}")
+        # 最后一次转换的各阶段耗时
+        phases = "  ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in converter.last_timings.items())
+        print(f"{'':>6} 阶段: {phases}")
+
+
+def bench_cache(converter, pdf_path, workers):
+    """测量首次转换（写入缓存）与再次打开（命中缓存）的耗时"""
+    cold, output_dir = _convert_once(converter, pdf_path, workers, use_cache=True)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    warm, output_dir = _convert_once(converter, pdf_path, workers, use_cache=True)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    print(f"转换缓存  首次: {cold:.2f}s  命中: {warm * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF转HTML性能测试")
+    parser.add_argument("--pdf", required=True, help="用于测试的PDF文件")
+    parser.add_argument("--workers", default="", help="逗号分隔的并行进程数，默认为 1,2,4,…,CPU核心数")
+    parser.add_argument("--repeat", type=int, default=1, help="每种并行度重复次数（取中位数）")
+    parser.add_argument("--skip-cache", action="store_true", help="跳过缓存命中测试")
+    args = parser.parse_args()
+
+    if args.workers:
+        worker_counts = [int(w) for w in args.workers.split(",") if w.strip()]
+    else:
+        cpu_count = os.cpu_count() or 1
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= cpu_count:
+            worker_counts.append(worker_counts[-1] * 2)
+        if worker_counts[-1] != cpu_count:
+            worker_counts.append(cpu_count)
+
+    converter = PDF2HTMLConverter()
+    bench_scaling(converter, args.pdf, worker_counts, max(1, args.repeat))
+    if not args.skip_cache:
+        bench_cache(converter, args.pdf, worker_counts[-1])
+
+
+if __name__ == "__main__":
+    main()
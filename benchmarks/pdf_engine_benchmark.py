@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+PDF转HTML引擎对比测试
+
+对目录中的每个PDF分别使用各个可用的转换引擎（pdf2htmlEX、PyMuPDF SVG、PyMuPDF HTML）
+执行转换（不使用缓存），输出首页耗时、总耗时、每页耗时以及输出目录大小。
+未安装的引擎会被跳过。
+
+用法:
+    python benchmarks/pdf_engine_benchmark.py --corpus ./pdfs [--engines pdf2htmlex,pymupdf-svg,pymupdf-html] [--repeat 1]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import statistics
+
+# 添加项目根目录到Python路径，以便导入模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.pdf_html_engines import create_pdf_engine, get_pdf_engine_names
+
+# 测试项名称: (引擎注册名称, 构造参数)
+ENGINE_VARIANTS = {
+    "pdf2htmlex": ("pdf2htmlex", {}),
+    "pymupdf-svg": ("pymupdf", {"page_format": "svg"}),
+    "pymupdf-html": ("pymupdf", {"page_format": "html"}),
+}
+
+
+def _dir_size(path):
+    """目录中全部文件的总大小（字节）"""
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def _convert_once(engine, pdf_path):
+    """执行一次转换，返回 (首页耗时, 总耗时, 页数, 输出大小)"""
+    first_page = {}
+
+    def on_first_page(_html_path, _pages_done, page_count):
+        first_page["elapsed"] = time.perf_counter() - start
+        first_page["pages"] = page_count
+
+    start = time.perf_counter()
+    _html_filename, output_dir = engine.convert(pdf_path, on_first_page=on_first_page, use_cache=False)
+    elapsed = time.perf_counter() - start
+    try:
+        size = _dir_size(output_dir)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return first_page.get("elapsed", elapsed), elapsed, first_page.get("pages", 0), size
+
+
+def _find_pdfs(corpus):
+    if os.path.isfile(corpus):
+        return [corpus]
+    pdfs = []
+    for root, _dirs, files in os.walk(corpus):
+        pdfs.extend(os.path.join(root, name) for name in files if name.lower().endswith(".pdf"))
+    return sorted(pdfs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF转HTML引擎对比测试")
+    parser.add_argument("--corpus", required=True, help="PDF文件或包含PDF的目录")
+    parser.add_argument("--engines", default=",".join(ENGINE_VARIANTS), help="逗号分隔的测试项")
+    parser.add_argument("--repeat", type=int, default=1, help="每项重复次数（取中位数）")
+    args = parser.parse_args()
+
+    pdfs = _find_pdfs(args.corpus)
+    if not pdfs:
+        print(f"未在 {args.corpus} 中找到PDF文件")
+        return
+
+    available = set(get_pdf_engine_names(available_only=True))
+    engines = {}
+    for variant in [v.strip() for v in args.engines.split(",") if v.strip()]:
+        if variant not in ENGINE_VARIANTS:
+            print(f"未知的测试项: {variant}")
+            continue
+        engine_name, kwargs = ENGINE_VARIANTS[variant]
+        if engine_name not in available:
+            print(f"跳过 {variant}：引擎不可用")
+            continue
+        engines[variant] = create_pdf_engine(engine_name, **kwargs)
+    if not engines:
+        print("没有可用的转换引擎")
+        return
+
+    print(f"{'PDF':<32} {'引擎':<14} {'页数':>5} {'首页(s)':>8} {'总耗时(s)':>10} {'每页(ms)':>9} {'输出(KB)':>10}")
+    totals = {variant: [0.0, 0, 0, 0] for variant in engines}  # 耗时, 页数, 大小, 失败数
+    for pdf_path in pdfs:
+        label = os.path.basename(pdf_path)[:32]
+        for variant, engine in engines.items():
+            runs = []
+            try:
+                for _ in range(max(1, args.repeat)):
+                    runs.append(_convert_once(engine, pdf_path))
+            except Exception as e:
+                totals[variant][3] += 1
+                print(f"{label:<32} {variant:<14} 失败: {e}")
+                continue
+            first = statistics.median(run[0] for run in runs)
+            elapsed = statistics.median(run[1] for run in runs)
+            pages = runs[0][2]
+            size = runs[0][3]
+            per_page = elapsed / pages * 1000 if pages else 0.0
+            print(f"{label:<32} {variant:<14} {pages:>5} {first:>8.2f} {elapsed:>10.2f} {per_page:>9.1f} {size / 1024:>10.1f}")
+            totals[variant][0] += elapsed
+            totals[variant][1] += pages
+            totals[variant][2] += size
+
+    print("\n合计")
+    for variant, (elapsed, pages, size, failures) in totals.items():
+        per_page = elapsed / pages * 1000 if pages else 0.0
+        print(f"  {variant:<14} 总耗时: {elapsed:.2f}s  页数: {pages}  每页: {per_page:.1f}ms  "
+              f"输出: {size / 1024 / 1024:.2f}MB  失败: {failures}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+翻译流水线性能测试
+
+使用本地模拟引擎（MockTranslationEngine）测量翻译后端的队列吞吐量、
+请求延迟、请求合并效果、全文翻译任务的耗时、翻译记忆的查找延迟以及
+术语表匹配速度，无需网络访问。
+
+用法:
+    python benchmarks/translation_benchmark.py [--requests 200] [--latency 0.01]
+"""
+import os
+import sys
+import time
+import random
+import string
+import argparse
+import statistics
+
+# 添加项目根目录到Python路径，以便导入模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt6.QtCore import QCoreApplication
+
+from src.services.translation_backend import get_translation_backend
+from src.services.translation_engines import create_engine
+from src.services.document_translation_service import DocumentTranslationJob
+from src.services.translation_memory import TranslationMemory
+from src.services.translation_glossary import AhoCorasick
+
+
+def _wait_until(app, predicate, timeout=120.0):
+    """运行事件循环直到条件满足或超时"""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise TimeoutError("等待翻译结果超时")
+        app.processEvents()
+        time.sleep(0.0005)
+
+
+def _percentile(values, pct):
+    """计算百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _submit_batch(app, backend, texts):
+    """提交一批请求并等待全部完成，返回(总耗时, 每个请求的延迟列表, 失败数)"""
+    latencies = []
+    failures = [0]
+    submitted_at = {}
+
+    def make_callback(index):
+        def on_done(success, _result, _raw):
+            latencies.append(time.perf_counter() - submitted_at[index])
+            if not success:
+                failures[0] += 1
+        return on_done
+
+    start = time.perf_counter()
+    for index, text in enumerate(texts):
+        submitted_at[index] = time.perf_counter()
+        backend.translate_async(text, "en", "zh", make_callback(index))
+    _wait_until(app, lambda: len(latencies) >= len(texts))
+    return time.perf_counter() - start, latencies, failures[0]
+
+
+def _report(title, elapsed, count, latencies, extra=""):
+    """输出单项测试结果"""
+    throughput = count / elapsed if elapsed > 0 else 0.0
+    print(f"{title}")
+    print(f"  请求数: {count}  总耗时: {elapsed:.3f}s  吞吐量: {throughput:.1f} req/s")
+    if latencies:
+        print(f"  延迟 p50: {_percentile(latencies, 50) * 1000:.1f}ms  "
+              f"p95: {_percentile(latencies, 95) * 1000:.1f}ms  "
+              f"平均: {statistics.mean(latencies) * 1000:.1f}ms")
+    if extra:
+        print(f"  {extra}")
+
+
+def bench_queue(app, backend, count, latency):
+    """测量队列吞吐量和端到端延迟（全部为不同文本）"""
+    engine = create_engine("mock", latency=latency)
+    backend.set_engine(engine)
+    texts = [f"unique sentence number {i}" for i in range(count)]
+    elapsed, latencies, failures = _submit_batch(app, backend, texts)
+    _report("队列吞吐量（无重复请求）", elapsed, count, latencies,
+            f"引擎调用次数: {engine.call_count}  失败: {failures}")
+
+
+def bench_coalescing(app, backend, count, latency, distinct):
+    """测量相同请求合并后节省的引擎调用"""
+    engine = create_engine("mock", latency=latency)
+    backend.set_engine(engine)
+    texts = [f"repeated sentence {i % distinct}" for i in range(count)]
+    elapsed, latencies, failures = _submit_batch(app, backend, texts)
+    _report(f"请求合并（{distinct} 个不同文本）", elapsed, count, latencies,
+            f"引擎调用次数: {engine.call_count}  节省: {count - engine.call_count}  失败: {failures}")
+
+
+def bench_error_injection(app, backend, count, latency, error_rate, qps_limit):
+    """测量错误注入和频率限制下的失败比例"""
+    engine = create_engine("mock", latency=latency, error_rate=error_rate, qps_limit=qps_limit)
+    backend.set_engine(engine)
+    texts = [f"faulty sentence {i}" for i in range(count)]
+    elapsed, latencies, failures = _submit_batch(app, backend, texts)
+    _report(f"错误注入（错误率 {error_rate:.0%}，QPS限制 {qps_limit or '无'}）", elapsed, count, latencies,
+            f"失败: {failures} ({failures / count:.1%})")
+
+
+def bench_document(app, backend, paragraphs, latency):
+    """测量全文翻译任务的耗时"""
+    engine = create_engine("mock", latency=latency)
+    backend.set_engine(engine)
+    text = "\n\n".join(f"Paragraph {i}. " + "Lorem ipsum dolor sit amet. " * 8 for i in range(paragraphs))
+    job = DocumentTranslationJob(text, "en", "zh")
+    done = []
+    job.finished.connect(lambda cancelled, failed, _err: done.append((cancelled, failed)))
+
+    start = time.perf_counter()
+    job.start()
+    _wait_until(app, lambda: bool(done))
+    elapsed = time.perf_counter() - start
+    _report("全文翻译任务", elapsed, job.total, [],
+            f"文档长度: {len(text)} 字符  引擎调用次数: {engine.call_count}  失败段落: {done[0][1]}")
+
+
+def bench_memory(entries, queries):
+    """测量翻译记忆的写入速度以及精确/近似查找延迟"""
+    # 使用单独的文件名且不写盘，避免影响用户的翻译记忆
+    memory = TranslationMemory(file_name="translation_memory_benchmark.json", autosave_every=entries + 1)
+    rng = random.Random(0)
+    vocabulary = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+                  for _ in range(3000)]
+    sentences = [" ".join(rng.choice(vocabulary) for _ in range(15)) + f" {i}" for i in range(entries)]
+
+    start = time.perf_counter()
+    for sentence in sentences:
+        memory.add(sentence, sentence.upper(), "en", "zh")
+    add_elapsed = time.perf_counter() - start
+
+    exact_latencies = []
+    fuzzy_latencies = []
+    fuzzy_hits = 0
+    for i in range(queries):
+        sentence = sentences[rng.randrange(entries)]
+        t0 = time.perf_counter()
+        memory.lookup(sentence, "en", "zh")
+        exact_latencies.append(time.perf_counter() - t0)
+
+        # 改动少量字符后做近似查找
+        variant = sentence.replace("e", "a", 2) + "."
+        t0 = time.perf_counter()
+        match = memory.lookup(variant, "en", "zh")
+        fuzzy_latencies.append(time.perf_counter() - t0)
+        if match and match.source == sentence:
+            fuzzy_hits += 1
+
+    print("翻译记忆")
+    print(f"  条目数: {entries}  写入耗时: {add_elapsed:.3f}s ({entries / add_elapsed:.0f} 条/s)")
+    print(f"  精确查找 p50: {_percentile(exact_latencies, 50) * 1e6:.1f}us  "
+          f"近似查找 p50: {_percentile(fuzzy_latencies, 50) * 1000:.2f}ms  "
+          f"p95: {_percentile(fuzzy_latencies, 95) * 1000:.2f}ms")
+    print(f"  近似匹配召回率: {fuzzy_hits / queries:.1%}")
+
+
+def bench_glossary(terms, text_chars):
+    """测量 Aho-Corasick 术语匹配的构建与扫描速度"""
+    rng = random.Random(1)
+    patterns = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 12)))
+                for _ in range(terms)]
+    words = []
+    length = 0
+    while length < text_chars:
+        word = rng.choice(patterns) if rng.random() < 0.1 else "".join(
+            rng.choice(string.ascii_lowercase) for _ in range(6))
+        words.append(word)
+        length += len(word) + 1
+    text = " ".join(words)
+
+    start = time.perf_counter()
+    automaton = AhoCorasick(patterns)
+    build_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matches = automaton.find_leftmost_longest(text)
+    scan_elapsed = time.perf_counter() - start
+
+    print("术语表匹配")
+    print(f"  术语数: {terms}  构建耗时: {build_elapsed * 1000:.1f}ms")
+    print(f"  文本长度: {len(text)} 字符  扫描耗时: {scan_elapsed * 1000:.1f}ms  "
+          f"({len(text) / scan_elapsed / 1e6:.2f} M字符/s)  命中: {len(matches)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="翻译流水线性能测试（离线）")
+    parser.add_argument("--requests", type=int, default=200, help="每项测试的请求数")
+    parser.add_argument("--latency", type=float, default=0.005, help="模拟引擎每次请求的延迟（秒）")
+    parser.add_argument("--distinct", type=int, default=20, help="请求合并测试中不同文本的数量")
+    parser.add_argument("--error-rate", type=float, default=0.1, help="错误注入测试的错误率")
+    parser.add_argument("--qps-limit", type=float, default=0.0, help="错误注入测试的QPS限制，0为不限制")
+    parser.add_argument("--paragraphs", type=int, default=100, help="全文翻译测试的段落数")
+    parser.add_argument("--memory-entries", type=int, default=5000, help="翻译记忆测试的条目数")
+    parser.add_argument("--glossary-terms", type=int, default=5000, help="术语表测试的术语数")
+    args = parser.parse_args()
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    backend = get_translation_backend()
+    # 关闭翻译记忆对全文翻译的影响，只测量后端本身
+    DocumentTranslationJob.use_memory = False
+
+    print(f"模拟引擎延迟: {args.latency * 1000:.1f}ms\n")
+    bench_queue(app, backend, args.requests, args.latency)
+    bench_coalescing(app, backend, args.requests, args.latency, args.distinct)
+    bench_error_injection(app, backend, args.requests, args.latency, args.error_rate, args.qps_limit)
+    bench_document(app, backend, args.paragraphs, args.latency)
+    bench_memory(args.memory_entries, min(args.requests, args.memory_entries))
+    for text_chars in (100000, 1000000):
+        bench_glossary(args.glossary_terms, text_chars)
+
+    backend.stop_worker()
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ from PyQt6.QtWidgets import QApplication, QFileDialog # Added QFileDialog
 from PyQt6.QtCore import Qt
 # Now this import should work if src is in sys.path and src/ui/main has __init__.py
 from src.ui.main.main_window import MainWindow # Updated import path
+from src.utils.temp_artifacts import get_temp_artifact_manager
 
 # Corrected indentation for the entire block below
 if __name__ == "__main__":
@@ -21,6 +22,9 @@ if __name__ == "__main__":
 
     app = QApplication(sys.argv)
 
+    # 创建临时产物管理器：清理上次异常退出遗留的临时目录
+    get_temp_artifact_manager()
+
     # Ensure the application style is set early, if applicable
     # For example, if using Fusion style: app.setStyle("Fusion")
 
@@ -1,6 +1,9 @@
 import os
+import threading
+import contextlib
 import requests
 from urllib.parse import urljoin, unquote, urlparse # Keep unquote here
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from bs4 import BeautifulSoup
 from tqdm import tqdm
 import utils # 导入我们自己的 utils 模块
@@ -10,6 +13,57 @@ from classifier import FileClassifier # 导入分类器
 
 log = utils.log # 复用 utils 中的 logger
 
+# 并发下载的默认设置 (可在 config.yaml 中通过 download_workers / max_connections_per_host 修改)
+DEFAULT_WORKERS = 4
+DEFAULT_CONNECTIONS_PER_HOST = 4
+
+# manifest 在多个下载线程间共享，读写签名时加锁
+_manifest_lock = threading.Lock()
+
+# 同一本地路径同时只允许一个线程检查/写入 (不同资源可能解析出同名文件)
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+@contextlib.contextmanager
+def _claim_local_path(local_path):
+    """独占某个本地文件路径，直到 with 块结束"""
+    key = os.path.normcase(os.path.abspath(local_path))
+    with _path_locks_guard:
+        entry = _path_locks.get(key)
+        if entry is None:
+            entry = _path_locks[key] = [threading.Lock(), 0]
+        entry[1] += 1 # 引用计数，最后一个使用者移除该锁
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _path_locks_guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _path_locks[key]
+
+class HostLimiter:
+    """按主机限制同时进行的请求数，避免对同一服务器 (Moodle 或文件 CDN) 打开过多连接"""
+
+    def __init__(self, max_per_host=DEFAULT_CONNECTIONS_PER_HOST):
+        self.max_per_host = max(1, int(max_per_host))
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def slot(self, url):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+        with semaphore:
+            yield
+
+def _host_slot(host_limiter, url):
+    """host_limiter 为 None (串行下载) 时不做限制"""
+    return host_limiter.slot(url) if host_limiter else contextlib.nullcontext()
+
 def _get_filename_from_headers(headers):
     """尝试从 Content-Disposition 响应头中提取文件名"""
     content_disposition = headers.get('Content-Disposition')
@@ -40,12 +94,12 @@ def _get_filename_from_url(url):
     return None
 
 # downloader.py (Updated with manifest check and pre-classification)
-def download_file(session, file_url, base_course_folder, manifest, classifier: FileClassifier): # 添加 classifier, 修改 dest_folder->base_course_folder
+def download_file(session, file_url, base_course_folder, manifest, classifier: FileClassifier,
+                  host_limiter=None, show_progress=True): # 添加 classifier, 修改 dest_folder->base_course_folder
     """
     下载单个文件。先确定分类，然后检查Manifest/大小。
     直接下载到 基础课程目录/分类目录 下。
-    直接下载到 基础课程目录/分类目录 下。
-    下载后更新 manifest。
+    下载后更新 manifest。可在多个线程中同时调用 (见 DownloadPool)。
     Returns:
         str: 'DOWNLOADED', 'SKIPPED', or 'FAILED'
     """
@@ -76,14 +130,13 @@ def download_file(session, file_url, base_course_folder, manifest, classifier: F
 
     # --- 开始网络请求 ---
     remote_size = 0
-    headers = {}
     final_url = file_url # Start with the original URL
-    mode = "wb" # Default write mode
 
     try:
         # 2. 先 HEAD 拿远端文件大小和最终URL/文件名
         log.debug(f"发送 HEAD 请求检查 {file_url}...")
-        head = session.head(file_url, allow_redirects=True, timeout=20)
+        with _host_slot(host_limiter, file_url):
+            head = session.head(file_url, allow_redirects=True, timeout=20)
         head.raise_for_status() # Will raise HTTPError for bad responses (4xx or 5xx)
         remote_size = int(head.headers.get("Content-Length", 0))
         final_url = head.url # Get the URL after any redirects
@@ -119,6 +172,17 @@ def download_file(session, file_url, base_course_folder, manifest, classifier: F
     # --- 确保目标目录存在 (在所有潜在的路径计算之后) ---
     utils.safe_mkdir(final_dest_folder)
 
+    # 检查本地文件、下载、更新 manifest 期间独占目标路径
+    with _claim_local_path(local_path):
+        return _check_and_download(session, final_url, local_path, filename, category, remote_size,
+                                   base_course_folder, manifest, host_limiter, show_progress)
+
+def _check_and_download(session, final_url, local_path, filename, category, remote_size,
+                        base_course_folder, manifest, host_limiter, show_progress):
+    """download_file 的后半部分：与本地文件/Manifest 比较，需要时下载并更新 manifest"""
+    headers = {}
+    mode = "wb" # Default write mode
+
     # 3. 检查本地文件是否存在于 *最终目标路径*
     local_size = 0
     if os.path.exists(local_path):
@@ -146,7 +210,8 @@ def download_file(session, file_url, base_course_folder, manifest, classifier: F
         if manifest_key:
             try:
                  local_sig = checker.extract_text_signature(local_path)
-                 old_sig = manifest.get(manifest_key)
+                 with _manifest_lock:
+                     old_sig = manifest.get(manifest_key)
 
                  if old_sig and local_sig and local_sig == old_sig:
                      log.info(f"[SKIP] '{filename}' 内容签名未变 ({local_sig[:8]}...)，位于 '{category}'。跳过。")
@@ -204,7 +269,8 @@ def download_file(session, file_url, base_course_folder, manifest, classifier: F
     # --- 执行下载 ---
     try:
         log.debug(f"发送 GET 请求下载 {final_url}...")
-        with session.get(final_url, stream=True, headers=headers, timeout=300) as r:
+        with _host_slot(host_limiter, final_url), \
+             session.get(final_url, stream=True, headers=headers, timeout=300) as r:
             r.raise_for_status() # Check for HTTP errors on GET
 
             # Determine total size for progress bar
@@ -229,7 +295,7 @@ def download_file(session, file_url, base_course_folder, manifest, classifier: F
                 pbar_desc = f"{category}/{filename}"[:50] # Limit desc length
                 with open(local_path, mode) as f, tqdm(
                     total=total_for_pbar, unit="B", unit_scale=True,
-                    desc=pbar_desc, initial=0, leave=False
+                    desc=pbar_desc, initial=0, leave=False, disable=not show_progress
                  ) as bar:
                      for chunk in r.iter_content(chunk_size=1024*10): # 10KB chunks
                          if chunk:
@@ -264,7 +330,8 @@ def download_file(session, file_url, base_course_folder, manifest, classifier: F
                       manifest_key = os.path.relpath(local_path, downloads_root).replace('\\', '/')
                       new_sig = checker.extract_text_signature(local_path)
                       if new_sig:
-                          manifest[manifest_key] = new_sig
+                          with _manifest_lock:
+                              manifest[manifest_key] = new_sig
                           log.debug(f"已更新 Manifest: '{manifest_key}' -> {new_sig[:8]}...")
                       else:
                           log.warning(f"下载后无法计算签名 '{filename}' (位于 {category})，Manifest 未更新。")
@@ -290,9 +357,161 @@ def download_file(session, file_url, base_course_folder, manifest, classifier: F
              except OSError: pass
          return 'FAILED' # Indicate failure
 
-def bulk_download(session, res_list, dest_folder_base, manifest, classifier: FileClassifier): # 添加 classifier
+
+def _find_file_url(session, res_page_url, resource_name, host_limiter=None):
+    """访问资源页面，返回真实文件的下载链接，找不到时返回 None"""
+    log.debug(f"访问资源页面 {res_page_url}...")
+    with _host_slot(host_limiter, res_page_url):
+        r = session.get(res_page_url, timeout=30, allow_redirects=True) # Allow redirects
+    r.raise_for_status()
+    final_page_url = r.url
+    log.debug(f"资源页面最终 URL: {final_page_url}")
+
+    # --- 查找下载链接 (Improved Logic) ---
+    soup = BeautifulSoup(r.text, "lxml")
+    link_selectors = [
+        'div.resourcecontent a[href*="pluginfile.php"]',
+        'div.activityinstance a[href*="pluginfile.php"]',
+        'a.realworkaround[href*="pluginfile.php"]', # Might exist in some themes
+        'a[href*="pluginfile.php"]' # General fallback
+    ]
+    file_link_tag = None
+    for selector in link_selectors:
+        file_link_tag = soup.select_one(selector)
+        if file_link_tag: break
+
+    if file_link_tag and file_link_tag.get('href'):
+        href = file_link_tag['href']
+        # Ensure URL is absolute
+        file_url = urljoin(final_page_url, href)
+        log.debug(f"找到 pluginfile 链接: {file_url}")
+        return file_url
+
+    # If no specific link, check if the page itself is the file
+    content_type = r.headers.get('Content-Type', '').split(';')[0].strip().lower()
+    content_disposition = r.headers.get('Content-Disposition', '').lower()
+    is_attachment = 'attachment' in content_disposition
+    is_likely_file = is_attachment or (content_type and content_type not in ['text/html', 'text/plain', ''])
+
+    if is_likely_file:
+         log.info(f"资源页面 {final_page_url} (Type: '{content_type}', Disp: '{content_disposition}') 可能是文件本身。")
+         return final_page_url
+    log.warning(f"在 '{final_page_url}' (Type: '{content_type}') 未找到下载链接。跳过 '{resource_name}'.")
+    return None
+
+def process_resource(session, resource_name, res_page_url, dest_folder_base, manifest, classifier: FileClassifier,
+                     host_limiter=None, show_progress=True):
+    """
+    处理一个资源：解析资源页面中的文件链接并下载。
+    Returns:
+        str: 'DOWNLOADED', 'SKIPPED' or 'FAILED'
+    """
+    try:
+        file_url_to_download = _find_file_url(session, res_page_url, resource_name, host_limiter)
+        if not file_url_to_download:
+            return 'FAILED'
+        log.debug(f"调用 download_file for '{file_url_to_download}'")
+        status = download_file(session, file_url_to_download, dest_folder_base, manifest, classifier,
+                               host_limiter=host_limiter, show_progress=show_progress)
+        return status if status in ('DOWNLOADED', 'SKIPPED') else 'FAILED'
+    except requests.exceptions.Timeout:
+         log.error(f"访问资源页面超时: {res_page_url}")
+    except requests.exceptions.RequestException as e:
+        log.error(f"访问资源页面失败: {res_page_url} - {e}")
+    except Exception as e:
+        log.exception(f"处理资源 '{resource_name}' ({res_page_url}) 时发生未预料错误")
+    return 'FAILED'
+
+def _clone_session(session):
+    """复制登录后的 session (headers/cookies 等)，供单个下载线程使用"""
+    clone = requests.Session()
+    clone.headers.update(session.headers)
+    clone.cookies.update(session.cookies)
+    clone.auth = session.auth
+    clone.proxies.update(session.proxies)
+    clone.verify = session.verify
+    clone.cert = session.cert
+    clone.trust_env = session.trust_env
+    if hasattr(session, 'base_url'):
+        clone.base_url = session.base_url
+    return clone
+
+class DownloadPool:
+    """
+    并发处理资源的线程池。
+
+    requests.Session 不保证线程安全，每个工作线程使用一份 session 的副本；
+    同一主机同时进行的请求数由 HostLimiter 限制。submit 返回的 Future 结果为
+    process_resource 的状态字符串，计数由调用方在主线程中汇总。
+    max_workers 为 1 时按提交顺序逐个处理，并显示单个文件的下载进度条。
+    """
+
+    def __init__(self, session, manifest, classifier: FileClassifier,
+                 max_workers=DEFAULT_WORKERS, max_per_host=DEFAULT_CONNECTIONS_PER_HOST):
+        self.session = session
+        self.manifest = manifest
+        self.classifier = classifier
+        self.host_limiter = HostLimiter(max_per_host)
+        # 只有一个工作线程时进度条不会互相覆盖
+        self.show_progress = int(max_workers) <= 1
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)),
+                                            thread_name_prefix="note-download")
+        self._local = threading.local()
+        self._sessions = []
+        self._futures = set()
+        self._lock = threading.Lock()
+
+    def thread_session(self):
+        """当前线程使用的 session 副本 (其他线程池中的线程也可使用，shutdown 时统一关闭)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = _clone_session(self.session)
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def _run(self, resource_name, res_page_url, dest_folder_base):
+        return process_resource(self.thread_session(), resource_name, res_page_url, dest_folder_base,
+                                self.manifest, self.classifier,
+                                host_limiter=self.host_limiter, show_progress=self.show_progress)
+
+    def submit(self, resource_name, res_page_url, dest_folder_base):
+        """提交一个资源，返回 Future"""
+        future = self._executor.submit(self._run, resource_name, res_page_url, dest_folder_base)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._forget)
+        return future
+
+    def _forget(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def shutdown(self, cancel_pending=False):
+        """等待已开始的任务结束；cancel_pending 为 True 时丢弃尚未开始的任务 (如用户中断)"""
+        if cancel_pending:
+            with self._lock:
+                pending = list(self._futures)
+            for future in pending:
+                future.cancel()
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(cancel_pending=exc_type is not None)
+        return False
+
+def bulk_download(session, res_list, dest_folder_base, manifest, classifier: FileClassifier, # 添加 classifier
+                  max_workers=DEFAULT_WORKERS, max_per_host=DEFAULT_CONNECTIONS_PER_HOST):
     """
     批量下载资源列表中的文件，直接下载到分类后的目录，使用 manifest 跳过。
+    max_workers > 1 时多个资源并发处理。
     Returns:
         tuple: (downloaded_count, skipped_count, failed_count)
     """
@@ -300,81 +519,21 @@ def bulk_download(session, res_list, dest_folder_base, manifest, classifier: Fil
         log.info("批量下载：没有资源需要处理。")
         return 0, 0, 0 # Return zero counts
 
-    log.info(f"开始批量下载/检查 {len(res_list)} 个资源，基础课程目录: {dest_folder_base}")
+    log.info(f"开始批量下载/检查 {len(res_list)} 个资源，基础课程目录: {dest_folder_base} (并发数: {max_workers})")
     # Base folder should already exist from main.py logic
-    actually_downloaded_count = 0
-    skipped_count = 0
-    failed_count = 0
-
-    for i, (resource_name, res_page_url) in enumerate(tqdm(res_list, desc="处理课程资源")):
-        log.debug(f"--- 处理资源 {i+1}/{len(res_list)}: '{resource_name}' ({res_page_url}) ---")
-        file_url_to_download = None # Reset for each resource
-        status = 'FAILED' # Default status if errors occur before download_file is called
-        try:
-            # 1. 尝试获取真实文件下载链接
-            log.debug(f"访问资源页面 {res_page_url}...")
-            r = session.get(res_page_url, timeout=30, allow_redirects=True) # Allow redirects
-            r.raise_for_status()
-            final_page_url = r.url
-            log.debug(f"资源页面最终 URL: {final_page_url}")
-
-            # --- 查找下载链接 (Improved Logic) ---
-            soup = BeautifulSoup(r.text, "lxml")
-            link_selectors = [
-                'div.resourcecontent a[href*="pluginfile.php"]',
-                'div.activityinstance a[href*="pluginfile.php"]',
-                'a.realworkaround[href*="pluginfile.php"]', # Might exist in some themes
-                'a[href*="pluginfile.php"]' # General fallback
-            ]
-            file_link_tag = None
-            for selector in link_selectors:
-                file_link_tag = soup.select_one(selector)
-                if file_link_tag: break
-
-            if file_link_tag and file_link_tag.get('href'):
-                href = file_link_tag['href']
-                # Ensure URL is absolute
-                file_url_to_download = urljoin(final_page_url, href)
-                log.debug(f"找到 pluginfile 链接: {file_url_to_download}")
-            else:
-                # If no specific link, check if the page itself is the file
-                content_type = r.headers.get('Content-Type', '').split(';')[0].strip().lower()
-                content_disposition = r.headers.get('Content-Disposition', '').lower()
-                is_attachment = 'attachment' in content_disposition
-                is_likely_file = is_attachment or (content_type and content_type not in ['text/html', 'text/plain', ''])
-
-                if is_likely_file:
-                     log.info(f"资源页面 {final_page_url} (Type: '{content_type}', Disp: '{content_disposition}') 可能是文件本身。")
-                     file_url_to_download = final_page_url
-                else:
-                     log.warning(f"在 '{final_page_url}' (Type: '{content_type}') 未找到下载链接。跳过 '{resource_name}'.")
-                     failed_count += 1
-                     continue # Skip this resource
-
-            # --- 调用下载函数并记录状态 ---
-            if file_url_to_download:
-                log.debug(f"调用 download_file for '{file_url_to_download}'")
-                status = download_file(session, file_url_to_download, dest_folder_base, manifest, classifier)
-                if status == 'DOWNLOADED':
-                    actually_downloaded_count += 1
-                elif status == 'SKIPPED':
-                    skipped_count += 1
-                else: # FAILED
-                    failed_count += 1
-            # No else needed, handled by continue above
-
-        except requests.exceptions.Timeout:
-             log.error(f"访问资源页面超时: {res_page_url}")
-             failed_count += 1
-        except requests.exceptions.RequestException as e:
-            log.error(f"访问资源页面失败: {res_page_url} - {e}")
-            failed_count += 1
-        except Exception as e:
-            log.exception(f"处理资源 '{resource_name}' ({res_page_url}) 时发生未预料错误")
-            failed_count += 1
-        # Log resource completion regardless of status for clarity, maybe not needed?
-        # log.debug(f"--- 资源 '{resource_name}' 处理结束 (Status: {status}) ---")
-
-
+    counts = {'DOWNLOADED': 0, 'SKIPPED': 0, 'FAILED': 0}
+
+    if max_workers <= 1:
+        for i, (resource_name, res_page_url) in enumerate(tqdm(res_list, desc="处理课程资源")):
+            log.debug(f"--- 处理资源 {i+1}/{len(res_list)}: '{resource_name}' ({res_page_url}) ---")
+            counts[process_resource(session, resource_name, res_page_url, dest_folder_base, manifest, classifier)] += 1
+    else:
+        with DownloadPool(session, manifest, classifier, max_workers, max_per_host) as pool:
+            futures = [pool.submit(resource_name, res_page_url, dest_folder_base)
+                       for resource_name, res_page_url in res_list]
+            for future in tqdm(as_completed(futures), total=len(futures), desc="处理课程资源"):
+                counts[future.result()] += 1
+
+    actually_downloaded_count, skipped_count, failed_count = counts['DOWNLOADED'], counts['SKIPPED'], counts['FAILED']
     log.info(f"本课程批量处理完成。下载: {actually_downloaded_count}, 跳过: {skipped_count}, 失败: {failed_count}.")
     return actually_downloaded_count, skipped_count, failed_count # 返回详细计数
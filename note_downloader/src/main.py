@@ -7,9 +7,13 @@ import os
 import re
 import sys
 import time # 导入 time 模块
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
 
 log = utils.log # 复用 utils 中的 logger
 
+DEFAULT_CRAWL_WORKERS = 4 # 同时抓取的课程页面数 (config.yaml 中的 crawl_workers)
+
 def sanitize_foldername(name):
     """清理字符串，使其成为安全的文件夹名称"""
     # 移除或替换 Windows 和 Linux/Mac 文件系统中非法的字符
@@ -21,6 +25,14 @@ def sanitize_foldername(name):
         name = "untitled_course"
     return name
 
+def _crawl_course(pool, course_url, course_download_folder, cfg):
+    """在抓取线程中创建课程目录并获取资源链接，返回 (资源链接列表, 耗时秒数)"""
+    start = time.time()
+    utils.safe_mkdir(course_download_folder)
+    with pool.host_limiter.slot(course_url):
+        resource_links = crawler.get_resource_links(pool.thread_session(), course_url, cfg) # crawler.py 内有日志
+    return resource_links, time.time() - start
+
 def main():
     """主执行函数"""
     start_time = time.time() # 记录开始时间
@@ -36,6 +48,7 @@ def main():
     total_files_downloaded = 0
     total_files_skipped = 0
     total_files_failed = 0
+    stage_timings = {} # 各阶段耗时，运行结束时输出
 
     try:
         # === 步骤 1: 加载配置 ===
@@ -61,19 +74,24 @@ def main():
         rules_file_path = os.path.join("config", "classify_rules.yaml")
         classifier_instance = FileClassifier(rules_path=rules_file_path)
         # FileClassifier 的 __init__ 会处理规则文件不存在或错误的情况
+        stage_timings["准备 (配置/清单/分类规则)"] = f"{time.time() - start_time:.2f} 秒"
 
         # === 步骤 2: 登录并获取 session === (保持不变)
         log.info("[步骤 2/5] 登录 Moodle 并获取会话...")
+        login_start_time = time.time()
         try:
             session = utils.get_session(cfg)
+            stage_timings["登录"] = f"{time.time() - login_start_time:.2f} 秒"
         except Exception as login_err:
             log.critical(f"登录 Moodle 失败，无法继续: {login_err}")
             sys.exit(1)
 
         # === 步骤 3: 获取课程列表 ===
         log.info("[步骤 3/5] 获取课程列表...")
+        course_list_start_time = time.time()
         try:
             courses = crawler.get_course_list(session, cfg) # crawler.py 内部已有错误处理和日志
+            stage_timings["获取课程列表"] = f"{time.time() - course_list_start_time:.2f} 秒"
             total_courses_found = len(courses)
             if not courses:
                 log.warning("未能从 Moodle 获取到任何课程列表。请检查登录状态或 Moodle 页面结构。")
@@ -89,6 +107,10 @@ def main():
         # 允许在 config.yaml 配置下载目录，默认为 'downloads'
         download_dir_name = cfg.get("download_directory", "downloads")
         base_download_dir = os.path.abspath(download_dir_name)
+        # 并发下载设置
+        crawl_workers = max(1, int(cfg.get("crawl_workers", DEFAULT_CRAWL_WORKERS)))
+        download_workers = int(cfg.get("download_workers", downloader.DEFAULT_WORKERS))
+        connections_per_host = int(cfg.get("max_connections_per_host", downloader.DEFAULT_CONNECTIONS_PER_HOST))
         log.info(f"[步骤 4/5] 检查/创建基础下载目录: {base_download_dir}")
         try:
              utils.safe_mkdir(base_download_dir)
@@ -97,67 +119,86 @@ def main():
              sys.exit(1)
 
 
-        # === 步骤 5: 遍历课程，下载和分类资源 ===
+        # === 步骤 5: 并发抓取课程页面，发现的资源立即交给下载线程池 ===
         if total_courses_found > 0:
-            log.info(f"[步骤 5/5] 开始遍历 {total_courses_found} 门课程进行处理...")
-            for i, (course_name, course_url) in enumerate(courses):
-                course_start_time = time.time()
-                log.info("-" * 40)
-                log.info(f"-> 开始处理课程 [{i+1}/{total_courses_found}]: '{course_name}'")
-                log.debug(f"   课程 URL: {course_url}")
-                course_failed_flag = False # 标记当前课程处理是否失败
-
+            log.info(f"[步骤 5/5] 开始处理 {total_courses_found} 门课程 "
+                     f"(抓取线程: {crawl_workers}, 下载线程: {download_workers})...")
+            course_counts = {} # 课程序号: [下载, 跳过, 失败]
+            download_futures = {} # Future: 课程序号
+            crawl_busy_seconds = 0.0 # 各课程抓取耗时之和
+            download_start_time = None
+            step5_start_time = time.time()
+            with downloader.DownloadPool(session, manifest, classifier_instance,
+                                         download_workers, connections_per_host) as pool:
+                crawl_executor = ThreadPoolExecutor(max_workers=crawl_workers, thread_name_prefix="note-crawl")
+                crawl_futures = {}
                 try:
-                    # --- 5.1 创建课程目录 ---
-                    safe_course_name = sanitize_foldername(course_name)
-                    course_download_folder = os.path.join(base_download_dir, safe_course_name)
-                    log.debug(f"   创建课程子目录: {course_download_folder}")
-                    utils.safe_mkdir(course_download_folder)
-
-                    # --- 5.2 获取资源链接 ---
-                    log.info(f"   [{i+1}/{total_courses_found}] 获取 '{course_name}' 的资源链接...")
-                    resource_links = crawler.get_resource_links(session, course_url, cfg) # crawler.py 内有日志
-                    if not resource_links:
-                        log.info(f"   [{i+1}/{total_courses_found}] 课程 '{course_name}' 中未找到有效资源链接，跳过下载和分类。")
-                        # 即使没有资源也算处理成功（指课程本身处理流程没出错）
+                    for i, (course_name, course_url) in enumerate(courses):
+                        course_download_folder = os.path.join(base_download_dir, sanitize_foldername(course_name))
+                        future = crawl_executor.submit(_crawl_course, pool, course_url, course_download_folder, cfg)
+                        crawl_futures[future] = (i, course_name, course_download_folder)
 
+                    # --- 5.1 每抓取完一门课程，就把它的资源提交给下载线程池 ---
+                    # (单线程下载时按课程顺序提交，保证文件逐个按顺序处理)
+                    crawl_order = list(crawl_futures) if pool.show_progress else as_completed(crawl_futures)
+                    for future in crawl_order:
+                        i, course_name, course_download_folder = crawl_futures[future]
+                        try:
+                            resource_links, crawl_seconds = future.result()
+                        except Exception:
+                            log.exception(f"   !!! 抓取课程 '{course_name}' 时发生错误 !!!")
+                            processed_courses_failed += 1
+                            continue
+                        crawl_busy_seconds += crawl_seconds
+                        course_counts[i] = [0, 0, 0]
+                        if not resource_links:
+                            log.info(f"   [{i+1}/{total_courses_found}] 课程 '{course_name}' 中未找到有效资源链接 "
+                                     f"(抓取耗时: {crawl_seconds:.2f} 秒)。")
+                            continue
+                        log.info(f"   [{i+1}/{total_courses_found}] 课程 '{course_name}' 找到 {len(resource_links)} 个资源链接 "
+                                 f"(抓取耗时: {crawl_seconds:.2f} 秒)，加入下载队列。")
+                        if download_start_time is None:
+                            download_start_time = time.time()
+                        for resource_name, res_page_url in resource_links:
+                            download_futures[pool.submit(resource_name, res_page_url, course_download_folder)] = i
+                    crawl_end_time = time.time()
+                    stage_timings["课程页面抓取"] = (f"{crawl_end_time - step5_start_time:.2f} 秒 "
+                                                  f"(各课程累计 {crawl_busy_seconds:.2f} 秒)")
+                finally:
+                    # 用户中断时丢弃尚未开始的抓取
+                    for future in crawl_futures:
+                        future.cancel()
+                    crawl_executor.shutdown(wait=True)
+
+                # --- 5.2 汇总下载结果 ---
+                # 单线程下载时已显示单个文件的进度条，不再显示总进度条
+                for future in tqdm(as_completed(download_futures), total=len(download_futures), desc="处理课程资源",
+                                   disable=pool.show_progress):
+                    counts = course_counts[download_futures[future]]
+                    status = future.result()
+                    if status == 'DOWNLOADED':
+                        counts[0] += 1
+                    elif status == 'SKIPPED':
+                        counts[1] += 1
                     else:
-                        log.info(f"   [{i+1}/{total_courses_found}] 找到 {len(resource_links)} 个资源链接，准备下载...")
-
-                        # --- 5.3 批量下载 (现在需要传递 manifest) ---
-                        log.info(f"   [{i+1}/{total_courses_found}] 开始批量下载/检查资源到: {course_download_folder}")
-                        # downloader.py 内的 download_file 现在会处理分类和 Manifest 更新
-                        # 将 classifier_instance 传递给 bulk_download 并接收返回的计数
-                        downloaded, skipped, failed = downloader.bulk_download(
-                            session,
-                            resource_links,
-                            course_download_folder,
-                            manifest,
-                            classifier_instance
-                        )
-                        # 累加到总计数
-                        total_files_downloaded += downloaded
-                        total_files_skipped += skipped
-                        total_files_failed += failed
-
-                        # --- 移除下载后的分类步骤 --- (仍然移除)
-                        # 分类现在在 download_file 内部完成
-
-                except Exception as course_err:
-                    # 捕获处理单个课程（获取链接、下载、分类）时发生的任何错误
-                    log.exception(f"   !!! 处理课程 '{course_name}' 时发生错误 !!!")
-                    course_failed_flag = True # 标记此课程失败
-
-                # --- 单个课程处理结束日志 ---
-                course_end_time = time.time()
-                course_duration = course_end_time - course_start_time
-                if not course_failed_flag:
-                     processed_courses_success += 1
-                     log.info(f"<- 课程 [{i+1}/{total_courses_found}] '{course_name}' 处理成功 (耗时: {course_duration:.2f} 秒)")
-                else:
-                     processed_courses_failed += 1
-                     log.error(f"<- 课程 [{i+1}/{total_courses_found}] '{course_name}' 处理失败 (耗时: {course_duration:.2f} 秒)")
-                log.info("-" * 40)
+                        counts[2] += 1
+                if download_start_time is not None:
+                    download_end_time = time.time()
+                    overlap = max(0.0, crawl_end_time - download_start_time)
+                    stage_timings["资源下载"] = (f"{download_end_time - download_start_time:.2f} 秒 "
+                                              f"(其中与抓取重叠 {overlap:.2f} 秒)")
+
+            for i, (course_name, _course_url) in enumerate(courses):
+                if i not in course_counts:
+                    log.error(f"<- 课程 [{i+1}/{total_courses_found}] '{course_name}' 处理失败")
+                    continue
+                downloaded, skipped, failed = course_counts[i]
+                processed_courses_success += 1
+                total_files_downloaded += downloaded
+                total_files_skipped += skipped
+                total_files_failed += failed
+                log.info(f"<- 课程 [{i+1}/{total_courses_found}] '{course_name}' 处理完成。"
+                         f"下载: {downloaded}, 跳过: {skipped}, 失败: {failed}")
         else:
              log.info("[步骤 5/5] 未找到课程，跳过课程处理步骤。")
 
@@ -178,6 +219,10 @@ def main():
         log.info("=" * 50)
         log.info("--- Note Downloader 运行结束 ---")
         log.info(f"总耗时: {duration:.2f} 秒")
+        if stage_timings:
+            log.info("--- 各阶段耗时 ---")
+            for stage_name, stage_time in stage_timings.items():
+                log.info(f"{stage_name}: {stage_time}")
         log.info(f"共找到课程数: {total_courses_found}")
         log.info(f"成功处理课程数: {processed_courses_success}")
         log.info(f"处理失败课程数: {processed_courses_failed}")
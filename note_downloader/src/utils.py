@@ -165,6 +165,6 @@ def safe_mkdir(path):
     """安全地创建目录（如果不存在）"""
     if not os.path.exists(path):
         log.info(f"创建目录：{path}")
-        os.makedirs(path)
+        os.makedirs(path, exist_ok=True) # 多个下载线程可能同时创建同一目录
     else:
         log.debug(f"目录已存在：{path}")
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+转换任务队列 - 共享的后台转换服务
+
+PDF转HTML、Office文件预览等耗时转换统一提交到这里，由固定数量的工作线程按优先级执行，
+全部任务共享一组进程名额（同时运行的外部转换进程总数不超过设定值）。
+当前可见标签页的任务优先执行；任务可以随时取消，取消时结束其正在运行的子进程。
+
+信号在工作线程中发出，连接到主线程对象的槽时由Qt自动排队到主线程执行。
+"""
+import os
+import time
+import heapq
+import itertools
+import threading
+from typing import Callable, List, Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from ..utils.job_control import JobControl, JobCancelledError
+
+# 优先级：数值越小越先执行
+PRIORITY_VISIBLE = 0      # 当前可见标签页（或用户正在等待）的任务
+PRIORITY_NORMAL = 10
+PRIORITY_BACKGROUND = 20  # 预取、预热等后台任务
+
+# 任务状态
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_FINISHED = "finished"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+JOB_STATE_NAMES = {
+    JOB_QUEUED: "排队中",
+    JOB_RUNNING: "运行中",
+    JOB_FINISHED: "已完成",
+    JOB_FAILED: "失败",
+    JOB_CANCELLED: "已取消",
+}
+
+
+class ConversionJob:
+    """队列中的一个转换任务（属性只由队列修改，界面只读）"""
+
+    def __init__(self, job_id: int, title: str, func: Callable, priority: int, owner, control: JobControl):
+        self.id = job_id
+        self.title = title
+        self.func = func
+        # 提交时的优先级；可见标签页提升的优先级在标签页切走后恢复为它
+        self.base_priority = priority
+        self.priority = priority
+        self.owner = owner
+        self.control = control
+        self.state = JOB_QUEUED
+        self.done = 0
+        self.total = 0
+        self.message = ""
+        self.submitted_at = time.time()
+        self.started_at = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.state in (JOB_QUEUED, JOB_RUNNING)
+
+
+class ConversionJobQueue(QObject):
+    """按优先级执行转换任务的共享队列"""
+
+    job_added = pyqtSignal(int)                   # 任务ID
+    job_started = pyqtSignal(int)                 # 任务ID
+    job_progress = pyqtSignal(int, int, int, str) # 任务ID, 已完成, 总数, 说明
+    job_finished = pyqtSignal(int, object)        # 任务ID, 任务函数的返回值
+    job_failed = pyqtSignal(int, str)             # 任务ID, 错误信息
+    job_cancelled = pyqtSignal(int)               # 任务ID
+    jobs_changed = pyqtSignal()                   # 任务列表或优先级发生变化
+
+    def __init__(self, max_concurrent_jobs: Optional[int] = None, max_processes: Optional[int] = None,
+                 parent=None):
+        """
+        初始化任务队列
+
+        Args:
+            max_concurrent_jobs: 同时执行的任务数，默认为CPU核心数的一半（至少1个，最多4个）
+            max_processes: 全部任务同时运行的外部进程总数，默认为CPU核心数
+        """
+        super().__init__(parent)
+        cpu_count = os.cpu_count() or 1
+        self.max_concurrent_jobs = max_concurrent_jobs or max(1, min(4, cpu_count // 2))
+        self.max_processes = max_processes or cpu_count
+        self.process_slots = threading.BoundedSemaphore(self.max_processes)
+
+        self._condition = threading.Condition()
+        self._heap = []   # [优先级, 提交序号, 任务]，优先级变化后重新建堆
+        self._jobs = {}   # 任务ID: 未结束的任务
+        self._job_ids = itertools.count(1)
+        self._sequence = itertools.count()
+        self._visible_owner = None
+        self._is_running = True
+        self._workers = []
+        for index in range(self.max_concurrent_jobs):
+            worker = threading.Thread(target=self._worker_loop, name=f"ConversionJobWorker-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    # ---- 提交与查询 ----
+    def submit(self, title: str, func: Callable, priority: int = PRIORITY_NORMAL, owner=None) -> int:
+        """
+        提交任务，返回任务ID
+
+        Args:
+            title: 显示在任务面板中的名称
+            func: 在工作线程中调用 func(job_control)，返回值通过 job_finished 发出；
+                应把 job_control 传给支持取消的转换函数
+            priority: 优先级，数值越小越先执行
+            owner: 任务所属的对象（通常是标签页控件），用于按标签页提升优先级和取消
+        """
+        with self._condition:
+            job_id = next(self._job_ids)
+            control = JobControl(self.process_slots,
+                                 lambda done, total, message, jid=job_id: self._on_progress(jid, done, total, message))
+            job = ConversionJob(job_id, title, func, priority, owner, control)
+            if owner is not None and owner is self._visible_owner:
+                job.priority = min(priority, PRIORITY_VISIBLE)
+            self._jobs[job_id] = job
+            heapq.heappush(self._heap, [job.priority, next(self._sequence), job])
+            self._condition.notify()
+        self.job_added.emit(job_id)
+        self.jobs_changed.emit()
+        return job_id
+
+    def get_job(self, job_id: int) -> Optional[ConversionJob]:
+        with self._condition:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[ConversionJob]:
+        """未结束的任务：运行中的在前，其余按执行顺序"""
+        with self._condition:
+            running = sorted((job for job in self._jobs.values() if job.state == JOB_RUNNING),
+                             key=lambda job: job.started_at)
+            queued = [entry[2] for entry in sorted(self._heap, key=lambda entry: entry[:2])]
+        return running + queued
+
+    def is_active(self, job_id: int) -> bool:
+        job = self.get_job(job_id)
+        return job is not None and job.is_active
+
+    # ---- 取消 ----
+    def cancel(self, job_id: int) -> bool:
+        """取消任务：排队中的直接移除，运行中的结束其子进程，返回任务是否存在"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            job.control.cancel()
+            if job.state != JOB_QUEUED:
+                # 运行中的任务由工作线程在任务函数返回后发出 job_cancelled
+                return True
+            self._heap = [entry for entry in self._heap if entry[2] is not job]
+            heapq.heapify(self._heap)
+            job.state = JOB_CANCELLED
+            del self._jobs[job_id]
+        self.job_cancelled.emit(job_id)
+        self.jobs_changed.emit()
+        return True
+
+    def cancel_owner(self, owner) -> int:
+        """取消属于 owner 的全部任务（标签页关闭时调用），返回取消的任务数"""
+        with self._condition:
+            job_ids = [job.id for job in self._jobs.values() if job.owner is owner]
+        for job_id in job_ids:
+            self.cancel(job_id)
+        return len(job_ids)
+
+    def cancel_all(self):
+        with self._condition:
+            job_ids = list(self._jobs)
+        for job_id in job_ids:
+            self.cancel(job_id)
+
+    # ---- 优先级 ----
+    def set_owner(self, job_id: int, owner):
+        """更改任务所属的对象（例如转换开始后才创建的标签页）"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.owner = owner
+            self._update_priority(job)
+        self.jobs_changed.emit()
+
+    def set_priority(self, job_id: int, priority: int):
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.base_priority = priority
+            self._update_priority(job)
+        self.jobs_changed.emit()
+
+    def set_visible_owner(self, owner):
+        """设置当前可见的标签页：其任务提升为最高优先级，其余任务恢复提交时的优先级"""
+        with self._condition:
+            if owner is self._visible_owner:
+                return
+            self._visible_owner = owner
+            for job in self._jobs.values():
+                self._update_priority(job)
+        self.jobs_changed.emit()
+
+    def _update_priority(self, job: ConversionJob):
+        """按 owner 是否可见重新计算任务的优先级（需持有锁）"""
+        visible = job.owner is not None and job.owner is self._visible_owner
+        job.priority = min(job.base_priority, PRIORITY_VISIBLE) if visible else job.base_priority
+        if job.state == JOB_QUEUED:
+            for entry in self._heap:
+                if entry[2] is job:
+                    entry[0] = job.priority
+            heapq.heapify(self._heap)
+
+    # ---- 执行 ----
+    def _on_progress(self, job_id: int, done: int, total: int, message: str):
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.done, job.total, job.message = done, total, message
+        self.job_progress.emit(job_id, done, total, message)
+
+    def _worker_loop(self):
+        while True:
+            with self._condition:
+                while self._is_running and not self._heap:
+                    self._condition.wait()
+                if not self._is_running:
+                    return
+                job = heapq.heappop(self._heap)[2]
+                job.state = JOB_RUNNING
+                job.started_at = time.time()
+            self.job_started.emit(job.id)
+            self.jobs_changed.emit()
+
+            try:
+                result = job.func(job.control)
+            except JobCancelledError:
+                self._finish(job, JOB_CANCELLED)
+                self.job_cancelled.emit(job.id)
+            except Exception as e:
+                print(f"转换任务 '{job.title}' 失败: {e}")
+                self._finish(job, JOB_FAILED)
+                self.job_failed.emit(job.id, str(e))
+            else:
+                # 取消请求到达时任务已经完成的，仍按完成处理，由接收者决定是否使用结果
+                self._finish(job, JOB_FINISHED)
+                self.job_finished.emit(job.id, result)
+            self.jobs_changed.emit()
+
+    def _finish(self, job: ConversionJob, state: str):
+        with self._condition:
+            job.state = state
+            self._jobs.pop(job.id, None)
+            # 释放对任务函数及其闭包（可能引用界面对象）的引用
+            job.func = None
+
+    def shutdown(self, wait: float = 2.0):
+        """取消全部任务并停止工作线程（程序退出时调用）"""
+        self.cancel_all()
+        with self._condition:
+            self._is_running = False
+            self._condition.notify_all()
+        deadline = time.time() + wait
+        for worker in self._workers:
+            worker.join(timeout=max(0.0, deadline - time.time()))
+
+
+# 全局单例实例
+_conversion_job_queue_instance = None
+
+
+def get_conversion_job_queue() -> ConversionJobQueue:
+    """获取转换任务队列单例实例（在主线程中首次调用）"""
+    global _conversion_job_queue_instance
+    if _conversion_job_queue_instance is None:
+        _conversion_job_queue_instance = ConversionJobQueue()
+    return _conversion_job_queue_instance
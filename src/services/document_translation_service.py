@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+全文翻译服务 - 将整篇文档按段落切分后流式提交到翻译后端
+"""
+import re
+import time
+from typing import List, Tuple, Optional
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from .translation_backend import get_translation_backend
+from .translation_memory import get_translation_memory
+from .translation_glossary import get_glossary
+
+
+def split_into_segments(text: str, max_chars: int = 1800) -> List[Tuple[str, str]]:
+    """
+    将文本按段落切分为翻译片段
+
+    段落以空行分隔；超过 max_chars 的段落再按行、按句子切分，
+    以满足百度翻译API单次请求的长度限制。
+
+    Args:
+        text: 要切分的文本
+        max_chars: 单个片段的最大字符数
+
+    Returns:
+        [(片段文本, 片段后的分隔符)] 列表，按顺序拼接即可还原原文
+    """
+    segments = []
+    pos = 0
+    for match in re.finditer(r'\n\s*\n', text):
+        segments.extend(_split_long_paragraph(text[pos:match.start()], match.group(0), max_chars))
+        pos = match.end()
+    if pos < len(text):
+        segments.extend(_split_long_paragraph(text[pos:], "", max_chars))
+    return segments
+
+
+def _split_long_paragraph(paragraph: str, separator: str, max_chars: int) -> List[Tuple[str, str]]:
+    """将过长的段落按行或句子边界切分"""
+    if len(paragraph) <= max_chars:
+        return [(paragraph, separator)]
+
+    pieces = []
+    # 按行切分，保留行尾换行符；单行仍然过长时按句末标点切分
+    for line in paragraph.splitlines(keepends=True):
+        if len(line) <= max_chars:
+            pieces.append(line)
+            continue
+        for sentence in re.split(r'(?<=[。！？.!?])', line):
+            while len(sentence) > max_chars:
+                pieces.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            if sentence:
+                pieces.append(sentence)
+
+    # 合并相邻的小片段，减少请求次数
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current:
+        chunks.append(current)
+
+    result = []
+    for chunk in chunks[:-1]:
+        # 片段末尾的换行作为分隔符保留，不送入翻译
+        stripped = chunk.rstrip("\n")
+        result.append((stripped, chunk[len(stripped):]))
+    last = chunks[-1]
+    stripped = last.rstrip("\n")
+    result.append((stripped, last[len(stripped):] + separator))
+    return result
+
+
+class DocumentTranslationJob(QObject):
+    """
+    全文翻译任务
+
+    片段以有限的并发窗口依次提交给翻译后端，完成的片段按原文顺序通过
+    segment_ready 信号输出，便于界面增量追加译文。
+    """
+
+    # 片段序号, 译文(含分隔符)
+    segment_ready = pyqtSignal(int, str)
+    # 已完成片段数, 片段总数, 预计剩余秒数(未知时为 -1)
+    progress_changed = pyqtSignal(int, int, float)
+    # 是否被取消, 失败片段数, 首个错误信息
+    finished = pyqtSignal(bool, int, str)
+
+    # 是否使用翻译记忆复用相同段落的译文
+    use_memory = True
+
+    def __init__(self, text: str, from_lang: str = "auto", to_lang: str = "zh",
+                 max_in_flight: int = 2, parent=None):
+        """
+        初始化全文翻译任务
+
+        Args:
+            text: 要翻译的全文
+            from_lang: 源语言代码
+            to_lang: 目标语言代码
+            max_in_flight: 同时提交到后端的最大片段数
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.backend = get_translation_backend()
+        self.memory = get_translation_memory()
+        self.glossary = get_glossary()
+        self.from_lang = from_lang
+        self.to_lang = to_lang
+        self.max_in_flight = max(1, max_in_flight)
+
+        self.segments = split_into_segments(text)
+        self.results: List[Optional[str]] = [None] * len(self.segments)
+        self.total_chars = sum(len(seg) for seg, _ in self.segments) or 1
+
+        self._next_submit = 0
+        self._next_emit = 0
+        self._in_flight = {}  # request_id: 片段序号
+        self._term_replacements = {}  # 片段序号: 术语译法列表
+        self._terms_keys = {}  # 片段序号: 术语指纹（写入翻译记忆时使用）
+        self._done_count = 0
+        self._done_chars = 0
+        self._failed_count = 0
+        self._first_error = ""
+        self._started_at = 0.0
+        self._running = False
+
+    @property
+    def total(self) -> int:
+        """片段总数"""
+        return len(self.segments)
+
+    def is_running(self) -> bool:
+        """任务是否正在进行"""
+        return self._running
+
+    def start(self):
+        """开始翻译"""
+        if self._running:
+            return
+        self._running = True
+        self._started_at = time.monotonic()
+        self.progress_changed.emit(0, self.total, -1)
+        self._fill_window()
+        self._check_finished()
+
+    def cancel(self):
+        """取消任务，丢弃尚未返回的请求"""
+        if not self._running:
+            return
+        self._running = False
+        for request_id in list(self._in_flight):
+            self.backend.cancel_request(request_id)
+        self._in_flight.clear()
+        if self.use_memory:
+            self.memory.flush()
+        self.finished.emit(True, self._failed_count, self._first_error)
+
+    def _fill_window(self):
+        """在并发窗口内提交后续片段"""
+        while self._running and len(self._in_flight) < self.max_in_flight and self._next_submit < self.total:
+            index = self._next_submit
+            self._next_submit += 1
+            segment_text = self.segments[index][0]
+
+            # 空白片段无需翻译，直接原样输出
+            if not segment_text.strip():
+                self._complete(index, segment_text, len(segment_text))
+                continue
+
+            # 翻译记忆中的相同段落（术语译法未修改时）直接复用
+            terms_key = self.glossary.terms_key(segment_text, self.to_lang)
+            match = None
+            if self.use_memory:
+                match = self.memory.lookup(segment_text, self.from_lang, self.to_lang, exact_only=True,
+                                           terms_key=terms_key)
+            if match and match.is_exact:
+                self._complete(index, match.target, len(segment_text))
+                continue
+
+            # 术语替换为占位符后再送去翻译
+            request_text, replacements = self.glossary.protect(segment_text, self.to_lang)
+            if replacements:
+                self._term_replacements[index] = replacements
+            self._terms_keys[index] = terms_key
+
+            request_id = self.backend.translate_async(
+                request_text, self.from_lang, self.to_lang,
+                lambda success, result, _raw, i=index: self._on_segment_translated(i, success, result)
+            )
+            if request_id:
+                self._in_flight[request_id] = index
+
+    def _on_segment_translated(self, index: int, success: bool, result: str):
+        """单个片段翻译完成的回调（在主线程中执行）"""
+        if not self._running:
+            return
+        for request_id, pending_index in list(self._in_flight.items()):
+            if pending_index == index:
+                del self._in_flight[request_id]
+                break
+
+        segment_text = self.segments[index][0]
+        replacements = self._term_replacements.pop(index, None)
+        terms_key = self._terms_keys.pop(index, "")
+        if success:
+            if replacements:
+                result = self.glossary.restore(result, replacements)
+            if self.use_memory:
+                self.memory.add(segment_text, result, self.from_lang, self.to_lang, terms_key=terms_key)
+        else:
+            # 失败的片段保留原文，保证输出结构完整
+            self._failed_count += 1
+            if not self._first_error:
+                self._first_error = result
+            result = segment_text
+        self._complete(index, result, len(segment_text))
+
+        # 凭据缺失等情况下回调会在 translate_async 内同步触发，直接补充窗口会逐段递归，
+        # 因此留到事件循环中再提交后续片段
+        QTimer.singleShot(0, self._refill_window)
+
+    def _refill_window(self):
+        """提交后续片段，并检查任务是否已全部完成"""
+        self._fill_window()
+        self._check_finished()
+
+    def _complete(self, index: int, translated: str, source_chars: int):
+        """记录片段结果，并按顺序输出已连续完成的片段"""
+        self.results[index] = translated
+        self._done_count += 1
+        self._done_chars += source_chars
+
+        while self._next_emit < self.total and self.results[self._next_emit] is not None:
+            separator = self.segments[self._next_emit][1]
+            self.segment_ready.emit(self._next_emit, self.results[self._next_emit] + separator)
+            self._next_emit += 1
+
+        self.progress_changed.emit(self._done_count, self.total, self._estimate_remaining())
+
+    def _estimate_remaining(self) -> float:
+        """按已翻译字符数估算剩余时间"""
+        elapsed = time.monotonic() - self._started_at
+        if self._done_chars <= 0 or elapsed <= 0:
+            return -1
+        remaining_chars = self.total_chars - self._done_chars
+        return max(0.0, elapsed * remaining_chars / self._done_chars)
+
+    def _check_finished(self):
+        """所有片段完成后发出结束信号"""
+        if self._running and self._done_count >= self.total and not self._in_flight:
+            self._running = False
+            if self.use_memory:
+                self.memory.flush()
+            self.finished.emit(False, self._failed_count, self._first_error)
+
+    def translated_text(self) -> str:
+        """获取当前已完成部分拼接后的译文"""
+        parts = []
+        for (segment_text, separator), translated in zip(self.segments, self.results):
+            if translated is None:
+                break
+            parts.append(translated + separator)
+        return "".join(parts)
+
+
+def format_eta(seconds: float) -> str:
+    """将剩余秒数格式化为界面显示文本"""
+    if seconds < 0:
+        return "估算中..."
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"约 {seconds} 秒"
+    minutes, seconds = divmod(seconds, 60)
+    return f"约 {minutes} 分 {seconds} 秒"
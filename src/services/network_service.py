@@ -1,93 +1,540 @@
+import os
+import re
+import codecs
 import traceback
-from PyQt6.QtCore import QObject, pyqtSignal, QUrl
-from PyQt6.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply, QNetworkRequest # Added QNetworkRequest again for RedirectPolicy
+from collections import deque
+from PyQt6.QtCore import QObject, pyqtSignal, QUrl, QTimer
+from PyQt6.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply, QNetworkRequest, QNetworkDiskCache # Added QNetworkRequest again for RedirectPolicy
+
+from .page_snapshot import SnapshotStore, PageSnapshotJob
+
+
+def get_http_cache_dir() -> str:
+    """HTTP磁盘缓存目录，位于项目根目录的 data/http_cache"""
+    project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+    cache_dir = os.path.join(project_root, "data", "http_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+# Byte order marks take precedence over any declared charset
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+_HEADER_CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+# Matches both <meta charset="..."> and <meta http-equiv="Content-Type" content="...; charset=...">
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+# Only the start of the document is scanned for <meta charset>, like browsers do
+META_SCAN_BYTES = 4096
+# Legacy labels mapped to the superset encodings browsers actually use
+_CHARSET_ALIASES = {"gb2312": "gb18030", "gbk": "gb18030", "iso-8859-1": "windows-1252",
+                    "latin1": "windows-1252", "ascii": "windows-1252", "us-ascii": "windows-1252"}
+
+
+def _normalize_charset(label) -> str:
+    """Return a Python codec name for a charset label, or '' if it is unknown"""
+    if not label:
+        return ""
+    label = label.strip().strip('"\'').lower()
+    label = _CHARSET_ALIASES.get(label, label)
+    try:
+        return codecs.lookup(label).name
+    except LookupError:
+        return ""
+
+
+def detect_charset(content_type: str, head: bytes):
+    """
+    检测响应正文的字符集：BOM 优先，其次是 Content-Type 头，最后是文档开头的 <meta charset>
+
+    Returns:
+        (编码名称, 来源)，来源为 "bom"、"header"、"meta"，均未声明时返回 ("", "")
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            # utf-32-le BOM starts with the utf-16-le BOM, so the longer ones are checked first
+            return encoding, "bom"
+    if content_type:
+        match = _HEADER_CHARSET_RE.search(content_type)
+        encoding = _normalize_charset(match.group(1)) if match else ""
+        if encoding:
+            return encoding, "header"
+    match = _META_CHARSET_RE.search(head[:META_SCAN_BYTES])
+    if match:
+        encoding = _normalize_charset(match.group(1).decode("ascii", "ignore"))
+        # A page that was decoded as UTF-16 can't contain an ASCII meta tag
+        if encoding and not encoding.startswith("utf-16"):
+            return encoding, "meta"
+    return "", ""
+
+
+def decode_html(body, content_type: str = "") -> str:
+    """
+    按检测到的字符集一次性解码正文
+
+    Args:
+        body: bytes、bytearray 或 memoryview
+        content_type: 响应的 Content-Type 头
+    """
+    head = bytes(body[:META_SCAN_BYTES])
+    encoding, _source = detect_charset(content_type, head)
+    if encoding:
+        return str(body, encoding, "replace")
+    # Nothing declared: UTF-8 is by far the most common; fall back to windows-1252, which never fails
+    try:
+        return str(body, "utf-8")
+    except UnicodeDecodeError:
+        return str(body, "windows-1252", "replace")
+
 
 class NetworkService(QObject):
     html_fetched = pyqtSignal(str, str) # url, html_content
     fetch_error = pyqtSignal(str, str)  # url, error_message
+    request_finished = pyqtSignal(int, str, str)  # request_id, url, html_content
+    request_failed = pyqtSignal(int, str, str)  # request_id, url, error_message
+    snapshot_ready = pyqtSignal(str, str)  # url, local snapshot html path
+    snapshot_error = pyqtSignal(str, str)  # url, error_message
+    snapshot_progress = pyqtSignal(str, int, int)  # url, resources done, resources found
+
+    # Default upper bound for the on-disk HTTP cache
+    DEFAULT_CACHE_SIZE = 50 * 1024 * 1024
+    # Upper bound for preallocating the body buffer from Content-Length
+    MAX_PREALLOCATE_BYTES = 64 * 1024 * 1024
+    # Default per-host concurrency cap and per-request timeout
+    DEFAULT_MAX_REQUESTS_PER_HOST = 4
+    DEFAULT_TIMEOUT_MS = 30000
+    # Offline snapshots younger than this are opened instead of fetching the page again
+    SNAPSHOT_FRESH_SECONDS = 60 * 60
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, cache_dir: str = None, cache_size: int = DEFAULT_CACHE_SIZE,
+                 max_requests_per_host: int = DEFAULT_MAX_REQUESTS_PER_HOST,
+                 request_timeout_ms: int = DEFAULT_TIMEOUT_MS):
         super().__init__(parent)
         self.manager = QNetworkAccessManager(self)
         self.manager.finished.connect(self._handle_finished)
-        self._active_requests = {} # To store QNetworkReply objects by URL
+        self.max_requests_per_host = max(1, max_requests_per_host)
+        self.request_timeout_ms = request_timeout_ms
+
+        self._next_request_id = 0
+        self._request_keys = {} # request_id: group key of every request still waiting for a result
+        self._groups = {} # (url, force_network): shared fetch state (caller ids, reply, timer) for in-flight/queued URLs
+        self._reply_groups = {} # QNetworkReply: shared fetch state
+        self._host_queues = {} # host: deque of group keys waiting for a free slot
+        self._host_active = {} # host: number of replies in flight
+        self._silent_ids = set() # request ids that only report through request_finished/request_failed
+        self._snapshot_fetches = {} # request_id: page url being saved for offline use
+        self._snapshot_jobs = {} # page url: PageSnapshotJob
+        self._snapshot_store = None
+        self.request_finished.connect(self._on_snapshot_page_fetched)
+        self.request_failed.connect(self._on_snapshot_page_failed)
+
+        # Size-bounded disk cache. Qt stores the ETag / Last-Modified validators with each entry
+        # and sends If-None-Match / If-Modified-Since when an entry has to be revalidated;
+        # a 304 response is then served from the cache.
+        self.cache = None
+        try:
+            self.cache = QNetworkDiskCache(self)
+            self.cache.setCacheDirectory(cache_dir or get_http_cache_dir())
+            self.cache.setMaximumCacheSize(cache_size)
+            self.manager.setCache(self.cache)
+        except Exception as e:
+            print(f"NetworkService: Failed to set up HTTP disk cache: {e}")
+            self.cache = None
+
+        # Offline mode only reads from the cache and never touches the network
+        self.offline_mode = False
+        self._stats = {"requests": 0, "cache_hits": 0, "network": 0, "offline_misses": 0, "bytes_from_cache": 0}
+
+    def set_offline_mode(self, enabled: bool):
+        """开启后只从磁盘缓存读取页面，缓存中没有的URL直接报错"""
+        self.offline_mode = bool(enabled)
+        print(f"NetworkService: Offline (cache-only) mode {'enabled' if self.offline_mode else 'disabled'}")
+
+    def get_cache_stats(self) -> dict:
+        """返回缓存命中统计：请求数、缓存命中数、网络请求数、离线未命中数、命中率和缓存占用"""
+        stats = dict(self._stats)
+        completed = stats["cache_hits"] + stats["network"] + stats["offline_misses"]
+        stats["hit_rate"] = stats["cache_hits"] / completed if completed else 0.0
+        stats["cache_size"] = self.cache.cacheSize() if self.cache is not None else 0
+        return stats
+
+    def reset_cache_stats(self):
+        for key in self._stats:
+            self._stats[key] = 0
+
+    def clear_cache(self):
+        """清空HTTP磁盘缓存"""
+        if self.cache is not None:
+            self.cache.clear()
+
+    def get_snapshot_store(self) -> SnapshotStore:
+        if self._snapshot_store is None:
+            self._snapshot_store = SnapshotStore()
+        return self._snapshot_store
+
+    def get_offline_snapshot(self, url_string: str, max_age: float = None) -> str:
+        """
+        返回URL已保存的离线快照路径，没有时返回空字符串
+
+        max_age 给出时只返回保存时间不超过 max_age 秒的快照。
+        """
+        try:
+            store = self.get_snapshot_store()
+        except OSError as e:
+            print(f"NetworkService: Snapshot store unavailable: {e}")
+            return ""
+        path = store.get_page(url_string)
+        if path and max_age is not None:
+            age = store.page_age(url_string)
+            if age is None or age > max_age:
+                return ""
+        return path
+
+    def get_offline_snapshot_age(self, url_string: str):
+        """快照保存至今的秒数，没有快照时返回 None"""
+        try:
+            return self.get_snapshot_store().page_age(url_string)
+        except OSError:
+            return None
+
+    def save_for_offline(self, url_string: str, max_concurrent: int = 6, refresh: bool = False) -> bool:
+        """
+        抓取页面并下载其图片、样式表、脚本等子资源，保存为离线快照（替换已有快照）
+
+        refresh 为 True 时页面一定从网络重新获取（忽略HTTP缓存和离线模式）。
+        完成后发出 snapshot_ready(url, 快照路径)；失败时发出 snapshot_error。
+        """
+        if url_string in self._snapshot_jobs or url_string in self._snapshot_fetches.values():
+            return True
+        request_id = self.fetch_html(url_string, notify=False, force_network=refresh)
+        if not request_id:
+            return False
+        self._snapshot_fetches[request_id] = (url_string, max_concurrent)
+        return True
+
+    def _on_snapshot_page_fetched(self, request_id: int, url_string: str, html_content: str):
+        entry = self._snapshot_fetches.pop(request_id, None)
+        if entry is None:
+            return
+        _url, max_concurrent = entry
+        try:
+            store = self.get_snapshot_store()
+        except OSError as e:
+            self.snapshot_error.emit(url_string, f"无法创建离线快照目录: {e}")
+            return
+        job = PageSnapshotJob(self.manager, store, url_string, html_content,
+                              max_concurrent=max_concurrent, timeout_ms=self.request_timeout_ms, parent=self)
+        job.progress.connect(lambda done, total, u=url_string: self.snapshot_progress.emit(u, done, total))
+        job.finished.connect(self._on_snapshot_job_finished)
+        job.failed.connect(self._on_snapshot_job_failed)
+        self._snapshot_jobs[url_string] = job
+        job.start()
+
+    def _on_snapshot_page_failed(self, request_id: int, url_string: str, error_message: str):
+        if self._snapshot_fetches.pop(request_id, None) is not None:
+            self.snapshot_error.emit(url_string, error_message)
+
+    def _on_snapshot_job_finished(self, url_string: str, path: str):
+        job = self._snapshot_jobs.pop(url_string, None)
+        if job is not None:
+            job.deleteLater()
+        self.snapshot_ready.emit(url_string, path)
 
-    def fetch_html(self, url_string: str):
+    def _on_snapshot_job_failed(self, url_string: str, error_message: str):
+        job = self._snapshot_jobs.pop(url_string, None)
+        if job is not None:
+            job.deleteLater()
+        self.snapshot_error.emit(url_string, error_message)
+
+    def fetch_html(self, url_string: str, timeout_ms: int = None, notify: bool = True,
+                   force_network: bool = False) -> int:
+        """
+        将抓取请求加入队列，返回请求ID（URL无效时返回0）
+
+        同一URL的并发抓取共用一个网络请求，但每个请求ID都会收到各自的结果通知。
+        notify 为 False 时只发出 request_finished/request_failed，不发出 html_fetched/fetch_error。
+        force_network 为 True 时不使用HTTP缓存（结果仍写入缓存），也不会并入可能读取缓存的
+        同一URL请求；普通请求可以并入 force_network 的请求。
+        """
         if not url_string:
             self.fetch_error.emit(url_string, "URL为空。")
-            return
+            return 0
 
         q_url = QUrl(url_string)
         if not q_url.isValid():
             self.fetch_error.emit(url_string, f"无效的URL格式: {url_string}")
+            return 0
+
+        self._next_request_id += 1
+        request_id = self._next_request_id
+        if not notify:
+            self._silent_ids.add(request_id)
+        self._stats["requests"] += 1
+
+        key = (url_string, force_network)
+        group = self._groups.get(key)
+        if group is None and not force_network:
+            group = self._groups.get((url_string, True))
+        if group is not None:
+            # Collapse duplicate concurrent fetches into the one already queued/running
+            group["ids"].append(request_id)
+            self._request_keys[request_id] = group["key"]
+            print(f"NetworkService: Request {request_id} for {url_string} joined request {group['ids'][0]}")
+            return request_id
+
+        host = q_url.host().lower()
+        self._request_keys[request_id] = key
+        self._groups[key] = {
+            "key": key,
+            "url": url_string,
+            "host": host,
+            "ids": [request_id],
+            "reply": None,
+            "timer": None,
+            "timed_out": False,
+            "timeout_ms": self.request_timeout_ms if timeout_ms is None else timeout_ms,
+            "force_network": force_network,
+            "buffer": None,
+            "received": 0,
+        }
+        self._host_queues.setdefault(host, deque()).append(key)
+        self._start_queued(host)
+        return request_id
+
+    def cancel(self, request_id: int) -> bool:
+        """取消一个请求；共用的网络请求在没有任何调用方等待时才会中止"""
+        key = self._request_keys.pop(request_id, None)
+        self._silent_ids.discard(request_id)
+        self._snapshot_fetches.pop(request_id, None)
+        if key is None:
+            return False
+        group = self._groups.get(key)
+        if group is None or request_id not in group["ids"]:
+            return False
+        group["ids"].remove(request_id)
+        if group["ids"]:
+            return True
+
+        del self._groups[key]
+        if group["reply"] is None:
+            queue = self._host_queues.get(group["host"])
+            if queue is not None and key in queue:
+                queue.remove(key)
+        else:
+            print(f"NetworkService: Aborting request for {group['url']}")
+            self._stop_timer(group)
+            # finished() still fires for the aborted reply; _handle_finished ignores it
+            group["reply"].abort()
+        return True
+
+    def cancel_all(self):
+        for request_id in list(self._request_keys):
+            self.cancel(request_id)
+        for job in list(self._snapshot_jobs.values()):
+            job.cancel()
+            job.deleteLater()
+        self._snapshot_jobs.clear()
+
+    def is_pending(self, request_id: int) -> bool:
+        return request_id in self._request_keys
+
+    def pending_count(self) -> int:
+        return len(self._request_keys)
+
+    def _start_queued(self, host: str):
+        """Start queued fetches for a host while it is below the concurrency cap"""
+        queue = self._host_queues.get(host)
+        while queue and self._host_active.get(host, 0) < self.max_requests_per_host:
+            group = self._groups.get(queue.popleft())
+            if group is None:
+                continue
+            self._host_active[host] = self._host_active.get(host, 0) + 1
+            try:
+                self._send(group)
+            except Exception as e:
+                error_msg = f"发起网络请求时出错: {group['url']}\n{traceback.format_exc()}"
+                print(error_msg)
+                self._host_active[host] -= 1
+                self._finish_group(group, None, str(e))
+        if queue is not None and not queue:
+            del self._host_queues[host]
+
+    def _send(self, group: dict):
+        url_string = group["url"]
+        print(f"NetworkService: Fetching HTML from {url_string}")
+        request = QNetworkRequest(QUrl(url_string))
+        # Set a user-agent to mimic a browser, some sites might block default Qt agent
+        request.setHeader(QNetworkRequest.KnownHeaders.UserAgentHeader, 
+                          "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.93 Safari/537.36")
+        # Corrected FollowRedirects attribute again based on new feedback
+        request.setAttribute(QNetworkRequest.Attribute.RedirectPolicyAttribute, QNetworkRequest.RedirectPolicy.NoLessSafeRedirectPolicy)
+        # PreferNetwork serves fresh cache entries directly and revalidates stale ones with
+        # conditional headers; AlwaysCache never goes to the network (offline mode)
+        # AlwaysNetwork is used to refresh offline snapshots
+        if group.get("force_network"):
+            cache_control = QNetworkRequest.CacheLoadControl.AlwaysNetwork
+        elif self.offline_mode:
+            cache_control = QNetworkRequest.CacheLoadControl.AlwaysCache
+        else:
+            cache_control = QNetworkRequest.CacheLoadControl.PreferNetwork
+        request.setAttribute(QNetworkRequest.Attribute.CacheLoadControlAttribute, cache_control)
+        request.setAttribute(QNetworkRequest.Attribute.CacheSaveControlAttribute, True)
+
+        reply = self.manager.get(request)
+        group["reply"] = reply
+        # Replies are matched by object, so redirects (which change reply.url()) are still found
+        self._reply_groups[reply] = group
+        # Read the body as it arrives instead of buffering everything inside the reply
+        reply.readyRead.connect(lambda g=group, r=reply: self._on_ready_read(g, r))
+
+        if group["timeout_ms"] and group["timeout_ms"] > 0:
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda g=group: self._on_timeout(g))
+            timer.start(group["timeout_ms"])
+            group["timer"] = timer
+
+    def _on_ready_read(self, group: dict, reply: QNetworkReply):
+        """Append newly arrived bytes to the request's buffer"""
+        chunk = reply.readAll()
+        size = chunk.size()
+        if not size:
             return
+        buffer = group["buffer"]
+        if buffer is None:
+            # Preallocate from Content-Length; it's only a hint (compressed bodies are larger once decoded)
+            length = reply.header(QNetworkRequest.KnownHeaders.ContentLengthHeader)
+            try:
+                length = int(length) if length is not None else 0
+            except (TypeError, ValueError):
+                length = 0
+            buffer = bytearray(min(max(length, size), self.MAX_PREALLOCATE_BYTES))
+            group["buffer"] = buffer
+        start = group["received"]
+        end = start + size
+        if end > len(buffer):
+            buffer.extend(bytes(max(end - len(buffer), len(buffer) // 2)))
+        buffer[start:end] = chunk.data()
+        group["received"] = end
 
-        try:
-            print(f"NetworkService: Fetching HTML from {url_string}")
-            request = QNetworkRequest(q_url)
-            # Set a user-agent to mimic a browser, some sites might block default Qt agent
-            request.setHeader(QNetworkRequest.KnownHeaders.UserAgentHeader, 
-                              "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.93 Safari/537.36")
-            # Corrected FollowRedirects attribute again based on new feedback
-            request.setAttribute(QNetworkRequest.Attribute.RedirectPolicyAttribute, QNetworkRequest.RedirectPolicy.NoLessSafeRedirectPolicy)
-            
-            reply = self.manager.get(request)
-            self._active_requests[url_string] = reply # Store reply to identify it later
-        except Exception as e:
-            error_msg = f"发起网络请求时出错: {url_string}\n{traceback.format_exc()}"
-            print(error_msg)
-            self.fetch_error.emit(url_string, str(e))
+    def _on_timeout(self, group: dict):
+        reply = group["reply"]
+        if reply is not None and not reply.isFinished():
+            print(f"NetworkService: Request for {group['url']} timed out after {group['timeout_ms']} ms")
+            group["timed_out"] = True
+            reply.abort()
 
+    def _stop_timer(self, group: dict):
+        timer = group.get("timer")
+        if timer is not None:
+            timer.stop()
+            timer.deleteLater()
+            group["timer"] = None
+
+    def _finish_group(self, group: dict, html_content, error_msg: str = ""):
+        """Notify every request id that shares this fetch"""
+        if self._groups.get(group["key"]) is group:
+            del self._groups[group["key"]]
+        for request_id in group["ids"]:
+            self._request_keys.pop(request_id, None)
+            notify = request_id not in self._silent_ids
+            self._silent_ids.discard(request_id)
+            if html_content is not None:
+                self.request_finished.emit(request_id, group["url"], html_content)
+                if notify:
+                    self.html_fetched.emit(group["url"], html_content)
+            else:
+                self.request_failed.emit(request_id, group["url"], error_msg)
+                if notify:
+                    self.fetch_error.emit(group["url"], error_msg)
 
     def _handle_finished(self, reply: QNetworkReply):
-        original_url = reply.request().url().toString()
-        
-        # Remove the reply from active requests now that it's finished
-        if original_url in self._active_requests:
-            del self._active_requests[original_url]
-        else:
-            # This might happen if the URL changed due to redirects and we didn't track the original
-            # For now, we'll try to use the final URL from the reply
-            print(f"Warning: Reply URL {original_url} not found in active requests. This might be due to a redirect not tracked by original key.")
+        group = self._reply_groups.pop(reply, None)
+        if group is None:
+            # Replies started directly on the shared manager (e.g. snapshot subresources) are owned by their caller
+            return
+        reply.deleteLater()
+
+        self._stop_timer(group)
+        host = group["host"]
+        self._host_active[host] = max(0, self._host_active.get(host, 0) - 1)
+        if not self._host_active[host]:
+            del self._host_active[host]
+
+        original_url = group["url"]
+        try:
+            if self._groups.get(group["key"]) is not group:
+                # Cancelled by every caller; nobody is waiting for this reply
+                print(f"NetworkService: Discarding cancelled request for {original_url}")
+                return
+            self._process_reply(group, reply)
+        finally:
+            self._start_queued(host)
 
+    def _process_reply(self, group: dict, reply: QNetworkReply):
+        original_url = group["url"]
+        from_cache = bool(reply.attribute(QNetworkRequest.Attribute.SourceIsFromCacheAttribute))
 
         if reply.error() == QNetworkReply.NetworkError.NoError:
+            if from_cache:
+                self._stats["cache_hits"] += 1
+            else:
+                self._stats["network"] += 1
             try:
-                # Try to decode with UTF-8 first, then with a common fallback like ISO-8859-1 or windows-1252
-                # More robust charset detection might be needed for a wider range of sites
-                html_bytes = reply.readAll()
-                try:
-                    html_content = str(html_bytes, 'utf-8')
-                except UnicodeDecodeError:
-                    try:
-                        html_content = str(html_bytes, 'iso-8859-1') # Common fallback
-                    except UnicodeDecodeError:
-                        html_content = str(html_bytes, 'windows-1252') # Another common fallback
+                # Pick up anything that arrived after the last readyRead
+                self._on_ready_read(group, reply)
+                buffer = group["buffer"]
+                body = memoryview(buffer)[:group["received"]] if buffer is not None else b""
+                if from_cache:
+                    self._stats["bytes_from_cache"] += group["received"]
+                content_type = reply.header(QNetworkRequest.KnownHeaders.ContentTypeHeader) or ""
+                html_content = decode_html(body, str(content_type))
+                group["buffer"] = None
                 
-                print(f"NetworkService: Successfully fetched HTML from {original_url} (length: {len(html_content)})")
-                self.html_fetched.emit(original_url, html_content)
+                print(f"NetworkService: Successfully fetched HTML from {original_url} (length: {len(html_content)}, from cache: {from_cache})")
+                self._finish_group(group, html_content)
             except Exception as e:
                 error_msg = f"读取或解码响应内容时出错: {original_url}\n{traceback.format_exc()}"
                 print(error_msg)
-                self.fetch_error.emit(original_url, f"读取响应内容错误: {e}")
+                self._finish_group(group, None, f"读取响应内容错误: {e}")
+        elif group["timed_out"]:
+            self._stats["network"] += 1
+            error_msg = f"请求超时 ({group['timeout_ms'] / 1000:.0f}秒) - URL: {original_url}"
+            print(error_msg)
+            self._finish_group(group, None, error_msg)
+        elif self.offline_mode and reply.error() == QNetworkReply.NetworkError.ContentNotFoundError and not from_cache:
+            self._stats["offline_misses"] += 1
+            error_msg = f"离线模式：缓存中没有该页面 - URL: {original_url}"
+            print(error_msg)
+            self._finish_group(group, None, error_msg)
         else:
+            if not from_cache:
+                self._stats["network"] += 1
             error_string = reply.errorString()
             status_code_attribute = reply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute)
             status_code = status_code_attribute if status_code_attribute is not None else "N/A"
             
             error_msg = f"网络错误 (状态码: {status_code}): {error_string} - URL: {original_url}"
             print(error_msg)
-            self.fetch_error.emit(original_url, error_msg)
-        
-        reply.deleteLater()
+            self._finish_group(group, None, error_msg)
 
     def __del__(self):
         # Clean up any pending requests if the service is deleted
-        for url_str, reply_obj in list(self._active_requests.items()): # Iterate over a copy
-            if reply_obj and not reply_obj.isFinished():
-                print(f"NetworkService: Aborting pending request for {url_str} during deletion.")
-                reply_obj.abort()
-        self._active_requests.clear()
+        try:
+            for reply_obj, group in list(self._reply_groups.items()): # Iterate over a copy
+                if reply_obj and not reply_obj.isFinished():
+                    print(f"NetworkService: Aborting pending request for {group['url']} during deletion.")
+                    reply_obj.abort()
+        except RuntimeError:
+            # The underlying Qt objects may already be gone
+            pass
+        self._reply_groups.clear()
+        self._groups.clear()
+        self._request_keys.clear()
 
 if __name__ == '__main__':
     from PyQt6.QtWidgets import QApplication, QTextEdit, QVBoxLayout, QWidget, QPushButton, QLineEdit
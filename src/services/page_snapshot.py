@@ -0,0 +1,360 @@
+import os
+import re
+import hashlib
+import mimetypes
+import posixpath
+import tempfile
+import time
+from collections import deque
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+from PyQt6.QtCore import QObject, pyqtSignal, QUrl, QTimer
+from PyQt6.QtNetwork import QNetworkRequest, QNetworkReply
+
+
+# Tags whose attribute is downloaded and rewritten to a local file
+_RESOURCE_ATTRS = {
+    "img": ("src",),
+    "script": ("src",),
+    "link": ("href",),
+    "source": ("src",),
+    "video": ("poster",),
+    "audio": ("src",),
+    "embed": ("src",),
+    "input": ("src",),
+}
+# Tags whose attribute is only made absolute so that it keeps working from a local file
+_ABSOLUTE_ATTRS = {"a": ("href",), "form": ("action",), "iframe": ("src",)}
+_LINK_RELS = ("stylesheet", "icon", "preload", "apple-touch-icon")
+_SKIPPED_SCHEMES = ("data:", "javascript:", "mailto:", "about:", "blob:", "#")
+
+_CSS_URL_RE = re.compile(r'url\(\s*(["\']?)([^"\')]+)\1\s*\)', re.IGNORECASE)
+_CSS_IMPORT_RE = re.compile(r'@import\s+(["\'])([^"\']+)\1', re.IGNORECASE)
+_BASE_TAG_RE = re.compile(r'<base\b[^>]*>', re.IGNORECASE)
+_META_CHARSET_RE = re.compile(r'(<meta[^>]+charset\s*=\s*["\']?\s*)([\w.:-]+)', re.IGNORECASE)
+_INTEGRITY_RE = re.compile(r'\s(?:integrity|crossorigin)(\s*=\s*("[^"]*"|\'[^\']*\'|[^\s>]+))?', re.IGNORECASE)
+
+# CSS can pull in fonts, images and further stylesheets; nested @import is followed this deep
+MAX_CSS_DEPTH = 3
+
+
+def _attr_pattern(name: str):
+    return re.compile(r'(\s%s\s*=\s*)("[^"]*"|\'[^\']*\'|[^\s>]+)' % re.escape(name), re.IGNORECASE)
+
+
+class _ResourceParser(HTMLParser):
+    """Collects the start tags that reference subresources, with their position in the document"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.base_href = None
+        self.found = []  # ((line, col), start tag text, attr name, attr value, download?)
+
+    def handle_starttag(self, tag, attrs):
+        attrs_dict = dict(attrs)
+        if tag == "base" and self.base_href is None and attrs_dict.get("href"):
+            self.base_href = attrs_dict["href"]
+            return
+        if tag in _RESOURCE_ATTRS:
+            if tag == "link":
+                rel = (attrs_dict.get("rel") or "").lower()
+                if not any(r in rel for r in _LINK_RELS):
+                    return
+            names, download = _RESOURCE_ATTRS[tag], True
+        elif tag in _ABSOLUTE_ATTRS:
+            names, download = _ABSOLUTE_ATTRS[tag], False
+        else:
+            return
+        for name in names:
+            value = (attrs_dict.get(name) or "").strip()
+            if value and not value.lower().startswith(_SKIPPED_SCHEMES):
+                self.found.append((self.getpos(), self.get_starttag_text(), name, value, download))
+
+
+def extract_subresources(html: str, base_url: str):
+    """
+    解析HTML，返回 (解析基准URL, 引用列表)
+
+    引用列表中每项为 (起始标签偏移, 起始标签文本, 属性名, 绝对URL, 是否下载)
+    """
+    parser = _ResourceParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception as e:
+        print(f"PageSnapshot: HTML parse error, snapshot may be incomplete: {e}")
+
+    if parser.base_href:
+        base_url = urljoin(base_url, parser.base_href)
+
+    # HTMLParser counts lines by "\n" only, so str.splitlines() would disagree on \r, \f etc.
+    line_offsets = [0]
+    for line in html.split("\n"):
+        line_offsets.append(line_offsets[-1] + len(line) + 1)
+
+    references = []
+    for (line, col), tag_text, name, value, download in parser.found:
+        if not tag_text:
+            continue
+        absolute = urljoin(base_url, value)
+        if urlsplit(absolute).scheme not in ("http", "https"):
+            continue
+        references.append((line_offsets[line - 1] + col, tag_text, name, absolute.split("#")[0] if download else absolute, download))
+    return base_url, references
+
+
+def extract_css_references(css: str, css_url: str):
+    """返回样式表中 url(...) 和 @import 引用的绝对URL列表"""
+    urls = []
+    for match in list(_CSS_URL_RE.finditer(css)) + list(_CSS_IMPORT_RE.finditer(css)):
+        value = match.group(2).strip()
+        if value and not value.lower().startswith(_SKIPPED_SCHEMES):
+            absolute = urljoin(css_url, value).split("#")[0]
+            if urlsplit(absolute).scheme in ("http", "https"):
+                urls.append(absolute)
+    return urls
+
+
+class SnapshotStore:
+    """
+    离线快照存储
+
+    子资源按内容的 SHA-256 保存在 objects/ 下，相同内容的文件在不同页面之间只保存一份；
+    改写后的页面保存在 pages/<URL哈希>.html。
+    """
+
+    def __init__(self, root_dir: str = None):
+        if root_dir is None:
+            project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+            root_dir = os.path.join(project_root, "data", "page_snapshots")
+        self.root_dir = root_dir
+        self.objects_dir = os.path.join(root_dir, "objects")
+        self.pages_dir = os.path.join(root_dir, "pages")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.pages_dir, exist_ok=True)
+
+    def page_path(self, url: str) -> str:
+        return os.path.join(self.pages_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".html")
+
+    def get_page(self, url: str) -> str:
+        """已保存的快照路径，不存在时返回空字符串"""
+        path = self.page_path(url)
+        return path if os.path.isfile(path) else ""
+
+    def page_age(self, url: str):
+        """快照保存至今的秒数，不存在时返回 None"""
+        try:
+            return max(0.0, time.time() - os.path.getmtime(self.page_path(url)))
+        except OSError:
+            return None
+
+    def put_object(self, data: bytes, extension: str = "") -> str:
+        """保存子资源内容，返回相对 objects/ 的路径（posix 分隔符）"""
+        digest = hashlib.sha256(data).hexdigest()
+        relative = f"{digest[:2]}/{digest}{extension}"
+        path = os.path.join(self.objects_dir, digest[:2], digest + extension)
+        if not os.path.exists(path):
+            self._write_atomic(path, data)
+        return relative
+
+    def put_page(self, url: str, html: str) -> str:
+        path = self.page_path(url)
+        self._write_atomic(path, html.encode("utf-8"))
+        return path
+
+    def _write_atomic(self, path: str, data: bytes):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+
+def _guess_extension(url: str, content_type: str) -> str:
+    extension = posixpath.splitext(urlsplit(url).path)[1].lower()
+    if re.fullmatch(r'\.[a-z0-9]{1,5}', extension):
+        return extension
+    mime = (content_type or "").split(";")[0].strip().lower()
+    return (mimetypes.guess_extension(mime) or "") if mime else ""
+
+
+def _is_css(url: str, content_type: str) -> bool:
+    return "text/css" in (content_type or "").lower() or urlsplit(url).path.lower().endswith(".css")
+
+
+class PageSnapshotJob(QObject):
+    """
+    下载页面的全部子资源并生成离线快照
+
+    子资源以有限的并发数下载（共用调用方的 QNetworkAccessManager 及其磁盘缓存），
+    样式表中引用的字体、图片和 @import 会继续下载。全部完成后链接被改写为本地文件。
+    下载失败的资源保留原始绝对URL。
+    """
+
+    progress = pyqtSignal(int, int)  # 已完成资源数, 已发现资源数
+    finished = pyqtSignal(str, str)  # 页面URL, 快照文件路径
+    failed = pyqtSignal(str, str)  # 页面URL, 错误信息
+
+    def __init__(self, manager, store: SnapshotStore, url: str, html: str,
+                 max_concurrent: int = 6, timeout_ms: int = 30000, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self.store = store
+        self.url = url
+        self.html = html
+        self.max_concurrent = max(1, max_concurrent)
+        self.timeout_ms = timeout_ms
+
+        self._queue = deque()
+        self._depth = {}  # resource url: CSS nesting depth (0 for resources referenced by the page)
+        self._active = {}  # QNetworkReply: (resource url, timer)
+        self._objects = {}  # resource url: path relative to objects/ (binary resources)
+        self._css = {}  # resource url: stylesheet text waiting to be rewritten
+        self._css_content_types = {}
+        self._failed = set()
+        self._references = []
+        self._done = 0
+        self._running = False
+
+    def start(self):
+        self._running = True
+        try:
+            _base, self._references = extract_subresources(self.html, self.url)
+        except Exception as e:
+            self._running = False
+            self.failed.emit(self.url, f"解析页面失败: {e}")
+            return
+        for _offset, _tag, _name, resource_url, download in self._references:
+            if download:
+                self._enqueue(resource_url, 0)
+        self._pump()
+
+    def cancel(self):
+        self._running = False
+        self._queue.clear()
+        for reply, (_url, timer) in list(self._active.items()):
+            timer.stop()
+            reply.abort()
+        self._active.clear()
+
+    def _enqueue(self, resource_url: str, depth: int):
+        if resource_url in self._depth or resource_url == self.url:
+            return
+        self._depth[resource_url] = depth
+        self._queue.append(resource_url)
+
+    def _pump(self):
+        while self._running and self._queue and len(self._active) < self.max_concurrent:
+            resource_url = self._queue.popleft()
+            request = QNetworkRequest(QUrl(resource_url))
+            request.setRawHeader(b"Referer", self.url.encode("utf-8"))
+            request.setAttribute(QNetworkRequest.Attribute.RedirectPolicyAttribute, QNetworkRequest.RedirectPolicy.NoLessSafeRedirectPolicy)
+            request.setAttribute(QNetworkRequest.Attribute.CacheLoadControlAttribute, QNetworkRequest.CacheLoadControl.PreferCache)
+            reply = self.manager.get(request)
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(reply.abort)
+            timer.start(self.timeout_ms)
+            self._active[reply] = (resource_url, timer)
+            reply.finished.connect(lambda r=reply: self._on_reply_finished(r))
+
+        if self._running and not self._queue and not self._active:
+            self._finish()
+
+    def _on_reply_finished(self, reply: QNetworkReply):
+        entry = self._active.pop(reply, None)
+        reply.deleteLater()
+        if entry is None or not self._running:
+            return
+        resource_url, timer = entry
+        timer.stop()
+        timer.deleteLater()
+
+        if reply.error() == QNetworkReply.NetworkError.NoError:
+            data = reply.readAll().data()
+            content_type = reply.header(QNetworkRequest.KnownHeaders.ContentTypeHeader) or ""
+            try:
+                if _is_css(resource_url, content_type):
+                    css = data.decode("utf-8", "replace")
+                    self._css[resource_url] = css
+                    if self._depth[resource_url] < MAX_CSS_DEPTH:
+                        for child_url in extract_css_references(css, resource_url):
+                            self._enqueue(child_url, self._depth[resource_url] + 1)
+                else:
+                    self._objects[resource_url] = self.store.put_object(data, _guess_extension(resource_url, content_type))
+            except Exception as e:
+                print(f"PageSnapshot: Failed to store {resource_url}: {e}")
+                self._failed.add(resource_url)
+        else:
+            print(f"PageSnapshot: Failed to download {resource_url}: {reply.errorString()}")
+            self._failed.add(resource_url)
+
+        self._done += 1
+        self.progress.emit(self._done, len(self._depth))
+        self._pump()
+
+    def _finish(self):
+        self._running = False
+        try:
+            # Deepest stylesheets first, so that @import targets already have their object path
+            for css_url in sorted(self._css, key=lambda u: -self._depth[u]):
+                css = self._rewrite_css(self._css[css_url], css_url)
+                self._objects[css_url] = self.store.put_object(css.encode("utf-8"), ".css")
+            html = self._rewrite_html()
+            path = self.store.put_page(self.url, html)
+        except Exception as e:
+            self.failed.emit(self.url, f"保存离线快照失败: {e}")
+            return
+        print(f"PageSnapshot: Saved {self.url} with {len(self._objects)} resources "
+              f"({len(self._failed)} failed) to {path}")
+        self.finished.emit(self.url, path)
+
+    def _rewrite_css(self, css: str, css_url: str) -> str:
+        def local_or_absolute(value):
+            absolute = urljoin(css_url, value.strip())
+            relative = self._objects.get(absolute.split("#")[0])
+            # Objects live in objects/<xx>/, so a sibling directory is one level up
+            return f"../{relative}" if relative else absolute
+
+        def replace_url(match):
+            value = match.group(2)
+            if value.strip().lower().startswith(_SKIPPED_SCHEMES):
+                return match.group(0)
+            return f'url("{local_or_absolute(value)}")'
+
+        def replace_import(match):
+            return f'@import "{local_or_absolute(match.group(2))}"'
+
+        css = _CSS_URL_RE.sub(replace_url, css)
+        return _CSS_IMPORT_RE.sub(replace_import, css)
+
+    def _rewrite_html(self) -> str:
+        html = self.html
+        parts = []
+        last = 0
+        for offset, tag_text, name, resource_url, download in sorted(self._references, key=lambda r: r[0]):
+            if html[offset:offset + len(tag_text)] != tag_text or offset < last:
+                continue
+            relative = self._objects.get(resource_url) if download else None
+            new_value = f"../objects/{relative}" if relative else resource_url
+            new_tag = _attr_pattern(name).sub(lambda m: f'{m.group(1)}"{new_value}"', tag_text, count=1)
+            if relative:
+                # Rewritten stylesheets no longer match their subresource integrity hash
+                new_tag = _INTEGRITY_RE.sub("", new_tag)
+            parts.append(html[last:offset])
+            parts.append(new_tag)
+            last = offset + len(tag_text)
+        parts.append(html[last:])
+        html = "".join(parts)
+
+        # Links are already absolute or local; a <base> tag would redirect them again
+        html = _BASE_TAG_RE.sub("", html)
+        # The snapshot is always written as UTF-8
+        return _META_CHARSET_RE.sub(lambda m: m.group(1) + "utf-8", html)
@@ -1,9 +1,9 @@
 import os
-import tempfile
-import shutil
 from pathlib import Path
 
 from ..utils.pdf2html_converter import PDF2HTMLConverter
+from ..utils.job_control import JobCancelledError
+from ..utils.temp_artifacts import get_temp_artifact_manager
 
 
 class PDFConversionService:
@@ -13,7 +13,7 @@ class PDFConversionService:
         """初始化PDF转换服务"""
         self.converter = PDF2HTMLConverter()
     
-    def convert_pdf_to_html(self, pdf_path, output_html_path=None, use_admin=True, options=None):
+    def convert_pdf_to_html(self, pdf_path, output_html_path=None, use_admin=True, options=None, job=None):
         """将PDF文件转换为HTML
         
         Args:
@@ -21,6 +21,7 @@ class PDFConversionService:
             output_html_path: 输出HTML文件路径，如果为None则返回HTML内容
             use_admin: 是否使用管理员权限执行转换
             options: 额外的pdf2htmlEX命令行选项
+            job: 可选的 JobControl，用于取消转换和报告进度
             
         Returns:
             如果output_html_path为None，返回HTML内容字符串
@@ -32,9 +33,11 @@ class PDFConversionService:
         try:
             # 根据是否需要管理员权限选择不同的转换方法
             if use_admin:
-                return self.converter.convert_with_admin_rights(pdf_path, output_html_path, options)
+                return self.converter.convert_with_admin_rights(pdf_path, output_html_path, options, job=job)
             else:
-                return self.converter.convert_pdf_to_html(pdf_path, output_html_path, options)
+                return self.converter.convert_pdf_to_html(pdf_path, output_html_path, options, job=job)
+        except JobCancelledError:
+            raise
         except Exception as e:
             raise RuntimeError(f"PDF转换失败: {e}") from e
     
@@ -62,7 +65,7 @@ class PDFConversionService:
         Returns:
             临时HTML文件路径
         """
-        temp_dir = tempfile.mkdtemp(prefix="pdf2html_service_")
+        temp_dir = get_temp_artifact_manager().create_dir(prefix="pdf2html_service_")
         html_filename = Path(pdf_path).stem + ".html"
         temp_html_path = os.path.join(temp_dir, html_filename)
         
@@ -70,6 +73,5 @@ class PDFConversionService:
             return self.convert_pdf_to_html(pdf_path, temp_html_path, use_admin, options)
         except Exception as e:
             # 清理临时目录
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir, ignore_errors=True)
+            get_temp_artifact_manager().remove(temp_dir)
             raise e
\ No newline at end of file
@@ -5,14 +5,14 @@
 import os
 import json
 import random
-import hashlib
 import threading
 import queue
 import time
-import requests
 from typing import Dict, Tuple, Optional, Callable, List
 from PyQt6.QtCore import QObject, pyqtSignal
 
+from .translation_engines import TranslationEngine, BaiduTranslationEngine
+
 class TranslationSignalEmitter(QObject):
     """用于发送翻译结果信号的类"""
     translation_completed = pyqtSignal(str, bool, str, object)
@@ -30,12 +30,23 @@ class TranslationBackend:
     API_CREDENTIALS_DIR = "D:\\pyqtNotepad\\data\\API"
     API_CREDENTIALS_FILE = "baidu_translate_credentials.json"
     
-    def __init__(self):
-        """初始化翻译后端服务"""
+    def __init__(self, engine: Optional[TranslationEngine] = None):
+        """
+        初始化翻译后端服务
+        
+        Args:
+            engine: 使用的翻译引擎，默认为百度翻译
+        """
         self.app_id = ""
         self.app_secret = ""
+        self.engine = engine or BaiduTranslationEngine()
         self.request_queue = queue.Queue()
         self.response_callbacks = {}
+        # 请求合并：相同文本和语言对的待处理请求只发起一次网络调用
+        self.pending_requests = {}  # (文本, 源语言, 目标语言): 主请求ID
+        self.pending_keys = {}  # 主请求ID: (文本, 源语言, 目标语言)
+        self.coalesced_requests = {}  # 主请求ID: [合并进来的请求ID]
+        self._pending_lock = threading.Lock()
         self.worker_thread = None
         self.is_running = False
         self.signal_emitter = _signal_emitter
@@ -130,6 +141,16 @@ class TranslationBackend:
             if callback:
                 self.response_callbacks[request_id] = callback
             
+            # 已有相同的请求在等待结果时，合并到该请求上，不再重复排队
+            key = (text, from_lang, to_lang)
+            with self._pending_lock:
+                primary_id = self.pending_requests.get(key)
+                if primary_id is not None:
+                    self.coalesced_requests.setdefault(primary_id, []).append(request_id)
+                    return request_id
+                self.pending_requests[key] = request_id
+                self.pending_keys[request_id] = key
+            
             # 将请求加入队列
             self.request_queue.put((request_id, text, from_lang, to_lang, callback))
             
@@ -149,6 +170,22 @@ class TranslationBackend:
                 )
             return ""
     
+    def pop_coalesced_requests(self, request_id: str) -> List[str]:
+        """
+        结束一个已完成的请求，返回需要接收该结果的全部请求ID
+        
+        Args:
+            request_id: 工作线程完成的主请求ID
+            
+        Returns:
+            主请求ID及合并到其上的请求ID列表
+        """
+        with self._pending_lock:
+            key = self.pending_keys.pop(request_id, None)
+            if key is not None:
+                self.pending_requests.pop(key, None)
+            return [request_id] + self.coalesced_requests.pop(request_id, [])
+    
     def cancel_request(self, request_id: str) -> bool:
         """
         取消翻译请求
@@ -159,6 +196,7 @@ class TranslationBackend:
         Returns:
             是否成功取消
         """
+        # 网络请求可能仍在为其他合并的调用方服务，这里只移除该调用方的回调
         if request_id in self.response_callbacks:
             del self.response_callbacks[request_id]
             return True
@@ -177,40 +215,20 @@ class TranslationBackend:
             (成功状态, 翻译结果或错误消息, 原始响应数据)
         """
         try:
-            # 构建请求参数
-            salt = str(random.randint(32768, 65536))
-            sign = self.app_id + text + salt + self.app_secret
-            sign = hashlib.md5(sign.encode()).hexdigest()
-            
-            params = {
-                'appid': self.app_id,
-                'q': text,
-                'from': from_lang,
-                'to': to_lang,
-                'salt': salt,
-                'sign': sign
-            }
-            
-            response = requests.post(self.BAIDU_API_URL, params=params, timeout=10)  # 添加超时参数
-            result = response.json()
-            
-            if 'error_code' in result:
-                error_msg = f"百度翻译API错误: {result.get('error_code')} - {result.get('error_msg', '未知错误')}"
-                return False, error_msg, result
-                
-            if 'trans_result' in result and result['trans_result']:
-                translated_text = result['trans_result'][0]['dst']
-                return True, translated_text, result
-            else:
-                return False, "未获取到翻译结果", result
-                
-        except requests.exceptions.Timeout:
-            return False, "翻译请求超时，请稍后重试", None
-        except requests.exceptions.ConnectionError:
-            return False, "网络连接错误，请检查网络设置", None
+            return self.engine.translate(text, from_lang, to_lang)
         except Exception as e:
             return False, f"翻译请求错误: {str(e)}", None
     
+    def set_engine(self, engine: TranslationEngine) -> None:
+        """
+        切换翻译引擎
+        
+        Args:
+            engine: 新的翻译引擎实例，已保存的凭据会同步给它
+        """
+        engine.set_credentials(self.app_id, self.app_secret)
+        self.engine = engine
+    
     def set_credentials(self, app_id: str, app_secret: str) -> None:
         """
         设置百度翻译API的凭据
@@ -221,10 +239,11 @@ class TranslationBackend:
         """
         self.app_id = app_id
         self.app_secret = app_secret
+        self.engine.set_credentials(app_id, app_secret)
         
     def has_credentials(self) -> bool:
-        """检查是否已设置凭据"""
-        return bool(self.app_id and self.app_secret)
+        """检查当前引擎是否已具备所需的凭据"""
+        return self.engine.has_credentials()
     
     def get_credentials_file_path(self) -> str:
         """获取凭据文件的完整路径"""
@@ -237,7 +256,7 @@ class TranslationBackend:
         Returns:
             bool: 是否成功保存
         """
-        if not self.has_credentials():
+        if not (self.app_id and self.app_secret):
             return False
             
         try:
@@ -273,8 +292,7 @@ class TranslationBackend:
             with open(file_path, 'r', encoding='utf-8') as f:
                 credentials = json.load(f)
                 
-            self.app_id = credentials.get("app_id", "")
-            self.app_secret = credentials.get("app_secret", "")
+            self.set_credentials(credentials.get("app_id", ""), credentials.get("app_secret", ""))
             
             return self.has_credentials()
         except Exception as e:
@@ -300,10 +318,12 @@ def get_translation_backend():
 def _handle_translation_completed(request_id, success, result, raw_result):
     """处理翻译完成信号（在主线程中执行）"""
     backend = get_translation_backend()
-    if request_id in backend.response_callbacks:
-        try:
-            callback = backend.response_callbacks.pop(request_id)
-            if callback:
-                callback(success, result, raw_result)
-        except Exception as e:
-            print(f"处理翻译回调时出错: {e}")
\ No newline at end of file
+    # 一次网络调用的结果分发给所有合并的请求
+    for target_id in backend.pop_coalesced_requests(request_id):
+        if target_id in backend.response_callbacks:
+            try:
+                callback = backend.response_callbacks.pop(target_id)
+                if callback:
+                    callback(success, result, raw_result)
+            except Exception as e:
+                print(f"处理翻译回调时出错: {e}")
\ No newline at end of file
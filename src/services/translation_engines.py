@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+翻译引擎 - 翻译后端可替换的具体实现
+
+TranslationBackend 只负责排队、合并与回调分发，实际的翻译调用交给
+TranslationEngine 的实现。通过 register_engine 注册新引擎后，即可用
+create_engine 按名称创建。
+"""
+import random
+import hashlib
+import threading
+import time
+import zlib
+import requests
+from typing import Dict, Tuple, Optional, List, Type
+
+
+class TranslationEngine:
+    """翻译引擎基类"""
+
+    # 引擎注册名称
+    name = ""
+    # 是否需要API凭据
+    requires_credentials = False
+
+    def translate(self, text: str, from_lang: str = "auto", to_lang: str = "zh") -> Tuple[bool, str, Optional[Dict]]:
+        """
+        执行翻译（在工作线程中调用）
+
+        Args:
+            text: 要翻译的文本
+            from_lang: 源语言代码
+            to_lang: 目标语言代码
+
+        Returns:
+            (成功状态, 翻译结果或错误消息, 原始响应数据)
+        """
+        raise NotImplementedError
+
+    def set_credentials(self, app_id: str, app_secret: str) -> None:
+        """设置API凭据，不需要凭据的引擎忽略此调用"""
+        pass
+
+    def has_credentials(self) -> bool:
+        """检查引擎是否可用"""
+        return not self.requires_credentials
+
+
+class BaiduTranslationEngine(TranslationEngine):
+    """百度翻译API引擎"""
+
+    name = "baidu"
+    requires_credentials = True
+
+    # 百度翻译API地址
+    BAIDU_API_URL = "https://fanyi-api.baidu.com/api/trans/vip/translate"
+
+    def __init__(self, app_id: str = "", app_secret: str = "", timeout: float = 10):
+        self.app_id = app_id
+        self.app_secret = app_secret
+        self.timeout = timeout
+
+    def set_credentials(self, app_id: str, app_secret: str) -> None:
+        self.app_id = app_id
+        self.app_secret = app_secret
+
+    def has_credentials(self) -> bool:
+        return bool(self.app_id and self.app_secret)
+
+    def translate(self, text: str, from_lang: str = "auto", to_lang: str = "zh") -> Tuple[bool, str, Optional[Dict]]:
+        try:
+            # 构建请求参数
+            salt = str(random.randint(32768, 65536))
+            sign = self.app_id + text + salt + self.app_secret
+            sign = hashlib.md5(sign.encode()).hexdigest()
+
+            params = {
+                'appid': self.app_id,
+                'q': text,
+                'from': from_lang,
+                'to': to_lang,
+                'salt': salt,
+                'sign': sign
+            }
+
+            response = requests.post(self.BAIDU_API_URL, params=params, timeout=self.timeout)
+            result = response.json()
+
+            if 'error_code' in result:
+                error_msg = f"百度翻译API错误: {result.get('error_code')} - {result.get('error_msg', '未知错误')}"
+                return False, error_msg, result
+
+            if 'trans_result' in result and result['trans_result']:
+                # 百度按输入的每一行返回一条结果，多行文本需要逐行拼接
+                translated_text = "\n".join(item.get('dst', '') for item in result['trans_result'])
+                return True, translated_text, result
+            else:
+                return False, "未获取到翻译结果", result
+
+        except requests.exceptions.Timeout:
+            return False, "翻译请求超时，请稍后重试", None
+        except requests.exceptions.ConnectionError:
+            return False, "网络连接错误，请检查网络设置", None
+        except Exception as e:
+            return False, f"翻译请求错误: {str(e)}", None
+
+
+class MockTranslationEngine(TranslationEngine):
+    """
+    本地模拟翻译引擎，不访问网络
+
+    译文为确定性的 "[目标语言] 原文"，响应格式与百度翻译API一致。
+    可配置延迟、抖动、错误注入和每秒请求数限制，用于离线调试和性能测试。
+    """
+
+    name = "mock"
+    requires_credentials = False
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 qps_limit: float = 0.0, seed: int = 0):
+        """
+        初始化模拟引擎
+
+        Args:
+            latency: 每次请求的基础延迟（秒）
+            jitter: 在基础延迟上附加的随机延迟上限（秒）
+            error_rate: 请求失败的概率（0~1），由文本内容确定，同一文本结果固定
+            qps_limit: 每秒允许的请求数，超出时返回与百度API相同的54003错误；0表示不限制
+            seed: 随机种子
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.qps_limit = qps_limit
+        self.seed = seed
+        self.call_count = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._last_call_at = 0.0
+
+    def translate(self, text: str, from_lang: str = "auto", to_lang: str = "zh") -> Tuple[bool, str, Optional[Dict]]:
+        with self._lock:
+            self.call_count += 1
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            now = time.monotonic()
+            rate_limited = bool(self.qps_limit) and (now - self._last_call_at) < 1.0 / self.qps_limit
+            self._last_call_at = now
+
+        if delay > 0:
+            time.sleep(delay)
+
+        if rate_limited:
+            result = {"error_code": "54003", "error_msg": "Invalid Access Limit"}
+            return False, "百度翻译API错误: 54003 - Invalid Access Limit", result
+
+        if self.error_rate and self._should_fail(text):
+            result = {"error_code": "52001", "error_msg": "TIMEOUT"}
+            return False, "百度翻译API错误: 52001 - TIMEOUT", result
+
+        # 与百度接口一致：每一行对应一条 trans_result
+        trans_result = [{"src": line, "dst": f"[{to_lang}] {line}"} for line in text.split("\n")]
+        translated_text = "\n".join(item["dst"] for item in trans_result)
+        result = {
+            "from": "en" if from_lang == "auto" else from_lang,
+            "to": to_lang,
+            "trans_result": trans_result,
+        }
+        return True, translated_text, result
+
+    def _should_fail(self, text: str) -> bool:
+        """根据文本内容确定是否注入错误，保证结果可复现"""
+        bucket = zlib.crc32(f"{self.seed}:{text}".encode("utf-8")) % 10000
+        return bucket < self.error_rate * 10000
+
+
+# 已注册的翻译引擎
+_ENGINE_REGISTRY: Dict[str, Type[TranslationEngine]] = {}
+
+
+def register_engine(engine_class: Type[TranslationEngine]) -> Type[TranslationEngine]:
+    """
+    注册翻译引擎类，可作为类装饰器使用
+
+    Args:
+        engine_class: TranslationEngine 子类，使用其 name 属性作为注册名称
+    """
+    if not engine_class.name:
+        raise ValueError(f"翻译引擎 {engine_class.__name__} 未设置名称")
+    _ENGINE_REGISTRY[engine_class.name] = engine_class
+    return engine_class
+
+
+def create_engine(name: str, **kwargs) -> TranslationEngine:
+    """
+    按名称创建翻译引擎实例
+
+    Args:
+        name: 引擎注册名称
+        **kwargs: 传给引擎构造函数的参数
+    """
+    if name not in _ENGINE_REGISTRY:
+        raise ValueError(f"未知的翻译引擎: {name}")
+    return _ENGINE_REGISTRY[name](**kwargs)
+
+
+def get_engine_names() -> List[str]:
+    """获取所有已注册的引擎名称"""
+    return list(_ENGINE_REGISTRY.keys())
+
+
+register_engine(BaiduTranslationEngine)
+register_engine(MockTranslationEngine)
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+术语表 - 在翻译前后强制使用用户指定的术语译法
+
+翻译前用 Aho-Corasick 自动机一次扫描找出文本中的全部术语，并替换为占位符，
+避免翻译引擎改写；翻译完成后再把占位符替换为术语表中的译法。
+匹配耗时只与文本长度（及命中次数）成线性关系，与术语数量无关。
+"""
+import re
+import hashlib
+from collections import deque
+from typing import Dict, List, Tuple
+
+from ..data.data_manager import DataManager
+
+
+def _fold_case(text: str) -> str:
+    """逐字符转小写，保证结果与原文等长，便于按位置映射回原文"""
+    return "".join(ch if len(ch.lower()) != 1 else ch.lower() for ch in text)
+
+
+def _is_word_char(ch: str) -> bool:
+    """是否为拉丁字母、数字或下划线（这类术语需要按整词匹配）"""
+    return ch.isascii() and (ch.isalnum() or ch == "_")
+
+
+class AhoCorasick:
+    """Aho-Corasick 多模式匹配自动机"""
+
+    def __init__(self, patterns: List[str]):
+        """
+        构建自动机
+
+        Args:
+            patterns: 模式串列表，匹配结果中以序号引用
+        """
+        self.patterns = patterns
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]  # 每个状态结束的模式序号
+
+        for index, pattern in enumerate(patterns):
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(index)
+
+        # 按广度优先顺序计算失败指针，并合并输出
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail_target = self._goto[fail].get(ch, 0)
+                self._fail[next_state] = fail_target if fail_target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def iter_matches(self, text: str):
+        """
+        扫描文本，依次产出全部匹配（可能重叠）
+
+        Yields:
+            (起始位置, 结束位置, 模式序号)
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        state = 0
+        for position, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for index in output[state]:
+                yield position + 1 - len(self.patterns[index]), position + 1, index
+
+    def find_leftmost_longest(self, text: str, accept=None) -> List[Tuple[int, int, int]]:
+        """
+        查找互不重叠的匹配，重叠时优先取起点靠前、长度更长的
+
+        Args:
+            text: 要扫描的文本
+            accept: 可选的过滤函数，接收 (起始位置, 结束位置)，返回 False 的匹配被忽略
+
+        Returns:
+            按位置排序的 (起始位置, 结束位置, 模式序号) 列表
+        """
+        best_at_start: Dict[int, Tuple[int, int]] = {}
+        for start, end, index in self.iter_matches(text):
+            if accept is not None and not accept(start, end):
+                continue
+            current = best_at_start.get(start)
+            if current is None or end > current[0]:
+                best_at_start[start] = (end, index)
+
+        matches = []
+        last_end = 0
+        for start in sorted(best_at_start):
+            if start < last_end:
+                continue
+            end, index = best_at_start[start]
+            matches.append((start, end, index))
+            last_end = end
+        return matches
+
+
+class Glossary:
+    """用户术语表"""
+
+    # 占位符格式，翻译引擎通常会原样保留这类标记
+    PLACEHOLDER_TEMPLATE = "__GT{}__"
+    # 还原时容忍引擎在占位符中插入空格或改变大小写
+    PLACEHOLDER_PATTERN = re.compile(r'_\s*_\s*[Gg]\s*[Tt]\s*(\d+)\s*_\s*_')
+
+    def __init__(self, file_name: str = "translation_glossary.json"):
+        """
+        初始化术语表
+
+        Args:
+            file_name: 保存在 data 目录下的文件名
+        """
+        self.data_manager = DataManager(file_name)
+        self.data_manager.load_data()
+        self._automata: Dict[str, Tuple[AhoCorasick, List[Dict]]] = {}  # 目标语言: (自动机, 术语条目)
+
+    def get_entries(self) -> List[Dict]:
+        """获取全部术语条目"""
+        return self.data_manager.get_data()
+
+    def set_entries(self, entries: List[Tuple[str, str, str]]) -> bool:
+        """
+        替换全部术语并保存
+
+        Args:
+            entries: (原文术语, 译文术语, 目标语言) 列表，目标语言为空时适用于所有语言
+        """
+        data = []
+        for source, target, to_lang in entries:
+            source = source.strip()
+            if not source:
+                continue
+            entry_id = hashlib.sha1(f"{to_lang}\x00{source}".encode("utf-8")).hexdigest()
+            data.append({"id": entry_id, "source": source, "target": target.strip(), "to_lang": to_lang or ""})
+        self._automata.clear()
+        return self.data_manager.save_data(data)
+
+    def add_term(self, source: str, target: str, to_lang: str = "") -> bool:
+        """添加或更新一条术语"""
+        entries = [(e["source"], e["target"], e.get("to_lang", "")) for e in self.get_entries()
+                   if not (e["source"] == source.strip() and e.get("to_lang", "") == (to_lang or ""))]
+        entries.append((source, target, to_lang))
+        return self.set_entries(entries)
+
+    def is_empty(self) -> bool:
+        """术语表是否为空"""
+        return not self.get_entries()
+
+    def _get_automaton(self, to_lang: str) -> Tuple[AhoCorasick, List[Dict]]:
+        """获取（必要时构建）适用于目标语言的自动机"""
+        cached = self._automata.get(to_lang)
+        if cached is None:
+            entries = [e for e in self.get_entries() if e.get("to_lang", "") in ("", to_lang)]
+            # 同一术语既有通用译法又有指定语言译法时，以指定语言为准
+            entries.sort(key=lambda e: e.get("to_lang", "") != "")
+            by_source = {_fold_case(e["source"]): e for e in entries}
+            patterns = list(by_source.keys())
+            cached = (AhoCorasick(patterns), [by_source[p] for p in patterns])
+            self._automata[to_lang] = cached
+        return cached
+
+    def find_terms(self, text: str, to_lang: str = "zh") -> List[Tuple[int, int, Dict]]:
+        """
+        查找文本中出现的术语（忽略大小写，拉丁术语按整词匹配）
+
+        Returns:
+            (起始位置, 结束位置, 术语条目) 列表
+        """
+        if not text or self.is_empty():
+            return []
+        automaton, entries = self._get_automaton(to_lang)
+
+        def on_word_boundary(start, end):
+            # 拉丁术语不能匹配到单词内部，例如 "cat" 不应匹配 "category"
+            if _is_word_char(text[start]) and start > 0 and _is_word_char(text[start - 1]):
+                return False
+            if _is_word_char(text[end - 1]) and end < len(text) and _is_word_char(text[end]):
+                return False
+            return True
+
+        return [(start, end, entries[index])
+                for start, end, index in automaton.find_leftmost_longest(_fold_case(text), on_word_boundary)]
+
+    def terms_key(self, text: str, to_lang: str = "zh") -> str:
+        """
+        文本中出现的术语及其当前译法的指纹，没有术语时为空字符串
+
+        翻译记忆用它判断历史译文是否仍符合术语表：只有修改了该文本中出现的术语，
+        指纹才会变化。
+        """
+        terms = sorted({(entry["source"], entry["target"]) for _start, _end, entry in self.find_terms(text, to_lang)})
+        if not terms:
+            return ""
+        return hashlib.sha1("\x00".join(f"{source}\x01{target}" for source, target in terms)
+                            .encode("utf-8")).hexdigest()
+
+    def protect(self, text: str, to_lang: str = "zh") -> Tuple[str, List[str]]:
+        """
+        翻译前处理：把术语替换为占位符
+
+        Args:
+            text: 原文
+            to_lang: 目标语言代码
+
+        Returns:
+            (替换后的文本, 按占位符序号排列的术语译法)
+        """
+        matches = self.find_terms(text, to_lang)
+        if not matches:
+            return text, []
+        parts = []
+        replacements = []
+        last = 0
+        for start, end, entry in matches:
+            parts.append(text[last:start])
+            parts.append(self.PLACEHOLDER_TEMPLATE.format(len(replacements)))
+            # 没有填写译法的术语保持原文不译
+            replacements.append(entry["target"] or text[start:end])
+            last = end
+        parts.append(text[last:])
+        return "".join(parts), replacements
+
+    def restore(self, translated: str, replacements: List[str]) -> str:
+        """
+        翻译后处理：把占位符替换为术语译法
+
+        Args:
+            translated: 翻译引擎返回的译文
+            replacements: protect 返回的术语译法列表
+        """
+        if not replacements:
+            return translated
+
+        def substitute(match):
+            index = int(match.group(1))
+            if index < len(replacements):
+                return replacements[index]
+            return match.group(0)
+
+        return self.PLACEHOLDER_PATTERN.sub(substitute, translated)
+
+
+# 全局术语表实例
+_glossary_instance = None
+
+
+def get_glossary() -> Glossary:
+    """获取全局术语表实例"""
+    global _glossary_instance
+    if _glossary_instance is None:
+        _glossary_instance = Glossary()
+    return _glossary_instance
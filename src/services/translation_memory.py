@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+"""
+翻译记忆 - 保存已翻译的原文/译文片段，并通过 MinHash 索引查找近似匹配
+
+精确匹配直接复用历史译文，不再调用翻译API；近似匹配（默认相似度≥85%）
+作为参考译文立即提供给界面。条目记录写入时所用术语译法的指纹，术语表修改后
+受影响的条目不再作为精确匹配复用。
+
+自动保存在后台线程中写入紧凑的 JSON，不阻塞界面线程。
+"""
+import os
+import re
+import json
+import atexit
+import time
+import zlib
+import hashlib
+import difflib
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..data.data_manager import DataManager
+
+
+@dataclass
+class MemoryMatch:
+    """翻译记忆的匹配结果"""
+    source: str
+    target: str
+    score: float
+    entry_id: str
+    stale_terms: bool = False  # 原文相同，但译文写入后术语表中相关术语的译法已修改
+
+    @property
+    def is_exact(self) -> bool:
+        """是否为可以直接复用的精确匹配"""
+        return self.score >= 1.0 and not self.stale_terms
+
+
+def normalize_segment(text: str) -> str:
+    """规范化片段文本：合并空白字符并去掉首尾空白"""
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+class TranslationMemory:
+    """翻译记忆库"""
+
+    def __init__(self, file_name: str = "translation_memory.json", threshold: float = 0.85,
+                 ngram_size: int = 3, num_perm: int = 64, bands: int = 16,
+                 max_entries: int = 20000, autosave_every: int = 50, max_candidates: int = 32,
+                 min_fuzzy_length: int = 6):
+        """
+        初始化翻译记忆库
+
+        Args:
+            file_name: 保存在 data 目录下的文件名
+            threshold: 近似匹配的最低相似度
+            ngram_size: 字符 n-gram 的长度
+            num_perm: MinHash 签名长度（分桶数）
+            bands: LSH 分带数，num_perm 必须能被其整除
+            max_entries: 最多保存的条目数，超出时淘汰最久未使用的条目
+            autosave_every: 新增多少条目后在后台自动写盘
+            max_candidates: 每次查找最多校验的候选条目数
+            min_fuzzy_length: 短于该长度的文本只做精确匹配，不加入 LSH 索引
+        """
+        if num_perm % bands != 0:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        self.threshold = threshold
+        self.ngram_size = ngram_size
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        self.autosave_every = autosave_every
+        self.max_candidates = max_candidates
+        self.min_fuzzy_length = min_fuzzy_length
+
+        self.data_manager = DataManager(file_name)
+        self._entries: Dict[str, Dict] = {}
+        self._exact_index: Dict[Tuple[str, str, str], str] = {}  # (规范化原文, 源语言, 目标语言): 条目ID
+        self._exact_any_source: Dict[Tuple[str, str], str] = {}  # (规范化原文, 目标语言): 条目ID，用于自动检测源语言
+        self._lsh_buckets: Dict[Tuple[str, int, int], Set[str]] = {}  # (目标语言, 带序号, 带哈希): 条目ID集合
+        self._entry_bands: Dict[str, List[Tuple[str, int, int]]] = {}
+        self._unsaved_changes = 0
+        # 后台写盘：只保留最新一份待写快照，连续的自动保存合并为一次写入
+        self._save_lock = threading.Lock()       # 串行化文件写入
+        self._pending_lock = threading.Lock()
+        self._pending_snapshot: Optional[Tuple[int, List[Dict]]] = None
+        self._save_thread: Optional[threading.Thread] = None
+        self._snapshot_seq = 0   # 快照序号，较旧的快照不会覆盖较新的写入
+        self._written_seq = 0
+
+        self.load()
+
+    def load(self):
+        """从文件加载记忆库并重建索引"""
+        self._entries.clear()
+        self._exact_index.clear()
+        self._exact_any_source.clear()
+        self._lsh_buckets.clear()
+        self._entry_bands.clear()
+        for entry in self.data_manager.load_data():
+            if entry.get("source") and entry.get("target"):
+                self._index_entry(entry)
+
+    def save(self) -> bool:
+        """将记忆库同步写入文件（等待进行中的后台写入结束）"""
+        snapshot = self._snapshot()
+        with self._pending_lock:
+            self._pending_snapshot = None  # 后台尚未写出的旧快照已被本次取代
+        return self._write(snapshot)
+
+    def flush(self) -> bool:
+        """有未保存的修改时写入文件"""
+        if self._unsaved_changes:
+            return self.save()
+        self._wait_for_background_save()
+        return True
+
+    def save_in_background(self):
+        """在后台线程中写入当前内容（在界面线程中只复制条目）"""
+        snapshot = self._snapshot()
+        with self._pending_lock:
+            self._pending_snapshot = snapshot
+            if self._save_thread is None or not self._save_thread.is_alive():
+                self._save_thread = threading.Thread(target=self._background_save_loop,
+                                                     name="TranslationMemorySave", daemon=True)
+                self._save_thread.start()
+
+    def _snapshot(self) -> Tuple[int, List[Dict]]:
+        self._unsaved_changes = 0
+        self._snapshot_seq += 1
+        # 条目之后仍会被修改（used_at 等），复制一份交给写入线程
+        return self._snapshot_seq, [dict(entry) for entry in self._entries.values()]
+
+    def _background_save_loop(self):
+        while True:
+            with self._pending_lock:
+                snapshot = self._pending_snapshot
+                self._pending_snapshot = None
+                if snapshot is None:
+                    self._save_thread = None
+                    return
+            self._write(snapshot)
+
+    def _wait_for_background_save(self):
+        thread = self._save_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _write(self, snapshot: Tuple[int, List[Dict]]) -> bool:
+        """写入紧凑 JSON：先写临时文件再替换，写入中途退出不会损坏原文件"""
+        seq, entries = snapshot
+        path = self.data_manager._data_file_path
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with self._save_lock:
+            if seq <= self._written_seq:
+                return True
+            try:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(entries, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(temp_path, path)
+                self._written_seq = seq
+                return True
+            except (OSError, TypeError, ValueError) as e:
+                print(f"保存翻译记忆失败: {e}")
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+                return False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, source: str, target: str, from_lang: str = "auto", to_lang: str = "zh",
+            terms_key: str = ""):
+        """
+        添加或更新一条翻译记忆
+
+        Args:
+            source: 原文
+            target: 译文
+            from_lang: 源语言代码
+            to_lang: 目标语言代码
+            terms_key: 译文所用术语译法的指纹（Glossary.terms_key），未使用术语时为空
+        """
+        normalized = normalize_segment(source)
+        if not normalized or not target:
+            return
+        entry_id = self._make_id(normalized, from_lang, to_lang)
+        now = time.time()
+        if entry_id in self._entries:
+            entry = self._entries[entry_id]
+            entry["target"] = target
+            entry["terms_key"] = terms_key
+            entry["used_at"] = now
+        else:
+            entry = {
+                "id": entry_id,
+                "source": normalized,
+                "target": target,
+                "from_lang": from_lang,
+                "to_lang": to_lang,
+                "terms_key": terms_key,
+                "used_at": now,
+            }
+            self._index_entry(entry)
+            self._evict_if_needed()
+
+        self._unsaved_changes += 1
+        if self._unsaved_changes >= self.autosave_every:
+            self.save_in_background()
+
+    def lookup(self, text: str, from_lang: str = "auto", to_lang: str = "zh",
+               exact_only: bool = False, terms_key: Optional[str] = None) -> Optional[MemoryMatch]:
+        """
+        查找与文本最相似的翻译记忆
+
+        Args:
+            text: 待翻译文本
+            from_lang: 源语言代码，"auto" 时匹配任意源语言
+            to_lang: 目标语言代码
+            exact_only: 是否只查找精确匹配
+            terms_key: 当前术语表下该文本的术语指纹；给出时，与条目记录的指纹不同的
+                匹配标记为 stale_terms，不作为精确匹配
+
+        Returns:
+            相似度不低于阈值的最佳匹配，没有时返回 None
+        """
+        normalized = normalize_segment(text)
+        if not normalized:
+            return None
+
+        # 精确匹配
+        entry_id = self._exact_index.get((normalized, from_lang, to_lang))
+        if entry_id is None and from_lang == "auto":
+            entry_id = self._exact_any_source.get((normalized, to_lang))
+        if entry_id is not None:
+            entry = self._entries[entry_id]
+            stale = self._is_stale(entry, terms_key)
+            if not stale:
+                entry["used_at"] = time.time()
+                return MemoryMatch(entry["source"], entry["target"], 1.0, entry_id)
+        if exact_only or len(normalized) < self.min_fuzzy_length:
+            return None
+
+        # 通过 LSH 分桶取候选，按命中的带数排序后只校验最可能的若干个
+        collisions = Counter()
+        for bucket_key in self._band_keys(self._signature(normalized), to_lang):
+            collisions.update(self._lsh_buckets.get(bucket_key, ()))
+
+        best = None
+        matcher = difflib.SequenceMatcher(None, "", normalized, autojunk=False)
+        for candidate_id, _count in collisions.most_common(self.max_candidates):
+            entry = self._entries[candidate_id]
+            if from_lang != "auto" and entry["from_lang"] not in (from_lang, "auto"):
+                continue
+            matcher.set_seq1(entry["source"])
+            if matcher.real_quick_ratio() < self.threshold or matcher.quick_ratio() < self.threshold:
+                continue
+            score = matcher.ratio()
+            if score >= self.threshold and (best is None or score > best.score):
+                best = MemoryMatch(entry["source"], entry["target"], score, candidate_id,
+                                   stale_terms=self._is_stale(entry, terms_key))
+
+        if best is not None:
+            self._entries[best.entry_id]["used_at"] = time.time()
+        return best
+
+    def clear(self):
+        """清空记忆库"""
+        self._entries.clear()
+        self._exact_index.clear()
+        self._exact_any_source.clear()
+        self._lsh_buckets.clear()
+        self._entry_bands.clear()
+        self.save()
+
+    @staticmethod
+    def _is_stale(entry: Dict, terms_key: Optional[str]) -> bool:
+        """条目写入时的术语译法与当前术语表不一致"""
+        return terms_key is not None and entry.get("terms_key", "") != terms_key
+
+    def _make_id(self, normalized: str, from_lang: str, to_lang: str) -> str:
+        """根据原文和语言对生成条目ID"""
+        return hashlib.sha1(f"{from_lang}\x00{to_lang}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    def _index_entry(self, entry: Dict):
+        """将条目加入精确索引和 LSH 索引"""
+        entry_id = entry["id"]
+        self._entries[entry_id] = entry
+        self._exact_index[(entry["source"], entry["from_lang"], entry["to_lang"])] = entry_id
+        self._exact_any_source[(entry["source"], entry["to_lang"])] = entry_id
+        band_keys = []
+        if len(entry["source"]) >= self.min_fuzzy_length:
+            band_keys = self._band_keys(self._signature(entry["source"]), entry["to_lang"])
+        self._entry_bands[entry_id] = band_keys
+        for bucket_key in band_keys:
+            self._lsh_buckets.setdefault(bucket_key, set()).add(entry_id)
+
+    def _remove_entry(self, entry_id: str):
+        """从索引中移除条目"""
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        self._exact_index.pop((entry["source"], entry["from_lang"], entry["to_lang"]), None)
+        if self._exact_any_source.get((entry["source"], entry["to_lang"])) == entry_id:
+            del self._exact_any_source[(entry["source"], entry["to_lang"])]
+        for bucket_key in self._entry_bands.pop(entry_id, []):
+            bucket = self._lsh_buckets.get(bucket_key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._lsh_buckets[bucket_key]
+
+    def _evict_if_needed(self):
+        """超出容量时淘汰最久未使用的条目"""
+        overflow = len(self._entries) - self.max_entries
+        if overflow <= 0:
+            return
+        oldest = sorted(self._entries.values(), key=lambda e: e.get("used_at", 0))[:overflow]
+        for entry in oldest:
+            self._remove_entry(entry["id"])
+
+    def _shingles(self, text: str) -> Set[int]:
+        """提取字符 n-gram 的哈希集合"""
+        text = text.lower()
+        n = self.ngram_size
+        if len(text) <= n:
+            return {zlib.crc32(text.encode("utf-8"))}
+        return {zlib.crc32(text[i:i + n].encode("utf-8")) for i in range(len(text) - n + 1)}
+
+    def _signature(self, text: str) -> List[int]:
+        """
+        计算 MinHash 签名
+
+        采用单次置换 MinHash：每个 n-gram 只哈希一次，按哈希值分到 num_perm 个桶中
+        并保留各桶的最小值，计算量与文本长度成线性关系。短文本的 n-gram 数少于桶数，
+        空桶取右侧（循环）最近的非空桶的值并按距离加偏移（旋转致密化）；否则全空的带
+        对所有短文本都相同，会落入同一个分桶。
+        """
+        num_perm = self.num_perm
+        signature = [-1] * num_perm
+        for h in self._shingles(text):
+            bucket = h % num_perm
+            value = h // num_perm
+            if signature[bucket] < 0 or value < signature[bucket]:
+                signature[bucket] = value
+
+        filled = [i for i, value in enumerate(signature) if value >= 0]
+        if not filled or len(filled) == num_perm:
+            return signature
+        # 桶内的值小于 2^32 // num_perm，按距离加上该值的整数倍，借来的值不会与真实值重复
+        offset = (1 << 32) // num_perm + 1
+        densified = list(signature)
+        next_filled = filled[0] + num_perm
+        for i in range(num_perm - 1, -1, -1):
+            if signature[i] >= 0:
+                next_filled = i
+            else:
+                densified[i] = signature[next_filled % num_perm] + (next_filled - i) * offset
+        return densified
+
+    def _band_keys(self, signature: List[int], to_lang: str) -> List[Tuple[str, int, int]]:
+        """将签名按带切分为 LSH 分桶键"""
+        rows = self.rows
+        return [(to_lang, band, hash(tuple(signature[band * rows:(band + 1) * rows])))
+                for band in range(self.bands)]
+
+
+# 全局翻译记忆实例
+_translation_memory_instance = None
+
+
+def get_translation_memory() -> TranslationMemory:
+    """获取全局翻译记忆实例"""
+    global _translation_memory_instance
+    if _translation_memory_instance is None:
+        _translation_memory_instance = TranslationMemory()
+        # 退出程序时保存尚未写盘的条目
+        atexit.register(_translation_memory_instance.flush)
+    return _translation_memory_instance
@@ -10,6 +10,8 @@ import requests
 from typing import Dict, Tuple, Optional, List, Callable
 
 from .translation_backend import get_translation_backend
+from .translation_memory import get_translation_memory, MemoryMatch
+from .translation_glossary import get_glossary
 
 class TranslationService:
     """百度翻译API服务"""
@@ -53,6 +55,12 @@ class TranslationService:
         self.app_secret = app_secret
         self.backend = get_translation_backend()
         self.current_request_id = None
+        # 翻译记忆：精确匹配直接复用译文，近似匹配由界面作为参考提供
+        self.memory = get_translation_memory()
+        self.use_memory = True
+        # 术语表：翻译前保护术语，翻译后替换为指定译法
+        self.glossary = get_glossary()
+        self.use_glossary = True
         
         # 创建API凭据目录（如果不存在）
         os.makedirs(self.API_CREDENTIALS_DIR, exist_ok=True)
@@ -79,7 +87,9 @@ class TranslationService:
         self.backend.set_credentials(app_id, app_secret)
         
     def has_credentials(self) -> bool:
-        """检查是否已设置凭据"""
+        """检查是否已设置凭据，当前引擎不需要凭据时（如本地模拟引擎）视为已设置"""
+        if not self.backend.engine.requires_credentials:
+            return True
         return bool(self.app_id and self.app_secret)
     
     def get_credentials_file_path(self) -> str:
@@ -214,8 +224,41 @@ class TranslationService:
         if self.current_request_id:
             self.cancel_translation()
             
+        # 译文中应使用的术语译法，用于判断翻译记忆是否仍然有效
+        terms_key = self.glossary.terms_key(text, to_lang) if self.use_glossary and text else ""
+
+        # 翻译记忆中有完全相同的片段（且术语译法未修改）时直接返回，不再调用API
+        if self.use_memory and text:
+            match = self.memory.lookup(text, from_lang, to_lang, terms_key=terms_key)
+            if match and match.is_exact:
+                if callback:
+                    raw_result = {
+                        "trans_result": [{"src": text, "dst": match.target}],
+                        "translation_memory": {"score": match.score},
+                    }
+                    try:
+                        callback(True, match.target, raw_result)
+                    except Exception as e:
+                        print(f"回调函数执行错误: {e}")
+                return ""
+                
+        # 术语替换为占位符后再送去翻译
+        request_text, term_replacements = text, []
+        if self.use_glossary and text:
+            request_text, term_replacements = self.glossary.protect(text, to_lang)
+            
+        def on_translation_complete(success, result, raw_result):
+            # 占位符还原为术语表中的译法
+            if success and term_replacements:
+                result = self.glossary.restore(result, term_replacements)
+            # 成功的译文写入翻译记忆
+            if success and self.use_memory:
+                self.memory.add(text, result, from_lang, to_lang, terms_key=terms_key)
+            if callback:
+                callback(success, result, raw_result)
+            
         # 使用后端进行异步翻译
-        self.current_request_id = self.backend.translate_async(text, from_lang, to_lang, callback)
+        self.current_request_id = self.backend.translate_async(request_text, from_lang, to_lang, on_translation_complete)
         return self.current_request_id
         try:
             if not self.has_credentials():
@@ -255,6 +298,23 @@ class TranslationService:
                     print(f"回调函数执行错误: {cb_err}")
             return ""
     
+    def lookup_memory(self, text: str, from_lang: str = "auto", to_lang: str = "zh") -> Optional[MemoryMatch]:
+        """
+        在翻译记忆中查找相似片段
+        
+        Args:
+            text: 要翻译的文本
+            from_lang: 源语言代码
+            to_lang: 目标语言代码
+            
+        Returns:
+            最相似的匹配结果（相似度不低于阈值），没有时返回 None
+        """
+        if not self.use_memory or not text:
+            return None
+        terms_key = self.glossary.terms_key(text, to_lang) if self.use_glossary else ""
+        return self.memory.lookup(text, from_lang, to_lang, terms_key=terms_key)
+    
     def cancel_translation(self) -> bool:
         """
         取消当前的翻译请求
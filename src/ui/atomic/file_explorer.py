@@ -4,12 +4,13 @@ import re # Added import for regex
 import shutil # Added for rmtree if needed
 from PyQt6.QtWidgets import (QTreeView, QWidget, QVBoxLayout, QHBoxLayout,
                               QPushButton, QFileDialog, QInputDialog, QMessageBox,
-                              QSizePolicy, QMenu, QLineEdit) # Added QMenu, QLineEdit
+                              QSizePolicy, QMenu, QLineEdit, QStackedWidget, QToolButton) # Added QMenu, QLineEdit
 from PyQt6.QtGui import QFileSystemModel, QIcon, QPalette, QColor, QAction # Added QAction
 from PyQt6.QtCore import QDir, Qt, pyqtSignal, QEvent, QModelIndex, QPoint, QStandardPaths # Added QStandardPaths
 
 # Correct relative import from atomic to core
 from ..core.base_widget import BaseWidget
+from .image_gallery import ImageGalleryView
 # from ..core.theme_manager import ThemeManager # Optional
 
 class FileExplorer(BaseWidget):
@@ -57,6 +58,17 @@ class FileExplorer(BaseWidget):
         # top_bar_layout.addStretch(1)
         # layout.addLayout(top_bar_layout)
 
+        # --- 树状视图 / 缩略图切换 ---
+        view_bar_layout = QHBoxLayout()
+        view_bar_layout.setContentsMargins(2, 2, 2, 2)
+        view_bar_layout.addStretch(1)
+        self.gallery_toggle_button = QToolButton()
+        self.gallery_toggle_button.setText("缩略图")
+        self.gallery_toggle_button.setToolTip("以缩略图网格浏览当前文件夹中的图片")
+        self.gallery_toggle_button.setCheckable(True)
+        view_bar_layout.addWidget(self.gallery_toggle_button)
+        layout.addLayout(view_bar_layout)
+
         # --- File System Model ---
         self.model = QFileSystemModel()
         self.model.setFilter(QDir.Filter.AllEntries | QDir.Filter.NoDotAndDotDot | QDir.Filter.Hidden)
@@ -93,7 +105,12 @@ class FileExplorer(BaseWidget):
         self.tree_view.setDragDropMode(QAbstractItemView.DragDropMode.DragOnly)
 
 
-        layout.addWidget(self.tree_view)
+        self.gallery_view = ImageGalleryView()
+
+        self.view_stack = QStackedWidget()
+        self.view_stack.addWidget(self.tree_view)
+        self.view_stack.addWidget(self.gallery_view)
+        layout.addWidget(self.view_stack)
         self.setLayout(layout)
 
     def _connect_signals(self):
@@ -101,6 +118,8 @@ class FileExplorer(BaseWidget):
         # self.select_workspace_button.clicked.connect(self.browse_for_folder) # Button removed
         self.tree_view.doubleClicked.connect(self._on_item_double_clicked)
         self.tree_view.customContextMenuRequested.connect(self._show_context_menu)
+        self.gallery_toggle_button.toggled.connect(self.set_gallery_mode)
+        self.gallery_view.image_activated.connect(self.file_double_clicked)
         # Optional: Connect selection changes if needed
         # self.tree_view.selectionModel().selectionChanged.connect(self._on_selection_changed)
 
@@ -162,10 +181,33 @@ class FileExplorer(BaseWidget):
             self._current_path = norm_path
             root_index = self.model.setRootPath(norm_path) # Update model's root
             self.tree_view.setRootIndex(root_index)       # Update view's root
+            if self.is_gallery_mode():
+                self.gallery_view.set_folder(norm_path)
             self.root_path_changed.emit(norm_path) # Emit signal
         else:
             print(f"路径无效或不是目录: {norm_path}")
 
+    def is_gallery_mode(self) -> bool:
+        return self.view_stack.currentWidget() is self.gallery_view
+
+    def set_gallery_mode(self, enabled: bool, folder: str | None = None):
+        """切换树状视图和缩略图网格；网格默认显示选中项所在的文件夹"""
+        if enabled:
+            if folder is None:
+                selected_path = self.get_selected_path()
+                if selected_path:
+                    folder = selected_path if os.path.isdir(selected_path) else os.path.dirname(selected_path)
+                else:
+                    folder = self._current_path
+            self.gallery_view.set_folder(folder)
+            self.view_stack.setCurrentWidget(self.gallery_view)
+        else:
+            self.view_stack.setCurrentWidget(self.tree_view)
+        if self.gallery_toggle_button.isChecked() != enabled:
+            self.gallery_toggle_button.blockSignals(True)
+            self.gallery_toggle_button.setChecked(enabled)
+            self.gallery_toggle_button.blockSignals(False)
+
     def get_root_path(self) -> str:
         """获取当前的根路径"""
         return self._current_path
@@ -279,6 +321,13 @@ class FileExplorer(BaseWidget):
             return
 
         menu = QMenu(self.tree_view)
+
+        if self.model.isDir(index):
+            folder_path = self.model.filePath(index)
+            gallery_action = QAction("以缩略图浏览", self)
+            gallery_action.triggered.connect(lambda: self.set_gallery_mode(True, folder_path))
+            menu.addAction(gallery_action)
+            menu.addSeparator()
         
         rename_action = QAction("重命名", self)
         rename_action.triggered.connect(lambda: self._rename_item(index))
@@ -0,0 +1,205 @@
+# src/ui/atomic/image_gallery.py
+import os
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem, QListView,
+                             QToolButton, QLabel, QFileIconProvider)
+from PyQt6.QtGui import QIcon, QPixmap, QColor
+from PyQt6.QtCore import Qt, QSize, QTimer, pyqtSignal
+
+from ...utils.image_loading import IMAGE_EXTENSIONS, PRIORITY_VISIBLE, get_image_decoder, get_decoded_image_cache
+from ...utils.thumbnail_cache import THUMBNAIL_SIZES, get_thumbnail_cache
+
+
+class ImageGalleryView(QWidget):
+    """
+    文件夹缩略图网格：显示子文件夹和图片
+
+    只为滚动到可见范围内的图片请求缩略图，缩略图在解码线程池中生成并保存到磁盘缓存，
+    再次浏览同一文件夹时直接读取。
+    """
+
+    image_activated = pyqtSignal(str)   # 双击图片，参数为图片路径
+    folder_changed = pyqtSignal(str)
+
+    SIZE_CLASS = "normal"
+    # 可见范围前后额外加载的行数（像素）
+    PRELOAD_MARGIN = 300
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.folder = None
+        self._pending = {}  # 缓存键: 列表项
+        self.decoder = get_image_decoder()
+        self.cache = get_decoded_image_cache()
+        self.thumbnails = get_thumbnail_cache()
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(2)
+
+        header = QHBoxLayout()
+        header.setContentsMargins(2, 2, 2, 0)
+        self.up_button = QToolButton()
+        self.up_button.setText("↑")
+        self.up_button.setToolTip("上一级文件夹")
+        self.up_button.clicked.connect(self.go_up)
+        header.addWidget(self.up_button)
+        self.path_label = QLabel()
+        self.path_label.setStyleSheet("color: gray;")
+        header.addWidget(self.path_label, 1)
+        layout.addLayout(header)
+
+        thumb_size = THUMBNAIL_SIZES[self.SIZE_CLASS]
+        self.list_widget = QListWidget()
+        self.list_widget.setViewMode(QListView.ViewMode.IconMode)
+        self.list_widget.setFlow(QListView.Flow.LeftToRight)
+        self.list_widget.setWrapping(True)
+        self.list_widget.setMovement(QListView.Movement.Static)
+        self.list_widget.setResizeMode(QListView.ResizeMode.Adjust)
+        self.list_widget.setUniformItemSizes(True)
+        self.list_widget.setIconSize(QSize(thumb_size, thumb_size))
+        self.list_widget.setGridSize(QSize(thumb_size + 20, thumb_size + 36))
+        self.list_widget.setWordWrap(True)
+        self.list_widget.setTextElideMode(Qt.TextElideMode.ElideMiddle)
+        self.list_widget.itemDoubleClicked.connect(self._on_item_double_clicked)
+        self.list_widget.verticalScrollBar().valueChanged.connect(self._schedule_thumbnail_load)
+        layout.addWidget(self.list_widget, 1)
+
+        placeholder = QPixmap(thumb_size, thumb_size)
+        placeholder.fill(QColor("#e0e0e0"))
+        self._placeholder_icon = QIcon(placeholder)
+        self._folder_icon = QFileIconProvider().icon(QFileIconProvider.IconType.Folder)
+
+        self._thumbnail_timer = QTimer(self)
+        self._thumbnail_timer.setSingleShot(True)
+        self._thumbnail_timer.setInterval(50)
+        self._thumbnail_timer.timeout.connect(self._load_visible_thumbnails)
+
+        self.decoder.image_decoded.connect(self._on_image_decoded)
+
+    # ---- 文件夹 ----
+    def set_folder(self, folder):
+        """显示文件夹中的子文件夹和图片"""
+        folder = os.path.normpath(folder)
+        try:
+            with os.scandir(folder) as it:
+                entries = [(entry.name, entry.is_dir()) for entry in it if not entry.name.startswith(".")]
+        except OSError as e:
+            self.path_label.setText(f"无法读取文件夹: {e}")
+            return
+        self._cancel_pending()
+        self.folder = folder
+        self.path_label.setText(folder)
+        self.path_label.setToolTip(folder)
+        self.up_button.setEnabled(os.path.dirname(folder) != folder)
+
+        folders = sorted((name for name, is_dir in entries if is_dir), key=str.lower)
+        images = sorted((name for name, is_dir in entries
+                         if not is_dir and os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS), key=str.lower)
+        self.list_widget.setUpdatesEnabled(False)
+        self.list_widget.clear()
+        for name in folders:
+            item = QListWidgetItem(self._folder_icon, name)
+            item.setData(Qt.ItemDataRole.UserRole, (os.path.join(folder, name), True))
+            self.list_widget.addItem(item)
+        for name in images:
+            item = QListWidgetItem(self._placeholder_icon, name)
+            item.setData(Qt.ItemDataRole.UserRole, (os.path.join(folder, name), False))
+            item.setToolTip(name)
+            self.list_widget.addItem(item)
+        self.list_widget.setUpdatesEnabled(True)
+        self.list_widget.scrollToTop()
+        self._schedule_thumbnail_load()
+        self.folder_changed.emit(folder)
+
+    def refresh(self):
+        if self.folder:
+            self.set_folder(self.folder)
+
+    def go_up(self):
+        if self.folder:
+            parent = os.path.dirname(self.folder)
+            if parent != self.folder:
+                self.set_folder(parent)
+
+    def _on_item_double_clicked(self, item):
+        path, is_dir = item.data(Qt.ItemDataRole.UserRole)
+        if is_dir:
+            self.set_folder(path)
+        else:
+            self.image_activated.emit(path)
+
+    # ---- 缩略图 ----
+    def _schedule_thumbnail_load(self, *_args):
+        if not self._thumbnail_timer.isActive():
+            self._thumbnail_timer.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._schedule_thumbnail_load()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._schedule_thumbnail_load()
+
+    def _visible_rows(self):
+        """与可见范围（上下各加 PRELOAD_MARGIN 像素）相交的行号范围"""
+        count = self.list_widget.count()
+        if count == 0:
+            return range(0)
+        viewport = self.list_widget.viewport().rect().adjusted(0, -self.PRELOAD_MARGIN, 0, self.PRELOAD_MARGIN)
+        # 网格按行从上到下排列，二分查找第一个底边进入可见范围的项
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if self.list_widget.visualItemRect(self.list_widget.item(middle)).bottom() < viewport.top():
+                low = middle + 1
+            else:
+                high = middle
+        last = low
+        while last < count and self.list_widget.visualItemRect(self.list_widget.item(last)).top() <= viewport.bottom():
+            last += 1
+        return range(low, last)
+
+    def _load_visible_thumbnails(self):
+        if not self.isVisible():
+            return
+        wanted = {}
+        for row in self._visible_rows():
+            item = self.list_widget.item(row)
+            path, is_dir = item.data(Qt.ItemDataRole.UserRole)
+            if is_dir or item.data(Qt.ItemDataRole.UserRole + 1):
+                continue
+            try:
+                file_key = self.thumbnails.file_key(path)
+            except OSError:
+                continue
+            key = ("thumb", file_key, self.SIZE_CLASS)
+            image = self.cache.get(key)
+            if image is not None:
+                self._set_thumbnail(item, image)
+                continue
+            wanted[key] = item
+            self.decoder.submit(key, lambda p=path: self.thumbnails.get_or_create(p, self.SIZE_CLASS),
+                                priority=PRIORITY_VISIBLE + 1)
+        # 滚出可见范围、尚未开始生成的不再生成
+        for key in set(self._pending) - set(wanted):
+            self.decoder.cancel(key)
+        self._pending = wanted
+
+    def _set_thumbnail(self, item, image):
+        item.setIcon(QIcon(QPixmap.fromImage(image)))
+        item.setData(Qt.ItemDataRole.UserRole + 1, True)  # 已处理，不再请求
+
+    def _on_image_decoded(self, key, image):
+        item = self._pending.pop(key, None)
+        if item is None:
+            return
+        if image is not None:
+            self._set_thumbnail(item, image)
+        else:
+            item.setData(Qt.ItemDataRole.UserRole + 1, True)  # 无法生成，不再请求
+
+    def _cancel_pending(self):
+        for key in self._pending:
+            self.decoder.cancel(key)
+        self._pending = {}
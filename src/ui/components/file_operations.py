@@ -1,7 +1,7 @@
 import os
 import sys # Added for sys.platform check
 from PyQt6.QtWidgets import (QFileDialog, QMessageBox, QApplication, QTabWidget) # Ensuring QTabWidget is imported
-from PyQt6.QtCore import QSignalBlocker, QTimer, QUrl # Added QTimer and QUrl
+from PyQt6.QtCore import QSignalBlocker, QTimer, QUrl, Qt # Added QTimer and QUrl
 import shutil # For cleaning up resource directories
 
 # Corrected relative imports
@@ -10,14 +10,21 @@ from ..atomic.editor.text_editor import TextEditor
 from wangEditor.wang_editor import WangEditor # Import from the project's wangEditor directory
 from ..atomic.markdown_editor_widget import MarkdownEditorWidget
 from ..views.pdf_viewer_view import PdfViewerView
-from ..views.office_viewer_view import OfficeViewerWidget
+from ..views.office_viewer_view import OfficeViewerWidget, SUPPORTED_OFFICE_EXTENSIONS
 from ..views.image_viewer_view import ImageViewWidget
 from ..views.video_player_view import VideoPlayerWidget
+from ..views.spreadsheet_viewer_view import SpreadsheetViewWidget
 # EditableHtmlPreviewWidget is now used inside HtmlViewContainer
 # from ..views.editable_html_preview_widget import EditableHtmlPreviewWidget 
 from ..composite.html_view_container import HtmlViewContainer, HTML_SKELETON # Import new container
 from ..views.editable_html_preview_widget import EditableHtmlPreviewWidget # For type checking
 from PyQt6.QtGui import QTextDocument # Added for HTML to Text conversion
+from ...utils.html_inliner import export_self_contained_html
+from ...services.conversion_job_queue import get_conversion_job_queue
+from ...utils.temp_artifacts import get_temp_artifact_manager
+from ...utils.office_converters import get_office_converter_names
+from ...utils.ooxml_html import OOXML_HTML_EXTENSIONS
+from ...utils.spreadsheet_readers import SPREADSHEET_EXTENSIONS
 
 
 class FileOperations:
@@ -129,7 +136,7 @@ class FileOperations:
         start_dir = initial_dir or os.getcwd()
         file_name, _ = QFileDialog.getOpenFileName(
             self.main_window, "打开文件", start_dir,
-            "Office 文件 (*.docx *.xlsx *.pptx);;HTML文件 (*.html);;Markdown文件 (*.md *.markdown);;文本文件 (*.txt);;PDF文件 (*.pdf);;所有文件 (*)"
+            "Office 文件 (*.docx *.xlsx *.pptx);;表格文件 (*.xlsx *.xlsm *.csv *.tsv);;HTML文件 (*.html);;Markdown文件 (*.md *.markdown);;文本文件 (*.txt);;PDF文件 (*.pdf);;所有文件 (*)"
         )
         if file_name:
             self.open_file_from_path(file_name)
@@ -165,13 +172,20 @@ class FileOperations:
             elif ext.lower() in image_extensions:
                 editor_to_add = ImageViewWidget(self.main_window)
                 if not editor_to_add.load_image(abs_file_path): editor_to_add = None
+                else: editor_to_add.current_image_changed.connect(
+                    lambda path, ed=editor_to_add: self._on_image_view_navigated(ed, path))
                 opened_as_special_view = True
             elif ext.lower() in video_extensions:
                 editor_to_add = VideoPlayerWidget(self.main_window)
                 if not editor_to_add.load_video(abs_file_path): editor_to_add = None
                 opened_as_special_view = True
-            elif ext.lower() in ['.docx', '.doc', '.xlsx', '.xls', '.pptx', '.ppt']:
-                if sys.platform == 'win32':
+            elif ext.lower() in SPREADSHEET_EXTENSIONS:
+                # XLSX/CSV 直接在表格查看器中按需读取，不经过 Office→PDF 转换
+                editor_to_add = SpreadsheetViewWidget(self.main_window)
+                if not editor_to_add.load_file(abs_file_path): editor_to_add = None
+                opened_as_special_view = True
+            elif ext.lower() in SUPPORTED_OFFICE_EXTENSIONS:
+                if get_office_converter_names(available_only=True):
                     msg_box = QMessageBox(self.main_window); msg_box.setWindowTitle("选择预览类型")
                     msg_box.setText(f"您希望如何预览 Office 文件 '{file_base_name}'？"); pdf_button = msg_box.addButton("PDF 预览", QMessageBox.ButtonRole.YesRole)
                     html_button = msg_box.addButton("HTML 预览", QMessageBox.ButtonRole.NoRole); cancel_button = msg_box.addButton("取消", QMessageBox.ButtonRole.RejectRole)
@@ -183,7 +197,12 @@ class FileOperations:
                     viewer_widget = OfficeViewerWidget(self.main_window)
                     if viewer_widget.loadFile(abs_file_path, preview_format=preview_format): editor_to_add = viewer_widget
                     else: viewer_widget.deleteLater()
-                else: QMessageBox.information(self.main_window, "功能限制", "Office 文件预览功能目前仅在 Windows 系统上通过本地 Office 转换实现。")
+                elif ext.lower() in OOXML_HTML_EXTENSIONS:
+                    # 没有 Office 转换程序时，DOCX/PPTX 仍可直接转换为HTML预览
+                    viewer_widget = OfficeViewerWidget(self.main_window)
+                    if viewer_widget.loadFile(abs_file_path, preview_format='html'): editor_to_add = viewer_widget
+                    else: viewer_widget.deleteLater()
+                else: QMessageBox.information(self.main_window, "功能限制", "Office 文件预览需要 Microsoft Office (Windows) 或 LibreOffice。")
                 opened_as_special_view = True
             elif ext.lower() == '.html':
                 try:
@@ -241,6 +260,17 @@ class FileOperations:
         except Exception as e:
              QMessageBox.critical(self.main_window, "打开文件错误", f"打开文件 '{file_path}' 时发生未知错误:\n{str(e)}")
 
+    def _on_image_view_navigated(self, image_view, new_path):
+        """图片查看器切换到同一文件夹中的其他图片后，更新标签页标题和文件路径"""
+        image_view.setProperty("file_path", os.path.abspath(new_path))
+        stack = image_view.parentWidget()
+        tab_widget = stack.parentWidget() if stack else None
+        if isinstance(tab_widget, QTabWidget):
+            index = tab_widget.indexOf(image_view)
+            if index != -1:
+                tab_widget.setTabText(index, os.path.basename(new_path))
+                tab_widget.setTabToolTip(index, new_path)
+
     def _delayed_add_opened_file_tab(self, editor_widget, tab_name_to_add, file_path_for_status):
         current_active_group = self.ui_manager.get_active_editor_group()
         target_tab_widget = current_active_group.get_tab_widget() if current_active_group else self.main_window.tab_widget 
@@ -434,22 +464,23 @@ class FileOperations:
 
         if self.main_window.previous_editor == widget_in_tab:
              self.main_window.previous_editor = None
+
+        # 取消属于该标签页的转换任务（结束正在运行的转换进程），再清理其资源目录
+        get_conversion_job_queue().cancel_owner(widget_in_tab)
         
         # Cleanup resource directory if this tab was from a PDF to HTML conversion
         # Check if the widget_in_tab (which could be HtmlViewContainer) has 'resource_dir_path'
         resource_dir_path = widget_in_tab.property("resource_dir_path")
         pdf_source_path = widget_in_tab.property("pdf_source_path") # Usually set on the container by UIManager
 
-        if resource_dir_path and os.path.isdir(resource_dir_path):
-            try:
-                shutil.rmtree(resource_dir_path)
-                tab_display_name = widget_in_tab.property('untitled_name') or \
-                                   (os.path.basename(pdf_source_path) if pdf_source_path else "Unknown Tab")
-                print(f"DEBUG FileOperations: Cleaned up resource dir {resource_dir_path} for tab '{tab_display_name}'")
-                if pdf_source_path and pdf_source_path in self.ui_manager.pdf_conversion_resource_dirs:
-                    del self.ui_manager.pdf_conversion_resource_dirs[pdf_source_path]
-            except Exception as e_shutil:
-                print(f"DEBUG FileOperations: Error cleaning up resource dir {resource_dir_path}: {e_shutil}")
+        if resource_dir_path:
+            # 释放标签页持有的引用，目录由临时产物管理器按容量上限淘汰
+            get_temp_artifact_manager().release(resource_dir_path)
+            tab_display_name = widget_in_tab.property('untitled_name') or \
+                               (os.path.basename(pdf_source_path) if pdf_source_path else "Unknown Tab")
+            print(f"DEBUG FileOperations: Released resource dir {resource_dir_path} for tab '{tab_display_name}'")
+            if pdf_source_path and pdf_source_path in self.ui_manager.pdf_conversion_resource_dirs:
+                del self.ui_manager.pdf_conversion_resource_dirs[pdf_source_path]
 
         current_tab_widget.removeTab(index)
         if hasattr(widget_in_tab, 'cleanup'): widget_in_tab.cleanup()
@@ -703,9 +734,20 @@ class FileOperations:
         else: # "所有文件" or unknown filter, assume raw content is fine for its original type
             content_to_export = raw_content
             
+        # PDF转换得到的HTML依赖标签页关闭时会被删除的资源目录，导出为HTML时把资源内联为单个文件
+        resource_dir = current_tab_container.property("resource_dir_path") if isinstance(current_tab_container, HtmlViewContainer) else None
+        inline_resources = bool(resource_dir) and os.path.isdir(resource_dir) and file_path_to_export.lower().endswith((".html", ".htm"))
+            
         try:
-            with open(file_path_to_export, 'w', encoding='utf-8') as f:
-                f.write(content_to_export)
+            if inline_resources:
+                QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+                try:
+                    export_self_contained_html(content_to_export, resource_dir, file_path_to_export)
+                finally:
+                    QApplication.restoreOverrideCursor()
+            else:
+                with open(file_path_to_export, 'w', encoding='utf-8') as f:
+                    f.write(content_to_export)
             if hasattr(self.main_window, 'statusBar'):
                 self.main_window.statusBar.showMessage(f"文件已导出到: {file_path_to_export}", 5000)
         except Exception as e:
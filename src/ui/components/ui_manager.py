@@ -1,6 +1,7 @@
 import os
-from PyQt6.QtWidgets import QDockWidget, QMessageBox, QWidget, QTabWidget, QApplication
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QObject, pyqtSlot, QUrl
+import json
+from PyQt6.QtWidgets import QDockWidget, QMessageBox, QWidget, QTabWidget, QApplication, QProgressBar
+from PyQt6.QtCore import Qt, pyqtSignal, QObject, pyqtSlot, QUrl
 from PyQt6.QtGui import QIcon, QColor
 import shutil # Added for cleaning up resource directory
 
@@ -13,6 +14,9 @@ from ..views.note_downloader_view import NoteDownloaderView
 from ..views.pdf_viewer_view import PdfViewerView # This is the QWebEngineView based one
 from ..dialogs.pdf_action_dialog import PdfActionChoiceDialog # For PDF action choices
 from ...utils import pdf_utils # For extract_pdf_content
+from ...utils.job_control import JobCancelledError
+from ...services.conversion_job_queue import get_conversion_job_queue, PRIORITY_VISIBLE
+from ...utils.temp_artifacts import get_temp_artifact_manager
 # Import BaseWidget for type checking if needed
 from ..core.base_widget import BaseWidget
 # Import editor types for checking
@@ -24,27 +28,83 @@ from ..core.theme_manager import ThemeManager
 from ..composite.editor_group_widget import EditorGroupWidget # Added
 
 # --- Worker for PDF to HTML conversion ---
+# run() 作为任务函数在转换任务队列的工作线程中执行，信号排队到主线程
 class PdfToHtmlWorkerForUIManager(QObject):
     # Signal now emits: pdf_path, full_html_file_path, resource_base_dir_path
     conversion_finished = pyqtSignal(str, str, str) 
-    conversion_error = pyqtSignal(str, str)    # error_title, error_message
+    conversion_error = pyqtSignal(str, str, str)    # pdf_path, error_title, error_message
+    # 渐进式显示：首页完成 (pdf_path, 主HTML路径, 资源目录, 已完成页数, 总页数)
+    first_page_ready = pyqtSignal(str, str, str, int, int)
+    # 后续页面完成 (pdf_path, 样式表路径列表, 页面HTML, 已完成页数, 总页数)
+    pages_ready = pyqtSignal(str, list, str, int, int)
 
     def __init__(self, pdf_path):
         super().__init__()
         self.pdf_path = pdf_path
 
-    @pyqtSlot()
-    def run(self):
+    def run(self, job=None):
         try:
             # extract_pdf_content now returns (full_html_path, temp_dir_path)
-            full_html_path, resource_base_dir_path = pdf_utils.extract_pdf_content(self.pdf_path)
+            full_html_path, resource_base_dir_path = pdf_utils.extract_pdf_content(
+                self.pdf_path, on_first_page=self._emit_first_page, on_pages=self._emit_pages, job=job)
             self.conversion_finished.emit(self.pdf_path, full_html_path, resource_base_dir_path)
+        except JobCancelledError:
+            # 由任务队列发出 job_cancelled
+            raise
         except FileNotFoundError as e:
-            self.conversion_error.emit("文件错误", str(e))
+            self.conversion_error.emit(self.pdf_path, "文件错误", str(e))
         except RuntimeError as e:
-            self.conversion_error.emit("HTML 转换失败", str(e))
+            self.conversion_error.emit(self.pdf_path, "HTML 转换失败", str(e))
         except Exception as e:
-            self.conversion_error.emit("未知转换错误", f"转换过程中发生意外错误: {e}")
+            self.conversion_error.emit(self.pdf_path, "未知转换错误", f"转换过程中发生意外错误: {e}")
+
+    def _emit_first_page(self, html_path, pages_done, page_count):
+        self.first_page_ready.emit(self.pdf_path, html_path, os.path.dirname(html_path), pages_done, page_count)
+
+    def _emit_pages(self, css_hrefs, pages_html, pages_done, page_count):
+        self.pages_ready.emit(self.pdf_path, list(css_hrefs), pages_html, pages_done, page_count)
+
+
+# 把新完成的一段页面按页码插入已显示的 pdf2htmlEX 文档，并通知其查看器重新扫描页面
+_APPEND_PDF_PAGES_JS = """
+(function(cssHrefs, pagesHtml) {
+    var head = document.head || document.getElementsByTagName('head')[0];
+    cssHrefs.forEach(function(href) {
+        var link = document.createElement('link');
+        link.rel = 'stylesheet';
+        link.href = href;
+        head.appendChild(link);
+    });
+    var container = document.getElementById('page-container');
+    if (!container) return 0;
+    var pageNo = function(el) { return parseInt(el.getAttribute('data-page-no') || '0', 16); };
+    var existing = Array.prototype.slice.call(container.children);
+    var holder = document.createElement('div');
+    holder.innerHTML = pagesHtml;
+    var added = 0;
+    while (holder.firstElementChild) {
+        var page = holder.firstElementChild;
+        var no = pageNo(page);
+        var before = null;
+        for (var i = 0; i < existing.length; i++) {
+            if (pageNo(existing[i]) > no) { before = existing[i]; break; }
+        }
+        container.insertBefore(page, before);
+        var contents = page.getElementsByClassName('pc');
+        for (var j = 0; j < contents.length; j++) contents[j].classList.add('opened');
+        added++;
+    }
+    var viewer = window.pdf2htmlEX && window.pdf2htmlEX.defaultViewer;
+    if (viewer) {
+        try {
+            if (viewer.find_pages) viewer.find_pages();
+            if (viewer.schedule_render) viewer.schedule_render(true);
+        } catch (e) {}
+    }
+    return added;
+})(%s, %s);
+"""
+
 
 class UIManager(QObject): # Inherit from QObject
     """处理MainWindow的UI管理功能，包括主题应用、视图/编辑器管理和工具窗口管理"""
@@ -59,9 +119,16 @@ class UIManager(QObject): # Inherit from QObject
         self.view_docks = {} 
         self.active_editor_group: EditorGroupWidget | None = None
         
-        self.pdf_conversion_thread = None 
-        self.pdf_conversion_worker = None
+        # 进行中的PDF转HTML任务: pdf_path -> (任务ID, worker)
+        self.pdf_conversion_jobs = {}
         self.pdf_conversion_resource_dirs = {} # pdf_path: resource_dir_path
+        # 渐进式转换中已打开的预览: pdf_path -> {"container", "loaded", "parts"}
+        self.pdf_progressive_views = {}
+        self.pdf_conversion_progress_bar = None
+        job_queue = get_conversion_job_queue()
+        job_queue.job_finished.connect(self._on_conversion_job_done)
+        job_queue.job_failed.connect(self._on_conversion_job_done)
+        job_queue.job_cancelled.connect(self._on_conversion_job_cancelled)
 
     def apply_current_theme(self):
         """应用当前主题和缩放级别到UI组件"""
@@ -191,28 +258,7 @@ class UIManager(QObject): # Inherit from QObject
             choice = dialog.exec()
 
             if choice == PdfActionChoiceDialog.PREVIEW_AS_PDF_IN_TAB:
-                pdf_viewer_tab_widget = PdfViewerView(self.main_window) 
-                if pdf_viewer_tab_widget.load_pdf(abs_pdf_path):
-                    tab_name = os.path.basename(abs_pdf_path)
-                    
-                    current_tab_widget = self.tab_widget
-                    if not current_tab_widget and hasattr(self.main_window, 'tab_widget') and self.main_window.tab_widget:
-                        current_tab_widget = self.main_window.tab_widget
-                        self.tab_widget = current_tab_widget 
-
-                    if not current_tab_widget:
-                        QMessageBox.critical(self.main_window, "错误", "标签页管理器未能正确初始化或访问。")
-                        pdf_viewer_tab_widget.deleteLater()
-                        return
-                        
-                    index = current_tab_widget.addTab(pdf_viewer_tab_widget, tab_name)
-                    current_tab_widget.setCurrentIndex(index)
-                    pdf_viewer_tab_widget.setProperty("file_path", abs_pdf_path) 
-                    pdf_viewer_tab_widget.setFocus()
-                    if hasattr(self.main_window, 'statusBar') and self.main_window.statusBar:
-                        self.main_window.statusBar.showMessage(f"已打开 PDF 预览: {pdf_path}")
-                else:
-                    pdf_viewer_tab_widget.deleteLater()
+                self.open_pdf_viewer_tab(abs_pdf_path)
 
             elif choice == PdfActionChoiceDialog.CONVERT_TO_HTML_SOURCE:
                 self._start_pdf_to_html_conversion(abs_pdf_path)
@@ -222,45 +268,208 @@ class UIManager(QObject): # Inherit from QObject
             import traceback
             traceback.print_exc()
 
-    def _start_pdf_to_html_conversion(self, pdf_path: str):
-        if hasattr(self, 'pdf_conversion_thread') and self.pdf_conversion_thread and self.pdf_conversion_thread.isRunning():
-            self.pdf_conversion_thread.quit()
-            self.pdf_conversion_thread.wait(1000) 
-        
-        self.pdf_conversion_thread = QThread(self.main_window) 
-        self.pdf_conversion_worker = PdfToHtmlWorkerForUIManager(pdf_path)
-        self.pdf_conversion_worker.moveToThread(self.pdf_conversion_thread)
+    def open_pdf_viewer_tab(self, pdf_path: str, page_index: int = -1):
+        """在PDF查看器标签页中打开PDF（已打开时切换到该标签页），page_index >= 0 时跳到该页"""
+        abs_pdf_path = os.path.abspath(pdf_path)
+        current_tab_widget = self.tab_widget
+        if not current_tab_widget and hasattr(self.main_window, 'tab_widget') and self.main_window.tab_widget:
+            current_tab_widget = self.main_window.tab_widget
+            self.tab_widget = current_tab_widget 
 
-        self.pdf_conversion_worker.conversion_finished.connect(self._on_pdf_to_html_conversion_finished)
-        self.pdf_conversion_worker.conversion_error.connect(self._on_pdf_to_html_conversion_error)
-        
-        self.pdf_conversion_thread.started.connect(self.pdf_conversion_worker.run)
-        self.pdf_conversion_thread.finished.connect(self.pdf_conversion_worker.deleteLater)
-        self.pdf_conversion_thread.finished.connect(self.pdf_conversion_thread.deleteLater)
-        self.pdf_conversion_thread.finished.connect(self._clear_conversion_refs)
+        if not current_tab_widget:
+            QMessageBox.critical(self.main_window, "错误", "标签页管理器未能正确初始化或访问。")
+            return
+
+        for index in range(current_tab_widget.count()):
+            widget = current_tab_widget.widget(index)
+            if isinstance(widget, PdfViewerView) and widget.pdf_path and \
+                    os.path.normcase(os.path.abspath(widget.pdf_path)) == os.path.normcase(abs_pdf_path):
+                current_tab_widget.setCurrentIndex(index)
+                if page_index >= 0:
+                    widget.go_to_page(page_index)
+                return
 
+        pdf_viewer_tab_widget = PdfViewerView(self.main_window) 
+        if not pdf_viewer_tab_widget.load_pdf(abs_pdf_path):
+            pdf_viewer_tab_widget.deleteLater()
+            return
+        # 跨文档搜索结果：在新标签页中打开对应的PDF
+        pdf_viewer_tab_widget.open_pdf_requested.connect(self.open_pdf_viewer_tab)
+        if page_index >= 0:
+            pdf_viewer_tab_widget.go_to_page(page_index)
+        tab_name = os.path.basename(abs_pdf_path)
+        index = current_tab_widget.addTab(pdf_viewer_tab_widget, tab_name)
+        current_tab_widget.setCurrentIndex(index)
+        pdf_viewer_tab_widget.setProperty("file_path", abs_pdf_path) 
+        pdf_viewer_tab_widget.setFocus()
         if hasattr(self.main_window, 'statusBar') and self.main_window.statusBar:
-            self.main_window.statusBar.showMessage(f"正在转换 '{os.path.basename(pdf_path)}' 为 HTML...")
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        self.pdf_conversion_thread.start()
+            self.main_window.statusBar.showMessage(f"已打开 PDF 预览: {pdf_path}")
+
+    def _start_pdf_to_html_conversion(self, pdf_path: str):
+        status_bar = getattr(self.main_window, 'statusBar', None)
+        if pdf_path in self.pdf_conversion_jobs:
+            if status_bar:
+                status_bar.showMessage(f"'{os.path.basename(pdf_path)}' 正在转换中，请稍候。", 5000)
+            return
+
+        worker = PdfToHtmlWorkerForUIManager(pdf_path)
+        worker.conversion_finished.connect(self._on_pdf_to_html_conversion_finished)
+        worker.conversion_error.connect(self._on_pdf_to_html_conversion_error)
+        worker.first_page_ready.connect(self._on_pdf_first_page_ready)
+        worker.pages_ready.connect(self._on_pdf_pages_ready)
+
+        job_queue = get_conversion_job_queue()
+        # 标签页在首页完成后才创建，在此之前用户正在等待，按可见任务处理
+        job_id = job_queue.submit(f"PDF转HTML: {os.path.basename(pdf_path)}", worker.run, priority=PRIORITY_VISIBLE)
+        self.pdf_conversion_jobs[pdf_path] = (job_id, worker)
+
+        if status_bar:
+            status_bar.showMessage(f"正在转换 '{os.path.basename(pdf_path)}' 为 HTML（进度见“转换任务”面板）...")
+        self._update_pdf_conversion_progress(0, 0)
+
+    def _pdf_path_for_job(self, job_id):
+        for pdf_path, (pdf_job_id, _worker) in self.pdf_conversion_jobs.items():
+            if pdf_job_id == job_id:
+                return pdf_path
+        return None
+
+    def _on_conversion_job_done(self, job_id, _result=None):
+        # worker 的信号先于队列的信号到达，这里只需释放 worker
+        pdf_path = self._pdf_path_for_job(job_id)
+        if pdf_path is not None:
+            self.pdf_conversion_jobs.pop(pdf_path, None)
+
+    def _on_conversion_job_cancelled(self, job_id):
+        pdf_path = self._pdf_path_for_job(job_id)
+        if pdf_path is None:
+            return
+        self.pdf_conversion_jobs.pop(pdf_path, None)
+        self.pdf_progressive_views.pop(pdf_path, None)
+        if not self.pdf_conversion_jobs:
+            self._hide_pdf_conversion_progress()
+        status_bar = getattr(self.main_window, 'statusBar', None)
+        if status_bar:
+            status_bar.showMessage(f"已取消 '{os.path.basename(pdf_path)}' 的转换。", 5000)
+
+    def _update_pdf_conversion_progress(self, pages_done: int, page_count: int):
+        """在状态栏显示PDF转换进度，page_count 为 0 时显示为忙碌状态"""
+        status_bar = getattr(self.main_window, 'statusBar', None)
+        if not status_bar:
+            return
+        if self.pdf_conversion_progress_bar is None:
+            self.pdf_conversion_progress_bar = QProgressBar(status_bar)
+            self.pdf_conversion_progress_bar.setMaximumWidth(200)
+            status_bar.addPermanentWidget(self.pdf_conversion_progress_bar)
+        self.pdf_conversion_progress_bar.setRange(0, max(0, page_count))
+        self.pdf_conversion_progress_bar.setValue(pages_done)
+        self.pdf_conversion_progress_bar.setFormat("%v/%m 页")
+        self.pdf_conversion_progress_bar.show()
+
+    def _hide_pdf_conversion_progress(self):
+        if self.pdf_conversion_progress_bar is not None:
+            self.pdf_conversion_progress_bar.hide()
+
+    @pyqtSlot(str, str, str, int, int)
+    def _on_pdf_first_page_ready(self, pdf_path: str, html_path: str, resource_dir_path: str,
+                                 pages_done: int, page_count: int):
+        """首页转换完成：立即打开预览，其余页面在后台继续转换"""
+        state = {"container": None, "loaded": False, "parts": []}
+        self.pdf_progressive_views[pdf_path] = state
+        container = self._open_converted_html_view(pdf_path, html_path, resource_dir_path)
+        if container is None:
+            return
+        state["container"] = container
+        # 其余页面的转换归属于新标签页：标签页可见时优先，关闭时取消
+        if pdf_path in self.pdf_conversion_jobs:
+            get_conversion_job_queue().set_owner(self.pdf_conversion_jobs[pdf_path][0], container)
+        container.preview_widget.loadFinished.connect(lambda ok, p=pdf_path: self._on_pdf_preview_loaded(p))
+        # 转换过程中标签页被关闭时，不再向其追加页面
+        container.destroyed.connect(lambda _obj=None, st=state: st.update(container=None, parts=[]))
+
+        status_bar = getattr(self.main_window, 'statusBar', None)
+        if page_count and pages_done < page_count:
+            self._update_pdf_conversion_progress(pages_done, page_count)
+            if status_bar:
+                status_bar.showMessage(f"已显示 '{os.path.basename(pdf_path)}' 的前 {pages_done} 页，其余页面正在转换...")
+        else:
+            self._hide_pdf_conversion_progress()
+
+    def _on_pdf_preview_loaded(self, pdf_path: str):
+        # 转换完成前磁盘上的主HTML只含首段，每次（重新）加载后都补上已完成的各段
+        state = self.pdf_progressive_views.get(pdf_path)
+        if not state:
+            return
+        state["loaded"] = True
+        for css_hrefs, pages_html in state["parts"]:
+            self._append_pdf_pages(state, css_hrefs, pages_html)
+
+    @pyqtSlot(str, list, str, int, int)
+    def _on_pdf_pages_ready(self, pdf_path: str, css_hrefs: list, pages_html: str, pages_done: int, page_count: int):
+        """后续页面转换完成：追加到已打开的预览中"""
+        state = self.pdf_progressive_views.get(pdf_path)
+        if state and state["container"] is not None:
+            state["parts"].append((css_hrefs, pages_html))
+            # 首页尚未加载完成时，加载完成后再追加
+            if state["loaded"]:
+                self._append_pdf_pages(state, css_hrefs, pages_html)
+        self._update_pdf_conversion_progress(pages_done, page_count)
+        status_bar = getattr(self.main_window, 'statusBar', None)
+        if status_bar:
+            status_bar.showMessage(f"正在转换 '{os.path.basename(pdf_path)}'：{pages_done}/{page_count} 页")
+
+    def _append_pdf_pages(self, state, css_hrefs, pages_html):
+        container = state["container"]
+        if container is None:
+            return
+        container.preview_widget.page().runJavaScript(
+            _APPEND_PDF_PAGES_JS % (json.dumps(css_hrefs), json.dumps(pages_html)))
+
+    def _finish_progressive_view(self, pdf_path: str, full_html_file_path: str):
+        """全部页面转换完成：源码视图换成合并后的完整文档"""
+        state = self.pdf_progressive_views.pop(pdf_path, None)
+        self._hide_pdf_conversion_progress()
+        status_bar = getattr(self.main_window, 'statusBar', None)
+        if status_bar:
+            status_bar.showMessage(f"'{os.path.basename(pdf_path)}' 已成功转换为 HTML。", 5000)
+        container = state["container"] if state else None
+        if container is None:
+            return
+        document = container.text_editor_widget._editor.document()
+        if document is not None and document.isModified():
+            return
+        try:
+            with open(full_html_file_path, 'r', encoding='utf-8') as f_html:
+                content = f_html.read()
+        except Exception as e_read:
+            print(f"DEBUG UIManager: Error reading stitched HTML {full_html_file_path}: {e_read}")
+            return
+        container.text_editor_widget.setPlainText(content)
+        if document is not None:
+            document.setModified(False)
+        container._raw_html_content_for_preview = content
 
     @pyqtSlot(str, str, str) # pdf_path, full_html_file_path, resource_base_dir_path
     def _on_pdf_to_html_conversion_finished(self, pdf_path: str, full_html_file_path: str, resource_base_dir_path: str):
-        QApplication.restoreOverrideCursor()
+        if pdf_path in self.pdf_progressive_views:
+            # 预览已在首页完成时打开
+            self._finish_progressive_view(pdf_path, full_html_file_path)
+            return
+
+        self._hide_pdf_conversion_progress()
         status_bar = getattr(self.main_window, 'statusBar', None)
         if status_bar:
             status_bar.showMessage(f"'{os.path.basename(pdf_path)}' 已成功转换为 HTML。", 5000)
 
+        self._open_converted_html_view(pdf_path, full_html_file_path, resource_base_dir_path)
+
+    def _open_converted_html_view(self, pdf_path: str, full_html_file_path: str, resource_base_dir_path: str):
+        """在新标签页中打开PDF转换得到的HTML，返回 HtmlViewContainer，失败时返回 None"""
         if not full_html_file_path or not os.path.exists(full_html_file_path):
             QMessageBox.warning(self.main_window, "警告", f"PDF转换后的HTML文件未找到或无效: {full_html_file_path}")
-            self._clear_conversion_refs()
-            if resource_base_dir_path and os.path.isdir(resource_base_dir_path):
-                try:
-                    shutil.rmtree(resource_base_dir_path)
-                    print(f"DEBUG UIManager: Cleaned up resource dir {resource_base_dir_path} due to missing HTML file.")
-                except Exception as e_shutil:
-                    print(f"DEBUG UIManager: Error cleaning up resource dir {resource_base_dir_path}: {e_shutil}")
-            return
+            if resource_base_dir_path:
+                get_temp_artifact_manager().remove(resource_base_dir_path)
+                print(f"DEBUG UIManager: Cleaned up resource dir {resource_base_dir_path} due to missing HTML file.")
+            return None
 
         # Store the resource directory path for later cleanup when the tab is closed
         self.pdf_conversion_resource_dirs[pdf_path] = resource_base_dir_path
@@ -279,10 +488,9 @@ class UIManager(QObject): # Inherit from QObject
                     html_content_for_container = f_html.read()
             except Exception as e_read:
                 QMessageBox.critical(self.main_window, "错误", f"无法读取转换后的HTML文件内容: {full_html_file_path}\n{e_read}")
-                if resource_base_dir_path and os.path.isdir(resource_base_dir_path):
-                    shutil.rmtree(resource_base_dir_path)
-                self._clear_conversion_refs()
-                return
+                if resource_base_dir_path:
+                    get_temp_artifact_manager().remove(resource_base_dir_path)
+                return None
 
             target_tab_widget = self.tab_widget
             if not target_tab_widget and hasattr(self.main_window, 'tab_widget') and self.main_window.tab_widget:
@@ -290,10 +498,9 @@ class UIManager(QObject): # Inherit from QObject
             
             if not target_tab_widget:
                 QMessageBox.critical(self.main_window, "错误", "标签页管理器未能正确初始化或访问。")
-                self._clear_conversion_refs()
-                if resource_base_dir_path and os.path.isdir(resource_base_dir_path): 
-                    shutil.rmtree(resource_base_dir_path)
-                return
+                if resource_base_dir_path:
+                    get_temp_artifact_manager().remove(resource_base_dir_path)
+                return None
             
             # Create HtmlViewContainer instead of EditableHtmlPreviewWidget directly
             # Treat it as an "existing" file (is_new_file=False) so it loads from file_path in preview mode
@@ -330,28 +537,26 @@ class UIManager(QObject): # Inherit from QObject
                  from PyQt6.QtCore import QTimer
                  # Signal for the container, initially not modified.
                  QTimer.singleShot(0, lambda ed=html_viewer_container: self.main_window.on_editor_content_changed(ed, initially_modified=False))
+            return html_viewer_container
 
         except Exception as e:
             QMessageBox.critical(self.main_window, "错误", f"创建HTML预览容器时出错: {e}")
-            if resource_base_dir_path and os.path.isdir(resource_base_dir_path): # Cleanup on error
-                shutil.rmtree(resource_base_dir_path)
-        
-        self._clear_conversion_refs()
+            if resource_base_dir_path: # Cleanup on error
+                get_temp_artifact_manager().remove(resource_base_dir_path)
+            return None
 
-    @pyqtSlot(str, str)
-    def _on_pdf_to_html_conversion_error(self, title: str, error_message: str):
-        QApplication.restoreOverrideCursor()
+    @pyqtSlot(str, str, str)
+    def _on_pdf_to_html_conversion_error(self, pdf_path: str, title: str, error_message: str):
+        self._hide_pdf_conversion_progress()
+        # 已显示部分页面时，已打开的预览保留
+        self.pdf_progressive_views.pop(pdf_path, None)
         status_bar = getattr(self.main_window, 'statusBar', None)
         if status_bar:
             status_bar.showMessage(f"HTML 转换失败: {title}", 5000)
         QMessageBox.critical(self.main_window, title, error_message)
-        self._clear_conversion_refs()
         # Note: resource_base_dir_path is not available here to clean up,
         # as it's only passed on success. The converter should handle its own temp dir on error.
 
-    def _clear_conversion_refs(self):
-        self.pdf_conversion_worker = None
-        self.pdf_conversion_thread = None
     
     def _handle_pdf_html_generated(self, pdf_path: str, html_content: str):
         pass
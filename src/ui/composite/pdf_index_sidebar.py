@@ -0,0 +1,212 @@
+import os
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QCheckBox, QLabel, QListWidget,
+                             QListWidgetItem, QListView, QTreeWidget, QTreeWidgetItem, QStackedWidget)
+from PyQt6.QtCore import Qt, QSize, QTimer, QPoint, pyqtSignal
+from PyQt6.QtGui import QIcon, QPixmap, QColor
+
+from ...utils.pdf_index import get_pdf_index
+
+
+class PdfIndexSidebar(QWidget):
+    """
+    PDF查看器侧边栏：页面缩略图和文本搜索
+
+    搜索框为空时显示缩略图列表（只加载滚动到可见范围内的缩略图）；输入内容后在当前文档
+    中即时搜索，勾选“所有PDF”时在全部已建立索引的PDF中搜索。
+    """
+
+    page_requested = pyqtSignal(int)               # 当前文档的页码（从0开始）
+    external_page_requested = pyqtSignal(str, int) # 其他PDF的路径, 页码（从0开始）
+
+    THUMBNAIL_SIZE = QSize(120, 160)
+    SEARCH_DELAY_MS = 150
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.entry = None  # 当前文档的 PdfIndexEntry，文本提取完成前为 None
+        self.pdf_path = None
+        self._loaded_thumbnails = set()
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        layout.setSpacing(4)
+
+        search_layout = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜索文本...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self._schedule_search)
+        self.search_edit.returnPressed.connect(self._run_search)
+        search_layout.addWidget(self.search_edit, 1)
+        self.all_documents_checkbox = QCheckBox("所有PDF")
+        self.all_documents_checkbox.setToolTip("在全部已建立索引的PDF中搜索")
+        self.all_documents_checkbox.toggled.connect(self._run_search)
+        search_layout.addWidget(self.all_documents_checkbox)
+        layout.addLayout(search_layout)
+
+        self.status_label = QLabel("正在建立索引...")
+        self.status_label.setStyleSheet("color: gray;")
+        layout.addWidget(self.status_label)
+
+        self.stack = QStackedWidget()
+        self.thumbnail_list = QListWidget()
+        self.thumbnail_list.setViewMode(QListView.ViewMode.IconMode)
+        self.thumbnail_list.setFlow(QListView.Flow.TopToBottom)
+        self.thumbnail_list.setWrapping(False)
+        self.thumbnail_list.setMovement(QListView.Movement.Static)
+        self.thumbnail_list.setResizeMode(QListView.ResizeMode.Adjust)
+        self.thumbnail_list.setUniformItemSizes(True)
+        self.thumbnail_list.setIconSize(self.THUMBNAIL_SIZE)
+        self.thumbnail_list.setSpacing(4)
+        self.thumbnail_list.itemClicked.connect(lambda item: self.page_requested.emit(self.thumbnail_list.row(item)))
+        self.thumbnail_list.verticalScrollBar().valueChanged.connect(self._schedule_thumbnail_load)
+        self.stack.addWidget(self.thumbnail_list)
+
+        self.result_tree = QTreeWidget()
+        self.result_tree.setHeaderHidden(True)
+        self.result_tree.itemClicked.connect(self._on_result_clicked)
+        self.stack.addWidget(self.result_tree)
+        layout.addWidget(self.stack, 1)
+
+        placeholder = QPixmap(self.THUMBNAIL_SIZE)
+        placeholder.fill(QColor("#e0e0e0"))
+        self._placeholder_icon = QIcon(placeholder)
+
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(self.SEARCH_DELAY_MS)
+        self._search_timer.timeout.connect(self._run_search)
+        self._thumbnail_timer = QTimer(self)
+        self._thumbnail_timer.setSingleShot(True)
+        self._thumbnail_timer.setInterval(30)
+        self._thumbnail_timer.timeout.connect(self._load_visible_thumbnails)
+
+    # ---- 索引状态 ----
+    def set_entry(self, entry, pdf_path):
+        """页面文本可用：建立页面列表，可以开始搜索"""
+        self.entry = entry
+        self.pdf_path = pdf_path
+        self._loaded_thumbnails.clear()
+        self.thumbnail_list.clear()
+        for page_index in range(entry.page_count):
+            item = QListWidgetItem(self._placeholder_icon, str(page_index + 1))
+            item.setTextAlignment(Qt.AlignmentFlag.AlignHCenter)
+            self.thumbnail_list.addItem(item)
+        self.status_label.setText(f"共 {entry.page_count} 页")
+        self._schedule_thumbnail_load()
+        if self.search_edit.text().strip():
+            self._run_search()
+
+    def set_progress(self, done, total, message):
+        if total > 0:
+            self.status_label.setText(f"正在建立索引: {message} {done * 100 // total}%")
+        self._schedule_thumbnail_load()
+
+    def set_finished(self):
+        if self.entry is not None:
+            self.status_label.setText(f"共 {self.entry.page_count} 页")
+        self._schedule_thumbnail_load()
+
+    def set_failed(self, message):
+        self.status_label.setText(f"无法建立索引: {message}")
+
+    def set_cancelled(self):
+        self.status_label.setText("索引未完成，下次打开时继续")
+
+    # ---- 缩略图 ----
+    def _schedule_thumbnail_load(self, *_args):
+        if not self._thumbnail_timer.isActive():
+            self._thumbnail_timer.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._schedule_thumbnail_load()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._schedule_thumbnail_load()
+
+    def _load_visible_thumbnails(self):
+        """只为滚动到可见范围内（及前后各几页）的页面加载缩略图"""
+        if self.entry is None or self.thumbnail_list.count() == 0:
+            return
+        viewport = self.thumbnail_list.viewport().rect()
+        count = self.thumbnail_list.count()
+        first = self.thumbnail_list.indexAt(QPoint(viewport.width() // 2, 1)).row()
+        if first < 0:
+            # 顶部恰好落在页面间隙中时，按滚动位置估算
+            scroll_value = self.thumbnail_list.verticalScrollBar().value()
+            first = min(count - 1, scroll_value // max(1, self.THUMBNAIL_SIZE.height()))
+        last = first
+        while (last + 1 < count and
+               self.thumbnail_list.visualItemRect(self.thumbnail_list.item(last + 1)).top() < viewport.bottom()):
+            last += 1
+        for row in range(max(0, first - 2), min(count, last + 3)):
+            if row in self._loaded_thumbnails:
+                continue
+            thumb_path = self.entry.thumbnail_path(row)
+            if not os.path.exists(thumb_path):
+                continue
+            pixmap = QPixmap(thumb_path)
+            if not pixmap.isNull():
+                self.thumbnail_list.item(row).setIcon(QIcon(pixmap))
+                self._loaded_thumbnails.add(row)
+
+    def select_page(self, page_index):
+        if 0 <= page_index < self.thumbnail_list.count():
+            self.thumbnail_list.setCurrentRow(page_index)
+
+    # ---- 搜索 ----
+    def _schedule_search(self):
+        self._search_timer.start()
+
+    def _run_search(self):
+        self._search_timer.stop()
+        query = self.search_edit.text().strip()
+        if not query:
+            self.stack.setCurrentWidget(self.thumbnail_list)
+            self._schedule_thumbnail_load()
+            return
+        self.stack.setCurrentWidget(self.result_tree)
+        self.result_tree.clear()
+
+        if self.all_documents_checkbox.isChecked():
+            results = get_pdf_index().search_all(query)
+            total = 0
+            for entry, hits in results:
+                is_current = self.entry is not None and entry.content_hash == self.entry.content_hash
+                path = self.pdf_path if is_current else entry.source_path
+                doc_item = QTreeWidgetItem([f"{entry.title} ({len(hits)})"])
+                doc_item.setToolTip(0, path)
+                doc_item.setData(0, Qt.ItemDataRole.UserRole, (path, 0, is_current))
+                for hit in hits:
+                    hit_item = QTreeWidgetItem([f"第 {hit.page_index + 1} 页: {hit.snippet}"])
+                    hit_item.setToolTip(0, hit.snippet)
+                    hit_item.setData(0, Qt.ItemDataRole.UserRole, (path, hit.page_index, is_current))
+                    doc_item.addChild(hit_item)
+                self.result_tree.addTopLevelItem(doc_item)
+                doc_item.setExpanded(is_current or len(results) <= 3)
+                total += len(hits)
+            self.status_label.setText(f"{len(results)} 个文档中找到 {total} 处")
+            return
+
+        if self.entry is None:
+            self.status_label.setText("索引尚未建立完成，请稍候")
+            return
+        hits = self.entry.search(query)
+        for hit in hits:
+            hit_item = QTreeWidgetItem([f"第 {hit.page_index + 1} 页: {hit.snippet}"])
+            hit_item.setToolTip(0, hit.snippet)
+            hit_item.setData(0, Qt.ItemDataRole.UserRole, (self.pdf_path, hit.page_index, True))
+            self.result_tree.addTopLevelItem(hit_item)
+        self.status_label.setText(f"找到 {len(hits)} 处" if hits else "未找到")
+
+    def _on_result_clicked(self, item, _column):
+        data = item.data(0, Qt.ItemDataRole.UserRole)
+        if not data:
+            return
+        path, page_index, is_current = data
+        if is_current:
+            self.page_requested.emit(page_index)
+        else:
+            self.external_page_requested.emit(path, page_index)
@@ -1,46 +1,22 @@
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
                              QFileDialog, QProgressBar, QMessageBox, QCheckBox)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QDir
+from PyQt6.QtCore import Qt, QDir
 import os
 import shutil
 from pathlib import Path
 
 from ...services.pdf_conversion_service import PDFConversionService
+from ...services.conversion_job_queue import get_conversion_job_queue, PRIORITY_VISIBLE
 
 
-class PDFConversionThread(QThread):
-    """PDF转换线程，用于在后台执行PDF到HTML的转换"""
-    conversion_complete = pyqtSignal(str)  # 转换完成信号，参数为输出文件路径
-    conversion_error = pyqtSignal(str)     # 转换错误信号，参数为错误信息
-    
-    def __init__(self, pdf_path, output_dir, use_admin=True, options=None):
-        super().__init__()
-        self.pdf_path = pdf_path
-        self.output_dir = output_dir
-        self.use_admin = use_admin
-        self.options = options
-        self.service = PDFConversionService()
-    
-    def run(self):
-        try:
-            # 设置输出HTML文件路径
-            html_filename = Path(self.pdf_path).stem + ".html"
-            output_html_path = os.path.join(self.output_dir, html_filename)
-            
-            # 执行转换
-            result = self.service.convert_pdf_to_html(
-                self.pdf_path, 
-                output_html_path, 
-                self.use_admin, 
-                self.options
-            )
-            
-            # 发出转换完成信号
-            self.conversion_complete.emit(result)
-            
-        except Exception as e:
-            # 发出错误信号
-            self.conversion_error.emit(str(e))
+def convert_pdf_job(pdf_path, output_dir, use_admin=True, options=None):
+    """创建在转换任务队列中执行的PDF到HTML转换任务函数，任务结果为输出文件路径"""
+    def run(job):
+        # 设置输出HTML文件路径
+        html_filename = Path(pdf_path).stem + ".html"
+        output_html_path = os.path.join(output_dir, html_filename)
+        return PDFConversionService().convert_pdf_to_html(pdf_path, output_html_path, use_admin, options, job=job)
+    return run
 
 
 class PDFConversionDialog(QDialog):
@@ -52,8 +28,13 @@ class PDFConversionDialog(QDialog):
         self.resize(500, 200)
         self.setup_ui()
         
-        # 初始化转换服务
-        self.conversion_thread = None
+        # 当前转换任务ID（在共享的转换任务队列中执行）
+        self.conversion_job_id = None
+        self.job_queue = get_conversion_job_queue()
+        self.job_queue.job_progress.connect(self.on_job_progress)
+        self.job_queue.job_finished.connect(self.on_job_finished)
+        self.job_queue.job_failed.connect(self.on_job_failed)
+        self.job_queue.job_cancelled.connect(self.on_job_cancelled)
         
         # 连接信号
         self.select_pdf_button.clicked.connect(self.select_pdf_file)
@@ -167,22 +148,52 @@ class PDFConversionDialog(QDialog):
         # 显示进度条
         self.progress_bar.setVisible(True)
         
-        # 创建并启动转换线程
-        self.conversion_thread = PDFConversionThread(pdf_path, output_dir, use_admin)
-        self.conversion_thread.conversion_complete.connect(self.on_conversion_complete)
-        self.conversion_thread.conversion_error.connect(self.on_conversion_error)
-        self.conversion_thread.start()
-    
-    def on_conversion_complete(self, output_path):
-        """转换完成处理"""
-        # 隐藏进度条
+        # 提交到转换任务队列（对话框打开期间用户在等待，按可见任务处理）
+        self.progress_bar.setRange(0, 0)
+        self.conversion_job_id = self.job_queue.submit(
+            f"PDF转HTML: {os.path.basename(pdf_path)}",
+            convert_pdf_job(pdf_path, output_dir, use_admin),
+            priority=PRIORITY_VISIBLE, owner=self)
+
+    def on_job_progress(self, job_id, done, total, _message):
+        if job_id != self.conversion_job_id or total <= 0:
+            return
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+
+    def on_job_finished(self, job_id, result):
+        if job_id == self.conversion_job_id:
+            self.conversion_job_id = None
+            self.on_conversion_complete(result)
+
+    def on_job_failed(self, job_id, error_message):
+        if job_id == self.conversion_job_id:
+            self.conversion_job_id = None
+            self.on_conversion_error(error_message)
+
+    def on_job_cancelled(self, job_id):
+        if job_id == self.conversion_job_id:
+            self.conversion_job_id = None
+            self._set_idle()
+
+    def reject(self):
+        """关闭对话框时取消进行中的转换"""
+        if self.conversion_job_id is not None:
+            self.job_queue.cancel(self.conversion_job_id)
+            self.conversion_job_id = None
+        super().reject()
+
+    def _set_idle(self):
+        """隐藏进度条并恢复UI元素"""
         self.progress_bar.setVisible(False)
-        
-        # 启用UI元素
         self.convert_button.setEnabled(True)
         self.select_pdf_button.setEnabled(True)
         self.select_output_button.setEnabled(True)
         self.admin_checkbox.setEnabled(True)
+    
+    def on_conversion_complete(self, output_path):
+        """转换完成处理"""
+        self._set_idle()
         
         # 显示成功消息
         result = QMessageBox.information(
@@ -202,14 +213,7 @@ class PDFConversionDialog(QDialog):
     
     def on_conversion_error(self, error_message):
         """转换错误处理"""
-        # 隐藏进度条
-        self.progress_bar.setVisible(False)
-        
-        # 启用UI元素
-        self.convert_button.setEnabled(True)
-        self.select_pdf_button.setEnabled(True)
-        self.select_output_button.setEnabled(True)
-        self.admin_checkbox.setEnabled(True)
+        self._set_idle()
         
         # 显示错误消息
         QMessageBox.critical(self, "转换失败", f"PDF转换失败:\n{error_message}")
\ No newline at end of file
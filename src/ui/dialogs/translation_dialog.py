@@ -1,10 +1,13 @@
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, 
                            QTextEdit, QPushButton, QLineEdit, QMessageBox, QGroupBox,
                            QFormLayout, QDialogButtonBox, QTabWidget, QWidget, QApplication,
-                           QGridLayout, QSplitter)
+                           QGridLayout, QSplitter, QProgressBar, QTableWidget,
+                           QTableWidgetItem, QHeaderView, QAbstractItemView)
 from PyQt6.QtCore import Qt, QSettings
-from PyQt6.QtGui import QColor, QPalette
+from PyQt6.QtGui import QColor, QPalette, QTextCursor
 from src.services.translation_service import TranslationService
+from src.services.document_translation_service import DocumentTranslationJob, format_eta
+from src.services.translation_glossary import get_glossary
 
 
 class TranslationDialog(QDialog):
@@ -23,6 +26,9 @@ class TranslationDialog(QDialog):
         # 初始文本
         self.selected_text = selected_text
         
+        # 当前的全文翻译任务
+        self.document_job = None
+        
         # 初始化界面
         self._init_ui()
         self._apply_styles()
@@ -41,6 +47,12 @@ class TranslationDialog(QDialog):
         self.settings_btn.clicked.connect(self.show_api_settings)
         top_layout.addWidget(self.settings_btn)
         
+        # 术语表按钮
+        self.glossary_btn = QPushButton("术语表")
+        self.glossary_btn.setToolTip("设置翻译时强制使用的术语译法")
+        self.glossary_btn.clicked.connect(self.show_glossary)
+        top_layout.addWidget(self.glossary_btn)
+        
         # 添加语言选择和交换按钮
         lang_layout = QHBoxLayout()
         
@@ -94,7 +106,13 @@ class TranslationDialog(QDialog):
         result_label = QLabel("翻译结果:")
         self.result_text = QTextEdit()
         self.result_text.setReadOnly(True)
+        # 翻译记忆提示
+        self.memory_label = QLabel()
+        self.memory_label.setStyleSheet("color: #757575;")
+        self.memory_label.setWordWrap(True)
+        self.memory_label.hide()
         result_layout.addWidget(result_label)
+        result_layout.addWidget(self.memory_label)
         result_layout.addWidget(self.result_text)
         
         splitter.addWidget(result_widget)
@@ -104,6 +122,17 @@ class TranslationDialog(QDialog):
         
         main_layout.addWidget(splitter, 1)  # 给予分隔器较大的拉伸因子
         
+        # 全文翻译进度区域
+        progress_layout = QHBoxLayout()
+        self.doc_progress_bar = QProgressBar()
+        self.doc_progress_bar.setTextVisible(True)
+        self.doc_progress_label = QLabel()
+        progress_layout.addWidget(self.doc_progress_bar, 1)
+        progress_layout.addWidget(self.doc_progress_label)
+        self.doc_progress_bar.hide()
+        self.doc_progress_label.hide()
+        main_layout.addLayout(progress_layout)
+        
         # 底部按钮区域
         button_layout = QHBoxLayout()
         
@@ -112,6 +141,12 @@ class TranslationDialog(QDialog):
         self.translate_button.clicked.connect(self.translate_text)
         button_layout.addWidget(self.translate_button)
         
+        # 全文翻译按钮
+        self.translate_doc_button = QPushButton("翻译全文")
+        self.translate_doc_button.setToolTip("按段落翻译当前编辑器的全部内容")
+        self.translate_doc_button.clicked.connect(self.translate_document)
+        button_layout.addWidget(self.translate_doc_button)
+        
         button_layout.addStretch(1)
         
         # 操作按钮
@@ -158,6 +193,7 @@ class TranslationDialog(QDialog):
         """
         
         self.translate_button.setStyleSheet(button_style)
+        self.translate_doc_button.setStyleSheet(button_style)
         self.copy_button.setStyleSheet(button_style)
         self.apply_button.setStyleSheet(button_style)
         self.clear_button.setStyleSheet(button_style)
@@ -179,6 +215,7 @@ class TranslationDialog(QDialog):
         }
         """
         self.settings_btn.setStyleSheet(settings_style)
+        self.glossary_btn.setStyleSheet(settings_style)
         
         # 交换按钮样式
         swap_style = """
@@ -249,6 +286,11 @@ class TranslationDialog(QDialog):
             
             QMessageBox.information(self, "API设置", "API凭据已保存")
         
+    def show_glossary(self):
+        """显示术语表编辑对话框"""
+        dialog = GlossaryDialog(self, self.translation_service.get_language_list())
+        dialog.exec()
+        
     def populate_language_combos(self):
         """填充语言下拉列表"""
         languages = self.translation_service.get_language_list()
@@ -308,16 +350,33 @@ class TranslationDialog(QDialog):
         from_lang = self.from_lang_combo.currentData()
         to_lang = self.to_lang_combo.currentData()
         
-        # 显示加载状态
-        self.result_text.setPlainText("正在翻译...")
+        # 翻译记忆中有近似片段时，先显示参考译文，同时请求API译文
+        memory_match = self.translation_service.lookup_memory(text, from_lang, to_lang)
+        if memory_match and not memory_match.is_exact:
+            self.memory_label.setText(f"翻译记忆参考译文（相似度 {memory_match.score:.0%}），正在获取API译文...")
+            self.memory_label.show()
+            self.result_text.setPlainText(memory_match.target)
+        else:
+            # 显示加载状态
+            self.memory_label.hide()
+            self.result_text.setPlainText("正在翻译...")
         self.translate_button.setEnabled(False)
         
         # 执行异步翻译
-        def on_translation_complete(success, result, _):
+        def on_translation_complete(success, result, raw_result):
             # 在UI线程中更新结果
             self.translate_button.setEnabled(True)
             if success:
                 self.result_text.setPlainText(result)
+                if raw_result and "translation_memory" in raw_result:
+                    self.memory_label.setText("译文来自翻译记忆")
+                    self.memory_label.show()
+                else:
+                    self.memory_label.hide()
+            elif memory_match and not memory_match.is_exact:
+                # API失败时保留翻译记忆的参考译文
+                self.memory_label.setText(f"翻译记忆参考译文（相似度 {memory_match.score:.0%}），API翻译失败")
+                QMessageBox.warning(self, "翻译错误", result)
             else:
                 self.result_text.setPlainText("")
                 QMessageBox.warning(self, "翻译错误", result)
@@ -327,6 +386,91 @@ class TranslationDialog(QDialog):
             text, from_lang, to_lang, on_translation_complete
         )
     
+    def translate_document(self):
+        """按段落流式翻译当前编辑器的全文，译文逐段追加到结果区域"""
+        # 再次点击时停止正在进行的全文翻译
+        if self.document_job and self.document_job.is_running():
+            self.document_job.cancel()
+            return
+            
+        text = self._get_current_editor_text()
+        if not text:
+            # 没有可用的编辑器时，把源文本框中的内容当作整篇文档处理
+            text = self.source_text.toPlainText()
+        if not text.strip():
+            QMessageBox.warning(self, "翻译全文", "当前文档没有可翻译的内容")
+            return
+            
+        if not self.translation_service.has_credentials():
+            QMessageBox.warning(
+                self, "API凭据缺失", 
+                "请点击'API设置'按钮配置您的API凭据"
+            )
+            self.show_api_settings()
+            return
+            
+        # 源文本与译文上下对照显示
+        self.source_text.setPlainText(text)
+        self.result_text.clear()
+        self.memory_label.hide()
+        
+        self.document_job = DocumentTranslationJob(
+            text, self.from_lang_combo.currentData(), self.to_lang_combo.currentData(), parent=self
+        )
+        self.document_job.segment_ready.connect(self._on_document_segment_ready)
+        self.document_job.progress_changed.connect(self._on_document_progress)
+        self.document_job.finished.connect(self._on_document_finished)
+        
+        self.translate_button.setEnabled(False)
+        self.translate_doc_button.setText("停止翻译")
+        self.doc_progress_bar.setRange(0, self.document_job.total)
+        self.doc_progress_bar.setValue(0)
+        self.doc_progress_bar.show()
+        self.doc_progress_label.show()
+        self.document_job.start()
+    
+    def _get_current_editor_text(self) -> str:
+        """获取主窗口当前编辑器的全部文本"""
+        parent = self.parent()
+        if not parent or not hasattr(parent, 'get_current_editor_widget'):
+            return ""
+        try:
+            editor = parent.get_current_editor_widget()
+            if editor and hasattr(editor, 'toPlainText'):
+                return editor.toPlainText()
+        except Exception as e:
+            print(f"获取编辑器内容时出错: {e}")
+        return ""
+    
+    def _on_document_segment_ready(self, index, text):
+        """按顺序将完成的段落追加到结果区域"""
+        cursor = self.result_text.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(text)
+    
+    def _on_document_progress(self, done, total, eta_seconds):
+        """更新全文翻译进度和预计剩余时间"""
+        self.doc_progress_bar.setValue(done)
+        if done >= total:
+            self.doc_progress_label.setText(f"{done}/{total} 段")
+        else:
+            self.doc_progress_label.setText(f"{done}/{total} 段，剩余{format_eta(eta_seconds)}")
+    
+    def _on_document_finished(self, cancelled, failed_count, first_error):
+        """全文翻译结束后恢复界面状态"""
+        self.translate_button.setEnabled(True)
+        self.translate_doc_button.setText("翻译全文")
+        if cancelled:
+            self.doc_progress_label.setText("已停止")
+        elif failed_count:
+            self.doc_progress_label.setText(f"完成，{failed_count} 段失败")
+            QMessageBox.warning(
+                self, "翻译全文", 
+                f"有 {failed_count} 个段落翻译失败，已保留原文。\n{first_error}"
+            )
+        else:
+            self.doc_progress_label.setText("翻译完成")
+    
     def copy_result(self):
         """复制翻译结果到剪贴板"""
         result = self.result_text.toPlainText()
@@ -336,6 +480,8 @@ class TranslationDialog(QDialog):
     
     def clear_text(self):
         """清空文本"""
+        if self.document_job and self.document_job.is_running():
+            self.document_job.cancel()
         self.source_text.clear()
         self.result_text.clear()
         
@@ -410,6 +556,12 @@ class TranslationDialog(QDialog):
             print(f"应用翻译结果时出错: {e}")
             QMessageBox.warning(self, "应用失败", f"应用翻译结果时出错: {str(e)}")
     
+    def done(self, result):
+        """关闭对话框时停止正在进行的全文翻译"""
+        if self.document_job and self.document_job.is_running():
+            self.document_job.cancel()
+        super().done(result)
+    
     def load_credentials(self):
         """从设置加载API凭据"""
         settings = QSettings("PyQtNotepad", "TranslationService")
@@ -532,4 +684,102 @@ class APIConfigDialog(QDialog):
         return {
             "app_id": self.app_id_input.text().strip(),
             "app_secret": self.app_secret_input.text().strip()
-        }
\ No newline at end of file
+        }
+
+
+class GlossaryDialog(QDialog):
+    """术语表编辑对话框"""
+    
+    def __init__(self, parent=None, languages=None):
+        super().__init__(parent)
+        self.setWindowTitle("术语表")
+        self.resize(520, 400)
+        
+        self.glossary = get_glossary()
+        # 目标语言选项，空代码表示适用于所有语言
+        self.language_options = [("所有语言", "")]
+        for name, code in (languages or {}).items():
+            if code != "auto":
+                self.language_options.append((name, code))
+        
+        self.init_ui()
+        self.load_entries()
+        
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        
+        info_label = QLabel("翻译时原文中的术语会被替换为下表中的译法（不区分大小写）。译法留空表示保持原文不译。")
+        info_label.setWordWrap(True)
+        layout.addWidget(info_label)
+        
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["原文术语", "译法", "目标语言"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        layout.addWidget(self.table, 1)
+        
+        button_layout = QHBoxLayout()
+        self.add_btn = QPushButton("添加")
+        self.add_btn.clicked.connect(lambda: self.add_row())
+        self.remove_btn = QPushButton("删除")
+        self.remove_btn.clicked.connect(self.remove_selected_rows)
+        button_layout.addWidget(self.add_btn)
+        button_layout.addWidget(self.remove_btn)
+        button_layout.addStretch(1)
+        
+        self.save_btn = QPushButton("保存")
+        self.save_btn.clicked.connect(self.save_entries)
+        self.cancel_btn = QPushButton("取消")
+        self.cancel_btn.clicked.connect(self.reject)
+        button_layout.addWidget(self.save_btn)
+        button_layout.addWidget(self.cancel_btn)
+        layout.addLayout(button_layout)
+        
+    def add_row(self, source="", target="", to_lang=""):
+        """添加一行术语"""
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self.table.setItem(row, 0, QTableWidgetItem(source))
+        self.table.setItem(row, 1, QTableWidgetItem(target))
+        
+        lang_combo = QComboBox()
+        for name, code in self.language_options:
+            lang_combo.addItem(name, code)
+        index = lang_combo.findData(to_lang)
+        lang_combo.setCurrentIndex(index if index >= 0 else 0)
+        self.table.setCellWidget(row, 2, lang_combo)
+        
+        if not source:
+            self.table.setCurrentCell(row, 0)
+            self.table.editItem(self.table.item(row, 0))
+        
+    def remove_selected_rows(self):
+        """删除选中的行"""
+        rows = sorted({index.row() for index in self.table.selectedIndexes()}, reverse=True)
+        for row in rows:
+            self.table.removeRow(row)
+        
+    def load_entries(self):
+        """加载已保存的术语"""
+        for entry in self.glossary.get_entries():
+            self.add_row(entry.get("source", ""), entry.get("target", ""), entry.get("to_lang", ""))
+        
+    def save_entries(self):
+        """保存术语表"""
+        entries = []
+        for row in range(self.table.rowCount()):
+            source_item = self.table.item(row, 0)
+            target_item = self.table.item(row, 1)
+            source = source_item.text().strip() if source_item else ""
+            if not source:
+                continue
+            target = target_item.text().strip() if target_item else ""
+            lang_combo = self.table.cellWidget(row, 2)
+            to_lang = lang_combo.currentData() if lang_combo else ""
+            entries.append((source, target, to_lang))
+        
+        if self.glossary.set_entries(entries):
+            self.accept()
+        else:
+            QMessageBox.warning(self, "术语表", "术语表保存失败")
@@ -0,0 +1,122 @@
+from PyQt6.QtWidgets import (QDockWidget, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                             QTreeWidget, QTreeWidgetItem, QProgressBar, QHeaderView)
+from PyQt6.QtCore import Qt
+
+from ...services.conversion_job_queue import (get_conversion_job_queue, JOB_RUNNING, JOB_STATE_NAMES,
+                                              PRIORITY_VISIBLE, PRIORITY_BACKGROUND)
+
+
+class ConversionJobsDockWidget(QDockWidget):
+    """转换任务面板，列出转换任务队列中运行中和排队中的任务，可取消任务"""
+
+    COLUMN_TITLE = 0
+    COLUMN_STATE = 1
+    COLUMN_PROGRESS = 2
+
+    def __init__(self, parent=None):
+        super().__init__("转换任务", parent)
+        self.setObjectName("ConversionJobsDock")
+        self.setAllowedAreas(Qt.DockWidgetArea.AllDockWidgetAreas)
+        self.setFeatures(QDockWidget.DockWidgetFeature.DockWidgetMovable |
+                         QDockWidget.DockWidgetFeature.DockWidgetFloatable |
+                         QDockWidget.DockWidgetFeature.DockWidgetClosable)
+
+        self.job_queue = get_conversion_job_queue()
+        self._items = {}  # 任务ID: QTreeWidgetItem
+        self._progress_bars = {}  # 任务ID: QProgressBar
+
+        self._init_ui()
+
+        self.job_queue.jobs_changed.connect(self.refresh)
+        self.job_queue.job_progress.connect(self._on_job_progress)
+        self.refresh()
+
+    def _init_ui(self):
+        main_widget = QWidget()
+        layout = QVBoxLayout(main_widget)
+        layout.setContentsMargins(4, 4, 4, 4)
+
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        self.job_tree = QTreeWidget()
+        self.job_tree.setRootIsDecorated(False)
+        self.job_tree.setHeaderLabels(["任务", "状态", "进度"])
+        self.job_tree.header().setSectionResizeMode(self.COLUMN_TITLE, QHeaderView.ResizeMode.Stretch)
+        self.job_tree.header().setSectionResizeMode(self.COLUMN_STATE, QHeaderView.ResizeMode.ResizeToContents)
+        self.job_tree.setColumnWidth(self.COLUMN_PROGRESS, 140)
+        self.job_tree.setSelectionMode(QTreeWidget.SelectionMode.ExtendedSelection)
+        self.job_tree.itemSelectionChanged.connect(self._update_buttons)
+        layout.addWidget(self.job_tree, 1)
+
+        button_layout = QHBoxLayout()
+        self.cancel_button = QPushButton("取消所选")
+        self.cancel_button.clicked.connect(self.cancel_selected)
+        self.cancel_all_button = QPushButton("全部取消")
+        self.cancel_all_button.clicked.connect(self.job_queue.cancel_all)
+        button_layout.addStretch(1)
+        button_layout.addWidget(self.cancel_button)
+        button_layout.addWidget(self.cancel_all_button)
+        layout.addLayout(button_layout)
+
+        self.setWidget(main_widget)
+
+    def refresh(self):
+        """按队列中的当前任务重建列表（保留选中状态）"""
+        selected = {item.data(self.COLUMN_TITLE, Qt.ItemDataRole.UserRole) for item in self.job_tree.selectedItems()}
+        jobs = self.job_queue.jobs()
+
+        self.job_tree.clear()
+        self._items.clear()
+        self._progress_bars.clear()
+        for job in jobs:
+            state = JOB_STATE_NAMES.get(job.state, job.state)
+            if job.state != JOB_RUNNING:
+                if job.priority <= PRIORITY_VISIBLE:
+                    state += "（优先）"
+                elif job.priority >= PRIORITY_BACKGROUND:
+                    state += "（后台）"
+            item = QTreeWidgetItem([job.title, state, ""])
+            item.setData(self.COLUMN_TITLE, Qt.ItemDataRole.UserRole, job.id)
+            item.setToolTip(self.COLUMN_TITLE, job.title)
+            self.job_tree.addTopLevelItem(item)
+            progress_bar = QProgressBar()
+            progress_bar.setMaximumHeight(16)
+            self.job_tree.setItemWidget(item, self.COLUMN_PROGRESS, progress_bar)
+            self._items[job.id] = item
+            self._progress_bars[job.id] = progress_bar
+            self._set_progress(job.id, job.done, job.total, job.message, running=job.state == JOB_RUNNING)
+            if job.id in selected:
+                item.setSelected(True)
+
+        running = sum(1 for job in jobs if job.state == JOB_RUNNING)
+        self.summary_label.setText(f"运行中: {running}    排队中: {len(jobs) - running}    "
+                                   f"最多同时运行 {self.job_queue.max_concurrent_jobs} 个任务")
+        self._update_buttons()
+
+    def _set_progress(self, job_id, done, total, message, running=True):
+        progress_bar = self._progress_bars.get(job_id)
+        if progress_bar is None:
+            return
+        if total > 0:
+            progress_bar.setRange(0, total)
+            progress_bar.setValue(min(done, total))
+            progress_bar.setFormat(f"%v/%m {message}".strip())
+        elif running:
+            # 总量未知时显示为忙碌状态
+            progress_bar.setRange(0, 0)
+        else:
+            progress_bar.setRange(0, 1)
+            progress_bar.setValue(0)
+            progress_bar.setFormat("等待")
+
+    def _on_job_progress(self, job_id, done, total, message):
+        self._set_progress(job_id, done, total, message)
+
+    def _update_buttons(self):
+        self.cancel_button.setEnabled(bool(self.job_tree.selectedItems()))
+        self.cancel_all_button.setEnabled(self.job_tree.topLevelItemCount() > 0)
+
+    def cancel_selected(self):
+        for item in self.job_tree.selectedItems():
+            self.job_queue.cancel(item.data(self.COLUMN_TITLE, Qt.ItemDataRole.UserRole))
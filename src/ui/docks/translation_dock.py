@@ -1,10 +1,11 @@
 from PyQt6.QtWidgets import (QDockWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, 
                            QTextEdit, QPushButton, QMessageBox, QApplication, QWidget,
-                           QGridLayout, QSplitter)
+                           QGridLayout, QSplitter, QProgressBar)
 from PyQt6.QtCore import Qt, QSettings, QTimer
-from PyQt6.QtGui import QColor, QPalette, QKeyEvent
+from PyQt6.QtGui import QColor, QPalette, QKeyEvent, QTextCursor
 from src.services.translation_service import TranslationService
-from ..dialogs.translation_dialog import APIConfigDialog
+from src.services.document_translation_service import DocumentTranslationJob, format_eta
+from ..dialogs.translation_dialog import APIConfigDialog, GlossaryDialog
 import os
 import json
 
@@ -31,6 +32,9 @@ class TranslationDockWidget(QDockWidget):
         self.default_to_lang = "中文"
         self.live_selection = True  # 默认开启实时选择翻译
         
+        # 当前的全文翻译任务
+        self.document_job = None
+        
         # 创建翻译服务
         self.translation_service = TranslationService()
         # 从设置中加载API凭据
@@ -64,6 +68,12 @@ class TranslationDockWidget(QDockWidget):
         self.settings_btn.clicked.connect(self.show_api_settings)
         top_layout.addWidget(self.settings_btn)
         
+        # 术语表按钮
+        self.glossary_btn = QPushButton("术语表")
+        self.glossary_btn.setToolTip("设置翻译时强制使用的术语译法")
+        self.glossary_btn.clicked.connect(self.show_glossary)
+        top_layout.addWidget(self.glossary_btn)
+        
         # 添加语言选择和交换按钮
         lang_layout = QHBoxLayout()
         
@@ -117,7 +127,13 @@ class TranslationDockWidget(QDockWidget):
         result_label = QLabel("翻译结果:")
         self.result_text = QTextEdit()
         self.result_text.setReadOnly(True)
+        # 翻译记忆提示
+        self.memory_label = QLabel()
+        self.memory_label.setStyleSheet("color: #757575;")
+        self.memory_label.setWordWrap(True)
+        self.memory_label.hide()
         result_layout.addWidget(result_label)
+        result_layout.addWidget(self.memory_label)
         result_layout.addWidget(self.result_text)
         
         splitter.addWidget(result_widget)
@@ -127,6 +143,17 @@ class TranslationDockWidget(QDockWidget):
         
         main_layout.addWidget(splitter, 1)  # 给予分隔器较大的拉伸因子
         
+        # 全文翻译进度区域
+        progress_layout = QHBoxLayout()
+        self.doc_progress_bar = QProgressBar()
+        self.doc_progress_bar.setTextVisible(True)
+        self.doc_progress_label = QLabel()
+        progress_layout.addWidget(self.doc_progress_bar, 1)
+        progress_layout.addWidget(self.doc_progress_label)
+        self.doc_progress_bar.hide()
+        self.doc_progress_label.hide()
+        main_layout.addLayout(progress_layout)
+        
         # 底部按钮区域
         button_layout = QHBoxLayout()
         
@@ -135,6 +162,12 @@ class TranslationDockWidget(QDockWidget):
         self.translate_button.clicked.connect(self.translate_text)
         button_layout.addWidget(self.translate_button)
         
+        # 全文翻译按钮
+        self.translate_doc_button = QPushButton("翻译全文")
+        self.translate_doc_button.setToolTip("按段落翻译当前编辑器的全部内容")
+        self.translate_doc_button.clicked.connect(self.translate_document)
+        button_layout.addWidget(self.translate_doc_button)
+        
         button_layout.addStretch(1)
         
         # 操作按钮
@@ -184,6 +217,7 @@ class TranslationDockWidget(QDockWidget):
         """
         
         self.translate_button.setStyleSheet(button_style)
+        self.translate_doc_button.setStyleSheet(button_style)
         self.copy_button.setStyleSheet(button_style)
         self.apply_button.setStyleSheet(button_style)
         self.clear_button.setStyleSheet(button_style)
@@ -223,6 +257,7 @@ class TranslationDockWidget(QDockWidget):
         }
         """
         self.settings_btn.setStyleSheet(settings_style)
+        self.glossary_btn.setStyleSheet(settings_style)
         
         # 交换按钮样式
         swap_style = """
@@ -292,11 +327,20 @@ class TranslationDockWidget(QDockWidget):
             else:
                 QMessageBox.warning(self, "API设置", "API凭据保存失败")
     
+    def show_glossary(self):
+        """显示术语表编辑对话框"""
+        dialog = GlossaryDialog(self, self.translation_service.get_language_list())
+        dialog.exec()
+    
     def check_selection(self):
         """检查当前编辑器中的选中文本并更新到翻译窗口"""
         if not self.live_selection or not self.isVisible():
             return
             
+        # 全文翻译进行中时不根据选区刷新源文本
+        if self.document_job and self.document_job.is_running():
+            return
+            
         if not self.parent() or not hasattr(self.parent(), 'get_current_editor_widget'):
             return
             
@@ -382,12 +426,20 @@ class TranslationDockWidget(QDockWidget):
         from_lang = self.from_lang_combo.currentData()
         to_lang = self.to_lang_combo.currentData()
         
-        # 显示加载状态
-        self.result_text.setPlainText("正在翻译...")
+        # 翻译记忆中有近似片段时，先显示参考译文，同时请求API译文
+        memory_match = self.translation_service.lookup_memory(text, from_lang, to_lang)
+        if memory_match and not memory_match.is_exact:
+            self.memory_label.setText(f"翻译记忆参考译文（相似度 {memory_match.score:.0%}），正在获取API译文...")
+            self.memory_label.show()
+            self.result_text.setPlainText(memory_match.target)
+        else:
+            # 显示加载状态
+            self.memory_label.hide()
+            self.result_text.setPlainText("正在翻译...")
         self.translate_button.setEnabled(False)
         
         # 执行异步翻译
-        def on_translation_complete(success, result, _):
+        def on_translation_complete(success, result, raw_result):
             # 此回调现在会在主线程中执行，因为我们使用了信号机制
             try:
                 # 检查控件是否仍然存在
@@ -395,6 +447,15 @@ class TranslationDockWidget(QDockWidget):
                     self.translate_button.setEnabled(True)
                     if success:
                         self.result_text.setPlainText(result)
+                        if raw_result and "translation_memory" in raw_result:
+                            self.memory_label.setText("译文来自翻译记忆")
+                            self.memory_label.show()
+                        else:
+                            self.memory_label.hide()
+                    elif memory_match and not memory_match.is_exact:
+                        # API失败时保留翻译记忆的参考译文
+                        self.memory_label.setText(f"翻译记忆参考译文（相似度 {memory_match.score:.0%}），API翻译失败")
+                        QMessageBox.warning(self, "翻译错误", result)
                     else:
                         self.result_text.setPlainText("")
                         QMessageBox.warning(self, "翻译错误", result)
@@ -406,6 +467,82 @@ class TranslationDockWidget(QDockWidget):
             text, from_lang, to_lang, on_translation_complete
         )
     
+    def translate_document(self):
+        """按段落流式翻译当前编辑器的全文，译文逐段追加到结果区域"""
+        # 再次点击时停止正在进行的全文翻译
+        if self.document_job and self.document_job.is_running():
+            self.document_job.cancel()
+            return
+            
+        text = ""
+        if self.parent() and hasattr(self.parent(), 'get_current_editor_widget'):
+            try:
+                editor = self.parent().get_current_editor_widget()
+                if editor and hasattr(editor, 'toPlainText'):
+                    text = editor.toPlainText()
+            except Exception as e:
+                print(f"获取编辑器内容时出错: {e}")
+        if not text.strip():
+            QMessageBox.warning(self, "翻译全文", "当前文档没有可翻译的内容")
+            return
+            
+        if not self.translation_service.has_credentials():
+            QMessageBox.warning(
+                self, "API凭据缺失", 
+                "请点击'API设置'按钮配置您的百度翻译API凭据"
+            )
+            self.show_api_settings()
+            return
+            
+        # 源文本与译文上下对照显示
+        self.source_text.setPlainText(text)
+        self.result_text.clear()
+        self.memory_label.hide()
+        
+        self.document_job = DocumentTranslationJob(
+            text, self.from_lang_combo.currentData(), self.to_lang_combo.currentData(), parent=self
+        )
+        self.document_job.segment_ready.connect(self._on_document_segment_ready)
+        self.document_job.progress_changed.connect(self._on_document_progress)
+        self.document_job.finished.connect(self._on_document_finished)
+        
+        self.translate_button.setEnabled(False)
+        self.translate_doc_button.setText("停止翻译")
+        self.doc_progress_bar.setRange(0, self.document_job.total)
+        self.doc_progress_bar.setValue(0)
+        self.doc_progress_bar.show()
+        self.doc_progress_label.show()
+        self.document_job.start()
+    
+    def _on_document_segment_ready(self, index, text):
+        """按顺序将完成的段落追加到结果区域"""
+        cursor = self.result_text.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(text)
+    
+    def _on_document_progress(self, done, total, eta_seconds):
+        """更新全文翻译进度和预计剩余时间"""
+        self.doc_progress_bar.setValue(done)
+        if done >= total:
+            self.doc_progress_label.setText(f"{done}/{total} 段")
+        else:
+            self.doc_progress_label.setText(f"{done}/{total} 段，剩余{format_eta(eta_seconds)}")
+    
+    def _on_document_finished(self, cancelled, failed_count, first_error):
+        """全文翻译结束后恢复界面状态"""
+        self.translate_button.setEnabled(True)
+        self.translate_doc_button.setText("翻译全文")
+        if cancelled:
+            self.doc_progress_label.setText("已停止")
+        elif failed_count:
+            self.doc_progress_label.setText(f"完成，{failed_count} 段失败")
+            QMessageBox.warning(
+                self, "翻译全文", 
+                f"有 {failed_count} 个段落翻译失败，已保留原文。\n{first_error}"
+            )
+        else:
+            self.doc_progress_label.setText("翻译完成")
+    
     def copy_result(self):
         """复制翻译结果到剪贴板"""
         result = self.result_text.toPlainText()
@@ -415,6 +552,8 @@ class TranslationDockWidget(QDockWidget):
     
     def clear_text(self):
         """清空文本"""
+        if self.document_job and self.document_job.is_running():
+            self.document_job.cancel()
         self.source_text.clear()
         self.result_text.clear()
         
@@ -549,6 +688,8 @@ class TranslationDockWidget(QDockWidget):
     def closeEvent(self, event):
         """关闭窗口时停止定时器并保存偏好"""
         self.selection_timer.stop()
+        if self.document_job and self.document_job.is_running():
+            self.document_job.cancel()
         self.save_preferences()
         super().closeEvent(event)
         
@@ -17,8 +17,12 @@ from ..components.edit_operations import EditOperations
 from ..components.view_operations import ViewOperations
 from ..components.ui_manager import UIManager
 from ..docks.optimized_ai_chat_dock import OptimizedAIChatDock  # 导入优化的AI聊天组件
+from ..docks.conversion_jobs_dock import ConversionJobsDockWidget
 from ...services.network_service import NetworkService # Added for fetching URL source
-# PDF转换服务现在直接在open_pdf_conversion_dialog方法中导入
+from ..dialogs.pdf_conversion_dialog import PDFConversionDialog
+from ...services.conversion_job_queue import get_conversion_job_queue, PRIORITY_BACKGROUND
+from ...utils.temp_artifacts import get_temp_artifact_manager
+from ...utils.office_converters import get_office_converter, get_office_converter_names, shutdown_office_converters
 
 # from ..atomic.editor.html_editor import HtmlEditor # No longer primary HTML editor
 from ..atomic.editor.wang_editor import WangEditor # Import WangEditor
@@ -67,9 +71,15 @@ class MainWindow(QMainWindow):
         self.create_actions() # Actions must be created before UI setup if UI uses them
         self.ui_initializer.setup_ui() 
         
+        # URLs whose live fetch should fall back to an older offline snapshot on failure
+        self._snapshot_fallback_urls = set()
+
         # Connect NetworkService signals
         self.network_service.html_fetched.connect(self._handle_html_fetched)
         self.network_service.fetch_error.connect(self._handle_fetch_error)
+        self.network_service.snapshot_ready.connect(self._handle_snapshot_ready)
+        self.network_service.snapshot_error.connect(self._handle_fetch_error)
+        self.network_service.snapshot_progress.connect(self._handle_snapshot_progress)
         
         if hasattr(self, 'file_explorer') and self.file_explorer:
             self.file_explorer.root_path_changed.connect(self.on_workspace_changed)
@@ -92,6 +102,13 @@ class MainWindow(QMainWindow):
         self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.ai_chat_dock)
         # 初始隐藏AI聊天侧边栏
         self.ai_chat_dock.hide()
+
+        # 转换任务面板，初始隐藏
+        self.conversion_jobs_dock = ConversionJobsDockWidget(self)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.conversion_jobs_dock)
+        self.conversion_jobs_dock.hide()
+        self.conversion_jobs_dock.visibilityChanged.connect(self.toggle_conversion_jobs_action.setChecked)
+        self.warm_up_office_converter()
         
         self.ui_manager.apply_current_theme()
 
@@ -113,6 +130,15 @@ class MainWindow(QMainWindow):
         self.update_window_title()
         self.setAcceptDrops(True)
 
+    def warm_up_office_converter(self):
+        """使用 LibreOffice 时在后台预先启动其工作进程，第一次预览 Office 文件时无需冷启动"""
+        names = get_office_converter_names(available_only=True)
+        if not names or names[0] != "libreoffice":
+            return
+        get_conversion_job_queue().submit("预热 LibreOffice",
+                                          lambda job: get_office_converter("libreoffice").warm_up(job),
+                                          priority=PRIORITY_BACKGROUND)
+
     def create_actions(self):
         self.new_action = QAction("新建文本", self, shortcut="Ctrl+N", toolTip="创建新文本文件", triggered=self.new_file_wrapper)
         self.new_html_action = QAction("新建HTML", self, shortcut="Ctrl+Shift+N", toolTip="创建新HTML文件", triggered=self.new_html_file_wrapper)
@@ -148,12 +174,16 @@ class MainWindow(QMainWindow):
 
         # PDF转HTML功能
         self.pdf_to_html_action = QAction("PDF转HTML...", self, toolTip="将PDF转换为HTML", triggered=self.open_pdf_conversion_dialog)
+        self.toggle_conversion_jobs_action = QAction("转换任务", self, checkable=True, toolTip="显示运行中和排队中的转换任务", triggered=self.toggle_conversion_jobs_dock)
 
         # Export action
         self.export_action = QAction("导出...", self, shortcut="Ctrl+E", toolTip="导出当前文件为不同格式", triggered=self.export_file_wrapper, enabled=False)
 
         # Fetch URL source action
         self.fetch_url_source_action = QAction("打开并抓取源码(Web视图)", self, toolTip="抓取选中URL的源码并在新标签页显示", triggered=self.fetch_url_source_wrapper, enabled=False)
+        self.save_page_offline_action = QAction("保存网页供离线浏览", self, toolTip="下载选中URL的页面及其图片、样式表和脚本，保存为离线快照", triggered=self.save_page_offline_wrapper, enabled=False)
+        self.refresh_page_snapshot_action = QAction("刷新离线快照", self, toolTip="从网络重新获取选中URL的页面及其资源，替换已保存的离线快照", triggered=self.refresh_page_snapshot_wrapper, enabled=False)
+        self.fetch_offline_mode_action = QAction("离线抓取(仅使用缓存)", self, checkable=True, toolTip="抓取源码时只读取本地HTTP缓存，不访问网络", triggered=self.toggle_fetch_offline_mode_wrapper)
 
         self.toggle_theme_action = QAction("切换主题", self, shortcut="Ctrl+T", toolTip="切换主题", triggered=self.toggle_theme_wrapper)
         self.zen_action = QAction("Zen Mode", self, checkable=True, shortcut="F11", triggered=self.toggle_zen_mode_wrapper, toolTip="Zen模式")
@@ -196,7 +226,7 @@ class MainWindow(QMainWindow):
         
         edit_menu = menu_bar.addMenu("编辑")
         # Add new actions to edit menu if desired, or they can remain context-menu only
-        edit_menu.addActions([self.undo_action, self.redo_action, self.cut_action, self.copy_action, self.paste_action, self.select_all_action, self.find_action, self.replace_action, self.translate_action, self.translate_selection_action, self.calculate_selection_action, self.copy_to_ai_action, self.fetch_url_source_action])
+        edit_menu.addActions([self.undo_action, self.redo_action, self.cut_action, self.copy_action, self.paste_action, self.select_all_action, self.find_action, self.replace_action, self.translate_action, self.translate_selection_action, self.calculate_selection_action, self.copy_to_ai_action, self.fetch_url_source_action, self.save_page_offline_action, self.refresh_page_snapshot_action, self.fetch_offline_mode_action])
 
         format_menu = menu_bar.addMenu("格式")
         format_menu.addActions([self.font_action, self.color_action, self.insert_image_action, self.toggle_theme_action, self.pdf_to_html_action])
@@ -206,7 +236,8 @@ class MainWindow(QMainWindow):
         view_menu.addActions([self.zen_action, self.toggle_markdown_preview_action, 
                               self.toggle_html_view_action, # Visual edit action (self.toggle_html_visual_edit_action) removed
                               # self.toggle_html_preview_action, self.toggle_html_edit_mode_action, self.view_html_source_action, # Old HTML actions
-                              self.zoom_in_action, self.zoom_out_action, self.reset_zoom_action])
+                              self.zoom_in_action, self.zoom_out_action, self.reset_zoom_action,
+                              self.toggle_conversion_jobs_action])
         
         ai_assistant_menu = menu_bar.addMenu("AI助手")
         ai_assistant_menu.addAction(self.toggle_ai_chat_action)
@@ -307,6 +338,8 @@ class MainWindow(QMainWindow):
         view_menu.addSeparator()
         view_menu.addAction(self.toggle_theme_action)
         view_menu.addAction(self.zen_action)
+        view_menu.addSeparator()
+        view_menu.addAction(self.toggle_conversion_jobs_action)
         view_btn.setMenu(view_menu)
         self.toolbar.addWidget(view_btn)
         
@@ -357,9 +390,9 @@ class MainWindow(QMainWindow):
     def open_file_dialog_wrapper(self): 
         default_open_dir = self.current_workspace_path or QStandardPaths.writableLocation(QStandardPaths.StandardLocation.DesktopLocation) or os.path.expanduser("~")
         filters = ";;".join([
-            "所有支持的文件 (*.txt *.md *.markdown *.html *.pdf *.docx *.xlsx *.pptx *.png *.jpg *.jpeg *.gif *.bmp *.webp *.mp4 *.avi *.mkv *.mov *.webm)",
+            "所有支持的文件 (*.txt *.md *.markdown *.html *.pdf *.docx *.xlsx *.pptx *.csv *.png *.jpg *.jpeg *.gif *.bmp *.webp *.mp4 *.avi *.mkv *.mov *.webm)",
             "图片文件 (*.png *.jpg *.jpeg *.gif *.bmp *.webp)", "视频文件 (*.mp4 *.avi *.mkv *.mov *.webm)",
-            "Office 文件 (*.docx *.xlsx *.pptx)", "HTML 文件 (*.html)", "Markdown 文件 (*.md *.markdown)",
+            "Office 文件 (*.docx *.xlsx *.pptx)", "表格文件 (*.xlsx *.xlsm *.csv *.tsv)", "HTML 文件 (*.html)", "Markdown 文件 (*.md *.markdown)",
             "文本文件 (*.txt)", "PDF 文件 (*.pdf)", "所有文件 (*)"
         ])
         file_name, _ = QFileDialog.getOpenFileName(self, "打开文件", default_open_dir, filters)
@@ -393,76 +426,25 @@ class MainWindow(QMainWindow):
             checked = not self.ai_chat_dock.isVisible()
         self.ai_chat_dock.setVisible(checked)
         self.toggle_ai_chat_action.setChecked(checked)
+
+    def toggle_conversion_jobs_dock(self, checked=None):
+        """切换转换任务面板的显示状态"""
+        if checked is None:
+            checked = not self.conversion_jobs_dock.isVisible()
+        self.conversion_jobs_dock.setVisible(checked)
+        if checked:
+            self.conversion_jobs_dock.raise_()
+        self.toggle_conversion_jobs_action.setChecked(checked)
+
     def show_about_wrapper(self):
         self.ui_manager.show_about_dialog()
     
     def open_pdf_conversion_dialog(self):
-        """打开PDF转HTML转换对话框，使用现有的PDF转换服务"""
-        from ...services.pdf_conversion_service import PDFConversionService
-        
-        # 选择PDF文件
-        file_path, _ = QFileDialog.getOpenFileName(
-            self, "选择PDF文件", "", "PDF文件 (*.pdf)"
-        )
-        
-        if not file_path:
-            return
-        
-        # 选择输出目录
-        dir_path = QFileDialog.getExistingDirectory(
-            self, "选择输出目录", "", QFileDialog.Option.ShowDirsOnly
-        )
-        
-        if not dir_path:
-            return
-        
-        # 设置输出HTML文件路径
-        html_filename = os.path.basename(file_path).replace(".pdf", ".html")
-        output_html_path = os.path.join(dir_path, html_filename)
-        
-        # 确认是否使用管理员权限
-        use_admin = QMessageBox.question(
-            self,
-            "PDF转HTML",
-            "是否使用管理员权限执行转换？\n(可能需要UAC确认)",
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-            QMessageBox.StandardButton.Yes
-        ) == QMessageBox.StandardButton.Yes
-        
-        # 显示进度对话框
-        progress_dialog = QMessageBox(self)
-        progress_dialog.setWindowTitle("PDF转HTML")
-        progress_dialog.setText("正在转换PDF文件，请稍候...")
-        progress_dialog.setStandardButtons(QMessageBox.StandardButton.NoButton)
-        progress_dialog.show()
-        QApplication.processEvents()
-        
-        try:
-            # 执行转换
-            service = PDFConversionService()
-            result = service.convert_pdf_to_html(file_path, output_html_path, use_admin)
-            
-            # 关闭进度对话框
-            progress_dialog.close()
-            
-            # 显示成功消息
-            result_msg = QMessageBox.information(
-                self, 
-                "转换成功", 
-                f"PDF已成功转换为HTML:\n{result}\n\n是否打开输出目录?", 
-                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-            )
-            
-            if result_msg == QMessageBox.StandardButton.Yes:
-                # 打开输出目录
-                os.startfile(os.path.dirname(result))
-                
-        except Exception as e:
-            # 关闭进度对话框
-            progress_dialog.close()
-            
-            # 显示错误消息
-            QMessageBox.critical(self, "转换失败", f"PDF转换失败:\n{str(e)}")
+        """打开PDF转HTML转换对话框（转换在转换任务队列中执行，不阻塞界面）"""
+        dialog = PDFConversionDialog(self)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.exec()
+
     def open_translation_dialog_wrapper(self): 
         if hasattr(self, 'edit_operations'): self.edit_operations.open_translation_dialog()
     def translate_selection_wrapper(self):
@@ -501,7 +483,7 @@ class MainWindow(QMainWindow):
         else:
             QMessageBox.warning(self, "错误", "导出功能尚未实现。")
 
-    def fetch_url_source_wrapper(self):
+    def _get_selected_text_for_fetch(self) -> str:
         selected_text = ""
         editor_widget = self.get_current_editor_widget()
         if editor_widget:
@@ -511,10 +493,22 @@ class MainWindow(QMainWindow):
                 cursor = editor_widget.textCursor()
                 if cursor.hasSelection():
                     selected_text = cursor.selectedText().strip()
-        
+        return selected_text
+
+    def fetch_url_source_wrapper(self):
+        selected_text = self._get_selected_text_for_fetch()
         if selected_text:
             q_url = QUrl(selected_text)
             if q_url.isValid() and q_url.scheme() and q_url.host():
+                # A recently saved offline snapshot opens instantly without touching the network;
+                # older snapshots are only used when the live fetch fails
+                snapshot_path = self.network_service.get_offline_snapshot(
+                    selected_text, max_age=self.network_service.SNAPSHOT_FRESH_SECONDS)
+                if snapshot_path:
+                    self._open_snapshot(selected_text, snapshot_path)
+                    return
+                if self.network_service.get_offline_snapshot(selected_text):
+                    self._snapshot_fallback_urls.add(selected_text)
                 if hasattr(self, 'statusBar') and self.statusBar:
                     self.statusBar.showMessage(f"正在抓取: {selected_text} ...", 0) 
                 self.network_service.fetch_html(selected_text)
@@ -525,9 +519,66 @@ class MainWindow(QMainWindow):
             if hasattr(self, 'statusBar') and self.statusBar:
                 self.statusBar.showMessage("请先选择一个URL。", 3000)
 
+    def save_page_offline_wrapper(self):
+        selected_text = self._get_selected_text_for_fetch()
+        q_url = QUrl(selected_text)
+        if not (selected_text and q_url.isValid() and q_url.scheme() and q_url.host()):
+            if hasattr(self, 'statusBar') and self.statusBar:
+                self.statusBar.showMessage("请先选择一个有效的URL。", 3000)
+            return
+        if hasattr(self, 'statusBar') and self.statusBar:
+            self.statusBar.showMessage(f"正在保存离线快照: {selected_text} ...", 0)
+        self.network_service.save_for_offline(selected_text)
+
+    def refresh_page_snapshot_wrapper(self):
+        selected_text = self._get_selected_text_for_fetch()
+        q_url = QUrl(selected_text)
+        if not (selected_text and q_url.isValid() and q_url.scheme() and q_url.host()):
+            if hasattr(self, 'statusBar') and self.statusBar:
+                self.statusBar.showMessage("请先选择一个有效的URL。", 3000)
+            return
+        if hasattr(self, 'statusBar') and self.statusBar:
+            self.statusBar.showMessage(f"正在刷新离线快照: {selected_text} ...", 0)
+        self.network_service.save_for_offline(selected_text, refresh=True)
+
+    @staticmethod
+    def _format_snapshot_age(age) -> str:
+        if age is None:
+            return ""
+        if age < 60:
+            return "刚刚保存"
+        if age < 3600:
+            return f"{int(age // 60)} 分钟前保存"
+        if age < 86400:
+            return f"{int(age // 3600)} 小时前保存"
+        return f"{int(age // 86400)} 天前保存"
+
+    def _open_snapshot(self, url: str, snapshot_path: str, reason: str = ""):
+        """打开已保存的离线快照，状态栏提示保存时间和刷新方法"""
+        age_text = self._format_snapshot_age(self.network_service.get_offline_snapshot_age(url))
+        if hasattr(self, 'statusBar') and self.statusBar:
+            self.statusBar.showMessage(f"{reason}已打开离线快照({age_text}): {url}，可用“刷新离线快照”获取最新内容", 8000)
+        self.file_operations.open_file_from_path(snapshot_path)
+
+    def _handle_snapshot_progress(self, url: str, done: int, total: int):
+        if hasattr(self, 'statusBar') and self.statusBar:
+            self.statusBar.showMessage(f"正在保存离线快照: {url} ({done}/{total} 个资源)", 0)
+
+    def _handle_snapshot_ready(self, url: str, snapshot_path: str):
+        if hasattr(self, 'statusBar') and self.statusBar:
+            self.statusBar.showMessage(f"已打开离线快照: {url}", 5000)
+        self.file_operations.open_file_from_path(snapshot_path)
+
+    def toggle_fetch_offline_mode_wrapper(self, checked):
+        self.network_service.set_offline_mode(checked)
+        if hasattr(self, 'statusBar') and self.statusBar:
+            self.statusBar.showMessage("抓取源码已切换为离线模式(仅使用缓存)" if checked else "抓取源码已恢复联网模式", 3000)
+
     def _handle_html_fetched(self, url: str, html_content: str):
+        self._snapshot_fallback_urls.discard(url)
         if hasattr(self, 'statusBar') and self.statusBar:
-            self.statusBar.showMessage(f"成功抓取: {url}", 5000)
+            stats = self.network_service.get_cache_stats()
+            self.statusBar.showMessage(f"成功抓取: {url} (缓存命中率: {stats['hit_rate']:.0%})", 5000)
         
         # Create a meaningful title for the new tab
         parsed_url = QUrl(url)
@@ -541,6 +592,13 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "错误", "无法在新标签页中打开抓取的源码。")
 
     def _handle_fetch_error(self, url: str, error_message: str):
+        # The live fetch failed but an older offline snapshot exists: open that instead
+        if url in self._snapshot_fallback_urls:
+            self._snapshot_fallback_urls.discard(url)
+            snapshot_path = self.network_service.get_offline_snapshot(url)
+            if snapshot_path:
+                self._open_snapshot(url, snapshot_path, reason=f"抓取失败({error_message})，")
+                return
         if hasattr(self, 'statusBar') and self.statusBar:
             self.statusBar.showMessage(f"抓取失败: {url} - {error_message}", 5000)
         QMessageBox.warning(self, "抓取源码失败", f"无法抓取以下URL的源码：\n{url}\n\n错误详情：\n{error_message}")
@@ -698,6 +756,8 @@ class MainWindow(QMainWindow):
     def on_current_tab_changed(self, index):
         current_editor_component = self.get_current_editor_widget()
         current_tab_container_widget = self.tab_widget.currentWidget() if self.tab_widget else None
+        # 当前标签页的转换任务优先执行
+        get_conversion_job_queue().set_visible_owner(current_tab_container_widget)
 
         # Disconnect signals from previous editor (if it was HtmlViewContainer, it handles internal signals)
         if self.previous_editor:
@@ -780,7 +840,7 @@ class MainWindow(QMainWindow):
             self.undo_action, self.redo_action, self.cut_action, self.copy_action,
             self.select_all_action, self.font_action, self.color_action,
             self.insert_image_action, self.find_action, self.replace_action,
-            self.translate_selection_action, self.calculate_selection_action, self.copy_to_ai_action, self.fetch_url_source_action # Add new actions
+            self.translate_selection_action, self.calculate_selection_action, self.copy_to_ai_action, self.fetch_url_source_action, self.save_page_offline_action, self.refresh_page_snapshot_action # Add new actions
         ]
         
         current_tab_container = self.tab_widget.currentWidget() if self.tab_widget else None
@@ -889,6 +949,8 @@ class MainWindow(QMainWindow):
                 if q_url_check.isValid() and q_url_check.scheme() and q_url_check.host():
                     is_valid_url_selected = True
         self.fetch_url_source_action.setEnabled(is_valid_url_selected)
+        self.save_page_offline_action.setEnabled(is_valid_url_selected)
+        self.refresh_page_snapshot_action.setEnabled(is_valid_url_selected)
 
 
         # View toggles
@@ -964,7 +1026,12 @@ class MainWindow(QMainWindow):
             self.update_window_title()
 
     def closeEvent(self, event):
-        if self.file_operations.close_all_tabs(): event.accept()
+        if self.file_operations.close_all_tabs():
+            # 结束仍在运行的转换进程，再删除本次会话的临时产物
+            get_conversion_job_queue().shutdown()
+            shutdown_office_converters()
+            get_temp_artifact_manager().shutdown()
+            event.accept()
         else: event.ignore()
 
     def on_workspace_changed(self, new_path: str):
@@ -1,65 +1,399 @@
 # src/ui/views/image_viewer_view.py
 import os
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QMessageBox, 
-                             QScrollArea, QSizePolicy)
-from PyQt6.QtGui import QPixmap
-from PyQt6.QtCore import Qt, QSize
+import math
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QMessageBox,
+                             QScrollArea)
+from PyQt6.QtGui import QPainter
+from PyQt6.QtCore import Qt, QSize, QRectF, QPointF, QEvent, QTimer, pyqtSignal
+
+from ...utils.image_loading import (IMAGE_EXTENSIONS, TILE_SIZE, PRIORITY_VISIBLE, PRIORITY_PREFETCH, ImageInfo,
+                                    fit_size, decode_scaled, decode_region, preview_key, level_key, tile_key,
+                                    tile_source_rect, tile_target_size, get_image_decoder, get_decoded_image_cache)
+
+
+class _ImageCanvas(QWidget):
+    """按当前缩放比例绘制预览图和已解码图块的画布，尺寸等于缩放后的图片尺寸"""
+
+    def __init__(self, view):
+        super().__init__()
+        self.view = view
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        try:
+            self.view._paint(painter, event.rect())
+        finally:
+            painter.end()
+
 
 class ImageViewWidget(QWidget):
     """
     图片查看器 Widget。
-    使用 QLabel 和 QPixmap 在可滚动区域中显示图片。
+    图片在后台线程中按窗口尺寸缩放解码，放大查看时只解码可见范围内的图块；
+    解码结果保存在全局缓存中，并提前解码同一文件夹中相邻的图片。
+    Ctrl+滚轮 / Ctrl+加号、减号缩放，Ctrl+0 适应窗口，Ctrl+1 原始大小，左右方向键切换图片。
     """
+
+    # 通过方向键切换到同一文件夹中的其他图片后发出，参数为新的图片路径
+    current_image_changed = pyqtSignal(str)
+
+    ZOOM_STEP = 1.25
+    MIN_ZOOM = 0.02
+    MAX_ZOOM = 16.0
+    PREFETCH_NEIGHBOURS = 2
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.file_path = None
-        self.pixmap = None
+        self.info = None      # 当前图片的 ImageInfo
+        self.zoom = None      # 缩放比例，None 表示适应窗口
+        self.preview = None   # 当前显示的整图预览（QImage）
+        self._preview_key = None
+        self._detail_keys = set()  # 当前缩放级别需要的图块（或整图级别）的缓存键
+        self._folder_cache = (None, None, [])  # (文件夹, 修改时间, 图片列表)
+        self._prefetched_path = None
 
-        self._image_label = QLabel(self)
-        self._image_label.setBackgroundRole(self.backgroundRole()) # Match theme
-        self._image_label.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
-        self._image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self._canvas = _ImageCanvas(self)
 
         self._scroll_area = QScrollArea(self)
         self._scroll_area.setBackgroundRole(self.backgroundRole())
-        self._scroll_area.setWidgetResizable(True)
-        self._scroll_area.setWidget(self._image_label)
+        self._scroll_area.setWidgetResizable(False)
+        self._scroll_area.setWidget(self._canvas)
         self._scroll_area.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self._scroll_area.viewport().installEventFilter(self)
+        self._scroll_area.installEventFilter(self)
+        self._scroll_area.horizontalScrollBar().valueChanged.connect(self._schedule_update)
+        self._scroll_area.verticalScrollBar().valueChanged.connect(self._schedule_update)
 
         layout = QVBoxLayout(self)
         layout.addWidget(self._scroll_area)
         layout.setContentsMargins(0, 0, 0, 0)
         self.setLayout(layout)
 
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(30)
+        self._update_timer.timeout.connect(self._update_requests)
+
+        self.decoder = get_image_decoder()
+        self.cache = get_decoded_image_cache()
+        self.decoder.image_decoded.connect(self._on_image_decoded)
+
     def load_image(self, file_path: str) -> bool:
         """
-        加载指定的图片文件。
+        加载指定的图片文件（只读取尺寸，像素在后台解码）。
         """
-        self.file_path = file_path
-        if not self.file_path or not os.path.exists(self.file_path):
-            QMessageBox.critical(self, "错误", f"图片文件路径无效或文件不存在:\n{self.file_path}")
+        if not file_path or not os.path.exists(file_path):
+            QMessageBox.critical(self, "错误", f"图片文件路径无效或文件不存在:\n{file_path}")
             return False
-        
-        self.pixmap = QPixmap(self.file_path)
-        if self.pixmap.isNull():
-            QMessageBox.critical(self, "错误", f"无法加载图片:\n{self.file_path}\n文件可能已损坏或格式不受支持。")
-            self.pixmap = None # Ensure pixmap is None if loading failed
+        try:
+            info = ImageInfo(file_path)
+        except (RuntimeError, OSError) as e:
+            QMessageBox.critical(self, "错误", f"无法加载图片:\n{file_path}\n文件可能已损坏或格式不受支持。\n{e}")
             return False
-        
-        self._image_label.setPixmap(self.pixmap)
-        # Adjust label size to pixmap size for scroll area to work correctly
-        self._image_label.adjustSize() 
+
+        self._cancel_requests()
+        self.file_path = file_path
+        self.info = info
+        self.zoom = None
+        # 预取过或在其他标签页中打开过时，先显示已缓存的预览
+        self.preview = self.cache.best_preview(info.identity)
+        self._preview_key = None
+        self._apply_display_size()
+        self._schedule_update()
+        if self.preview is not None:
+            self._schedule_prefetch()
         return True
 
     def get_file_path(self) -> str | None:
         return self.file_path
 
+    # ---- 缩放 ----
+    def _device_pixel_ratio(self):
+        return self.devicePixelRatioF() or 1.0
+
+    def display_scale(self) -> float:
+        """显示尺寸（逻辑像素）与原图尺寸之比"""
+        if self.info is None:
+            return 1.0
+        if self.zoom is not None:
+            return self.zoom
+        viewport = self._scroll_area.viewport().size()
+        size = self.info.size
+        return min(1.0, viewport.width() / max(1, size.width()), viewport.height() / max(1, size.height()))
+
+    def _apply_display_size(self):
+        if self.info is None:
+            return
+        scale = self.display_scale()
+        self._canvas.resize(max(1, math.ceil(self.info.size.width() * scale)),
+                            max(1, math.ceil(self.info.size.height() * scale)))
+        self._canvas.update()
+
+    def set_zoom(self, zoom, anchor=None):
+        """设置缩放比例（None 为适应窗口），anchor 为保持不动的视口坐标点"""
+        if self.info is None:
+            return
+        viewport = self._scroll_area.viewport()
+        if anchor is None:
+            anchor = QPointF(viewport.width() / 2, viewport.height() / 2)
+        old_scale = self.display_scale()
+        canvas_point = QPointF(self._canvas.mapFrom(viewport, anchor.toPoint()))
+        if zoom is not None:
+            zoom = max(self.MIN_ZOOM, min(self.MAX_ZOOM, zoom))
+        self.zoom = zoom
+        self._apply_display_size()
+        new_scale = self.display_scale()
+        new_point = canvas_point * (new_scale / old_scale)
+        self._scroll_area.horizontalScrollBar().setValue(int(new_point.x() - anchor.x()))
+        self._scroll_area.verticalScrollBar().setValue(int(new_point.y() - anchor.y()))
+        self._schedule_update()
+
+    def zoom_in(self, anchor=None):
+        self.set_zoom(self.display_scale() * self.ZOOM_STEP, anchor)
+
+    def zoom_out(self, anchor=None):
+        self.set_zoom(self.display_scale() / self.ZOOM_STEP, anchor)
+
+    def eventFilter(self, obj, event):
+        if obj is self._scroll_area.viewport():
+            if event.type() == QEvent.Type.Wheel and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+                if event.angleDelta().y() > 0:
+                    self.zoom_in(event.position())
+                elif event.angleDelta().y() < 0:
+                    self.zoom_out(event.position())
+                return True
+            if event.type() == QEvent.Type.Resize:
+                if self.zoom is None:
+                    self._apply_display_size()
+                self._schedule_update()
+        elif obj is self._scroll_area and event.type() == QEvent.Type.KeyPress:
+            return self._handle_key(event)
+        return super().eventFilter(obj, event)
+
+    def keyPressEvent(self, event):
+        if not self._handle_key(event):
+            super().keyPressEvent(event)
+
+    def _handle_key(self, event):
+        key = event.key()
+        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            if key in (Qt.Key.Key_Plus, Qt.Key.Key_Equal):
+                self.zoom_in()
+            elif key == Qt.Key.Key_Minus:
+                self.zoom_out()
+            elif key == Qt.Key.Key_0:
+                self.set_zoom(None)
+            elif key == Qt.Key.Key_1:
+                self.set_zoom(1.0)
+            else:
+                return False
+            return True
+        # 图片宽度超出窗口时方向键用于滚动
+        if key in (Qt.Key.Key_Left, Qt.Key.Key_Right) and not self._scroll_area.horizontalScrollBar().maximum():
+            self.show_adjacent_image(-1 if key == Qt.Key.Key_Left else 1)
+            return True
+        return False
+
+    # ---- 同一文件夹中的图片 ----
+    def _folder_images(self):
+        folder = os.path.dirname(self.file_path)
+        try:
+            mtime = os.path.getmtime(folder)
+        except OSError:
+            return []
+        if self._folder_cache[:2] != (folder, mtime):
+            try:
+                names = sorted((name for name in os.listdir(folder)
+                                if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS), key=str.lower)
+            except OSError:
+                names = []
+            self._folder_cache = (folder, mtime, [os.path.join(folder, name) for name in names])
+        return self._folder_cache[2]
+
+    def show_adjacent_image(self, step: int) -> bool:
+        """切换到同一文件夹中的上一张（step=-1）或下一张（step=1）图片"""
+        if not self.file_path:
+            return False
+        images = self._folder_images()
+        try:
+            index = images.index(self.file_path)
+        except ValueError:
+            return False
+        new_index = index + step
+        if not 0 <= new_index < len(images):
+            return False
+        if not self.load_image(images[new_index]):
+            return False
+        self.current_image_changed.emit(self.file_path)
+        return True
+
+    def _schedule_prefetch(self):
+        # 当前图片显示出来以后再预取相邻图片，每张图片只预取一次
+        if self._prefetched_path != self.file_path:
+            self._prefetched_path = self.file_path
+            QTimer.singleShot(0, self._prefetch_neighbours)
+
+    def _prefetch_neighbours(self):
+        """把相邻图片按当前窗口尺寸解码到缓存中"""
+        if not self.file_path:
+            return
+        images = self._folder_images()
+        try:
+            index = images.index(self.file_path)
+        except ValueError:
+            return
+        box = self._preview_box()
+        for distance in range(1, self.PREFETCH_NEIGHBOURS + 1):
+            for neighbour_index in (index + distance, index - distance):
+                if not 0 <= neighbour_index < len(images):
+                    continue
+                try:
+                    info = ImageInfo(images[neighbour_index])
+                except (RuntimeError, OSError):
+                    continue
+                size = fit_size(info.size, box)
+                self.decoder.submit(preview_key(info, size), lambda p=info.path, s=size: decode_scaled(p, s),
+                                    priority=PRIORITY_PREFETCH + distance)
+
+    # ---- 解码请求 ----
+    def _preview_box(self):
+        viewport = self._scroll_area.viewport().size()
+        ratio = self._device_pixel_ratio()
+        # 尚未显示时视口尺寸无意义，按常见窗口尺寸解码
+        if viewport.width() < 64 or viewport.height() < 64:
+            viewport = QSize(1280, 800)
+        return QSize(math.ceil(viewport.width() * ratio), math.ceil(viewport.height() * ratio))
+
+    def _schedule_update(self, *_args):
+        if not self._update_timer.isActive():
+            self._update_timer.start()
+
+    def _update_requests(self):
+        """按当前视口和缩放比例提交需要的预览和图块，取消不再需要的图块"""
+        if self.info is None:
+            return
+        info = self.info
+        preview_size = fit_size(info.size, self._preview_box())
+        if self.preview is None or self.preview.width() < preview_size.width() * 0.98:
+            self._preview_key = preview_key(info, preview_size)
+            cached = self.cache.get(self._preview_key)
+            if cached is not None:
+                self._set_preview(cached)
+            else:
+                self.decoder.submit(self._preview_key, lambda p=info.path, s=preview_size: decode_scaled(p, s),
+                                    priority=PRIORITY_VISIBLE)
+
+        wanted = set()
+        level = self._detail_level()
+        if level is not None:
+            if info.tiling_supported:
+                for column, row in self._visible_tiles(level):
+                    key = tile_key(info, level, column, row)
+                    wanted.add(key)
+                    if self.cache.get(key) is None:
+                        rect = tile_source_rect(info, level, column, row)
+                        self.decoder.submit(key, lambda p=info.path, r=rect, s=tile_target_size(rect, level):
+                                            decode_region(p, r, s), priority=PRIORITY_VISIBLE)
+            else:
+                key = level_key(info, level)
+                wanted.add(key)
+                size = QSize(max(1, round(info.size.width() * level)), max(1, round(info.size.height() * level)))
+                self.decoder.submit(key, lambda p=info.path, s=size: decode_scaled(p, s), priority=PRIORITY_VISIBLE)
+        for key in self._detail_keys - wanted:
+            self.decoder.cancel(key)
+        self._detail_keys = wanted
+
+    def _detail_level(self):
+        """需要比预览更清晰的图像时返回解码的缩放级别（1、1/2、1/4...），否则返回 None"""
+        info = self.info
+        if self.preview is None:
+            # 先等预览解码完成，再决定是否需要更清晰的图块
+            return None
+        needed = self.display_scale() * self._device_pixel_ratio()
+        preview_scale = self.preview.width() / info.size.width()
+        if needed <= preview_scale * 1.05:
+            return None
+        level = min(1.0, 2.0 ** math.ceil(math.log2(needed)))
+        if not info.tiling_supported:
+            # 整张解码：限制在缓存容量的四分之一以内
+            max_pixels = self.cache.max_bytes / 4 / 4
+            level = min(level, math.sqrt(max_pixels / max(1, info.size.width() * info.size.height())))
+            if level <= preview_scale * 1.05:
+                return None
+        return level
+
+    def _visible_tiles(self, level, margin=1):
+        """与可见区域（及周围 margin 个图块）相交的图块"""
+        scale = self.display_scale()
+        visible = self._canvas.visibleRegion().boundingRect()
+        if visible.isEmpty():
+            return []
+        source_tile = TILE_SIZE / level
+        columns = math.ceil(self.info.size.width() / source_tile)
+        rows = math.ceil(self.info.size.height() / source_tile)
+        first_column = max(0, int(visible.left() / scale / source_tile) - margin)
+        last_column = min(columns - 1, int(visible.right() / scale / source_tile) + margin)
+        first_row = max(0, int(visible.top() / scale / source_tile) - margin)
+        last_row = min(rows - 1, int(visible.bottom() / scale / source_tile) + margin)
+        return [(column, row) for row in range(first_row, last_row + 1)
+                for column in range(first_column, last_column + 1)]
+
+    def _set_preview(self, image):
+        self.preview = image
+        self._canvas.update()
+        self._schedule_prefetch()
+
+    def _on_image_decoded(self, key, image):
+        if self.info is None or image is None:
+            return
+        if key == self._preview_key:
+            self._set_preview(image)
+            self._schedule_update()
+        elif key in self._detail_keys:
+            self._canvas.update()
+
+    def _cancel_requests(self):
+        for key in self._detail_keys:
+            self.decoder.cancel(key)
+        self._detail_keys = set()
+        if self._preview_key is not None:
+            self.decoder.cancel(self._preview_key)
+
+    # ---- 绘制 ----
+    def _paint(self, painter, rect):
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        if self.info is None:
+            return
+        if self.preview is None:
+            painter.drawText(self._canvas.visibleRegion().boundingRect(), Qt.AlignmentFlag.AlignCenter, "正在加载...")
+            return
+        painter.drawImage(QRectF(self._canvas.rect()), self.preview)
+        level = self._detail_level()
+        if level is None:
+            return
+        scale = self.display_scale()
+        if not self.info.tiling_supported:
+            image = self.cache.get(level_key(self.info, level))
+            if image is not None:
+                painter.drawImage(QRectF(self._canvas.rect()), image)
+            return
+        for column, row in self._visible_tiles(level, margin=0):
+            image = self.cache.get(tile_key(self.info, level, column, row))
+            if image is None:
+                continue
+            source = tile_source_rect(self.info, level, column, row)
+            target = QRectF(source.x() * scale, source.y() * scale, source.width() * scale, source.height() * scale)
+            if target.intersects(QRectF(rect)):
+                painter.drawImage(target, image)
+
     def cleanup(self):
         """清理资源。"""
-        if self.pixmap:
-            self.pixmap = QPixmap() # Clear the pixmap
-            self._image_label.setPixmap(self.pixmap)
+        self._cancel_requests()
+        self.preview = None
+        self.info = None
         self.file_path = None
+        self._canvas.update()
 
     def closeEvent(self, event):
         self.cleanup()
@@ -69,32 +403,32 @@ if __name__ == '__main__':
     import sys
     from PyQt6.QtWidgets import QApplication, QFileDialog
 
-    app = QApplication.instance() 
+    app = QApplication.instance()
     if app is None:
         app = QApplication(sys.argv)
-    
+
     main_win = QWidget()
     main_win.setWindowTitle("Image Viewer Widget Test")
     main_win.setGeometry(100, 100, 800, 600)
-    
+
     viewer_widget = ImageViewWidget(main_win)
-    
+
     from PyQt6.QtWidgets import QPushButton
     btn = QPushButton("Open Image File", main_win)
-    
+
     vbox = QVBoxLayout(main_win)
     vbox.addWidget(btn)
     vbox.addWidget(viewer_widget)
     main_win.setLayout(vbox)
 
     def open_test_image():
-        file_path, _ = QFileDialog.getOpenFileName(main_win, "Select Image File", "", 
+        file_path, _ = QFileDialog.getOpenFileName(main_win, "Select Image File", "",
                                                    "Image Files (*.png *.jpg *.jpeg *.bmp *.gif)")
         if file_path:
             if not viewer_widget.load_image(file_path):
                 print(f"Failed to load image: {file_path}")
-    
+
     btn.clicked.connect(open_test_image)
-    
+
     main_win.show()
     sys.exit(app.exec())
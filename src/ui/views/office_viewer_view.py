@@ -1,33 +1,65 @@
 import sys
 import os
-import tempfile
+import html
+import functools
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QMessageBox, QApplication
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtCore import QUrl, Qt, QLoggingCategory
 
+from ...services.conversion_job_queue import get_conversion_job_queue, PRIORITY_VISIBLE
+from ...utils.temp_artifacts import get_temp_artifact_manager
+from ...utils.office_converters import OFFICE_EXTENSIONS, convert_office_to_pdf, get_office_converter_names
+from ...utils.ooxml_html import OOXML_HTML_EXTENSIONS, convert_ooxml_to_html
+
 # Suppress QWebEngineView context menu INFO messages if they are noisy
 # QLoggingCategory.setFilterRules("qt.webenginecontextmenu.info=false")
 
-if sys.platform == 'win32':
+SUPPORTED_OFFICE_EXTENSIONS = OFFICE_EXTENSIONS
+PREVIEW_FORMATS = ("pdf", "html")
+
+
+def _convert_office_file(office_file_path, preview_format, job):
+    """
+    转换任务函数（在转换任务队列的工作线程中执行）
+
+    先把 Office 文件转换为PDF（有缓存时直接使用），HTML预览时再把PDF转换为HTML。
+    返回 (PDF路径或None, PDF所在临时目录或None, 主HTML路径或None, 资源目录或None)，
+    失败或取消时释放已生成的临时文件。
+    DOCX/PPTX 的HTML预览直接解析文件生成HTML，不经过PDF；失败时再走PDF路线。
+    """
+    manager = get_temp_artifact_manager()
+    file_extension = os.path.splitext(office_file_path)[1].lower()
+    if preview_format == 'html' and file_extension in OOXML_HTML_EXTENSIONS:
+        try:
+            html_filename, output_dir = convert_ooxml_to_html(office_file_path, job=job)
+            return None, None, os.path.join(output_dir, html_filename), output_dir
+        except RuntimeError as e:
+            if not get_office_converter_names(available_only=True):
+                raise
+            print(f"WARNING OfficeViewerWidget: 直接转换HTML失败，改用PDF转换: {e}")
+
+    pdf_path, pdf_dir = convert_office_to_pdf(office_file_path, job=job)
     try:
-        import win32com.client
-        import pythoncom
-        WIN32_AVAILABLE = True
-    except ImportError:
-        WIN32_AVAILABLE = False
-else:
-    WIN32_AVAILABLE = False
-
-# Office SaveAs PDF constants
-WD_FORMAT_PDF = 17
-XL_TYPE_PDF = 0
-PPT_SAVE_AS_PDF = 32
+        job.check()
+        if preview_format != 'html':
+            return pdf_path, pdf_dir, None, None
+        from ...utils.pdf_utils import extract_pdf_content
+        # extract_pdf_content now returns (full_html_path_to_load, resource_base_dir_path)
+        full_html_path, resource_base_dir_path = extract_pdf_content(pdf_path, job=job)
+    except BaseException:
+        manager.remove(pdf_dir)
+        raise
+    # HTML 预览不再需要中间PDF（它仍保存在转换缓存中）
+    manager.release(pdf_dir)
+    return None, None, full_html_path, resource_base_dir_path
+
 
 class OfficeViewerWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.web_view = QWebEngineView(self)
         self.temp_pdf_path = None
+        self.temp_pdf_dir = None # 临时PDF所在的目录（由临时产物管理器管理）
 
         layout = QVBoxLayout(self)
         layout.addWidget(self.web_view)
@@ -40,124 +72,105 @@ class OfficeViewerWidget(QWidget):
         self.temp_html_content_path = None # For storing path to a temp HTML file if setHtml with base URL is problematic
         self.pdf_conversion_temp_dir = None # To store the path of the directory containing HTML and its resources
 
+        # 转换在共享的转换任务队列中执行，不阻塞界面
+        self.conversion_job_id = None
+        self.office_file_path = None
+        self.preview_format = None
+        self._is_cleaned_up = False
+        self.job_queue = get_conversion_job_queue()
+        self.job_queue.job_finished.connect(self._on_conversion_finished)
+        self.job_queue.job_failed.connect(self._on_conversion_failed)
+        self.job_queue.job_cancelled.connect(self._on_conversion_cancelled)
+
     def loadFile(self, office_file_path: str, preview_format: str = 'pdf') -> bool: # Added preview_format
-        if not WIN32_AVAILABLE:
-            QMessageBox.critical(self, "错误", "pywin32 模块未找到，无法执行 Office 文件转换。")
+        """开始转换并在完成后显示；返回 False 表示无法转换（已提示用户）"""
+        file_extension = os.path.splitext(office_file_path)[1].lower()
+        direct_html = preview_format == 'html' and file_extension in OOXML_HTML_EXTENSIONS
+        if not direct_html and not get_office_converter_names(available_only=True):
+            QMessageBox.critical(self, "错误", "没有可用的 Office 转换程序：Windows 下需要 Microsoft Office 和 pywin32，"
+                                             "其他平台请安装 LibreOffice。")
             return False
 
         if not os.path.exists(office_file_path):
             QMessageBox.critical(self, "错误", f"文件不存在: {office_file_path}")
             return False
 
-        file_extension = os.path.splitext(office_file_path)[1].lower()
-        app_dispatch_name = None
-        save_format_const = None
-        office_app = None
-        doc = None
-
-        try:
-            # Initialize COM for this thread
-            pythoncom.CoInitialize()
-
-            # Create a temporary file for the PDF (still needed as intermediate for HTML conversion)
-            # Suffix is important. delete=False because Office writes to it.
-            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmpfile_pdf:
-                self.temp_pdf_path = tmpfile_pdf.name
-            
-            abs_office_file_path = os.path.abspath(office_file_path)
-
-            # Step 1: Convert Office to PDF
-            if file_extension == ".docx" or file_extension == ".doc":
-                app_dispatch_name = "Word.Application"
-                save_format_const = WD_FORMAT_PDF
-                office_app = win32com.client.Dispatch(app_dispatch_name)
-                office_app.Visible = False
-                doc = office_app.Documents.Open(abs_office_file_path, ReadOnly=True)
-                doc.SaveAs(self.temp_pdf_path, FileFormat=save_format_const)
-            elif file_extension == ".xlsx" or file_extension == ".xls":
-                app_dispatch_name = "Excel.Application"
-                office_app = win32com.client.Dispatch(app_dispatch_name)
-                office_app.Visible = False
-                doc = office_app.Workbooks.Open(abs_office_file_path, ReadOnly=True)
-                doc.ExportAsFixedFormat(Type=XL_TYPE_PDF, Filename=self.temp_pdf_path)
-            elif file_extension == ".pptx" or file_extension == ".ppt":
-                app_dispatch_name = "PowerPoint.Application"
-                save_format_const = PPT_SAVE_AS_PDF
-                office_app = win32com.client.Dispatch(app_dispatch_name)
-                doc = office_app.Presentations.Open(abs_office_file_path, ReadOnly=True, WithWindow=False)
-                doc.SaveAs(self.temp_pdf_path, FileFormat=save_format_const)
-            else:
-                QMessageBox.warning(self, "不支持的文件", f"不支持的文件类型: {file_extension} 进行转换。")
-                self._cleanup_temp_files()
-                return False
-
-            # Step 2: Display based on preview_format
-            if preview_format == 'pdf':
-                self.web_view.setUrl(QUrl.fromLocalFile(self.temp_pdf_path))
-            elif preview_format == 'html':
-                from ...utils.pdf_utils import extract_pdf_content
-                
-                # extract_pdf_content now returns (full_html_path_to_load, resource_base_dir_path)
-                full_html_path_to_load, resource_base_dir_path = extract_pdf_content(self.temp_pdf_path)
-                self.pdf_conversion_temp_dir = resource_base_dir_path # Store for cleanup
-
-                if full_html_path_to_load and os.path.exists(full_html_path_to_load):
-                    print(f"DEBUG OfficeViewerWidget: Loading HTML from file: {full_html_path_to_load}")
-                    self.web_view.load(QUrl.fromLocalFile(full_html_path_to_load))
-                else:
-                    error_msg = f"生成HTML文件失败或未找到: {full_html_path_to_load}"
-                    print(f"ERROR OfficeViewerWidget: {error_msg}")
-                    QMessageBox.critical(self, "HTML预览错误", error_msg)
-                    # Clean up the potentially empty or problematic resource_base_dir_path
-                    if resource_base_dir_path and os.path.isdir(resource_base_dir_path):
-                        try:
-                            shutil.rmtree(resource_base_dir_path)
-                        except Exception as e_shutil:
-                            print(f"Error cleaning up resource_base_dir_path on load failure: {e_shutil}")
-                    self.pdf_conversion_temp_dir = None # Nullify as it's cleaned or invalid
-            else:
-                QMessageBox.warning(self, "未知预览格式", f"未知的预览格式: {preview_format}")
-                self._cleanup_temp_files()
-                return False
-            
-            return True
-
-        except pythoncom.com_error as e:
-            QMessageBox.critical(self, "COM 错误", f"与 Microsoft Office 交互时发生错误 (COM Error):\n{str(e)}\n请确保已安装 Microsoft Office 并且文件未损坏。")
-            self._cleanup_temp_files()
+        if file_extension not in SUPPORTED_OFFICE_EXTENSIONS:
+            QMessageBox.warning(self, "不支持的文件", f"不支持的文件类型: {file_extension} 进行转换。")
             return False
-        except ImportError as e_imp: # Catch import error for pdf_utils if it occurs
-            QMessageBox.critical(self, "导入错误", f"无法加载必要的预览组件: {e_imp}")
-            self._cleanup_temp_files()
+        if preview_format not in PREVIEW_FORMATS:
+            QMessageBox.warning(self, "未知预览格式", f"未知的预览格式: {preview_format}")
             return False
-        except Exception as e:
-            QMessageBox.critical(self, "转换/加载错误", f"处理文件 '{os.path.basename(office_file_path)}' 时发生错误:\n{str(e)}")
+
+        # 重新加载时取消上一次尚未完成的转换
+        if self.conversion_job_id is not None:
+            self.job_queue.cancel(self.conversion_job_id)
+        self._cleanup_temp_files()
+
+        self.office_file_path = office_file_path
+        self.preview_format = preview_format
+        file_name = os.path.basename(office_file_path)
+        self.web_view.setHtml(f"<p style='font-family:sans-serif;color:#666;padding:1em;'>"
+                              f"正在转换 {html.escape(file_name)}，请稍候...</p>")
+        # 新打开的标签页随即成为当前标签页，按可见任务处理
+        self.conversion_job_id = self.job_queue.submit(
+            f"Office {preview_format.upper()} 预览: {file_name}",
+            functools.partial(_convert_office_file, office_file_path, preview_format),
+            priority=PRIORITY_VISIBLE, owner=self)
+        return True
+
+    def _on_conversion_finished(self, job_id, result):
+        if job_id != self.conversion_job_id:
+            return
+        self.conversion_job_id = None
+        temp_pdf_path, temp_pdf_dir, full_html_path_to_load, resource_base_dir_path = result
+        self.temp_pdf_path = temp_pdf_path
+        self.temp_pdf_dir = temp_pdf_dir
+        self.pdf_conversion_temp_dir = resource_base_dir_path # Store for cleanup
+        if self._is_cleaned_up:
+            # 转换完成前标签页已关闭
             self._cleanup_temp_files()
-            return False
-        finally:
-            if doc:
-                try:
-                    doc.Close(SaveChanges=0) 
-                except Exception as e_close:
-                    print(f"Error closing Office document: {e_close}")
-            if office_app:
-                try:
-                    office_app.Quit()
-                except Exception as e_quit:
-                    print(f"Error quitting Office application: {e_quit}")
-            pythoncom.CoUninitialize()
-            doc = None 
-            office_app = None
+            return
+
+        if self.preview_format == 'pdf':
+            self.web_view.setUrl(QUrl.fromLocalFile(self.temp_pdf_path))
+        elif full_html_path_to_load and os.path.exists(full_html_path_to_load):
+            print(f"DEBUG OfficeViewerWidget: Loading HTML from file: {full_html_path_to_load}")
+            self.web_view.load(QUrl.fromLocalFile(full_html_path_to_load))
+        else:
+            error_msg = f"生成HTML文件失败或未找到: {full_html_path_to_load}"
+            print(f"ERROR OfficeViewerWidget: {error_msg}")
+            QMessageBox.critical(self, "HTML预览错误", error_msg)
+            # Clean up the potentially empty or problematic resource_base_dir_path
+            if resource_base_dir_path:
+                get_temp_artifact_manager().remove(resource_base_dir_path)
+            self.pdf_conversion_temp_dir = None # Nullify as it's cleaned or invalid
+
+    def _on_conversion_failed(self, job_id, error_message):
+        if job_id != self.conversion_job_id:
+            return
+        self.conversion_job_id = None
+        if self._is_cleaned_up:
+            return
+        file_name = os.path.basename(self.office_file_path or "")
+        self.web_view.setHtml(f"<p style='font-family:sans-serif;color:#c00;padding:1em;'>"
+                              f"转换 {html.escape(file_name)} 失败。</p>")
+        QMessageBox.critical(self, "转换/加载错误", f"处理文件 '{file_name}' 时发生错误:\n{error_message}")
+
+    def _on_conversion_cancelled(self, job_id):
+        if job_id != self.conversion_job_id:
+            return
+        self.conversion_job_id = None
+        if not self._is_cleaned_up:
+            self.web_view.setHtml("<p style='font-family:sans-serif;color:#666;padding:1em;'>转换已取消。</p>")
 
     def _cleanup_temp_files(self): 
-        if self.temp_pdf_path and os.path.exists(self.temp_pdf_path):
-            try:
-                os.remove(self.temp_pdf_path)
-                self.temp_pdf_path = None
-            except OSError as e:
-                print(f"Error deleting temporary PDF file '{self.temp_pdf_path}': {e}")
-        elif self.temp_pdf_path: 
-             self.temp_pdf_path = None
+        manager = get_temp_artifact_manager()
+        # 临时PDF和转换目录归临时产物管理器所有，这里只释放引用
+        if self.temp_pdf_dir:
+            manager.release(self.temp_pdf_dir)
+            self.temp_pdf_dir = None
+        self.temp_pdf_path = None
 
         if self.temp_html_content_path and os.path.exists(self.temp_html_content_path):
             try:
@@ -169,20 +182,17 @@ class OfficeViewerWidget(QWidget):
             self.temp_html_content_path = None
         
         # Cleanup the directory holding PDF conversion HTML and resources
-        if self.pdf_conversion_temp_dir and os.path.exists(self.pdf_conversion_temp_dir):
-            try:
-                # shutil.rmtree is needed for directories
-                import shutil 
-                shutil.rmtree(self.pdf_conversion_temp_dir)
-                print(f"DEBUG OfficeViewerWidget: Cleaned up PDF conversion temp dir: {self.pdf_conversion_temp_dir}")
-                self.pdf_conversion_temp_dir = None
-            except Exception as e:
-                print(f"Error deleting PDF conversion temp dir '{self.pdf_conversion_temp_dir}': {e}")
-        elif self.pdf_conversion_temp_dir:
+        if self.pdf_conversion_temp_dir:
+            manager.release(self.pdf_conversion_temp_dir)
+            print(f"DEBUG OfficeViewerWidget: Released PDF conversion temp dir: {self.pdf_conversion_temp_dir}")
             self.pdf_conversion_temp_dir = None
 
 
     def cleanup(self):
+        # 标签页关闭：取消尚未完成的转换（其临时文件由任务自行删除）
+        self._is_cleaned_up = True
+        if self.conversion_job_id is not None:
+            self.job_queue.cancel(self.conversion_job_id)
         self.web_view.stop() 
         self.web_view.setUrl(QUrl("")) 
         self._cleanup_temp_files() 
@@ -192,7 +202,7 @@ class OfficeViewerWidget(QWidget):
         super().closeEvent(event)
 
 if __name__ == '__main__':
-    if sys.platform == 'win32' and WIN32_AVAILABLE:
+    if get_office_converter_names(available_only=True):
         app = QApplication(sys.argv)
         
         main_win = QWidget()
@@ -211,7 +221,7 @@ if __name__ == '__main__':
 
         def open_test_file():
             file_path, _ = QFileDialog.getOpenFileName(main_win, "Select Office File", "", 
-                                                       "Office Files (*.docx *.doc *.xlsx *.xls *.pptx *.ppt)")
+                                                       "Office Files (" + " ".join("*" + ext for ext in SUPPORTED_OFFICE_EXTENSIONS) + ")")
             if file_path:
                 # Test HTML preview
                 if not viewer.loadFile(file_path, preview_format='html'):
@@ -222,7 +232,4 @@ if __name__ == '__main__':
         main_win.show()
         sys.exit(app.exec())
     else:
-        if sys.platform != 'win32':
-            print("This test is Windows-specific because it uses COM automation.")
-        elif not WIN32_AVAILABLE:
-            print("pywin32 module is not available. Cannot run the test.")
+        print("No Office converter available (Microsoft Office + pywin32 on Windows, or LibreOffice). Cannot run the test.")
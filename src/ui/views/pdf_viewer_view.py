@@ -1,10 +1,15 @@
 # src/ui/views/pdf_viewer_view.py
 import os
 import sys
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QMessageBox, QApplication
+import functools
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QMessageBox, QApplication, QSplitter
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtCore import QUrl, Qt, pyqtSignal
 
+from ..composite.pdf_index_sidebar import PdfIndexSidebar
+from ...services.conversion_job_queue import get_conversion_job_queue, PRIORITY_BACKGROUND
+from ...utils.pdf_index import get_pdf_index, PYMUPDF_AVAILABLE
+
 # Correct relative import from views to core or utils if needed
 # from ..core.base_widget import BaseWidget # Assuming BaseWidget is a QWidget suitable for tabs
 
@@ -12,21 +17,44 @@ class PdfViewerView(QWidget): # Changed from BaseDialog to QWidget
     """
     PDF 查看器视图。
     使用 QWebEngineView 在标签页中嵌入显示 PDF 文件。
+    左侧边栏显示页面缩略图并支持文本搜索，所需的文本和缩略图索引在转换任务队列中后台建立。
     """
     # htmlGenerated signal is removed as this view now focuses on direct PDF display.
     # If PDF-to-HTML source is still needed, it should be a separate action/utility.
 
+    # 请求打开另一个PDF并跳到指定页（跨文档搜索结果），参数为路径和页码（从0开始）
+    open_pdf_requested = pyqtSignal(str, int)
+    # 工作线程中页面文本可搜索后发出（排队到主线程）
+    _index_text_ready = pyqtSignal(object)
+
     def __init__(self, parent=None): # pdf_path removed from constructor, will be passed to load_pdf
         super().__init__(parent)
         self.pdf_path = None
+        self.index_job_id = None
         
         self.web_view = QWebEngineView(self)
+        self.index_sidebar = PdfIndexSidebar(self)
+        self.index_sidebar.page_requested.connect(self.go_to_page)
+        self.index_sidebar.external_page_requested.connect(self.open_pdf_requested)
+        self._index_text_ready.connect(self._on_index_text_ready)
+
+        self.splitter = QSplitter(Qt.Orientation.Horizontal, self)
+        self.splitter.addWidget(self.index_sidebar)
+        self.splitter.addWidget(self.web_view)
+        self.splitter.setStretchFactor(1, 1)
+        self.splitter.setSizes([180, 800])
         
         layout = QVBoxLayout(self)
-        layout.addWidget(self.web_view)
+        layout.addWidget(self.splitter)
         layout.setContentsMargins(0, 0, 0, 0)
         self.setLayout(layout)
 
+        job_queue = get_conversion_job_queue()
+        job_queue.job_progress.connect(self._on_index_job_progress)
+        job_queue.job_finished.connect(self._on_index_job_finished)
+        job_queue.job_failed.connect(self._on_index_job_failed)
+        job_queue.job_cancelled.connect(self._on_index_job_cancelled)
+
         # Enable PDF viewer plugin in QWebEngineView
         self.web_view.settings().setAttribute(self.web_view.settings().WebAttribute.PluginsEnabled, True)
         self.web_view.settings().setAttribute(self.web_view.settings().WebAttribute.PdfViewerEnabled, True)
@@ -47,14 +75,63 @@ class PdfViewerView(QWidget): # Changed from BaseDialog to QWidget
             pdf_url = QUrl.fromLocalFile(self.pdf_path)
             self.web_view.setUrl(pdf_url)
             # print(f"PdfViewerView: Loading PDF {self.pdf_path} into QWebEngineView. URL: {pdf_url.toString()}")
-            return True
         except Exception as e:
             QMessageBox.critical(self, "错误", f"加载 PDF 文件时出错:\n{e}")
             # print(f"Error loading PDF into QWebEngineView: {e}")
             return False
+        self._start_indexing()
+        return True
+
+    def go_to_page(self, page_index: int):
+        """跳到指定页（从0开始），由 Chromium PDF 查看器处理 #page= 片段"""
+        if not self.pdf_path:
+            return
+        pdf_url = QUrl.fromLocalFile(self.pdf_path)
+        pdf_url.setFragment(f"page={page_index + 1}")
+        self.web_view.setUrl(pdf_url)
+        self.index_sidebar.select_page(page_index)
+
+    # ---- 文本与缩略图索引 ----
+    def _start_indexing(self):
+        if not PYMUPDF_AVAILABLE:
+            self.index_sidebar.set_failed("PyMuPDF (fitz) 模块未安装")
+            return
+        job_queue = get_conversion_job_queue()
+        if self.index_job_id is not None:
+            job_queue.cancel(self.index_job_id)
+        pdf_path = self.pdf_path
+        build = functools.partial(get_pdf_index().build, pdf_path, on_text_ready=self._index_text_ready.emit)
+        self.index_job_id = job_queue.submit(f"建立索引: {os.path.basename(pdf_path)}",
+                                             lambda job: build(job=job), priority=PRIORITY_BACKGROUND, owner=self)
+
+    def _on_index_text_ready(self, entry):
+        if self.index_job_id is not None:
+            self.index_sidebar.set_entry(entry, self.pdf_path)
+
+    def _on_index_job_progress(self, job_id, done, total, message):
+        if job_id == self.index_job_id:
+            self.index_sidebar.set_progress(done, total, message)
+
+    def _on_index_job_finished(self, job_id, _entry):
+        if job_id == self.index_job_id:
+            self.index_job_id = None
+            self.index_sidebar.set_finished()
+
+    def _on_index_job_failed(self, job_id, error_message):
+        if job_id == self.index_job_id:
+            self.index_job_id = None
+            self.index_sidebar.set_failed(error_message)
+
+    def _on_index_job_cancelled(self, job_id):
+        if job_id == self.index_job_id:
+            self.index_job_id = None
+            self.index_sidebar.set_cancelled()
 
     def cleanup(self):
         """清理资源（如果需要）。"""
+        if self.index_job_id is not None:
+            get_conversion_job_queue().cancel(self.index_job_id)
+            self.index_job_id = None
         self.web_view.stop()
         self.web_view.setUrl(QUrl("")) # Clear the view
         # print(f"PdfViewerView cleanup for {self.pdf_path}. Instance: {id(self)}")
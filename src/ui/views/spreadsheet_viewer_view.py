@@ -0,0 +1,321 @@
+# src/ui/views/spreadsheet_viewer_view.py
+import os
+import collections
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView, QComboBox, QCheckBox, QPushButton,
+                             QLabel, QMessageBox, QHeaderView, QAbstractItemView)
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer
+
+from ...services.conversion_job_queue import get_conversion_job_queue, PRIORITY_NORMAL
+from ...utils.spreadsheet_readers import (XlsxReader, open_spreadsheet, compute_column_stats, column_name)
+
+
+class SpreadsheetTableModel(QAbstractTableModel):
+    """
+    只读表格模型：行数随后台索引增长，单元格内容按块从读取器中按需读取
+
+    只缓存最近访问的若干块，滚动到哪里读哪里，内存占用与表格大小无关。
+    """
+
+    BLOCK_ROWS = 200
+    MAX_CACHED_BLOCKS = 50
+
+    def __init__(self, reader, header_row=False, parent=None):
+        super().__init__(parent)
+        self.reader = reader
+        self.header_row = header_row
+        self._row_count = 0
+        self._column_count = 0
+        self._blocks = collections.OrderedDict()  # 块号: 行列表
+        self._header = []
+
+    @property
+    def first_data_row(self):
+        """第一行数据在读取器中的行号（首行作为表头时为1）"""
+        return 1 if self.header_row else 0
+
+    def set_header_row(self, header_row):
+        self.beginResetModel()
+        self.header_row = header_row
+        self._header = []
+        self._row_count = max(0, self.reader.row_count - self.first_data_row)
+        self._column_count = self.reader.column_count
+        self.endResetModel()
+
+    def sync(self):
+        """把后台新索引的行和新发现的列加入模型"""
+        row_count = max(0, self.reader.row_count - self.first_data_row)
+        if row_count > self._row_count:
+            # 之前位于末尾、读取时尚不完整的块作废
+            self._blocks.pop((self._row_count + self.first_data_row) // self.BLOCK_ROWS, None)
+            self.beginInsertRows(QModelIndex(), self._row_count, row_count - 1)
+            self._row_count = row_count
+            self.endInsertRows()
+        column_count = self.reader.column_count
+        if column_count > self._column_count:
+            self.beginInsertColumns(QModelIndex(), self._column_count, column_count - 1)
+            self._column_count = column_count
+            self.endInsertColumns()
+        if self.header_row and not self._header and self.reader.row_count:
+            rows = self.reader.read_rows(0, 1)
+            self._header = rows[0] if rows else []
+            if self._column_count:
+                self.headerDataChanged.emit(Qt.Orientation.Horizontal, 0, self._column_count - 1)
+
+    def _row(self, reader_row):
+        block_index = reader_row // self.BLOCK_ROWS
+        block = self._blocks.get(block_index)
+        if block is None:
+            block = self.reader.read_rows(block_index * self.BLOCK_ROWS, self.BLOCK_ROWS)
+            self._blocks[block_index] = block
+            if len(self._blocks) > self.MAX_CACHED_BLOCKS:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(block_index)
+        offset = reader_row - block_index * self.BLOCK_ROWS
+        return block[offset] if offset < len(block) else []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._column_count
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return None
+        row = self._row(index.row() + self.first_data_row)
+        return row[index.column()] if index.column() < len(row) else ""
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Vertical:
+            return str(section + self.first_data_row + 1)
+        if self.header_row and section < len(self._header) and self._header[section]:
+            return self._header[section]
+        return column_name(section)
+
+    def column_title(self, column):
+        title = self.headerData(column, Qt.Orientation.Horizontal)
+        letter = column_name(column)
+        return title if title == letter else f"{letter} ({title})"
+
+
+class SpreadsheetViewWidget(QWidget):
+    """
+    表格查看器 Widget，用于大型 XLSX/CSV 文件。
+
+    文件在转换任务队列中后台建立行索引，已索引的行立即可以浏览；单元格按需读取。
+    “列统计”在后台统计当前列。
+    """
+
+    SYNC_INTERVAL_MS = 200
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.file_path = None
+        self.reader = None
+        self.model = None
+        self.index_job_id = None
+        self.stats_job_id = None
+
+        toolbar = QHBoxLayout()
+        toolbar.setContentsMargins(4, 4, 4, 0)
+        self.sheet_combo = QComboBox()
+        self.sheet_combo.setToolTip("工作表")
+        self.sheet_combo.currentIndexChanged.connect(self._on_sheet_changed)
+        self.sheet_combo.hide()
+        toolbar.addWidget(self.sheet_combo)
+        self.header_checkbox = QCheckBox("首行作为表头")
+        self.header_checkbox.toggled.connect(self._on_header_toggled)
+        toolbar.addWidget(self.header_checkbox)
+        self.stats_button = QPushButton("列统计")
+        self.stats_button.setToolTip("统计当前选中单元格所在的列")
+        self.stats_button.clicked.connect(self.compute_current_column_stats)
+        toolbar.addWidget(self.stats_button)
+        toolbar.addStretch(1)
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("color: gray;")
+        toolbar.addWidget(self.status_label)
+
+        self.table_view = QTableView(self)
+        self.table_view.setSelectionMode(QAbstractItemView.SelectionMode.ContiguousSelection)
+        self.table_view.setWordWrap(False)
+        # 固定行高、列宽不按内容计算，避免为了布局读取全部行
+        vertical_header = self.table_view.verticalHeader()
+        vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vertical_header.setDefaultSectionSize(self.fontMetrics().height() + 8)
+        self.table_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        self.table_view.horizontalHeader().setDefaultSectionSize(120)
+
+        self.stats_label = QLabel()
+        self.stats_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        self.stats_label.setWordWrap(True)
+        self.stats_label.setContentsMargins(6, 2, 6, 4)
+        self.stats_label.hide()
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(toolbar)
+        layout.addWidget(self.table_view, 1)
+        layout.addWidget(self.stats_label)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+
+        self._sync_timer = QTimer(self)
+        self._sync_timer.setInterval(self.SYNC_INTERVAL_MS)
+        self._sync_timer.timeout.connect(self._sync_model)
+
+        job_queue = get_conversion_job_queue()
+        job_queue.job_finished.connect(self._on_job_finished)
+        job_queue.job_failed.connect(self._on_job_failed)
+        job_queue.job_cancelled.connect(self._on_job_cancelled)
+
+    def load_file(self, file_path: str) -> bool:
+        """
+        打开 XLSX/CSV 文件并开始建立行索引。
+        """
+        self.file_path = file_path
+        if not self.file_path or not os.path.exists(self.file_path):
+            QMessageBox.critical(self, "错误", f"表格文件路径无效或文件不存在:\n{self.file_path}")
+            return False
+        try:
+            reader = open_spreadsheet(file_path)
+        except RuntimeError as e:
+            QMessageBox.critical(self, "错误", f"无法打开表格文件:\n{self.file_path}\n{e}")
+            return False
+
+        if isinstance(reader, XlsxReader):
+            self.sheet_combo.blockSignals(True)
+            self.sheet_combo.clear()
+            self.sheet_combo.addItems([name for name, _part in reader.sheets])
+            self.sheet_combo.blockSignals(False)
+            self.sheet_combo.setVisible(len(reader.sheets) > 1)
+        else:
+            # CSV 通常第一行是列名
+            self.header_checkbox.blockSignals(True)
+            self.header_checkbox.setChecked(True)
+            self.header_checkbox.blockSignals(False)
+        self._set_reader(reader)
+        return True
+
+    def get_file_path(self) -> str | None:
+        return self.file_path
+
+    # ---- 读取与索引 ----
+    def _set_reader(self, reader):
+        self._stop_jobs()
+        if self.reader is not None:
+            self.reader.close()
+        self.reader = reader
+        self.model = SpreadsheetTableModel(reader, header_row=self.header_checkbox.isChecked(), parent=self)
+        self.table_view.setModel(self.model)
+        self.stats_label.hide()
+        self.status_label.setText("正在读取...")
+        self.index_job_id = get_conversion_job_queue().submit(
+            f"读取表格: {os.path.basename(self.file_path)}", reader.build_index, priority=PRIORITY_NORMAL, owner=self)
+        self._sync_timer.start()
+
+    def _sync_model(self):
+        if self.model is None:
+            return
+        self.model.sync()
+        if self.index_job_id is not None:
+            self.status_label.setText(f"已读取 {self.model.rowCount():,} 行...")
+        else:
+            self._sync_timer.stop()
+            self.status_label.setText(f"共 {self.model.rowCount():,} 行, {self.model.columnCount()} 列")
+
+    def _on_sheet_changed(self, sheet_index):
+        if sheet_index < 0 or not isinstance(self.reader, XlsxReader) or sheet_index == self.reader.sheet_index:
+            return
+        try:
+            reader = XlsxReader(self.file_path, sheet_index)
+        except RuntimeError as e:
+            QMessageBox.warning(self, "错误", f"无法读取工作表:\n{e}")
+            return
+        self._set_reader(reader)
+
+    def _on_header_toggled(self, checked):
+        if self.model is not None:
+            self.model.set_header_row(checked)
+            self.model.sync()
+
+    # ---- 列统计 ----
+    def compute_current_column_stats(self):
+        if self.model is None or self.model.columnCount() == 0:
+            return
+        current = self.table_view.currentIndex()
+        column = current.column() if current.isValid() else 0
+        job_queue = get_conversion_job_queue()
+        if self.stats_job_id is not None:
+            job_queue.cancel(self.stats_job_id)
+        reader, start_row = self.reader, self.model.first_data_row
+        self.stats_label.setText(f"正在统计 {self.model.column_title(column)}...")
+        self.stats_label.show()
+        self.stats_job_id = job_queue.submit(
+            f"列统计: {os.path.basename(self.file_path)} {column_name(column)}",
+            lambda job: compute_column_stats(reader, column, job=job, start_row=start_row),
+            priority=PRIORITY_NORMAL, owner=self)
+
+    def _show_stats(self, stats):
+        parts = [f"<b>{self.model.column_title(stats.column)}</b>",
+                 f"行数: {stats.rows:,}", f"非空: {stats.rows - stats.empty:,}",
+                 f"不同值: {'≥' if stats.distinct_truncated else ''}{stats.distinct:,}"]
+        if stats.numeric:
+            parts += [f"数值: {stats.numeric:,}", f"最小: {stats.minimum:.10g}", f"最大: {stats.maximum:.10g}",
+                      f"平均: {stats.mean:.10g}", f"合计: {stats.total:.10g}"]
+        text = " &nbsp; ".join(parts)
+        if stats.top_values:
+            top = ", ".join(f"{value[:30]} ({count:,})" for value, count in stats.top_values)
+            text += f"<br>最常见: {top}"
+        if stats.partial:
+            text += "<br><span style='color:gray;'>文件尚未读取完，只统计了已读取的行。</span>"
+        self.stats_label.setText(text)
+        self.stats_label.show()
+
+    # ---- 任务 ----
+    def _on_job_finished(self, job_id, result):
+        if job_id == self.index_job_id:
+            self.index_job_id = None
+            self._sync_model()
+        elif job_id == self.stats_job_id:
+            self.stats_job_id = None
+            self._show_stats(result)
+
+    def _on_job_failed(self, job_id, error_message):
+        if job_id == self.index_job_id:
+            self.index_job_id = None
+            self._sync_model()
+            self.status_label.setText(f"读取失败: {error_message}")
+        elif job_id == self.stats_job_id:
+            self.stats_job_id = None
+            self.stats_label.setText(f"统计失败: {error_message}")
+
+    def _on_job_cancelled(self, job_id):
+        if job_id == self.index_job_id:
+            self.index_job_id = None
+        elif job_id == self.stats_job_id:
+            self.stats_job_id = None
+            self.stats_label.hide()
+
+    def _stop_jobs(self):
+        job_queue = get_conversion_job_queue()
+        for job_id in (self.index_job_id, self.stats_job_id):
+            if job_id is not None:
+                job_queue.cancel(job_id)
+        self.index_job_id = self.stats_job_id = None
+        self._sync_timer.stop()
+
+    def cleanup(self):
+        """取消后台任务并释放读取器。"""
+        self._stop_jobs()
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+        self.table_view.setModel(None)
+        self.model = None
+        self.file_path = None
+
+    def closeEvent(self, event):
+        self.cleanup()
+        super().closeEvent(event)
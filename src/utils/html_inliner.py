@@ -0,0 +1,269 @@
+import os
+import re
+import base64
+import mimetypes
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+
+
+# 把HTML引用的本地资源（图片、字体、样式表、脚本）内联为 data URI 或 <style>/<script>，
+# 生成不依赖资源目录的单文件HTML。
+#
+# 先用正则扫描出全部引用并行读取（同一文件只读取、编码一次），再用同一个正则
+# 一次替换输出，不构建DOM树，输出可以分块直接写入文件。
+#
+# 扫描以标签为单位：只改写标签内的 src/poster 属性和 style 属性、<style> 块中的
+# url()，正文文本、注释和内联脚本中形如 src="..." 或 url(...) 的内容保持原样。
+
+_TOKEN_RE = re.compile(
+    r'(?P<comment><!--.*?-->)'
+    r'|(?P<style_open><style\b[^>]*>)(?P<style_body>.*?)(?P<style_close></style\s*>)'
+    r'|(?P<script><script\b(?P<script_attrs>[^>]*)>(?P<script_body>.*?)</script\s*>)'
+    r'|(?P<link><link\b[^>]*>)'
+    r'|(?P<tag><[a-zA-Z][^>"\']*(?:(?:"[^"]*"|\'[^\']*\')[^>"\']*)*>)',
+    re.IGNORECASE | re.DOTALL)
+_TAG_NAME_RE = re.compile(r'<[^\s/>]+')
+_ATTRIBUTE_RE = re.compile(
+    r'(?P<name>[^\s"\'>/=]+)(?P<equals>\s*=\s*)(?:(?P<quote>["\'])(?P<value>.*?)(?P=quote)|(?P<bare>[^\s"\'>]+))',
+    re.DOTALL)
+_URL_ATTRIBUTES = ("src", "poster")
+_SCRIPT_SRC_RE = re.compile(r'(?<![\w-])src\s*=\s*(["\'])([^"\']*)\1', re.IGNORECASE)
+_CSS_URL_RE = re.compile(r'url\(\s*(["\']?)([^"\')]*)\1\s*\)', re.IGNORECASE)
+_LINK_HREF_RE = re.compile(r'\bhref\s*=\s*(["\'])([^"\']*)\1', re.IGNORECASE)
+_LINK_REL_STYLESHEET_RE = re.compile(r'\brel\s*=\s*(["\']?)[^"\'>]*stylesheet', re.IGNORECASE)
+_LINK_MEDIA_RE = re.compile(r'\bmedia\s*=\s*(["\'])([^"\']*)\1', re.IGNORECASE)
+
+_SKIP_PREFIXES = ("data:", "http:", "https:", "//", "#", "about:", "javascript:", "blob:")
+
+# mimetypes 未识别时按扩展名补充
+_MIME_FALLBACK = {
+    ".ttf": "font/ttf", ".otf": "font/otf", ".woff": "font/woff", ".woff2": "font/woff2",
+    ".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".gif": "image/gif",
+    ".svg": "image/svg+xml", ".webp": "image/webp", ".css": "text/css", ".js": "text/javascript",
+}
+
+
+def _guess_mime_type(path):
+    ext = path.suffix.lower()
+    if ext in _MIME_FALLBACK:
+        return _MIME_FALLBACK[ext]
+    mime_type, _ = mimetypes.guess_type(str(path))
+    return mime_type or "application/octet-stream"
+
+
+class ResourceInliner:
+    """
+    本地资源内联器
+
+    同一实例可以处理多个文档，已编码的资源按解析后的路径缓存复用。
+    只内联 base_dir 之内的文件，外部链接和无法读取的资源保持原样。
+    """
+
+    def __init__(self, base_dir, max_workers=None):
+        self.base_dir = pathlib.Path(base_dir).resolve()
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+        self._data_uris = {}  # 解析后的路径: data URI，None 表示无法内联
+        self._texts = {}  # 解析后的路径: 文本内容（样式表、脚本），None 表示无法读取
+        self._inlined_css = {}  # 解析后的路径: 已内联资源的样式表
+        self._rejected = set()  # 解析到基础目录之外的引用（只提示一次）
+        self.files_read = 0
+        self.bytes_read = 0
+
+    def _resolve(self, url, relative_to):
+        """把引用解析为 base_dir 内的文件路径，不需要或不能内联时返回 None"""
+        url = (url or "").strip()
+        if not url or url.lower().startswith(_SKIP_PREFIXES):
+            return None
+        url = unquote(url.split("#", 1)[0].split("?", 1)[0])
+        if not url:
+            return None
+        path = (relative_to / url).resolve()
+        if path != self.base_dir and self.base_dir not in path.parents:
+            if path not in self._rejected:
+                self._rejected.add(path)
+                print(f"警告: 资源路径 '{url}' 解析到基础目录之外，跳过嵌入。")
+            return None
+        return path
+
+    # ---- 读取 ----
+    def _read_data_uri(self, path):
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return path, None, 0
+        return path, f"data:{_guess_mime_type(path)};base64,{base64.b64encode(data).decode('ascii')}", len(data)
+
+    def _read_text(self, path):
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return path, None, 0
+        return path, data.decode("utf-8", errors="replace"), len(data)
+
+    def _load(self, reader, paths, store):
+        """并行读取尚未缓存的文件"""
+        pending = [p for p in dict.fromkeys(paths) if p is not None and p not in store]
+        if not pending:
+            return
+        if len(pending) == 1:
+            results = [reader(pending[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as executor:
+                results = list(executor.map(reader, pending))
+        for path, value, size in results:
+            store[path] = value
+            if value is not None:
+                self.files_read += 1
+                self.bytes_read += size
+
+    def _prefetch(self, html):
+        """扫描文档引用的全部资源并行读取；样式表读取后再读取其中引用的资源"""
+        binary_paths = []
+        text_paths = []
+        css_paths = []
+        for match in _TOKEN_RE.finditer(html):
+            if match.group("link"):
+                path = self._stylesheet_path(match.group("link"))
+                if path is not None:
+                    text_paths.append(path)
+                    css_paths.append(path)
+            elif match.group("script"):
+                text_paths.append(self._script_path(match))
+            elif match.group("style_open"):
+                binary_paths.extend(self._css_paths(match.group("style_body")))
+            elif match.group("tag"):
+                for name, value in self._tag_attributes(match.group("tag")):
+                    if name in _URL_ATTRIBUTES:
+                        binary_paths.append(self._resolve(value, self.base_dir))
+                    elif name == "style":
+                        binary_paths.extend(self._css_paths(value))
+        self._load(self._read_text, text_paths, self._texts)
+
+        for css_path in dict.fromkeys(css_paths):
+            css_text = self._texts.get(css_path)
+            if css_text:
+                binary_paths.extend(self._resolve(m.group(2), css_path.parent) for m in _CSS_URL_RE.finditer(css_text))
+        self._load(self._read_data_uri, binary_paths, self._data_uris)
+
+    def _css_paths(self, css_text):
+        return [self._resolve(m.group(2), self.base_dir) for m in _CSS_URL_RE.finditer(css_text)]
+
+    @staticmethod
+    def _tag_attributes(tag):
+        """逐个返回标签中带值的属性 (小写属性名, 属性值)"""
+        name = _TAG_NAME_RE.match(tag)
+        for match in _ATTRIBUTE_RE.finditer(tag, name.end()):
+            value = match.group("value") if match.group("quote") else match.group("bare")
+            yield match.group("name").lower(), value
+
+    # ---- 替换 ----
+    def _script_path(self, script_match):
+        """外部脚本（<script src> 且内容为空）的路径，内联脚本返回 None"""
+        if script_match.group("script_body").strip():
+            return None
+        src = _SCRIPT_SRC_RE.search(script_match.group("script_attrs"))
+        return self._resolve(src.group(2), self.base_dir) if src else None
+
+    def _replace_attribute(self, match):
+        name = match.group("name").lower()
+        quote = match.group("quote")
+        value = match.group("value") if quote else match.group("bare")
+        if name in _URL_ATTRIBUTES:
+            data_uri = self._data_uri(value, self.base_dir)
+            if not data_uri:
+                return match.group(0)
+            value = data_uri
+        elif name == "style":
+            inlined = self.inline_css(value, self.base_dir)
+            if inlined == value:
+                return match.group(0)
+            value = inlined
+        else:
+            return match.group(0)
+        quote = quote or '"'
+        return f"{match.group('name')}{match.group('equals')}{quote}{value}{quote}"
+
+    def _replace_tag(self, tag):
+        name_end = _TAG_NAME_RE.match(tag).end()
+        return tag[:name_end] + _ATTRIBUTE_RE.sub(self._replace_attribute, tag[name_end:])
+
+    def _stylesheet_path(self, link_tag):
+        if not _LINK_REL_STYLESHEET_RE.search(link_tag):
+            return None
+        href = _LINK_HREF_RE.search(link_tag)
+        return self._resolve(href.group(2), self.base_dir) if href else None
+
+    def _data_uri(self, url, relative_to):
+        path = self._resolve(url, relative_to)
+        if path is None:
+            return None
+        if path not in self._data_uris:
+            self._load(self._read_data_uri, [path], self._data_uris)
+        return self._data_uris.get(path)
+
+    def inline_css(self, css_text, relative_to):
+        """内联样式表中 url() 引用的资源，relative_to 为样式表所在目录"""
+        def replace(match):
+            data_uri = self._data_uri(match.group(2), relative_to)
+            return f"url({data_uri})" if data_uri else match.group(0)
+        return _CSS_URL_RE.sub(replace, css_text)
+
+    def _replace(self, match):
+        if match.group("link"):
+            path = self._stylesheet_path(match.group("link"))
+            css_text = self._texts.get(path) if path is not None else None
+            if css_text is None:
+                return match.group(0)
+            if path not in self._inlined_css:
+                self._inlined_css[path] = self.inline_css(css_text, path.parent).replace("</style", "<\\/style")
+            media = _LINK_MEDIA_RE.search(match.group("link"))
+            media_attr = f' media="{media.group(2)}"' if media else ""
+            return f'<style type="text/css"{media_attr}>\n{self._inlined_css[path]}\n</style>'
+        if match.group("script"):
+            path = self._script_path(match)
+            script = self._texts.get(path) if path is not None else None
+            if script is None:
+                return match.group(0)
+            script = script.replace("</script", "<\\/script")
+            return f"<script>\n{script}\n</script>"
+        if match.group("style_open"):
+            return (self._replace_tag(match.group("style_open"))
+                    + self.inline_css(match.group("style_body"), self.base_dir)
+                    + match.group("style_close"))
+        if match.group("tag"):
+            return self._replace_tag(match.group("tag"))
+        return match.group(0)
+
+    def iter_inlined(self, html):
+        """逐块生成内联后的文档"""
+        self._prefetch(html)
+        position = 0
+        for match in _TOKEN_RE.finditer(html):
+            yield html[position:match.start()]
+            yield self._replace(match)
+            position = match.end()
+        yield html[position:]
+
+    def inline(self, html):
+        """返回内联后的完整文档"""
+        return "".join(self.iter_inlined(html))
+
+    def inline_to_file(self, html, output_path):
+        """把内联后的文档分块写入 output_path（先写临时文件再替换）"""
+        temp_path = output_path + ".part"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for chunk in self.iter_inlined(html):
+                f.write(chunk)
+        os.replace(temp_path, output_path)
+        return output_path
+
+
+def inline_html_resources(html_text, base_dir, max_workers=None):
+    """把 base_dir 中被引用的资源内联到HTML中，返回自包含的HTML文本"""
+    return ResourceInliner(base_dir, max_workers=max_workers).inline(html_text)
+
+
+def export_self_contained_html(html_text, base_dir, output_path, max_workers=None):
+    """把HTML及其引用的本地资源导出为单个自包含的HTML文件"""
+    return ResourceInliner(base_dir, max_workers=max_workers).inline_to_file(html_text, output_path)
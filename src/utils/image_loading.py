@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+图片的缩放解码、分块解码与解码缓存
+
+ImageViewWidget 原先在界面线程中用 QPixmap 解码整张原图，上亿像素的扫描件要几秒钟、
+占用数百MB内存。这里改为：
+- 用 QImageReader.setScaledSize 直接解码成窗口需要的尺寸（JPEG 在解码时即缩小，
+  不会先生成原尺寸图像）；
+- 放大查看时只解码可见范围内的图块（setClipRect + setScaledSize），格式不支持区域
+  解码时整张解码到所需的缩放级别（受缓存容量限制）；
+- 解码在后台线程中进行（QImage/QImageReader 可在非界面线程使用），结果放入按字节数
+  限制容量的 LRU 缓存，相邻图片的预览也提前解码到缓存中。
+"""
+import os
+import math
+import heapq
+import itertools
+import threading
+import collections
+from typing import Callable, Optional
+
+from PyQt6.QtCore import Qt, QObject, QRect, QSize, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader, QImageIOHandler
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp')
+
+PRIORITY_VISIBLE = 0    # 当前视图需要的预览和图块
+PRIORITY_PREFETCH = 20  # 相邻图片的预览
+
+TILE_SIZE = 512  # 图块边长（解码后的像素）
+
+
+class ImageInfo:
+    """不解码像素即可读取的图片信息"""
+
+    def __init__(self, path: str):
+        self.path = path
+        reader = QImageReader(path)
+        reader.setAutoTransform(True)
+        size = reader.size()
+        if not size.isValid():
+            raise RuntimeError(reader.errorString() or "无法读取图片尺寸")
+        self.transformation = reader.transformation()
+        # 需要旋转90度的图片（EXIF方向），显示尺寸的宽高与文件中相反
+        self.rotated = bool(self.transformation & QImageIOHandler.Transformation.TransformationRotate90)
+        self.size = size.transposed() if self.rotated else size
+        self.format = bytes(reader.format()).decode("ascii", errors="replace")
+        self.mtime = os.path.getmtime(path)
+        # 可以只解码一个区域时才分块；带方向变换的图片区域坐标与文件坐标不一致，不分块
+        self.tiling_supported = (reader.supportsOption(QImageIOHandler.ImageOption.ClipRect) and
+                                 self.transformation == QImageIOHandler.Transformation.TransformationNone)
+
+    @property
+    def identity(self):
+        """缓存键中标识图片版本的部分，文件被修改后旧的解码结果不再使用"""
+        return (self.path, self.mtime)
+
+
+def fit_size(size: QSize, box: QSize) -> QSize:
+    """按比例缩小到 box 之内（不放大）"""
+    if size.width() <= box.width() and size.height() <= box.height():
+        return QSize(size)
+    return size.scaled(box, Qt.AspectRatioMode.KeepAspectRatio).expandedTo(QSize(1, 1))
+
+
+def decode_scaled(path: str, target_size: QSize) -> QImage:
+    """把整张图片解码为 target_size（显示方向的尺寸）"""
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    scaled = QSize(target_size)
+    if reader.transformation() & QImageIOHandler.Transformation.TransformationRotate90:
+        scaled.transpose()
+    reader.setScaledSize(scaled)
+    image = reader.read()
+    if image.isNull():
+        raise RuntimeError(reader.errorString())
+    return image
+
+
+def decode_region(path: str, source_rect: QRect, target_size: QSize) -> QImage:
+    """只解码原图中 source_rect 区域并缩放到 target_size（仅用于 tiling_supported 的图片）"""
+    reader = QImageReader(path)
+    reader.setClipRect(source_rect)
+    reader.setScaledSize(target_size)
+    image = reader.read()
+    if image.isNull():
+        raise RuntimeError(reader.errorString())
+    return image
+
+
+class DecodedImageCache:
+    """按字节数限制容量的解码结果 LRU 缓存，可在多个线程中使用"""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._images = collections.OrderedDict()  # 键: QImage
+        self._total_bytes = 0
+
+    def get(self, key) -> Optional[QImage]:
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+            return image
+
+    def put(self, key, image: QImage):
+        size = image.sizeInBytes()
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._images.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old.sizeInBytes()
+            self._images[key] = image
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes and self._images:
+                _old_key, old = self._images.popitem(last=False)
+                self._total_bytes -= old.sizeInBytes()
+
+    def best_preview(self, identity) -> Optional[QImage]:
+        """已缓存的该图片最大的整图预览，没有时返回 None"""
+        best = None
+        with self._lock:
+            for key, image in self._images.items():
+                if key[0] == "preview" and key[1] == identity and (best is None or image.width() > best.width()):
+                    best = image
+        return best
+
+    @property
+    def total_bytes(self):
+        with self._lock:
+            return self._total_bytes
+
+
+class _DecodeRequest:
+    __slots__ = ("key", "func", "priority", "cancelled", "running")
+
+    def __init__(self, key, func, priority):
+        self.key = key
+        self.func = func
+        self.priority = priority
+        self.cancelled = False
+        self.running = False
+
+
+class ImageDecoder(QObject):
+    """
+    后台解码线程池
+
+    submit 的解码函数在工作线程中执行，结果放入缓存后发出 image_decoded；同一键
+    已在排队或解码时不重复提交。优先级数值小的先执行。
+    """
+
+    image_decoded = pyqtSignal(object, object)  # 缓存键, QImage（解码失败时为 None）
+
+    def __init__(self, cache: DecodedImageCache, workers: Optional[int] = None):
+        super().__init__()
+        self.cache = cache
+        self._condition = threading.Condition()
+        self._heap = []
+        self._pending = {}  # 键: _DecodeRequest（排队或解码中）
+        self._sequence = itertools.count()
+        self._stopped = False
+        workers = workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        for index in range(workers):
+            threading.Thread(target=self._worker_loop, name=f"ImageDecoder-{index}", daemon=True).start()
+
+    def submit(self, key, func: Callable[[], QImage], priority: int = PRIORITY_VISIBLE):
+        """提交解码；已在缓存中时直接返回 False"""
+        if self.cache.get(key) is not None:
+            return False
+        with self._condition:
+            request = self._pending.get(key)
+            if request is not None and not request.cancelled:
+                if priority < request.priority and not request.running:
+                    # 预取的图片变成当前图片：以更高的优先级重新排队
+                    request.cancelled = True
+                else:
+                    return True
+            request = _DecodeRequest(key, func, priority)
+            self._pending[key] = request
+            heapq.heappush(self._heap, (priority, next(self._sequence), request))
+            self._condition.notify()
+        return True
+
+    def cancel(self, key):
+        """取消尚未开始的解码（已开始的继续完成，结果仍放入缓存）"""
+        with self._condition:
+            request = self._pending.get(key)
+            if request is not None and not request.running:
+                request.cancelled = True
+                del self._pending[key]
+
+    def is_pending(self, key) -> bool:
+        with self._condition:
+            return key in self._pending
+
+    def _worker_loop(self):
+        while True:
+            with self._condition:
+                while not self._stopped and not self._heap:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                _priority, _sequence, request = heapq.heappop(self._heap)
+                if request.cancelled:
+                    continue
+                request.running = True
+            image = None
+            try:
+                image = request.func()
+            except Exception as e:
+                print(f"ImageDecoder: 解码失败 {request.key}: {e}")
+            with self._condition:
+                if self._pending.get(request.key) is request:
+                    del self._pending[request.key]
+            if image is not None and not image.isNull():
+                self.cache.put(request.key, image)
+            else:
+                image = None
+            self.image_decoded.emit(request.key, image)
+
+    def shutdown(self):
+        with self._condition:
+            self._stopped = True
+            for request in self._pending.values():
+                request.cancelled = True
+            self._pending.clear()
+            self._heap.clear()
+            self._condition.notify_all()
+
+
+def preview_key(info: ImageInfo, size: QSize):
+    return ("preview", info.identity, size.width(), size.height())
+
+
+def level_key(info: ImageInfo, level: float):
+    return ("level", info.identity, level)
+
+
+def tile_key(info: ImageInfo, level: float, column: int, row: int):
+    return ("tile", info.identity, level, column, row)
+
+
+def tile_source_rect(info: ImageInfo, level: float, column: int, row: int) -> QRect:
+    """缩放级别 level 下第 (column, row) 个图块对应的原图区域"""
+    source_tile = TILE_SIZE / level
+    left = int(column * source_tile)
+    top = int(row * source_tile)
+    right = min(info.size.width(), int((column + 1) * source_tile))
+    bottom = min(info.size.height(), int((row + 1) * source_tile))
+    return QRect(left, top, max(1, right - left), max(1, bottom - top))
+
+
+def tile_target_size(rect: QRect, level: float) -> QSize:
+    return QSize(max(1, math.ceil(rect.width() * level)), max(1, math.ceil(rect.height() * level)))
+
+
+_cache_instance = None
+_decoder_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_decoded_image_cache() -> DecodedImageCache:
+    """获取全局解码缓存"""
+    global _cache_instance
+    with _instance_lock:
+        if _cache_instance is None:
+            _cache_instance = DecodedImageCache()
+        return _cache_instance
+
+
+def get_image_decoder() -> ImageDecoder:
+    """获取全局解码线程池（需在创建 QApplication 之后调用）"""
+    global _decoder_instance
+    cache = get_decoded_image_cache()
+    with _instance_lock:
+        if _decoder_instance is None:
+            _decoder_instance = ImageDecoder(cache)
+        return _decoder_instance
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+转换任务控制 - 取消、进度报告和子进程管理
+
+转换函数接收可选的 JobControl 参数（通常由 services.conversion_job_queue 创建），
+通过它启动外部进程、报告进度并检查是否已被取消。取消任务时会结束其正在运行的
+全部子进程，等待中的转换步骤随后抛出 JobCancelledError。
+不传入 JobControl 时，run_process 的行为与 subprocess.run 相同。
+"""
+import os
+import threading
+import subprocess
+from contextlib import contextmanager
+
+
+class JobCancelledError(Exception):
+    """任务已被取消"""
+
+
+def _kill_process_tree(process):
+    """结束进程及其子进程（Windows 下经 shell 启动的命令需要结束整个进程树）"""
+    if process.poll() is not None:
+        return
+    try:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                           capture_output=True, check=False,
+                           creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+        else:
+            process.kill()
+    except OSError as e:
+        print(f"警告: 无法结束进程 {process.pid}: {e}")
+
+
+class JobControl:
+    """
+    一个转换任务的控制对象，可在多个线程中共享
+
+    process_slots 为同一队列中全部任务共享的信号量，限制同时运行的外部进程总数；
+    progress_callback(已完成, 总数, 说明) 在报告进度的线程中调用。
+    """
+
+    def __init__(self, process_slots=None, progress_callback=None):
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._processes = set()
+        self.process_slots = process_slots
+        self.progress_callback = progress_callback
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """取消任务并结束其正在运行的子进程"""
+        self._cancelled.set()
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            _kill_process_tree(process)
+
+    def check(self):
+        """任务已取消时抛出 JobCancelledError"""
+        if self._cancelled.is_set():
+            raise JobCancelledError("任务已取消")
+
+    def report_progress(self, done, total, message=""):
+        if self.progress_callback:
+            self.progress_callback(done, total, message)
+
+    @contextmanager
+    def process_slot(self):
+        """占用一个进程名额，等待期间任务被取消时抛出 JobCancelledError"""
+        if self.process_slots is None:
+            self.check()
+            yield
+            return
+        while not self.process_slots.acquire(timeout=0.2):
+            self.check()
+        try:
+            self.check()
+            yield
+        finally:
+            self.process_slots.release()
+
+    @contextmanager
+    def attach_process(self, process):
+        """在 with 块内把已启动的进程登记到任务中，任务被取消时结束该进程"""
+        with self._lock:
+            self._processes.add(process)
+        # 登记之前已被取消时，cancel() 不会看到这个进程
+        if self.cancelled:
+            _kill_process_tree(process)
+        try:
+            yield process
+        finally:
+            with self._lock:
+                self._processes.discard(process)
+
+    def run_process(self, cmd, **kwargs):
+        """启动并等待外部进程（占用进程名额、可被取消），返回 CompletedProcess"""
+        with self.process_slot():
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs)
+            with self.attach_process(process):
+                stdout, stderr = process.communicate()
+        self.check()
+        return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+
+def run_process(cmd, job=None, **kwargs):
+    """
+    执行外部进程并捕获输出，job 不为 None 时经由 JobControl 执行（可被取消）
+
+    kwargs 传给 subprocess（不含 capture_output/check）。
+    """
+    if job is None:
+        return subprocess.run(cmd, capture_output=True, check=False, **kwargs)
+    return job.run_process(cmd, **kwargs)
@@ -0,0 +1,480 @@
+# -*- coding: utf-8 -*-
+"""
+Office文件转PDF - 可替换的转换实现
+
+OfficeViewerWidget 通过 convert_office_to_pdf 把 Word/Excel/PowerPoint 文件转换为PDF：
+Windows 下优先使用本机 Microsoft Office（COM），其他平台使用 LibreOffice。
+LibreOffice 转换器维护一组 soffice --headless 工作进程，每个进程使用独立的用户配置目录，
+预热后转换文件不再需要冷启动。转换结果按文件内容哈希保存在转换缓存中，
+同一文件再次预览时直接使用（PDF内容不变，后续的PDF转HTML也会命中缓存）。
+"""
+import os
+import sys
+import glob
+import time
+import queue
+import shutil
+import pathlib
+import threading
+import subprocess
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional, Type
+
+from .pdf_conversion_cache import get_pdf_conversion_cache
+from .temp_artifacts import get_temp_artifact_manager
+from .job_control import JobCancelledError, run_process
+
+if sys.platform == 'win32':
+    try:
+        import win32com.client
+        import pythoncom
+        WIN32_AVAILABLE = True
+    except ImportError:
+        WIN32_AVAILABLE = False
+else:
+    WIN32_AVAILABLE = False
+
+try:
+    # LibreOffice 自带（或发行版 python3-uno 提供）的 Python 绑定，可以复用常驻进程
+    import uno
+    from com.sun.star.beans import PropertyValue
+    UNO_AVAILABLE = True
+except ImportError:
+    UNO_AVAILABLE = False
+
+WORD_EXTENSIONS = (".docx", ".doc", ".odt", ".rtf")
+EXCEL_EXTENSIONS = (".xlsx", ".xls", ".ods")
+POWERPOINT_EXTENSIONS = (".pptx", ".ppt", ".odp")
+OFFICE_EXTENSIONS = WORD_EXTENSIONS + EXCEL_EXTENSIONS + POWERPOINT_EXTENSIONS
+
+# Office SaveAs PDF constants
+WD_FORMAT_PDF = 17
+XL_TYPE_PDF = 0
+PPT_SAVE_AS_PDF = 32
+
+
+class OfficeConverter:
+    """Office文件转PDF转换器基类"""
+
+    # 转换器注册名称
+    name = ""
+    # 显示名称
+    display_name = ""
+    # 转换器版本标识，作为缓存键的一部分
+    converter_version = ""
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """检查转换器依赖是否已安装"""
+        return False
+
+    def convert_to_pdf(self, office_file_path, pdf_path, job=None):
+        """
+        把 Office 文件转换为 pdf_path（在工作线程中调用）
+
+        Args:
+            office_file_path: Office 文件路径
+            pdf_path: 输出PDF路径
+            job: 可选的 JobControl，用于取消转换（取消时抛出 JobCancelledError）
+        """
+        raise NotImplementedError
+
+    def warm_up(self, job=None):
+        """预先启动转换所需的程序（可在后台任务中调用）"""
+
+    def shutdown(self):
+        """结束转换器启动的进程（程序退出时调用）"""
+
+
+class ComOfficeConverter(OfficeConverter):
+    """通过本机 Microsoft Office（COM）导出PDF，仅限 Windows"""
+
+    name = "msoffice"
+    display_name = "Microsoft Office"
+    converter_version = "msoffice"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return WIN32_AVAILABLE
+
+    def convert_to_pdf(self, office_file_path, pdf_path, job=None):
+        # COM 按线程初始化；Office 调用本身无法中途取消
+        file_extension = os.path.splitext(office_file_path)[1].lower()
+        office_app = None
+        doc = None
+        pythoncom.CoInitialize()
+        try:
+            abs_office_file_path = os.path.abspath(office_file_path)
+            if file_extension in WORD_EXTENSIONS:
+                office_app = win32com.client.Dispatch("Word.Application")
+                office_app.Visible = False
+                doc = office_app.Documents.Open(abs_office_file_path, ReadOnly=True)
+                doc.SaveAs(pdf_path, FileFormat=WD_FORMAT_PDF)
+            elif file_extension in EXCEL_EXTENSIONS:
+                office_app = win32com.client.Dispatch("Excel.Application")
+                office_app.Visible = False
+                doc = office_app.Workbooks.Open(abs_office_file_path, ReadOnly=True)
+                doc.ExportAsFixedFormat(Type=XL_TYPE_PDF, Filename=pdf_path)
+            elif file_extension in POWERPOINT_EXTENSIONS:
+                office_app = win32com.client.Dispatch("PowerPoint.Application")
+                doc = office_app.Presentations.Open(abs_office_file_path, ReadOnly=True, WithWindow=False)
+                doc.SaveAs(pdf_path, FileFormat=PPT_SAVE_AS_PDF)
+            else:
+                raise ValueError(f"不支持的文件类型: {file_extension} 进行转换。")
+        except pythoncom.com_error as e:
+            raise RuntimeError(f"与 Microsoft Office 交互时发生错误 (COM Error):\n{str(e)}\n"
+                               f"请确保已安装 Microsoft Office 并且文件未损坏。") from e
+        finally:
+            if doc:
+                try:
+                    doc.Close(SaveChanges=0)
+                except Exception as e_close:
+                    print(f"Error closing Office document: {e_close}")
+            if office_app:
+                try:
+                    office_app.Quit()
+                except Exception as e_quit:
+                    print(f"Error quitting Office application: {e_quit}")
+            pythoncom.CoUninitialize()
+        if job is not None:
+            job.check()
+
+
+class _SofficeWorker:
+    """
+    一个 LibreOffice 工作进程
+
+    每个工作进程使用独立的用户配置目录（同一配置目录同时只能运行一个 soffice 实例）。
+    有 UNO 绑定时 soffice 常驻运行，通过管道接收转换请求；没有时每次转换启动一次
+    soffice --convert-to，但配置目录已在预热时初始化，省去首次启动最耗时的部分。
+    """
+
+    def __init__(self, converter, index):
+        self.converter = converter
+        self.index = index
+        self.profile_dir = None
+        self.process = None  # UNO 模式下常驻的 soffice 进程
+        self.desktop = None
+        self.warm = False
+
+    def _base_args(self):
+        profile_url = pathlib.Path(self.profile_dir).as_uri()
+        return [self.converter.executable, f"-env:UserInstallation={profile_url}",
+                "--headless", "--invisible", "--nologo", "--norestore", "--nodefault", "--nolockcheck"]
+
+    def is_alive(self):
+        if UNO_AVAILABLE:
+            return self.process is not None and self.process.poll() is None and self.desktop is not None
+        return self.warm
+
+    def warm_up(self, job=None):
+        if self.is_alive():
+            return
+        if self.profile_dir is None:
+            self.profile_dir = get_temp_artifact_manager().create_dir(prefix=f"soffice_profile_{self.index}_")
+        if UNO_AVAILABLE:
+            self._start_listener(job)
+        else:
+            # 首次启动时创建用户配置，完成后立即退出
+            result = run_process(self._base_args() + ["--terminate_after_init"], job=job)
+            if result.returncode != 0:
+                stderr = result.stderr.decode("utf-8", errors="replace").strip()
+                raise RuntimeError(f"LibreOffice 启动失败 (返回码 {result.returncode}): {stderr}")
+        self.warm = True
+
+    def _start_listener(self, job=None):
+        pipe_name = f"soffice_{os.getpid()}_{self.index}_{int(time.time() * 1000)}"
+        connect_url = f"uno:pipe,name={pipe_name};urp;StarOffice.ComponentContext"
+        self.process = subprocess.Popen(self._base_args() + [f"--accept=pipe,name={pipe_name};urp;"],
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context)
+        deadline = time.time() + self.converter.STARTUP_TIMEOUT
+        while True:
+            try:
+                context = resolver.resolve(connect_url)
+                break
+            except Exception:
+                if job is not None and job.cancelled:
+                    self.stop()
+                    job.check()
+                if self.process.poll() is not None or time.time() > deadline:
+                    self.stop()
+                    raise RuntimeError("LibreOffice 工作进程启动失败或超时。")
+                time.sleep(0.2)
+        self.desktop = context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+
+    def convert(self, office_file_path, pdf_path, filter_name, job=None):
+        self.warm_up(job)
+        if UNO_AVAILABLE:
+            self._convert_with_uno(office_file_path, pdf_path, filter_name, job)
+        else:
+            self._convert_with_cli(office_file_path, pdf_path, job)
+
+    def _convert_with_cli(self, office_file_path, pdf_path, job):
+        output_dir = os.path.dirname(pdf_path)
+        result = run_process(self._base_args() + ["--convert-to", "pdf", "--outdir", output_dir,
+                                                  os.path.abspath(office_file_path)], job=job)
+        produced = os.path.join(output_dir, os.path.splitext(os.path.basename(office_file_path))[0] + ".pdf")
+        if result.returncode != 0 or not os.path.exists(produced):
+            stderr = result.stderr.decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"LibreOffice 转换失败 (返回码 {result.returncode}): {stderr}")
+        if os.path.abspath(produced) != os.path.abspath(pdf_path):
+            os.replace(produced, pdf_path)
+
+    def _convert_with_uno(self, office_file_path, pdf_path, filter_name, job):
+        def prop(name, value):
+            property_value = PropertyValue()
+            property_value.Name = name
+            property_value.Value = value
+            return property_value
+
+        slot = job.process_slot() if job is not None else nullcontext()
+        attached = job.attach_process(self.process) if job is not None else nullcontext()
+        with slot, attached:
+            try:
+                document = self.desktop.loadComponentFromURL(
+                    uno.systemPathToFileUrl(os.path.abspath(office_file_path)), "_blank", 0,
+                    (prop("Hidden", True), prop("ReadOnly", True)))
+                if document is None:
+                    raise RuntimeError("LibreOffice 无法打开文件。")
+                try:
+                    document.storeToURL(uno.systemPathToFileUrl(os.path.abspath(pdf_path)),
+                                        (prop("FilterName", filter_name),))
+                finally:
+                    document.close(True)
+            except JobCancelledError:
+                raise
+            except Exception as e:
+                # 任务取消时进程已被结束，崩溃时同样重新启动
+                self.stop()
+                if job is not None:
+                    job.check()
+                raise RuntimeError(f"LibreOffice 转换失败: {e}") from e
+
+    def stop(self):
+        self.desktop = None
+        self.warm = False
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.kill()
+                try:
+                    self.process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    pass
+            self.process = None
+
+
+class LibreOfficeConverter(OfficeConverter):
+    """通过 LibreOffice (soffice --headless) 导出PDF，工作进程池在多次转换之间复用"""
+
+    name = "libreoffice"
+    display_name = "LibreOffice"
+    STARTUP_TIMEOUT = 60
+
+    PDF_FILTERS = {}
+    PDF_FILTERS.update(dict.fromkeys(WORD_EXTENSIONS, "writer_pdf_Export"))
+    PDF_FILTERS.update(dict.fromkeys(EXCEL_EXTENSIONS, "calc_pdf_Export"))
+    PDF_FILTERS.update(dict.fromkeys(POWERPOINT_EXTENSIONS, "impress_pdf_Export"))
+
+    def __init__(self, pool_size=None, executable=None):
+        """
+        初始化转换器
+
+        Args:
+            pool_size: 工作进程数，默认为CPU核心数的一半（至少1个，最多2个）
+            executable: soffice 可执行文件路径，默认自动查找
+        """
+        self.executable = executable or self.find_executable()
+        if not self.executable or not os.path.exists(self.executable):
+            raise FileNotFoundError("未找到 LibreOffice (soffice)。请安装 LibreOffice 并加入 PATH，"
+                                    "或通过环境变量 LIBREOFFICE_PATH 指定 soffice 可执行文件路径。")
+        exe_stat = os.stat(self.executable)
+        self.converter_version = f"libreoffice:{exe_stat.st_size}:{int(exe_stat.st_mtime)}"
+        self.pool_size = pool_size or max(1, min(2, (os.cpu_count() or 1) // 2))
+        self._workers = [_SofficeWorker(self, index) for index in range(self.pool_size)]
+        self._idle_workers = queue.Queue()
+        for worker in self._workers:
+            self._idle_workers.put(worker)
+
+    @staticmethod
+    def find_executable():
+        """
+        查找 soffice 可执行文件，找不到时返回None
+
+        依次检查环境变量 LIBREOFFICE_PATH、PATH 中的 soffice/libreoffice 以及各平台的默认安装位置。
+        """
+        from_env = os.environ.get("LIBREOFFICE_PATH")
+        if from_env and os.path.isfile(from_env):
+            return from_env
+        for name in ("soffice", "libreoffice"):
+            found = shutil.which(name)
+            if found:
+                return found
+        if sys.platform == "win32":
+            candidates = [os.path.join(os.environ.get(var, ""), "LibreOffice", "program", "soffice.exe")
+                          for var in ("PROGRAMFILES", "PROGRAMFILES(X86)") if os.environ.get(var)]
+        elif sys.platform == "darwin":
+            candidates = ["/Applications/LibreOffice.app/Contents/MacOS/soffice"]
+        else:
+            candidates = (["/usr/lib/libreoffice/program/soffice", "/opt/libreoffice/program/soffice"] +
+                          sorted(glob.glob("/opt/libreoffice*/program/soffice"), reverse=True))
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return cls.find_executable() is not None
+
+    @contextmanager
+    def _acquire_worker(self, job=None):
+        """取出一个空闲的工作进程，等待期间任务被取消时抛出 JobCancelledError"""
+        while True:
+            try:
+                worker = self._idle_workers.get(timeout=0.2)
+                break
+            except queue.Empty:
+                if job is not None:
+                    job.check()
+        try:
+            yield worker
+        finally:
+            self._idle_workers.put(worker)
+
+    def warm_up(self, job=None):
+        """预热当前空闲的全部工作进程（正在转换的进程已经是热的）"""
+        workers = []
+        while True:
+            try:
+                workers.append(self._idle_workers.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            for worker in workers:
+                worker.warm_up(job)
+        finally:
+            for worker in workers:
+                self._idle_workers.put(worker)
+
+    def convert_to_pdf(self, office_file_path, pdf_path, job=None):
+        file_extension = os.path.splitext(office_file_path)[1].lower()
+        filter_name = self.PDF_FILTERS.get(file_extension)
+        if filter_name is None:
+            raise ValueError(f"不支持的文件类型: {file_extension} 进行转换。")
+        with self._acquire_worker(job) as worker:
+            worker.convert(office_file_path, pdf_path, filter_name, job=job)
+
+    def shutdown(self):
+        for worker in self._workers:
+            worker.stop()
+
+
+# 已注册的转换器，按优先级排列
+_CONVERTER_REGISTRY: Dict[str, Type[OfficeConverter]] = {}
+# 已创建的转换器实例（LibreOffice 工作进程池需要在多次转换之间共享）
+_converter_instances: Dict[str, OfficeConverter] = {}
+_converter_instances_lock = threading.Lock()
+
+
+def register_office_converter(converter_class: Type[OfficeConverter]) -> Type[OfficeConverter]:
+    """
+    注册 Office 转换器类，可作为类装饰器使用，先注册的优先级高
+
+    Args:
+        converter_class: OfficeConverter 子类，使用其 name 属性作为注册名称
+    """
+    if not converter_class.name:
+        raise ValueError(f"Office转换器 {converter_class.__name__} 未设置名称")
+    _CONVERTER_REGISTRY[converter_class.name] = converter_class
+    return converter_class
+
+
+def get_office_converter_names(available_only: bool = False) -> List[str]:
+    """获取已注册的转换器名称（按优先级）"""
+    return [name for name, converter_class in _CONVERTER_REGISTRY.items()
+            if not available_only or converter_class.is_available()]
+
+
+def get_office_converter(preferred: Optional[str] = None) -> OfficeConverter:
+    """
+    获取第一个可用的转换器（共享实例），preferred 指定的转换器可用时优先使用
+
+    Raises:
+        RuntimeError: 没有可用的转换器时
+    """
+    names = get_office_converter_names(available_only=True)
+    if preferred in names:
+        names.remove(preferred)
+        names.insert(0, preferred)
+    errors = []
+    with _converter_instances_lock:
+        for name in names:
+            if name in _converter_instances:
+                return _converter_instances[name]
+            try:
+                converter = _CONVERTER_REGISTRY[name]()
+            except (FileNotFoundError, RuntimeError) as e:
+                errors.append(f"{name}: {e}")
+                continue
+            _converter_instances[name] = converter
+            return converter
+    detail = "\n".join(errors)
+    raise RuntimeError("没有可用的 Office 转换程序：Windows 下需要 Microsoft Office 和 pywin32，"
+                       "其他平台请安装 LibreOffice。" + (f"\n{detail}" if detail else ""))
+
+
+def shutdown_office_converters():
+    """结束全部转换器启动的进程（程序退出时调用）"""
+    with _converter_instances_lock:
+        converters = list(_converter_instances.values())
+        _converter_instances.clear()
+    for converter in converters:
+        converter.shutdown()
+
+
+def convert_office_to_pdf(office_file_path, job=None, use_cache=True):
+    """
+    把 Office 文件转换为PDF（在工作线程中调用），结果按文件内容哈希缓存
+
+    Returns:
+        (PDF路径, 所在的临时目录)，临时目录由调用者通过临时产物管理器释放
+    """
+    if not os.path.exists(office_file_path):
+        raise FileNotFoundError(f"文件不存在: {office_file_path}")
+    converter = get_office_converter()
+    pdf_filename = os.path.splitext(os.path.basename(office_file_path))[0] + ".pdf"
+
+    cache = None
+    cache_key = None
+    if use_cache:
+        try:
+            cache = get_pdf_conversion_cache()
+            cache_key = cache.make_key(office_file_path, ["office-pdf"], converter.converter_version)
+            cached = cache.materialize(cache_key)
+            if cached is not None:
+                return os.path.join(cached[1], cached[0]), cached[1]
+        except OSError as e:
+            print(f"WARNING: convert_office_to_pdf: conversion cache unavailable: {e}")
+            cache = None
+            cache_key = None
+
+    manager = get_temp_artifact_manager()
+    output_dir = manager.create_dir(prefix="office_")
+    pdf_path = os.path.join(output_dir, pdf_filename)
+    try:
+        converter.convert_to_pdf(office_file_path, pdf_path, job=job)
+        if not os.path.exists(pdf_path):
+            raise RuntimeError(f"{converter.display_name} 未生成PDF文件。")
+    except BaseException:
+        manager.remove(output_dir)
+        raise
+    if cache is not None and cache_key:
+        cache.store(cache_key, output_dir, pdf_filename)
+    return pdf_path, output_dir
+
+
+register_office_converter(ComOfficeConverter)
+register_office_converter(LibreOfficeConverter)
@@ -0,0 +1,667 @@
+# -*- coding: utf-8 -*-
+"""
+DOCX/PPTX 直接转换为HTML
+
+Office 文件的 HTML 预览原先经过 Office→PDF→HTML 两次重量级转换。对 DOCX 和 PPTX，
+这里直接读取 OOXML 压缩包中的 XML 部件生成语义化的HTML（标题、段落、列表、表格、
+链接、图片）：
+- DOCX 正文用 iterparse 增量解析，每个顶层段落或表格解析完立即写出并从树中移除，
+  内存占用与文档长度无关；PPTX 逐张幻灯片解析、写出。
+- 图片只在正文引用到时才从压缩包中解出到 media 目录，未引用的不解压。
+输出结构与PDF转HTML引擎相同：(主HTML文件名, 输出目录)，输出目录归临时产物管理器管理。
+版面不做还原（分页、绝对定位、主题样式均忽略），需要精确版面时仍使用PDF预览。
+"""
+import os
+import html
+import shutil
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+from urllib.parse import quote
+
+from .pdf_conversion_cache import get_pdf_conversion_cache
+from .temp_artifacts import get_temp_artifact_manager
+from .job_control import JobCancelledError
+
+OOXML_HTML_EXTENSIONS = (".docx", ".pptx")
+# 转换器版本标识，作为缓存键的一部分；修改输出格式时递增
+CONVERTER_VERSION = "ooxml-html:1"
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_P = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+_V = "{urn:schemas-microsoft-com:vml}"
+_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+
+# 文档中的这类链接不输出为可点击的链接
+_UNSAFE_LINK_PREFIXES = ("javascript:", "vbscript:", "data:")
+
+_PAGE_CSS = """
+body{margin:0;background:#f3f3f3;font-family:"Segoe UI","Microsoft YaHei",sans-serif;line-height:1.5;color:#222;}
+#document{max-width:860px;margin:16px auto;padding:32px 48px;background:#fff;box-shadow:0 0 4px rgba(0,0,0,.25);}
+img{max-width:100%;height:auto;}
+table{border-collapse:collapse;margin:8px 0;}
+td,th{border:1px solid #bbb;padding:4px 8px;vertical-align:top;}
+td>p:first-child,th>p:first-child{margin-top:0;}td>p:last-child,th>p:last-child{margin-bottom:0;}
+.subtitle{color:#666;font-size:1.2em;}
+section.slide{position:relative;margin:0 0 24px 0;padding:24px 32px;border:1px solid #ccc;border-radius:4px;background:#fff;}
+section.slide .slide-number{position:absolute;top:6px;right:10px;color:#999;font-size:.85em;}
+"""
+
+
+def _attr(element, name, default=None):
+    """读取 w:/r: 等带命名空间的属性"""
+    return element.get(name, default) if element is not None else default
+
+
+def _is_on(element, name=f"{_W}val"):
+    """w:b、w:i 等开关属性：元素存在且 val 不为 0/false 时为开"""
+    if element is None:
+        return False
+    return element.get(name, "true").lower() not in ("0", "false", "off", "none")
+
+
+class _Package:
+    """OOXML 压缩包：解析关系，按需解出图片"""
+
+    def __init__(self, zip_file, output_dir):
+        self.zip = zip_file
+        self.output_dir = output_dir
+        self._names = set(zip_file.namelist())
+        self._rels = {}  # 部件路径: {关系ID: (目标, 是否外部, 关系类型)}
+        self._media = {}  # 压缩包内路径: 输出中的相对路径
+        self.media_count = 0
+
+    def has(self, part):
+        return part in self._names
+
+    def open(self, part):
+        return self.zip.open(part)
+
+    def parse(self, part):
+        with self.zip.open(part) as f:
+            return ET.parse(f).getroot()
+
+    def rels(self, part):
+        """部件的关系表 {关系ID: (目标路径或URL, 是否外部, 关系类型)}"""
+        if part in self._rels:
+            return self._rels[part]
+        directory, name = posixpath.split(part)
+        rels_part = posixpath.join(directory, "_rels", name + ".rels")
+        result = {}
+        if rels_part in self._names:
+            for rel in self.parse(rels_part).iter(f"{_PKG_REL}Relationship"):
+                target = rel.get("Target", "")
+                external = rel.get("TargetMode") == "External"
+                if not external:
+                    target = posixpath.normpath(posixpath.join(directory, target)).lstrip("/")
+                result[rel.get("Id")] = (target, external, rel.get("Type", ""))
+        self._rels[part] = result
+        return result
+
+    def main_part(self):
+        for target, external, rel_type in self.rels("").values():
+            if rel_type == _OFFICE_DOCUMENT_REL and not external:
+                return target
+        return None
+
+    def related_part(self, part, type_suffix):
+        """part 的某类关联部件（如 /styles、/numbering），不存在时返回 None"""
+        for target, external, rel_type in self.rels(part).values():
+            if rel_type.endswith(type_suffix) and not external and target in self._names:
+                return target
+        return None
+
+    def link_target(self, part, rel_id):
+        rel = self.rels(part).get(rel_id)
+        return rel[0] if rel else None
+
+    def media_src(self, part, rel_id):
+        """图片的 src：外部链接原样返回，压缩包内的图片首次引用时解出到 media 目录"""
+        rel = self.rels(part).get(rel_id)
+        if rel is None:
+            return None
+        target, external, _rel_type = rel
+        if external:
+            return target
+        if target in self._media:
+            return self._media[target]
+        if target not in self._names:
+            return None
+        self.media_count += 1
+        file_name = f"{self.media_count:04d}_{posixpath.basename(target)}"
+        media_dir = os.path.join(self.output_dir, "media")
+        os.makedirs(media_dir, exist_ok=True)
+        with self.zip.open(target) as source, open(os.path.join(media_dir, file_name), "wb") as dest:
+            shutil.copyfileobj(source, dest)
+        src = "media/" + quote(file_name)
+        self._media[target] = src
+        return src
+
+
+class _ListState:
+    """连续列表段落的嵌套状态，每一层为 [标签, 列表ID, 是否已有列表项]"""
+
+    def __init__(self):
+        self.levels = []
+
+    def item(self, out, level, tag, list_id):
+        """开始第 level 层（从0开始）的一个列表项"""
+        self.close(out, level + 1)
+        if len(self.levels) == level + 1 and self.levels[level][:2] != [tag, list_id]:
+            self.close(out, level)
+        while len(self.levels) < level + 1:
+            out.append(f"<{tag}>")
+            self.levels.append([tag, list_id, False])
+        current = self.levels[level]
+        if current[2]:
+            out.append("</li>")
+        out.append("<li>")
+        current[2] = True
+
+    def close(self, out, keep=0):
+        """关闭多余的层，只保留外层的 keep 层"""
+        while len(self.levels) > keep:
+            tag, _list_id, has_item = self.levels.pop()
+            if has_item:
+                out.append("</li>")
+            out.append(f"</{tag}>")
+            if not self.levels:
+                out.append("\n")
+
+
+class _Runs:
+    """把一段连续的文本片段按格式合并后输出（相邻格式相同的片段共用一组标签）"""
+
+    def __init__(self):
+        self.segments = []  # [(格式标签元组, 链接, HTML片段)]
+
+    def add(self, formats, fragment, link=None):
+        if not fragment:
+            return
+        if self.segments and self.segments[-1][0] == formats and self.segments[-1][1] == link:
+            formats, link, previous = self.segments.pop()
+            fragment = previous + fragment
+        self.segments.append((formats, link, fragment))
+
+    def html(self):
+        parts = []
+        for formats, link, fragment in self.segments:
+            for tag in formats:
+                fragment = f"<{tag}>{fragment}</{tag}>"
+            if link and not link.strip().lower().startswith(_UNSAFE_LINK_PREFIXES):
+                fragment = f'<a href="{html.escape(link, quote=True)}">{fragment}</a>'
+            parts.append(fragment)
+        return "".join(parts)
+
+
+class _DocxConverter:
+    """DOCX 正文转换"""
+
+    HEADING_STYLES = {"title": 1, "subtitle": 0}
+
+    def __init__(self, package, part, out_file, job=None):
+        self.package = package
+        self.part = part
+        self.out_file = out_file
+        self.job = job
+        self.styles = self._load_styles()
+        self.numbering = self._load_numbering()
+        self.blocks = 0
+
+    # ---- 样式与编号 ----
+    def _load_styles(self):
+        """段落样式ID: 标题级别（0 表示副标题，None 表示普通段落）"""
+        styles = {}
+        styles_part = self.package.related_part(self.part, "/styles")
+        if not styles_part:
+            return styles
+        for style in self.package.parse(styles_part).iter(f"{_W}style"):
+            if style.get(f"{_W}type") != "paragraph":
+                continue
+            style_id = style.get(f"{_W}styleId")
+            name = (_attr(style.find(f"{_W}name"), f"{_W}val") or style_id or "").lower()
+            outline = style.find(f"{_W}pPr/{_W}outlineLvl")
+            if name in self.HEADING_STYLES:
+                styles[style_id] = self.HEADING_STYLES[name]
+            elif name.startswith("heading "):
+                try:
+                    styles[style_id] = min(6, int(name.split()[1]))
+                except ValueError:
+                    pass
+            elif outline is not None:
+                try:
+                    styles[style_id] = min(6, int(outline.get(f"{_W}val")) + 1)
+                except (TypeError, ValueError):
+                    pass
+        return styles
+
+    def _load_numbering(self):
+        """(numId, ilvl): "ul" 或 "ol" """
+        numbering = {}
+        numbering_part = self.package.related_part(self.part, "/numbering")
+        if not numbering_part:
+            return numbering
+        root = self.package.parse(numbering_part)
+        abstract_formats = {}
+        for abstract in root.iter(f"{_W}abstractNum"):
+            levels = {}
+            for level in abstract.iter(f"{_W}lvl"):
+                fmt = _attr(level.find(f"{_W}numFmt"), f"{_W}val", "decimal")
+                levels[level.get(f"{_W}ilvl")] = "ul" if fmt in ("bullet", "none") else "ol"
+            abstract_formats[abstract.get(f"{_W}abstractNumId")] = levels
+        for num in root.iter(f"{_W}num"):
+            abstract_id = _attr(num.find(f"{_W}abstractNumId"), f"{_W}val")
+            for ilvl, tag in abstract_formats.get(abstract_id, {}).items():
+                numbering[(num.get(f"{_W}numId"), ilvl)] = tag
+        return numbering
+
+    # ---- 流式转换 ----
+    def convert(self):
+        """增量解析正文，每个顶层块写出后即从树中移除"""
+        list_state = _ListState()
+        body = None
+        depth = 0
+        with self.package.open(self.part) as f:
+            for event, element in ET.iterparse(f, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if depth == 2 and element.tag == f"{_W}body":
+                        body = element
+                    continue
+                depth -= 1
+                if body is None or depth != 2:
+                    continue
+                out = []
+                self._block(element, out, list_state)
+                if out:
+                    self.out_file.write("".join(out))
+                body.remove(element)
+                self.blocks += 1
+                if self.job is not None and self.blocks % 50 == 0:
+                    self.job.check()
+                    self.job.report_progress(self.blocks, 0, "DOCX")
+        out = []
+        list_state.close(out)
+        self.out_file.write("".join(out))
+
+    def _block(self, element, out, list_state):
+        tag = element.tag
+        if tag == f"{_W}p":
+            self._paragraph(element, out, list_state)
+        elif tag == f"{_W}tbl":
+            list_state.close(out)
+            self._table(element, out)
+        elif tag in (f"{_W}sdt", f"{_W}customXml"):
+            content = element.find(f"{_W}sdtContent") if tag == f"{_W}sdt" else element
+            for child in list(content if content is not None else []):
+                self._block(child, out, list_state)
+
+    def _paragraph(self, paragraph, out, list_state):
+        properties = paragraph.find(f"{_W}pPr")
+        style_id = _attr(properties.find(f"{_W}pStyle") if properties is not None else None, f"{_W}val")
+        heading = self.styles.get(style_id)
+        num_pr = properties.find(f"{_W}numPr") if properties is not None else None
+        content = self._inline(paragraph)
+
+        if num_pr is not None and heading is None:
+            num_id = _attr(num_pr.find(f"{_W}numId"), f"{_W}val")
+            ilvl = _attr(num_pr.find(f"{_W}ilvl"), f"{_W}val", "0")
+            if num_id and num_id != "0":
+                level = int(ilvl) if ilvl.isdigit() else 0
+                list_state.item(out, level, self.numbering.get((num_id, ilvl), "ul"), num_id)
+                out.append(content)
+                return
+        list_state.close(out)
+
+        style = ""
+        justification = _attr(properties.find(f"{_W}jc") if properties is not None else None, f"{_W}val")
+        if justification in ("center", "right", "both"):
+            style = f' style="text-align:{"justify" if justification == "both" else justification}"'
+        if heading:
+            out.append(f"<h{heading}{style}>{content}</h{heading}>\n")
+        elif heading == 0:
+            out.append(f'<p class="subtitle"{style}>{content}</p>\n')
+        else:
+            out.append(f"<p{style}>{content or '<br/>'}</p>\n")
+
+    def _inline(self, element, link=None):
+        """段落（或超链接等容器）中的内联内容"""
+        runs = _Runs()
+        self._collect_runs(element, runs, link)
+        return runs.html()
+
+    def _collect_runs(self, element, runs, link):
+        for child in element:
+            tag = child.tag
+            if tag == f"{_W}r":
+                self._run(child, runs, link)
+            elif tag == f"{_W}hyperlink":
+                rel_id = child.get(f"{_R}id")
+                anchor = child.get(f"{_W}anchor")
+                target = self.package.link_target(self.part, rel_id) if rel_id else None
+                if anchor:
+                    target = (target or "") + "#" + anchor
+                self._collect_runs(child, runs, target or link)
+            elif tag == f"{_W}bookmarkStart":
+                name = child.get(f"{_W}name")
+                if name and not name.startswith("_"):
+                    runs.add((), f'<a id="{html.escape(name, quote=True)}"></a>')
+            elif tag in (f"{_W}ins", f"{_W}smartTag", f"{_W}fldSimple", f"{_W}customXml", f"{_W}sdtContent"):
+                self._collect_runs(child, runs, link)
+            elif tag == f"{_W}sdt":
+                content = child.find(f"{_W}sdtContent")
+                if content is not None:
+                    self._collect_runs(content, runs, link)
+
+    def _run(self, run, runs, link):
+        properties = run.find(f"{_W}rPr")
+        formats = ()
+        if properties is not None:
+            formats = tuple(tag for tag, on in (
+                ("strong", _is_on(properties.find(f"{_W}b"))),
+                ("em", _is_on(properties.find(f"{_W}i"))),
+                ("u", _is_on(properties.find(f"{_W}u")) and
+                 _attr(properties.find(f"{_W}u"), f"{_W}val") != "none"),
+                ("s", _is_on(properties.find(f"{_W}strike")) or _is_on(properties.find(f"{_W}dstrike"))),
+                ("sup", _attr(properties.find(f"{_W}vertAlign"), f"{_W}val") == "superscript"),
+                ("sub", _attr(properties.find(f"{_W}vertAlign"), f"{_W}val") == "subscript"),
+            ) if on)
+        for child in run:
+            tag = child.tag
+            if tag == f"{_W}t":
+                runs.add(formats, html.escape(child.text or ""), link)
+            elif tag == f"{_W}tab":
+                runs.add(formats, "&emsp;", link)
+            elif tag in (f"{_W}br", f"{_W}cr"):
+                if child.get(f"{_W}type") != "page":
+                    runs.add(formats, "<br/>", link)
+            elif tag == f"{_W}noBreakHyphen":
+                runs.add(formats, "&#8209;", link)
+            elif tag in (f"{_W}drawing", f"{_W}pict", f"{_W}object"):
+                image = self._image(child)
+                if image:
+                    runs.add((), image, link)
+
+    def _image(self, element):
+        for blip in element.iter(f"{_A}blip"):
+            src = self.package.media_src(self.part, blip.get(f"{_R}embed") or blip.get(f"{_R}link"))
+            if src:
+                return f'<img src="{html.escape(src, quote=True)}" alt="{html.escape(self._image_description(element), quote=True)}"/>'
+        for image_data in element.iter(f"{_V}imagedata"):
+            src = self.package.media_src(self.part, image_data.get(f"{_R}id"))
+            if src:
+                return f'<img src="{html.escape(src, quote=True)}" alt=""/>'
+        return ""
+
+    @staticmethod
+    def _image_description(element):
+        for properties in element.iter():
+            if properties.tag.endswith("}docPr"):
+                return properties.get("descr") or properties.get("title") or ""
+        return ""
+
+    def _table(self, table, out):
+        # 先按网格列计算纵向合并（vMerge）的行数，再输出
+        rows = []
+        for row in table.findall(f"{_W}tr"):
+            header = row.find(f"{_W}trPr/{_W}tblHeader") is not None
+            cells = []
+            column = 0
+            for cell in row.findall(f"{_W}tc"):
+                properties = cell.find(f"{_W}tcPr")
+                span = _attr(properties.find(f"{_W}gridSpan") if properties is not None else None, f"{_W}val", "1")
+                span = int(span) if span.isdigit() else 1
+                v_merge = properties.find(f"{_W}vMerge") if properties is not None else None
+                merge_state = None if v_merge is None else v_merge.get(f"{_W}val", "continue")
+                cells.append({"element": cell, "column": column, "span": span, "merge": merge_state, "rowspan": 1})
+                column += span
+            rows.append((header, cells))
+
+        origins = {}  # 网格列: 正在向下合并的起始单元格
+        for _header, cells in rows:
+            for cell in cells:
+                if cell["merge"] == "continue" and cell["column"] in origins:
+                    origins[cell["column"]]["rowspan"] += 1
+                    cell["skip"] = True
+                elif cell["merge"] == "restart":
+                    origins[cell["column"]] = cell
+                else:
+                    origins.pop(cell["column"], None)
+
+        out.append("<table>\n")
+        for header, cells in rows:
+            out.append("<tr>")
+            cell_tag = "th" if header else "td"
+            for cell in cells:
+                if cell.get("skip"):
+                    continue
+                attrs = ""
+                if cell["span"] > 1:
+                    attrs += f' colspan="{cell["span"]}"'
+                if cell["rowspan"] > 1:
+                    attrs += f' rowspan="{cell["rowspan"]}"'
+                cell_out = []
+                cell_lists = _ListState()
+                for child in cell["element"]:
+                    self._block(child, cell_out, cell_lists)
+                cell_lists.close(cell_out)
+                out.append(f"<{cell_tag}{attrs}>{''.join(cell_out)}</{cell_tag}>")
+            out.append("</tr>\n")
+        out.append("</table>\n")
+
+
+class _PptxConverter:
+    """PPTX 幻灯片转换：每张幻灯片输出为一个 section"""
+
+    TITLE_PLACEHOLDERS = ("title", "ctrTitle")
+    # 正文占位符中的段落默认带项目符号（来自版式），文本框默认不带
+    BODY_PLACEHOLDERS = ("body", None)
+
+    def __init__(self, package, part, out_file, job=None):
+        self.package = package
+        self.part = part
+        self.out_file = out_file
+        self.job = job
+
+    def slide_parts(self):
+        presentation = self.package.parse(self.part)
+        rels = self.package.rels(self.part)
+        slides = []
+        for slide_id in presentation.iter(f"{_P}sldId"):
+            rel = rels.get(slide_id.get(f"{_R}id"))
+            if rel and not rel[1] and self.package.has(rel[0]):
+                slides.append(rel[0])
+        return slides
+
+    def convert(self):
+        slides = self.slide_parts()
+        for number, slide_part in enumerate(slides, start=1):
+            if self.job is not None:
+                self.job.check()
+            out = [f'<section class="slide" id="slide-{number}"><div class="slide-number">{number}</div>\n']
+            tree = self.package.parse(slide_part).find(f"{_P}cSld/{_P}spTree")
+            if tree is not None:
+                self._shapes(slide_part, tree, out)
+            out.append("</section>\n")
+            self.out_file.write("".join(out))
+            if self.job is not None:
+                self.job.report_progress(number, len(slides), "PPTX")
+
+    def _shapes(self, slide_part, tree, out):
+        for shape in tree:
+            tag = shape.tag
+            if tag == f"{_P}sp":
+                self._text_shape(slide_part, shape, out)
+            elif tag == f"{_P}pic":
+                blip = shape.find(f".//{_A}blip")
+                src = self.package.media_src(slide_part, blip.get(f"{_R}embed")) if blip is not None else None
+                if src:
+                    description = shape.find(f"{_P}nvPicPr/{_P}cNvPr")
+                    alt = _attr(description, "descr", "") or ""
+                    out.append(f'<p><img src="{html.escape(src, quote=True)}" alt="{html.escape(alt, quote=True)}"/></p>\n')
+            elif tag == f"{_P}graphicFrame":
+                table = shape.find(f".//{_A}tbl")
+                if table is not None:
+                    self._table(slide_part, table, out)
+            elif tag == f"{_P}grpSp":
+                self._shapes(slide_part, shape, out)
+
+    def _text_shape(self, slide_part, shape, out):
+        body = shape.find(f"{_P}txBody")
+        if body is None:
+            return
+        placeholder = shape.find(f"{_P}nvSpPr/{_P}nvPr/{_P}ph")
+        placeholder_type = placeholder.get("type") if placeholder is not None else "textbox"
+        if placeholder_type in self.TITLE_PLACEHOLDERS:
+            text = "<br/>".join(filter(None, (self._paragraph_runs(slide_part, p) for p in body.findall(f"{_A}p"))))
+            if text:
+                out.append(f"<h2>{text}</h2>\n")
+            return
+        if placeholder_type == "subTitle":
+            text = "<br/>".join(filter(None, (self._paragraph_runs(slide_part, p) for p in body.findall(f"{_A}p"))))
+            if text:
+                out.append(f'<p class="subtitle">{text}</p>\n')
+            return
+        self._text_body(slide_part, body, out, bulleted=placeholder is not None and placeholder_type in self.BODY_PLACEHOLDERS)
+
+    def _text_body(self, slide_part, body, out, bulleted=False):
+        list_state = _ListState()
+        for paragraph in body.findall(f"{_A}p"):
+            content = self._paragraph_runs(slide_part, paragraph)
+            properties = paragraph.find(f"{_A}pPr")
+            level = _attr(properties, "lvl", "0")
+            level = int(level) if level.isdigit() else 0
+            list_tag = None
+            if properties is not None and properties.find(f"{_A}buNone") is not None:
+                list_tag = None
+            elif properties is not None and properties.find(f"{_A}buAutoNum") is not None:
+                list_tag = "ol"
+            elif (properties is not None and properties.find(f"{_A}buChar") is not None) or bulleted:
+                list_tag = "ul"
+            if list_tag and content:
+                list_state.item(out, level, list_tag, list_tag)
+                out.append(content)
+            else:
+                list_state.close(out)
+                if content:
+                    out.append(f"<p>{content}</p>\n")
+        list_state.close(out)
+        out.append("\n")
+
+    def _paragraph_runs(self, slide_part, paragraph):
+        runs = _Runs()
+        for child in paragraph:
+            if child.tag == f"{_A}r" or child.tag == f"{_A}fld":
+                properties = child.find(f"{_A}rPr")
+                formats = ()
+                link = None
+                if properties is not None:
+                    baseline = properties.get("baseline", "0")
+                    formats = tuple(tag for tag, on in (
+                        ("strong", properties.get("b") in ("1", "true")),
+                        ("em", properties.get("i") in ("1", "true")),
+                        ("u", properties.get("u", "none") != "none"),
+                        ("s", properties.get("strike", "noStrike") != "noStrike"),
+                        ("sup", baseline.lstrip("-").isdigit() and int(baseline) > 0),
+                        ("sub", baseline.lstrip("-").isdigit() and int(baseline) < 0),
+                    ) if on)
+                    click = properties.find(f"{_A}hlinkClick")
+                    if click is not None and click.get(f"{_R}id"):
+                        link = self.package.link_target(slide_part, click.get(f"{_R}id"))
+                text = child.find(f"{_A}t")
+                runs.add(formats, html.escape(text.text or "") if text is not None else "", link)
+            elif child.tag == f"{_A}br":
+                runs.add((), "<br/>")
+        return runs.html()
+
+    def _table(self, slide_part, table, out):
+        out.append("<table>\n")
+        for row in table.findall(f"{_A}tr"):
+            out.append("<tr>")
+            for cell in row.findall(f"{_A}tc"):
+                if cell.get("hMerge") in ("1", "true") or cell.get("vMerge") in ("1", "true"):
+                    continue
+                attrs = ""
+                if cell.get("gridSpan", "1") != "1":
+                    attrs += f' colspan="{cell.get("gridSpan")}"'
+                if cell.get("rowSpan", "1") != "1":
+                    attrs += f' rowspan="{cell.get("rowSpan")}"'
+                cell_out = []
+                body = cell.find(f"{_A}txBody")
+                if body is not None:
+                    self._text_body(slide_part, body, cell_out)
+                out.append(f"<td{attrs}>{''.join(cell_out).strip()}</td>")
+            out.append("</tr>\n")
+        out.append("</table>\n")
+
+
+def _convert_into(file_path, output_dir, html_filename, job=None):
+    """把 file_path 转换为 output_dir 中的 html_filename（先写临时文件再替换）"""
+    output_path = os.path.join(output_dir, html_filename)
+    temp_path = output_path + ".part"
+    title = os.path.splitext(os.path.basename(file_path))[0]
+    with zipfile.ZipFile(file_path) as zip_file, open(temp_path, "w", encoding="utf-8") as out_file:
+        package = _Package(zip_file, output_dir)
+        main_part = package.main_part()
+        if not main_part or not package.has(main_part):
+            raise ValueError("文件中缺少主文档部件，不是有效的 DOCX/PPTX 文件。")
+        if main_part.endswith("presentation.xml"):
+            converter_class = _PptxConverter
+        elif main_part.startswith("word/"):
+            converter_class = _DocxConverter
+        else:
+            raise ValueError(f"不支持的 OOXML 文档类型: {main_part}")
+        out_file.write(f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8"/>\n<title>{html.escape(title)}</title>\n'
+                       f'<style type="text/css">{_PAGE_CSS}</style>\n</head>\n<body>\n<div id="document">\n')
+        converter_class(package, main_part, out_file, job=job).convert()
+        out_file.write('</div>\n</body>\n</html>\n')
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+def convert_ooxml_to_html(file_path, job=None, use_cache=True):
+    """
+    把 DOCX/PPTX 直接转换为HTML（在工作线程中调用），结果按文件内容哈希缓存
+
+    Args:
+        file_path: .docx 或 .pptx 文件路径
+        job: 可选的 JobControl，用于取消转换和报告进度（取消时抛出 JobCancelledError）
+        use_cache: 是否使用转换结果缓存
+
+    Returns:
+        (主HTML文件名, 输出目录)，输出目录由调用者通过临时产物管理器释放
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"文件不存在: {file_path}")
+
+    cache = None
+    cache_key = None
+    if use_cache:
+        try:
+            cache = get_pdf_conversion_cache()
+            cache_key = cache.make_key(file_path, ["ooxml-html"], CONVERTER_VERSION)
+            cached = cache.materialize(cache_key)
+            if cached is not None:
+                return cached
+        except OSError as e:
+            print(f"WARNING: convert_ooxml_to_html: conversion cache unavailable: {e}")
+            cache = None
+            cache_key = None
+
+    manager = get_temp_artifact_manager()
+    output_dir = manager.create_dir(prefix="ooxml_")
+    html_filename = os.path.splitext(os.path.basename(file_path))[0] + ".html"
+    try:
+        _convert_into(file_path, output_dir, html_filename, job=job)
+    except JobCancelledError:
+        manager.remove(output_dir)
+        raise
+    except Exception as e:
+        manager.remove(output_dir)
+        raise RuntimeError(f"DOCX/PPTX 转换HTML失败: {e}") from e
+    if cache is not None and cache_key:
+        cache.store(cache_key, output_dir, html_filename)
+    return html_filename, output_dir
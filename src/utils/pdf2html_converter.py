@@ -1,9 +1,22 @@
 import os
 import subprocess
-import tempfile
 import shutil
 import sys
+import time
 import pathlib
+import math
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .pdf_conversion_cache import get_pdf_conversion_cache, reflink_file
+from .pdf2html_stitcher import plan_page_ranges, stitch_range_outputs, prepare_part, write_stitched
+from .job_control import JobCancelledError, run_process
+from .temp_artifacts import get_temp_artifact_manager
+
+try:
+    import fitz  # PyMuPDF，仅用于读取页数
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
 # from .pdf_utils import _inline_resources # Import for inlining resources - MOVED
 
 
@@ -18,26 +31,231 @@ def get_application_path():
     return application_path
 
 
+def stage_input_file(src, dst):
+    """
+    把输入文件放到 dst，尽量不复制数据：依次尝试硬链接、reflink、符号链接，都不支持时才复制
+
+    pdf2htmlEX 只读取输入文件，因此共享同一份数据是安全的。
+
+    Returns:
+        使用的方式："hardlink"、"reflink"、"symlink" 或 "copy"
+    """
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:
+        pass
+    try:
+        reflink_file(src, dst)
+        return "reflink"
+    except OSError:
+        pass
+    try:
+        os.symlink(os.path.abspath(src), dst)
+        return "symlink"
+    except (OSError, NotImplementedError):
+        pass
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+class PhaseTimer:
+    """记录一次转换中各阶段的耗时（秒）"""
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def summary(self):
+        total = sum(self.phases.values())
+        parts = "  ".join(f"{name}={elapsed * 1000:.1f}ms" for name, elapsed in self.phases.items())
+        return f"{parts}  total={total * 1000:.1f}ms"
+
+
 class PDF2HTMLConverter:
     """PDF转HTML转换器，使用pdf2htmlEX工具"""
+
+    # 每段最少页数；页数不足两段时不拆分
+    MIN_PAGES_PER_RANGE = 8
+    # 渐进式转换：首段页数（尽快显示），以及后续每段的最多页数（控制页面追加的粒度）
+    PROGRESSIVE_FIRST_PAGES = 1
+    PROGRESSIVE_CHUNK_PAGES = 16
     
-    def __init__(self):
+    def __init__(self, max_workers=None, executable=None):
         self.application_root = get_application_path()
         self.pdf2html_dir = os.path.join(self.application_root, "pdf2htmlEX-win32-0.13.6")
-        self.pdf2html_exe = os.path.join(self.pdf2html_dir, "pdf2htmlEX.exe")
+        self.pdf2html_exe = executable or self.find_executable(self.pdf2html_dir)
         
         # 验证pdf2htmlEX工具是否存在
-        if not os.path.exists(self.pdf2html_exe):
-            raise FileNotFoundError(f"pdf2htmlEX.exe 未找到。请确保 'pdf2htmlEX-win32-0.13.6' 目录已放置在项目根目录下，"  
-                                   f"并且 'pdf2htmlEX.exe' 在该目录中。")
+        if not self.pdf2html_exe or not os.path.exists(self.pdf2html_exe):
+            raise FileNotFoundError(f"pdf2htmlEX 未找到。Windows 下请确保 'pdf2htmlEX-win32-0.13.6' 目录已放置在项目根目录下，"
+                                   f"并且 'pdf2htmlEX.exe' 在该目录中；其他平台请安装 pdf2htmlEX 并加入 PATH，"
+                                   f"或通过环境变量 PDF2HTMLEX_PATH 指定可执行文件路径。")
+        # 只有项目自带的版本需要指定数据目录，系统安装的版本使用其编译时的数据目录
+        self.use_bundled_data = os.path.dirname(os.path.abspath(self.pdf2html_exe)) == os.path.abspath(self.pdf2html_dir)
+
+        # 转换器版本标识，作为缓存键的一部分；替换可执行文件后旧缓存自动失效
+        exe_stat = os.stat(self.pdf2html_exe)
+        self.converter_version = f"{os.path.basename(self.pdf2html_exe)}:{exe_stat.st_size}:{int(exe_stat.st_mtime)}"
+        # 并行转换的进程数，默认等于CPU核心数
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # 最近一次转换各阶段的耗时 {阶段名: 秒}
+        self.last_timings = {}
+
+    @staticmethod
+    def find_executable(pdf2html_dir=None):
+        """
+        查找pdf2htmlEX可执行文件，找不到时返回None
+
+        依次检查环境变量 PDF2HTMLEX_PATH、项目自带的Windows版本（仅Windows）以及 PATH 中的 pdf2htmlEX。
+        """
+        from_env = os.environ.get("PDF2HTMLEX_PATH")
+        if from_env and os.path.isfile(from_env):
+            return from_env
+        if os.name == "nt":
+            pdf2html_dir = pdf2html_dir or os.path.join(get_application_path(), "pdf2htmlEX-win32-0.13.6")
+            bundled = os.path.join(pdf2html_dir, "pdf2htmlEX.exe")
+            if os.path.exists(bundled):
+                return bundled
+        return shutil.which("pdf2htmlEX")
+
+    @staticmethod
+    def get_page_count(pdf_path):
+        """读取PDF页数，无法读取时返回0"""
+        if not PYMUPDF_AVAILABLE:
+            return 0
+        try:
+            with fitz.open(pdf_path) as doc:
+                return doc.page_count
+        except Exception as e:
+            print(f"WARNING: PDF2HTMLConverter: 无法读取PDF页数: {e}")
+            return 0
+
+    def plan_ranges(self, pdf_path, max_workers=None):
+        """按CPU核心数把PDF划分为页码区间，不需要拆分时返回单个区间或空列表"""
+        workers = max_workers or self.max_workers
+        if workers <= 1:
+            return []
+        return plan_page_ranges(self.get_page_count(pdf_path), workers, self.MIN_PAGES_PER_RANGE)
+
+    def _run_pdf2htmlex(self, args, cwd, job=None):
+        """在 cwd 中执行 pdf2htmlEX，失败时抛出 RuntimeError；job 被取消时结束进程并抛出 JobCancelledError"""
+        cmd = [self.pdf2html_exe] + list(args)
+        print(f"DEBUG: pdf2htmlEX command: {' '.join(cmd)}")
+        process = run_process(
+            cmd,
+            job=job,
+            cwd=cwd,  # 在临时目录中执行命令
+            text=True,
+            shell=os.name == "nt",  # Windows 下使用shell执行以支持管理员权限；其他平台直接执行
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)  # 不显示命令窗口
+        )
+        if process.returncode != 0:
+            stderr_output = process.stderr[:1000] if process.stderr else "未知错误"
+            raise RuntimeError(f"pdf2htmlEX转换失败 (代码: {process.returncode}):\n{stderr_output}")
+        return process
+
+    def _range_args(self, work_dir, part_dir, pdf_filename, html_filename, base_options, options,
+                    first_page, last_page):
+        """创建段子目录，返回只转换 first_page-last_page 页的 pdf2htmlEX 参数"""
+        os.makedirs(os.path.join(work_dir, part_dir), exist_ok=True)
+        return base_options + [
+            "--first-page", str(first_page),
+            "--last-page", str(last_page),
+            "--dest-dir", part_dir,
+            pdf_filename,
+            html_filename,
+        ] + list(options or [])
+
+    def _convert_ranges_in_parallel(self, pdf_filename, html_filename, work_dir, base_options, options, ranges,
+                                    timer=None, job=None):
+        """
+        按页码区间并行执行多个pdf2htmlEX进程，并把各段输出合并为一个文档
+
+        每段输出到 work_dir 下单独的子目录；pdf2htmlEX 本身是单线程的，
+        每个线程只负责启动并等待一个子进程，实际的并行发生在进程层面。
+        """
+        parts = []
+        jobs = []
+        for index, (first_page, last_page) in enumerate(ranges):
+            part_dir = f"part_{index}"
+            parts.append((part_dir, html_filename))
+            jobs.append(self._range_args(work_dir, part_dir, pdf_filename, html_filename,
+                                         base_options, options, first_page, last_page))
+
+        timer = timer or PhaseTimer()
+        with timer.phase("pdf2htmlex"), ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            futures = [executor.submit(self._run_pdf2htmlex, args, work_dir, job) for args in jobs]
+            errors = []
+            pages_done = 0
+            page_count = ranges[-1][1]
+            for (first_page, last_page), future in zip(ranges, futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append(f"第 {first_page}-{last_page} 页: {e}")
+                    continue
+                pages_done += last_page - first_page + 1
+                if job is not None:
+                    job.report_progress(pages_done, page_count, "pdf2htmlEX")
+        if job is not None:
+            job.check()
+        if errors:
+            raise RuntimeError("\n".join(errors))
+
+        with timer.phase("stitch"):
+            return stitch_range_outputs(parts, work_dir, html_filename)
+
+    def _build_base_options(self):
+        """构建与文件名无关的pdf2htmlEX选项（同时用于生成缓存键）"""
+        data_options = ["--data-dir", os.path.join(self.pdf2html_dir, "data")] if self.use_bundled_data else []
+        return data_options + [
+            # Performance-related options (experimental)
+            # Ensure resources are external, as we use load()
+            # These might be default, but explicitly setting them can ensure behavior
+            # and potentially skip some internal embedding logic if pdf2htmlEX tries it by default.
+            "--embed-css", "0",
+            "--embed-font", "0",
+            "--embed-image", "0",
+            "--embed-javascript", "0",
+            # "--no-hinting", # Removed as it's an unknown option for this version
+            # "--process-type3", "0", # If Type3 fonts are an issue (test needed)
+            # "--optimize-text", "0", # May reduce quality but speed up (test needed)
+        ]
+
+    def _copy_cached_output(self, cached_dir, cached_html_filename, output_html_path):
+        """把缓存中的转换结果复制到指定输出位置，主HTML按输出文件名保存"""
+        output_dir = os.path.dirname(output_html_path)
+        os.makedirs(output_dir, exist_ok=True)
+        for item in os.listdir(cached_dir):
+            s = os.path.join(cached_dir, item)
+            if item == cached_html_filename:
+                shutil.copy2(s, output_html_path)
+            elif os.path.isdir(s):
+                shutil.copytree(s, os.path.join(output_dir, item), dirs_exist_ok=True)
+            else:
+                shutil.copy2(s, os.path.join(output_dir, item))
+        return output_html_path
     
-    def convert_pdf_to_html(self, pdf_path, output_html_path=None, options=None):
+    def convert_pdf_to_html(self, pdf_path, output_html_path=None, options=None, use_cache=True,
+                            parallel=True, max_workers=None, job=None):
         """将PDF文件转换为HTML
         
         Args:
             pdf_path: PDF文件路径
             output_html_path: 输出HTML文件路径，如果为None则使用临时文件
             options: 额外的pdf2htmlEX命令行选项
+            use_cache: 是否使用转换结果缓存（内容未变化的PDF直接复用上次的输出）
+            parallel: 页数较多时是否按页码区间拆分为多个进程并行转换
+            max_workers: 并行进程数，默认为CPU核心数
+            job: 可选的 JobControl，用于取消转换（结束pdf2htmlEX进程）和报告进度
             
         Returns:
             如果output_html_path为None，返回HTML内容字符串
@@ -46,147 +264,279 @@ class PDF2HTMLConverter:
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF文件未找到: {pdf_path}")
         
+        use_temp_output = output_html_path is None
+        timer = PhaseTimer()
+        self.last_timings = timer.phases
+        base_options = self._build_base_options()
+        ranges = self.plan_ranges(pdf_path, max_workers) if parallel else []
+        # 分段输出的文档结构与单次转换不同，分段方式也计入缓存键
+        layout = [f"--ranges={len(ranges)}"] if len(ranges) > 1 else []
+
+        # 查找缓存：键为 (PDF内容哈希, 全部选项, 转换器版本)
+        cache = None
+        cache_key = None
+        if use_cache:
+            try:
+                with timer.phase("cache_lookup"):
+                    cache = get_pdf_conversion_cache()
+                    cache_key = cache.make_key(pdf_path, base_options + list(options or []) + layout, self.converter_version)
+                    cached = cache.materialize(cache_key) if use_temp_output else cache.lookup(cache_key)
+                if cached is not None:
+                    if use_temp_output:
+                        print(f"DEBUG: PDF2HTMLConverter: cache hit for {pdf_path} -> {cached[1]} ({timer.summary()})")
+                        return cached
+                    with timer.phase("copy_output"):
+                        result = self._copy_cached_output(cached[1], cached[0], output_html_path)
+                    print(f"DEBUG: PDF2HTMLConverter: cache hit for {pdf_path} ({timer.summary()})")
+                    return result
+            except OSError as e:
+                print(f"WARNING: PDF2HTMLConverter: conversion cache unavailable: {e}")
+                cache = None
+                cache_key = None
+
         # 创建临时目录用于处理文件
-        temp_dir = tempfile.mkdtemp(prefix="pdf2html_")
+        temp_dir = get_temp_artifact_manager().create_dir(prefix="pdf2html_")
         temp_pdf_path = None
-        temp_html_path = None
-        use_temp_output = output_html_path is None
+        succeeded = False
         
         try:
-            # 复制PDF文件到工具目录
+            # 把PDF放到临时目录（优先使用链接，不复制数据）
             pdf_filename = os.path.basename(pdf_path)
             temp_pdf_path = os.path.join(temp_dir, pdf_filename)
-            shutil.copy2(pdf_path, temp_pdf_path)
+            with timer.phase("stage_input"):
+                stage_method = stage_input_file(pdf_path, temp_pdf_path)
             
             # 设置输出HTML文件名
             if use_temp_output:
                 html_filename = os.path.splitext(pdf_filename)[0] + ".html"
-                temp_html_path = os.path.join(temp_dir, html_filename)
             else:
                 html_filename = os.path.basename(output_html_path)
-                temp_html_path = os.path.join(temp_dir, html_filename)
-            
-            # 构建命令
-            data_dir_path = os.path.join(self.pdf2html_dir, "data")
-            data_dir_path = os.path.join(self.pdf2html_dir, "data")
-            
-            # Base command
-            cmd = [
-                self.pdf2html_exe,
-                "--data-dir", data_dir_path,
-            ]
-
-            # Performance-related options (experimental)
-            # Ensure resources are external, as we use load()
-            # These might be default, but explicitly setting them can ensure behavior
-            # and potentially skip some internal embedding logic if pdf2htmlEX tries it by default.
-            cmd.extend([
-                "--embed-css", "0",
-                "--embed-font", "0",
-                "--embed-image", "0",
-                "--embed-javascript", "0",
-                # "--no-hinting", # Removed as it's an unknown option for this version
-                # "--process-type3", "0", # If Type3 fonts are an issue (test needed)
-                # "--optimize-text", "0", # May reduce quality but speed up (test needed)
-            ])
-            
-            # Add PDF filename and output HTML filename
-            cmd.extend([
-                pdf_filename,
-                html_filename
-            ])
-            
-            # Add user-传入的额外选项 (these could override our defaults if they are the same flags)
-            if options:
-                cmd.extend(options)
-            
-            print(f"DEBUG: pdf2htmlEX command: {' '.join(cmd)}")
-
-            # 执行命令
-            process = subprocess.run(
-                cmd,
-                cwd=temp_dir,  # 在临时目录中执行命令
-                check=False,
-                capture_output=True,
-                text=True,
-                shell=True,  # 使用shell执行以支持管理员权限
-                creationflags=subprocess.CREATE_NO_WINDOW  # 不显示命令窗口
-            )
+            temp_html_path = os.path.join(temp_dir, html_filename)
             
-            if process.returncode != 0:
-                stderr_output = process.stderr[:1000] if process.stderr else "未知错误"
-                raise RuntimeError(f"pdf2htmlEX转换失败 (代码: {process.returncode}):\n{stderr_output}")
+            if len(ranges) > 1:
+                print(f"DEBUG: PDF2HTMLConverter: converting {len(ranges)} page ranges in parallel: {ranges}")
+                self._convert_ranges_in_parallel(pdf_filename, html_filename, temp_dir, base_options, options,
+                                                 ranges, timer=timer, job=job)
+            else:
+                # Add PDF filename and output HTML filename, then user-传入的额外选项
+                # (these could override our defaults if they are the same flags)
+                with timer.phase("pdf2htmlex"):
+                    self._run_pdf2htmlex(base_options + [pdf_filename, html_filename] + list(options or []), temp_dir, job)
             
             if not os.path.exists(temp_html_path):
                 raise RuntimeError(f"pdf2htmlEX执行成功，但未找到预期的输出文件: {temp_html_path}")
+
+            # 输入文件不属于输出，转换完成后立即移除
+            os.remove(temp_pdf_path)
+            temp_pdf_path = None
+
+            # 转换结果加入缓存（复制一份，缓存不与交给调用者的文件共用数据）
+            if cache is not None and cache_key:
+                with timer.phase("cache_store"):
+                    cache.store(cache_key, temp_dir, html_filename)
             
             # 处理输出
             if use_temp_output:
-                # 读取HTML内容
-                with open(temp_html_path, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-                
-                # 读取HTML内容
-                with open(temp_html_path, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-
-                print(f"DEBUG: PDF2HTMLConverter: temp_dir = {temp_dir}")
-                print(f"DEBUG: PDF2HTMLConverter: temp_html_path = {temp_html_path}")
-                
-                # 暂时不进行内联，直接返回原始HTML内容和临时目录路径
-                # from .pdf_utils import _inline_resources # Delayed import
-                # inlined_html_content = _inline_resources(html_content, temp_dir)
-                
-                # DEBUG: Save original HTML to a file for external browser testing (optional)
-                # debug_output_filename = "debug_pdf_conversion_raw_output.html"
-                # debug_output_path = os.path.join(self.application_root, debug_output_filename)
-                # try:
-                #     with open(debug_output_path, "w", encoding="utf-8") as f_debug:
-                #         f_debug.write(html_content) # Save raw content
-                #     print(f"DEBUG: Saved RAW HTML to {debug_output_path}")
-                # except Exception as e_debug_save:
-                #     print(f"DEBUG: Error saving debug RAW HTML: {e_debug_save}")
-                
-                # 返回主HTML文件名和临时目录的路径，供调用者使用 load()
-                return html_filename, temp_dir
+                # 返回主HTML文件名和临时目录的路径，供调用者使用 load()；不需要读取HTML内容
+                result = html_filename, temp_dir
             else:
-                # 如果不是临时输出，我们假设调用者会处理资源路径，或者输出路径本身就是目标
-                # 将生成的HTML文件复制到指定位置
-                os.makedirs(os.path.dirname(output_html_path), exist_ok=True)
-                shutil.copy2(temp_html_path, output_html_path) # Copy the main HTML
-                # Potentially copy other assets from temp_dir to output_html_path's directory if needed
-                # For now, assume output_html_path is a single file target.
-                # If output_html_path is a directory, logic would need to change.
+                # 把主HTML和资源文件移动到输出目录（临时目录随后会被删除，不需要复制）
+                with timer.phase("copy_output"):
+                    result = self._move_output(temp_dir, output_html_path)
                 print(f"DEBUG: PDF2HTMLConverter: Output HTML saved to {output_html_path}")
-                # If assets are needed alongside output_html_path, they must be copied from temp_dir
-                # For example, copy the entire temp_dir content to the dir of output_html_path
-                output_dir = os.path.dirname(output_html_path)
-                for item in os.listdir(temp_dir):
-                    s = os.path.join(temp_dir, item)
-                    d = os.path.join(output_dir, item)
-                    if os.path.isdir(s):
-                        if not os.path.exists(d): # Avoid error if dir exists
-                            shutil.copytree(s, d, dirs_exist_ok=True)
-                    else:
-                        shutil.copy2(s, d)
-                print(f"DEBUG: PDF2HTMLConverter: Copied assets from {temp_dir} to {output_dir}")
-                return output_html_path
+            succeeded = True
+            print(f"DEBUG: PDF2HTMLConverter: converted {pdf_path} (input staged by {stage_method}): {timer.summary()}")
+            return result
             
+        except JobCancelledError:
+            print(f"DEBUG: PDF2HTMLConverter: conversion of {pdf_path} cancelled")
+            raise
         except Exception as e:
             print(f"ERROR in PDF2HTMLConverter: {e}") # Print error for easier debugging
             raise RuntimeError(f"处理PDF时发生意外错误: {e}") from e
         
         finally:
-            # 清理临时文件
-            # If use_temp_output is True, the temp_dir is returned and its cleanup is handled by the caller.
-            # If use_temp_output is False (output_html_path is provided), then temp_dir should be cleaned up here.
-            if not use_temp_output and temp_dir and os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir, ignore_errors=True)
-                print(f"DEBUG: PDF2HTMLConverter: Cleaned up temp_dir {temp_dir} for non-preview output.")
-            elif use_temp_output:
-                 print(f"DEBUG: PDF2HTMLConverter: temp_dir {temp_dir} was returned for preview, caller handles cleanup.")
-    
-    def convert_with_admin_rights(self, pdf_path, output_html_path=None, options=None):
+            # 清理临时文件：失败时或输出已移到指定位置时删除临时目录；
+            # 成功的临时输出交给调用者，由其负责删除
+            if temp_pdf_path and os.path.lexists(temp_pdf_path):
+                try:
+                    os.remove(temp_pdf_path)
+                except OSError:
+                    pass
+            if not succeeded or not use_temp_output:
+                get_temp_artifact_manager().remove(temp_dir)
+
+    def _move_output(self, temp_dir, output_html_path):
+        """把临时目录中的转换输出移动到 output_html_path 所在目录，返回 output_html_path"""
+        output_dir = os.path.dirname(output_html_path) or "."
+        os.makedirs(output_dir, exist_ok=True)
+        for item in os.listdir(temp_dir):
+            s = os.path.join(temp_dir, item)
+            d = os.path.join(output_dir, item)
+            if os.path.isdir(s) and os.path.isdir(d):
+                shutil.copytree(s, d, dirs_exist_ok=True)
+            else:
+                if os.path.isdir(d):
+                    shutil.rmtree(d)
+                shutil.move(s, d)
+        return output_html_path
+
+    def plan_progressive_ranges(self, page_count, max_workers=None):
+        """
+        渐进式转换的页码区间：首段只含前几页，其余页按较小的段划分，
+        段数不少于并行进程数，使靠前的页面先完成
+        """
+        if page_count <= 0:
+            return []
+        first_last = min(page_count, self.PROGRESSIVE_FIRST_PAGES)
+        rest = page_count - first_last
+        ranges = [(1, first_last)]
+        if rest > 0:
+            workers = max_workers or self.max_workers
+            chunks = max(workers, math.ceil(rest / self.PROGRESSIVE_CHUNK_PAGES))
+            ranges += [(first + first_last, last + first_last) for first, last in plan_page_ranges(rest, chunks, 1)]
+        return ranges
+
+    def convert_pdf_progressively(self, pdf_path, on_first_page=None, on_pages=None, options=None,
+                                  use_cache=True, max_workers=None, job=None):
+        """
+        渐进式转换PDF：先单独转换首页并回调，其余页分段并行转换，每完成一段回调一次
+
+        pdf2htmlEX 的样式表和字体表在一次转换全部结束时才写出，--split-pages 在转换过程中
+        生成的单页文件无法单独显示，因此这里按页码区间启动多个进程，每段完成后即可显示。
+        回调在调用线程以外的线程中执行（段完成的顺序不一定与页码顺序一致）。
+
+        Args:
+            pdf_path: PDF文件路径
+            on_first_page: 回调 (主HTML文件路径, 已完成页数, 总页数)，首段完成后调用，
+                此时主HTML只包含首段页面
+            on_pages: 回调 (样式表路径列表, 页面HTML, 已完成页数, 总页数)，
+                其余每段完成后调用，路径相对于输出目录
+            options: 额外的pdf2htmlEX命令行选项
+            use_cache: 是否使用转换结果缓存，命中时直接以完整文档回调 on_first_page
+            max_workers: 并行进程数，默认为CPU核心数
+            job: 可选的 JobControl，用于取消转换（结束pdf2htmlEX进程）和报告进度
+
+        Returns:
+            (主HTML文件名, 输出目录)，全部段完成后主HTML为合并后的完整文档
+        """
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF文件未找到: {pdf_path}")
+
+        page_count = self.get_page_count(pdf_path)
+        if page_count <= 0:
+            # 无法读取页数时不能分段，整体转换后一次性显示
+            html_filename, output_dir = self.convert_pdf_to_html(pdf_path, options=options, use_cache=use_cache, job=job)
+            if on_first_page:
+                on_first_page(os.path.join(output_dir, html_filename), 0, 0)
+            return html_filename, output_dir
+
+        timer = PhaseTimer()
+        self.last_timings = timer.phases
+        base_options = self._build_base_options()
+        ranges = self.plan_progressive_ranges(page_count, max_workers)
+        layout = [f"--progressive={ranges}"]
+
+        cache = None
+        cache_key = None
+        if use_cache:
+            try:
+                with timer.phase("cache_lookup"):
+                    cache = get_pdf_conversion_cache()
+                    cache_key = cache.make_key(pdf_path, base_options + list(options or []) + layout, self.converter_version)
+                    cached = cache.materialize(cache_key)
+                if cached is not None:
+                    print(f"DEBUG: PDF2HTMLConverter: cache hit for {pdf_path} -> {cached[1]} ({timer.summary()})")
+                    if on_first_page:
+                        on_first_page(os.path.join(cached[1], cached[0]), page_count, page_count)
+                    return cached
+            except OSError as e:
+                print(f"WARNING: PDF2HTMLConverter: conversion cache unavailable: {e}")
+                cache = None
+                cache_key = None
+
+        temp_dir = get_temp_artifact_manager().create_dir(prefix="pdf2html_")
+        first_page_shown = False
+        temp_pdf_path = None
+        try:
+            pdf_filename = os.path.basename(pdf_path)
+            temp_pdf_path = os.path.join(temp_dir, pdf_filename)
+            with timer.phase("stage_input"):
+                stage_method = stage_input_file(pdf_path, temp_pdf_path)
+            html_filename = os.path.splitext(pdf_filename)[0] + ".html"
+            jobs = [self._range_args(temp_dir, f"part_{index}", pdf_filename, html_filename,
+                                     base_options, options, first_page, last_page)
+                    for index, (first_page, last_page) in enumerate(ranges)]
+
+            # 首段单独转换，完成后立即显示
+            with timer.phase("first_page"):
+                self._run_pdf2htmlex(jobs[0], temp_dir, job)
+                prepared = [prepare_part(temp_dir, "part_0", html_filename, 0)]
+                pages_done = ranges[0][1]
+                html_path = write_stitched(prepared, temp_dir, html_filename)
+            first_page_shown = True
+            if job is not None:
+                job.report_progress(pages_done, page_count, "pdf2htmlEX")
+            if on_first_page:
+                on_first_page(html_path, pages_done, page_count)
+
+            if len(jobs) > 1:
+                print(f"DEBUG: PDF2HTMLConverter: converting remaining {len(jobs) - 1} page ranges progressively")
+                errors = []
+                workers = min(len(jobs) - 1, max_workers or self.max_workers)
+                with timer.phase("remaining_pages"), ThreadPoolExecutor(max_workers=workers) as executor:
+                    # 按页码顺序提交，靠前的段先开始
+                    futures = {executor.submit(self._run_pdf2htmlex, jobs[index], temp_dir, job): index
+                               for index in range(1, len(jobs))}
+                    for future in as_completed(futures):
+                        index = futures[future]
+                        first_page, last_page = ranges[index]
+                        try:
+                            future.result()
+                            part = prepare_part(temp_dir, f"part_{index}", html_filename, index)
+                        except Exception as e:
+                            errors.append(f"第 {first_page}-{last_page} 页: {e}")
+                            continue
+                        prepared.append(part)
+                        pages_done += last_page - first_page + 1
+                        if job is not None:
+                            job.report_progress(pages_done, page_count, "pdf2htmlEX")
+                        if on_pages:
+                            on_pages(part.css_hrefs, part.pages_html, pages_done, page_count)
+                if job is not None:
+                    job.check()
+                if errors:
+                    raise RuntimeError("\n".join(errors))
+                with timer.phase("stitch"):
+                    html_path = write_stitched(prepared, temp_dir, html_filename)
+
+            os.remove(temp_pdf_path)
+            temp_pdf_path = None
+            if cache is not None and cache_key:
+                with timer.phase("cache_store"):
+                    cache.store(cache_key, temp_dir, html_filename)
+            print(f"DEBUG: PDF2HTMLConverter: converted {pdf_path} progressively "
+                  f"(input staged by {stage_method}): {timer.summary()}")
+            return html_filename, temp_dir
+        except JobCancelledError:
+            print(f"DEBUG: PDF2HTMLConverter: progressive conversion of {pdf_path} cancelled")
+            if not first_page_shown:
+                get_temp_artifact_manager().remove(temp_dir)
+            raise
+        except Exception as e:
+            print(f"ERROR in PDF2HTMLConverter: {e}")
+            # 首段显示之后，输出目录已交给调用者管理
+            if not first_page_shown:
+                get_temp_artifact_manager().remove(temp_dir)
+            raise RuntimeError(f"处理PDF时发生意外错误: {e}") from e
+        finally:
+            if temp_pdf_path and os.path.lexists(temp_pdf_path):
+                try:
+                    os.remove(temp_pdf_path)
+                except OSError:
+                    pass
+
+    def convert_with_admin_rights(self, pdf_path, output_html_path=None, options=None, job=None):
         """使用管理员权限执行PDF到HTML的转换
         
         此方法使用runas命令以管理员权限执行转换。
@@ -196,22 +546,23 @@ class PDF2HTMLConverter:
             pdf_path: PDF文件路径
             output_html_path: 输出HTML文件路径，如果为None则使用临时文件
             options: 额外的pdf2htmlEX命令行选项
+            job: 可选的 JobControl，取消时结束等待中的提权命令
             
         Returns:
             如果output_html_path为None，返回HTML内容字符串
             否则返回输出文件路径
         """
         # 创建临时目录用于处理文件
-        temp_dir = tempfile.mkdtemp(prefix="pdf2html_admin_")
+        temp_dir = get_temp_artifact_manager().create_dir(prefix="pdf2html_admin_")
         temp_pdf_path = None
         temp_html_path = None
         use_temp_output = output_html_path is None
         
         try:
-            # 复制PDF文件到临时目录
+            # 把PDF放到临时目录（优先使用链接，不复制数据）
             pdf_filename = os.path.basename(pdf_path)
             temp_pdf_path = os.path.join(temp_dir, pdf_filename)
-            shutil.copy2(pdf_path, temp_pdf_path)
+            stage_input_file(pdf_path, temp_pdf_path)
             
             # 设置输出HTML文件名
             if use_temp_output:
@@ -233,11 +584,10 @@ class PDF2HTMLConverter:
             # 注意：这将弹出UAC提示窗口
             admin_cmd = f'powershell.exe -Command "Start-Process cmd -ArgumentList \"/c cd /d \\"{temp_dir}\\\" && {pdf2html_cmd}\" -Verb RunAs -Wait"'
             
-            process = subprocess.run(
+            process = run_process(
                 admin_cmd,
+                job=job,
                 shell=True,
-                check=False,
-                capture_output=True,
                 text=True
             )
             
@@ -258,10 +608,11 @@ class PDF2HTMLConverter:
                 shutil.copy2(temp_html_path, output_html_path)
                 return output_html_path
             
+        except JobCancelledError:
+            raise
         except Exception as e:
             raise RuntimeError(f"处理PDF时发生意外错误: {e}") from e
         
         finally:
             # 清理临时文件
-            if temp_dir and os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir, ignore_errors=True)
+            get_temp_artifact_manager().remove(temp_dir)
@@ -0,0 +1,203 @@
+import os
+import re
+import math
+
+
+# pdf2htmlEX 为每次转换生成的类名（ff1、m0、w0 …）和字体名只在单次输出内唯一，
+# 分段并行转换后合并时，需要给每一段的页面加上段类名，并把该段的样式限定在段类名之下。
+
+# 各段输出完全相同、只需保留一份的公共资源
+SHARED_ASSETS = ("base.min.css", "fancy.min.css", "compatibility.min.js", "pdf2htmlEX.min.js",
+                 "base.css", "fancy.css", "pdf2htmlEX.js")
+
+_PAGE_CONTAINER_RE = re.compile(r'<div\s+id="page-container"[^>]*>', re.IGNORECASE)
+_DIV_TOKEN_RE = re.compile(r'<div\b|</div\s*>', re.IGNORECASE)
+_PAGE_DIV_RE = re.compile(r'(<div\s+id="pf[0-9a-fA-F]+"\s+class=")([^"]*)(")')
+_RELATIVE_URL_ATTR_RE = re.compile(r'(\s(?:src|href|data-page-url)=")(?![a-zA-Z][a-zA-Z0-9+.-]*:|#|/|data:)([^"]+)(")')
+_LINK_TAG_RE = re.compile(r'<link\b[^>]*href="([^"]+)"[^>]*/?>', re.IGNORECASE)
+_FONT_FAMILY_RE = re.compile(r'(font-family\s*:\s*)(ff[0-9a-fA-F]+)\b')
+
+
+def plan_page_ranges(page_count, workers, min_pages_per_range=8):
+    """
+    将页码划分为连续区间
+
+    Args:
+        page_count: 总页数
+        workers: 并行进程数
+        min_pages_per_range: 每段最少页数，避免段过小时进程启动开销抵消并行收益
+
+    Returns:
+        [(起始页, 结束页)] 列表，页码从1开始且包含结束页
+    """
+    if page_count <= 0:
+        return []
+    parts = max(1, min(workers, page_count // max(1, min_pages_per_range)))
+    size = math.ceil(page_count / parts)
+    return [(start, min(page_count, start + size - 1)) for start in range(1, page_count + 1, size)]
+
+
+def _find_page_container(html):
+    """返回 (page-container 开始标签结束位置, 对应 </div> 的开始位置)"""
+    match = _PAGE_CONTAINER_RE.search(html)
+    if not match:
+        raise ValueError("pdf2htmlEX 输出中未找到 page-container")
+    depth = 1
+    for token in _DIV_TOKEN_RE.finditer(html, match.end()):
+        if token.group(0).startswith("</"):
+            depth -= 1
+            if depth == 0:
+                return match.end(), token.start()
+        else:
+            depth += 1
+    raise ValueError("pdf2htmlEX 输出中的 page-container 未闭合")
+
+
+def _split_css_blocks(css):
+    """把样式表切分为 (前导部分, 块内容) 的顶层块列表，块内容不含外层花括号"""
+    blocks = []
+    depth = 0
+    start = 0
+    body_start = 0
+    prelude = ""
+    for i, ch in enumerate(css):
+        if ch == "{":
+            if depth == 0:
+                prelude = css[start:i]
+                body_start = i + 1
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                blocks.append((prelude.strip(), css[body_start:i]))
+                start = i + 1
+    return blocks
+
+
+def _scope_selector(selector, scope_class):
+    # 同时匹配带段类名的页面本身和其后代元素
+    selector = selector.strip()
+    if not selector:
+        return selector
+    if selector[0] in ".#[:":
+        return f".{scope_class}{selector},.{scope_class} {selector}"
+    return f".{scope_class} {selector}"
+
+
+def scope_css(css, scope_class, font_prefix):
+    """
+    把 pdf2htmlEX 生成的文档样式限定在 scope_class 之下，并为字体名加前缀
+
+    @font-face 不加限定；@media 等嵌套块递归处理。
+    """
+    css = _FONT_FAMILY_RE.sub(lambda m: m.group(1) + font_prefix + m.group(2), css)
+    output = []
+    for prelude, body in _split_css_blocks(css):
+        if prelude.startswith("@"):
+            if prelude.lower().startswith(("@media", "@supports")):
+                output.append(f"{prelude}{{{scope_css(body, scope_class, '')}}}")
+            else:
+                output.append(f"{prelude}{{{body}}}")
+            continue
+        selectors = ",".join(_scope_selector(s, scope_class) for s in prelude.split(","))
+        output.append(f"{selectors}{{{body}}}")
+    return "\n".join(output)
+
+
+def _prefix_relative_urls(fragment, prefix):
+    return _RELATIVE_URL_ATTR_RE.sub(lambda m: f"{m.group(1)}{prefix}{m.group(2)}{m.group(3)}", fragment)
+
+
+class PreparedPart:
+    """已限定样式的单段输出"""
+
+    def __init__(self, index, part_dir, css_hrefs, pages_html, head_html, tail_html):
+        self.index = index
+        self.part_dir = part_dir
+        self.css_hrefs = css_hrefs  # 本段文档样式相对输出目录的路径
+        self.pages_html = pages_html  # 本段全部页面的HTML，资源路径已相对输出目录
+        self.head_html = head_html
+        self.tail_html = tail_html
+
+
+def prepare_part(output_dir, part_dir, part_html, index):
+    """
+    读取一段 pdf2htmlEX 输出，把其文档样式限定到段类名下（直接改写该段的CSS文件）
+
+    每段只能处理一次；index 为 0 的段提供文档框架，其余段的公共资源副本会被删除。
+    """
+    part_path = os.path.join(output_dir, part_dir)
+    with open(os.path.join(part_path, part_html), "r", encoding="utf-8") as f:
+        html = f.read()
+    scope_class = f"p2h{index}"
+
+    # 文档样式限定到本段
+    css_hrefs = []
+    head_end = html.find("</head>")
+    for match in _LINK_TAG_RE.finditer(html[:head_end] if head_end >= 0 else ""):
+        href = match.group(1)
+        css_path = os.path.join(part_path, href)
+        if os.path.basename(href) in SHARED_ASSETS or not href.endswith(".css") or not os.path.isfile(css_path):
+            continue
+        with open(css_path, "r", encoding="utf-8") as f:
+            scoped = scope_css(f.read(), scope_class, f"{scope_class}_")
+        with open(css_path, "w", encoding="utf-8") as f:
+            f.write(scoped)
+        css_hrefs.append(f"{part_dir}/{href}")
+
+    content_start, content_end = _find_page_container(html)
+    pages_html = _PAGE_DIV_RE.sub(lambda m: f"{m.group(1)}{m.group(2)} {scope_class}{m.group(3)}",
+                                  html[content_start:content_end])
+    pages_html = _prefix_relative_urls(pages_html, f"{part_dir}/")
+
+    head_html = tail_html = ""
+    if index == 0:
+        # 第一段提供文档框架（head、侧边栏大纲和结尾部分）
+        head_html = _prefix_relative_urls(html[:content_start], f"{part_dir}/")
+        tail_html = _prefix_relative_urls(html[content_end:], f"{part_dir}/")
+    else:
+        # 公共资源与第一段相同，删除重复副本
+        for asset in SHARED_ASSETS:
+            asset_path = os.path.join(part_path, asset)
+            if os.path.isfile(asset_path):
+                os.remove(asset_path)
+    return PreparedPart(index, part_dir, css_hrefs, pages_html, head_html, tail_html)
+
+
+def write_stitched(prepared_parts, output_dir, html_filename):
+    """把已处理的各段写为一个文档，prepared_parts 中必须包含 index 为 0 的段"""
+    parts = sorted(prepared_parts, key=lambda p: p.index)
+    if not parts or parts[0].index != 0:
+        raise ValueError("没有可合并的分段输出")
+    head_html = parts[0].head_html
+    head_links = [f'<link rel="stylesheet" href="{href}"/>' for part in parts[1:] for href in part.css_hrefs]
+    if head_links:
+        insert_at = head_html.find("</head>")
+        extra = "\n".join(head_links) + "\n"
+        head_html = head_html[:insert_at] + extra + head_html[insert_at:] if insert_at >= 0 else extra + head_html
+
+    output_path = os.path.join(output_dir, html_filename)
+    temp_path = output_path + ".part"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(head_html)
+        f.writelines(part.pages_html for part in parts)
+        f.write(parts[0].tail_html)
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+def stitch_range_outputs(parts, output_dir, html_filename):
+    """
+    合并各段的 pdf2htmlEX 输出为一个文档
+
+    Args:
+        parts: [(段子目录名, 段主HTML文件名)]，段子目录位于 output_dir 下，按页码顺序排列
+        output_dir: 输出目录
+        html_filename: 合并后的主HTML文件名
+
+    Returns:
+        合并后主HTML文件的完整路径
+    """
+    prepared = [prepare_part(output_dir, part_dir, part_html, index)
+                for index, (part_dir, part_html) in enumerate(parts)]
+    return write_stitched(prepared, output_dir, html_filename)
@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+
+from .temp_artifacts import get_temp_artifact_manager
+
+
+def get_default_cache_dir():
+    """默认缓存目录：项目根目录下的 data/pdf2html_cache"""
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    return os.path.join(project_root, "data", "pdf2html_cache")
+
+
+def reflink_file(src, dst):
+    """通过 FICLONE 创建写时复制副本（Linux 上的 btrfs、xfs 等），不支持时抛出 OSError"""
+    try:
+        import fcntl
+    except ImportError as e:
+        raise OSError("当前平台不支持 reflink") from e
+    ficlone = 0x40049409
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        try:
+            fcntl.ioctl(dst_file.fileno(), ficlone, src_file.fileno())
+        except OSError:
+            dst_file.close()
+            os.remove(dst)
+            raise
+
+
+def _clone_or_copy(src, dst):
+    """
+    复制文件：优先用 reflink（写时复制，不复制数据），不支持时普通复制
+
+    不使用硬链接：调用者拿到的输出文件可能被编辑器原地改写，与缓存共用 inode
+    会把缓存项一起改掉。
+    """
+    try:
+        reflink_file(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _clone_tree(src_dir, dst_dir, skip=()):
+    """按目录结构把 src_dir 中的文件复制到 dst_dir，返回文件总大小"""
+    total = 0
+    for root, dirs, files in os.walk(src_dir):
+        rel_root = os.path.relpath(root, src_dir)
+        target_root = dst_dir if rel_root == "." else os.path.join(dst_dir, rel_root)
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            if rel_root == "." and name in skip:
+                continue
+            src = os.path.join(root, name)
+            _clone_or_copy(src, os.path.join(target_root, name))
+            total += os.path.getsize(src)
+    return total
+
+
+class PdfConversionCache:
+    """pdf2htmlEX 转换结果缓存
+
+    以 (PDF内容哈希, 转换选项, 转换器版本) 作为键，把转换输出保存在持久目录中，
+    总大小超过上限时按最近使用时间淘汰。写入和命中时都复制文件（支持 reflink 的
+    文件系统上不复制数据），缓存项与交给调用者的文件互不共用 inode，调用者修改或
+    删除输出都不会影响缓存本身。
+    """
+
+    META_FILE = "cache_meta.json"
+
+    def __init__(self, cache_dir=None, max_size_bytes=1024 * 1024 * 1024):
+        self.cache_dir = cache_dir or get_default_cache_dir()
+        self.entries_dir = os.path.join(self.cache_dir, "entries")
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+        self._hash_memo = {}  # (绝对路径, 大小, 修改时间): 内容哈希
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.entries_dir, exist_ok=True)
+
+    # ---- 键 ----
+    def file_hash(self, file_path):
+        """计算文件内容的 SHA-256，文件未变化时复用上次的结果"""
+        abs_path = os.path.abspath(file_path)
+        stat = os.stat(abs_path)
+        memo_key = (abs_path, stat.st_size, stat.st_mtime_ns)
+        cached = self._hash_memo.get(memo_key)
+        if cached:
+            return cached
+        digest = hashlib.sha256()
+        with open(abs_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        result = digest.hexdigest()
+        self._hash_memo[memo_key] = result
+        return result
+
+    def make_key(self, pdf_path, options, converter_version):
+        """根据PDF内容、转换选项和转换器版本生成缓存键"""
+        payload = json.dumps([self.file_hash(pdf_path), list(options or []), converter_version],
+                             ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # ---- 读写 ----
+    def new_staging_dir(self, prefix="pdf2html_"):
+        """在受管理的临时区域中创建临时目录，调用者持有其引用"""
+        return get_temp_artifact_manager().create_dir(prefix=prefix)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.entries_dir, key)
+
+    def _read_meta(self, entry_dir):
+        try:
+            with open(os.path.join(entry_dir, self.META_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def lookup(self, key):
+        """查找缓存项，命中时返回 (主HTML文件名, 缓存目录)，并更新最近使用时间"""
+        entry_dir = self._entry_dir(key)
+        meta = self._read_meta(entry_dir)
+        if not meta or not os.path.exists(os.path.join(entry_dir, meta.get("html_filename", ""))):
+            self.misses += 1
+            return None
+        try:
+            os.utime(os.path.join(entry_dir, self.META_FILE))
+        except OSError:
+            pass
+        self.hits += 1
+        return meta["html_filename"], entry_dir
+
+    def materialize(self, key, target_dir=None):
+        """把缓存项复制到一个新目录，命中时返回 (主HTML文件名, 目录)，未命中返回 None"""
+        found = self.lookup(key)
+        if found is None:
+            return None
+        html_filename, entry_dir = found
+        target_dir = target_dir or self.new_staging_dir()
+        try:
+            _clone_tree(entry_dir, target_dir, skip=(self.META_FILE,))
+        except OSError as e:
+            print(f"PdfConversionCache: 读取缓存项失败，将重新转换: {e}")
+            get_temp_artifact_manager().remove(target_dir)
+            return None
+        return html_filename, target_dir
+
+    def store(self, key, output_dir, html_filename, exclude=()):
+        """把转换输出目录复制到缓存中，exclude 中的顶层文件不会被缓存"""
+        entry_dir = self._entry_dir(key)
+        if os.path.isdir(entry_dir):
+            return
+        building_dir = tempfile.mkdtemp(prefix=f".{key[:12]}_", dir=self.entries_dir)
+        try:
+            size = _clone_tree(output_dir, building_dir, skip=tuple(exclude))
+            meta = {"html_filename": html_filename, "size": size, "created": time.time()}
+            with open(os.path.join(building_dir, self.META_FILE), "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            try:
+                os.rename(building_dir, entry_dir)
+            except OSError:
+                # 其他线程/进程已经写入了同一个键
+                shutil.rmtree(building_dir, ignore_errors=True)
+                return
+        except Exception as e:
+            print(f"PdfConversionCache: 写入缓存失败: {e}")
+            shutil.rmtree(building_dir, ignore_errors=True)
+            return
+        self.evict()
+
+    def evict(self):
+        """总大小超过上限时，按最近使用时间从旧到新删除缓存项"""
+        with self._lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.entries_dir):
+                entry_dir = os.path.join(self.entries_dir, name)
+                if name.startswith(".") or not os.path.isdir(entry_dir):
+                    continue
+                meta = self._read_meta(entry_dir)
+                if meta is None:
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+                    continue
+                try:
+                    last_used = os.path.getmtime(os.path.join(entry_dir, self.META_FILE))
+                except OSError:
+                    last_used = 0
+                entries.append((last_used, entry_dir, meta.get("size", 0)))
+                total += meta.get("size", 0)
+            entries.sort()
+            for _last_used, entry_dir, size in entries:
+                if total <= self.max_size_bytes:
+                    break
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                total -= size
+                print(f"PdfConversionCache: 已淘汰缓存项 {os.path.basename(entry_dir)} ({size} 字节)")
+
+    def clear(self):
+        """清空全部缓存项"""
+        with self._lock:
+            shutil.rmtree(self.entries_dir, ignore_errors=True)
+            os.makedirs(self.entries_dir, exist_ok=True)
+
+    def total_size(self):
+        total = 0
+        for name in os.listdir(self.entries_dir):
+            meta = self._read_meta(os.path.join(self.entries_dir, name))
+            if meta:
+                total += meta.get("size", 0)
+        return total
+
+
+_cache_instance = None
+_cache_instance_lock = threading.Lock()
+
+
+def get_pdf_conversion_cache():
+    """获取全局PDF转换缓存实例"""
+    global _cache_instance
+    with _cache_instance_lock:
+        if _cache_instance is None:
+            _cache_instance = PdfConversionCache()
+        return _cache_instance
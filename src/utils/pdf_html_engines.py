@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+PDF转HTML引擎 - 可替换的转换实现
+
+pdf_utils.extract_pdf_content 通过 get_default_pdf_engine 选择第一个可用的引擎：
+优先使用 pdf2htmlEX（任意平台的可执行文件），不可用时退回基于 PyMuPDF 的
+纯 Python 实现。两种引擎的输出结构一致：主HTML中的 #page-container 包含
+每页一个 .pf 元素（data-page-no 为十六进制页码），因此渐进式显示对两者通用。
+"""
+import os
+import html
+import shutil
+from typing import Dict, List, Optional, Type
+
+from .pdf_conversion_cache import get_pdf_conversion_cache
+from .job_control import JobCancelledError
+from .temp_artifacts import get_temp_artifact_manager
+
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+
+class PdfHtmlEngine:
+    """PDF转HTML引擎基类"""
+
+    # 引擎注册名称
+    name = ""
+    # 显示名称
+    display_name = ""
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """检查引擎依赖是否已安装"""
+        return False
+
+    def convert(self, pdf_path, on_first_page=None, on_pages=None, use_cache=True, job=None):
+        """
+        转换PDF（在工作线程中调用）
+
+        Args:
+            pdf_path: PDF文件路径
+            on_first_page: 可选回调 (主HTML文件路径, 已完成页数, 总页数)，首页完成后调用
+            on_pages: 可选回调 (样式表路径列表, 页面HTML, 已完成页数, 总页数)，其余页面分批完成后调用
+            use_cache: 是否使用转换结果缓存
+            job: 可选的 JobControl，用于取消转换和报告进度（取消时抛出 JobCancelledError）
+
+        Returns:
+            (主HTML文件名, 输出目录)，输出目录由调用者负责删除
+        """
+        raise NotImplementedError
+
+
+class Pdf2HtmlExEngine(PdfHtmlEngine):
+    """pdf2htmlEX 引擎，版面还原度最高，需要 pdf2htmlEX 可执行文件"""
+
+    name = "pdf2htmlex"
+    display_name = "pdf2htmlEX"
+
+    def __init__(self, max_workers=None, executable=None):
+        from .pdf2html_converter import PDF2HTMLConverter
+        self.converter = PDF2HTMLConverter(max_workers=max_workers, executable=executable)
+
+    @classmethod
+    def is_available(cls) -> bool:
+        from .pdf2html_converter import PDF2HTMLConverter
+        return PDF2HTMLConverter.find_executable() is not None
+
+    def convert(self, pdf_path, on_first_page=None, on_pages=None, use_cache=True, job=None):
+        if on_first_page or on_pages:
+            return self.converter.convert_pdf_progressively(
+                pdf_path, on_first_page=on_first_page, on_pages=on_pages, use_cache=use_cache, job=job)
+        return self.converter.convert_pdf_to_html(pdf_path, use_cache=use_cache, job=job)
+
+
+_PYMUPDF_PAGE_CSS = """
+body{margin:0;background:#9e9e9e;}
+#page-container{padding:12px 0;}
+.pf{position:relative;margin:0 auto 12px auto;background:#fff;box-shadow:0 0 4px rgba(0,0,0,.4);overflow:hidden;}
+.pf>img{display:block;width:100%;height:100%;}
+"""
+
+
+class PyMuPdfEngine(PdfHtmlEngine):
+    """
+    基于 PyMuPDF 的纯 Python 引擎，不依赖外部程序
+
+    page_format 为 "svg" 时每页输出一个 SVG 文件（文字转为路径，版面还原度高）；
+    为 "html" 时使用 PyMuPDF 的 HTML 文本输出（文字可编辑，图片内嵌）。
+    """
+
+    name = "pymupdf"
+    display_name = "PyMuPDF"
+    # 首页之后每完成多少页回调一次
+    PAGES_PER_BATCH = 8
+
+    def __init__(self, page_format="svg", zoom=1.0):
+        if not PYMUPDF_AVAILABLE:
+            raise RuntimeError("PyMuPDF (fitz) 模块未安装，无法使用 PyMuPDF 转换引擎。")
+        if page_format not in ("svg", "html"):
+            raise ValueError(f"不支持的页面格式: {page_format}")
+        self.page_format = page_format
+        self.zoom = zoom
+        self.converter_version = f"pymupdf:{getattr(fitz, 'VersionBind', '')}"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return PYMUPDF_AVAILABLE
+
+    def _render_page(self, page, output_dir):
+        """渲染一页，返回该页的HTML片段"""
+        number = page.number + 1
+        width = page.rect.width * self.zoom
+        height = page.rect.height * self.zoom
+        if self.page_format == "svg":
+            svg_name = f"pages/page-{number:04d}.svg"
+            svg = page.get_svg_image(matrix=fitz.Matrix(self.zoom, self.zoom), text_as_path=True)
+            with open(os.path.join(output_dir, svg_name), "w", encoding="utf-8") as f:
+                f.write(svg)
+            content = f'<img src="{svg_name}" alt="第 {number} 页" loading="lazy"/>'
+        else:
+            content = page.get_text("html")
+        return (f'<div id="pf{number:x}" class="pf" data-page-no="{number:x}" '
+                f'style="width:{width:.2f}pt;height:{height:.2f}pt;">{content}</div>\n')
+
+    @staticmethod
+    def _write_document(output_dir, html_filename, title, pages):
+        """写出包含 pages 的完整文档（先写临时文件再替换，避免读到半个文件）"""
+        output_path = os.path.join(output_dir, html_filename)
+        temp_path = output_path + ".part"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8"/>\n<title>{html.escape(title)}</title>\n'
+                    f'<style type="text/css">{_PYMUPDF_PAGE_CSS}</style>\n</head>\n<body>\n<div id="page-container">\n')
+            f.writelines(pages)
+            f.write('</div>\n</body>\n</html>\n')
+        os.replace(temp_path, output_path)
+        return output_path
+
+    def convert(self, pdf_path, on_first_page=None, on_pages=None, use_cache=True, job=None):
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF文件未找到: {pdf_path}")
+
+        cache = None
+        cache_key = None
+        if use_cache:
+            try:
+                cache = get_pdf_conversion_cache()
+                cache_key = cache.make_key(pdf_path, [f"--format={self.page_format}", f"--zoom={self.zoom}"],
+                                           self.converter_version)
+                cached = cache.materialize(cache_key)
+                if cached is not None:
+                    if on_first_page:
+                        on_first_page(os.path.join(cached[1], cached[0]), 0, 0)
+                    return cached
+            except OSError as e:
+                print(f"WARNING: PyMuPdfEngine: conversion cache unavailable: {e}")
+                cache = None
+                cache_key = None
+
+        output_dir = get_temp_artifact_manager().create_dir(prefix="pymupdf_")
+        first_page_shown = False
+        try:
+            html_filename = os.path.splitext(os.path.basename(pdf_path))[0] + ".html"
+            os.makedirs(os.path.join(output_dir, "pages"), exist_ok=True)
+            with fitz.open(pdf_path) as doc:
+                page_count = doc.page_count
+                title = (doc.metadata or {}).get("title") or os.path.basename(pdf_path)
+                pages = []
+                batch = []
+                for page in doc:
+                    if job is not None:
+                        job.check()
+                    batch.append(self._render_page(page, output_dir))
+                    if job is not None:
+                        job.report_progress(len(pages) + len(batch), page_count, "PyMuPDF")
+                    if not pages and len(batch) == 1:
+                        # 首页单独写出，立即显示
+                        pages.extend(batch)
+                        batch = []
+                        html_path = self._write_document(output_dir, html_filename, title, pages)
+                        first_page_shown = True
+                        if on_first_page:
+                            on_first_page(html_path, 1, page_count)
+                    elif len(batch) >= self.PAGES_PER_BATCH:
+                        pages.extend(batch)
+                        if on_pages:
+                            on_pages([], "".join(batch), len(pages), page_count)
+                        batch = []
+                if batch:
+                    pages.extend(batch)
+                    if on_pages:
+                        on_pages([], "".join(batch), len(pages), page_count)
+            self._write_document(output_dir, html_filename, title, pages)
+
+            if cache is not None and cache_key:
+                cache.store(cache_key, output_dir, html_filename)
+            return html_filename, output_dir
+        except JobCancelledError:
+            if not first_page_shown:
+                get_temp_artifact_manager().remove(output_dir)
+            raise
+        except Exception as e:
+            print(f"ERROR in PyMuPdfEngine: {e}")
+            # 首页显示之后，输出目录已交给调用者管理
+            if not first_page_shown:
+                get_temp_artifact_manager().remove(output_dir)
+            raise RuntimeError(f"PyMuPDF 转换PDF失败: {e}") from e
+
+
+# 已注册的引擎，按优先级排列
+_ENGINE_REGISTRY: Dict[str, Type[PdfHtmlEngine]] = {}
+
+
+def register_pdf_engine(engine_class: Type[PdfHtmlEngine]) -> Type[PdfHtmlEngine]:
+    """
+    注册PDF转HTML引擎类，可作为类装饰器使用，先注册的优先级高
+
+    Args:
+        engine_class: PdfHtmlEngine 子类，使用其 name 属性作为注册名称
+    """
+    if not engine_class.name:
+        raise ValueError(f"PDF引擎 {engine_class.__name__} 未设置名称")
+    _ENGINE_REGISTRY[engine_class.name] = engine_class
+    return engine_class
+
+
+def create_pdf_engine(name: str, **kwargs) -> PdfHtmlEngine:
+    """
+    按名称创建PDF转HTML引擎实例
+
+    Args:
+        name: 引擎注册名称
+        **kwargs: 传给引擎构造函数的参数
+    """
+    if name not in _ENGINE_REGISTRY:
+        raise ValueError(f"未知的PDF转换引擎: {name}")
+    return _ENGINE_REGISTRY[name](**kwargs)
+
+
+def get_pdf_engine_names(available_only: bool = False) -> List[str]:
+    """获取已注册的引擎名称（按优先级）"""
+    return [name for name, engine_class in _ENGINE_REGISTRY.items()
+            if not available_only or engine_class.is_available()]
+
+
+def get_default_pdf_engine(preferred: Optional[str] = None) -> PdfHtmlEngine:
+    """
+    创建第一个可用的引擎，preferred 指定的引擎可用时优先使用
+
+    Raises:
+        RuntimeError: 没有可用的引擎时
+    """
+    names = get_pdf_engine_names(available_only=True)
+    if preferred in names:
+        names.remove(preferred)
+        names.insert(0, preferred)
+    errors = []
+    for name in names:
+        try:
+            return create_pdf_engine(name)
+        except (FileNotFoundError, RuntimeError) as e:
+            errors.append(f"{name}: {e}")
+    detail = "\n".join(errors)
+    raise RuntimeError("没有可用的PDF转HTML引擎，请安装 pdf2htmlEX 或 PyMuPDF。" + (f"\n{detail}" if detail else ""))
+
+
+register_pdf_engine(Pdf2HtmlExEngine)
+register_pdf_engine(PyMuPdfEngine)
@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""
+PDF文本与缩略图索引
+
+PdfViewerView 通过 Chromium 的 PDF 插件显示文件，无法访问页面内容。这里用 PyMuPDF
+在后台提取每页文本和低分辨率缩略图，按PDF内容哈希保存在 data/pdf_index 中，
+同一文件重复打开、改名或移动后都直接使用已有索引。已建立索引的全部PDF都可以搜索。
+
+索引分两步建立：先提取全部页面文本（很快，完成后即可搜索），再逐页渲染缩略图。
+中途取消时已完成的部分保留，下次打开时继续。
+"""
+import os
+import json
+import time
+import shutil
+import threading
+from typing import Dict, List, Optional
+
+from .pdf_conversion_cache import get_pdf_conversion_cache
+
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+
+def get_default_index_dir():
+    """默认索引目录：项目根目录下的 data/pdf_index"""
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    return os.path.join(project_root, "data", "pdf_index")
+
+
+class PdfSearchHit:
+    """一条搜索结果"""
+
+    __slots__ = ("page_index", "snippet")
+
+    def __init__(self, page_index: int, snippet: str):
+        self.page_index = page_index
+        self.snippet = snippet
+
+
+def _casefold_with_offsets(text: str):
+    """
+    casefold 并记录折叠后每个字符在原文中的位置
+
+    个别字符折叠后变长（如 "ß" → "ss"），此时折叠文本中的位置不能直接用于原文。
+    casefold 不会把字符折叠为空，长度不变即逐字符一一对应，位置表为 None。
+    """
+    folded = text.casefold()
+    if len(folded) == len(text):
+        return folded, None
+    offsets = []
+    for index, ch in enumerate(text):
+        offsets.extend([index] * len(ch.casefold()))
+    return folded, offsets
+
+
+class PdfIndexEntry:
+    """一个PDF文件的索引（页面文本在内存中，缩略图在磁盘上）"""
+
+    def __init__(self, content_hash: str, entry_dir: str, meta: dict):
+        self.content_hash = content_hash
+        self.entry_dir = entry_dir
+        self.meta = meta
+        self.source_path = meta.get("source_path", "")
+        self.title = meta.get("title") or os.path.basename(self.source_path)
+        self.page_count = meta.get("page_count", 0)
+        self.pages = meta.get("pages", [])
+        self.thumbnails_complete = meta.get("thumbnails_complete", False)
+        # 搜索时不区分大小写，预先转换一次（附带到原文位置的映射，用于截取上下文）
+        self._folded_pages = [_casefold_with_offsets(text) for text in self.pages]
+
+    def thumbnail_path(self, page_index: int) -> str:
+        return os.path.join(self.entry_dir, "thumbs", f"{page_index + 1:04d}.png")
+
+    def has_thumbnail(self, page_index: int) -> bool:
+        return os.path.exists(self.thumbnail_path(page_index))
+
+    def search(self, query: str, max_hits: int = 200, context: int = 30) -> List[PdfSearchHit]:
+        """在页面文本中查找 query（不区分大小写），每处匹配返回一条带上下文的结果"""
+        folded_query = " ".join(query.split()).casefold()
+        if not folded_query:
+            return []
+        hits = []
+        for page_index, (folded, offsets) in enumerate(self._folded_pages):
+            start = folded.find(folded_query)
+            while start != -1:
+                text = self.pages[page_index]
+                end = start + len(folded_query)
+                if offsets is not None:
+                    # 匹配在原文中的范围（匹配可能从折叠后变长的字符中间开始或结束）
+                    match_start, match_end = offsets[start], offsets[end - 1] + 1
+                else:
+                    match_start, match_end = start, end
+                left = max(0, match_start - context)
+                right = min(len(text), match_end + context)
+                snippet = ("…" if left > 0 else "") + text[left:right] + ("…" if right < len(text) else "")
+                hits.append(PdfSearchHit(page_index, snippet))
+                if len(hits) >= max_hits:
+                    return hits
+                start = folded.find(folded_query, start + len(folded_query))
+        return hits
+
+
+class PdfIndex:
+    """按内容哈希保存的PDF文本与缩略图索引"""
+
+    META_FILE = "index.json"
+    FORMAT_VERSION = 1
+
+    def __init__(self, index_dir=None, thumbnail_width=120, max_size_bytes=256 * 1024 * 1024):
+        self.index_dir = index_dir or get_default_index_dir()
+        self.thumbnail_width = thumbnail_width
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+        self._entries: Dict[str, PdfIndexEntry] = {}  # 内容哈希: 已加载的索引
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._building: Dict[str, int] = {}  # 内容哈希: 正在建立该索引的线程数（淘汰时跳过）
+        os.makedirs(self.index_dir, exist_ok=True)
+
+    # ---- 读取 ----
+    def _entry_dir(self, content_hash):
+        return os.path.join(self.index_dir, content_hash)
+
+    def _load_entry(self, content_hash) -> Optional[PdfIndexEntry]:
+        with self._lock:
+            entry = self._entries.get(content_hash)
+        if entry is not None:
+            return entry
+        entry_dir = self._entry_dir(content_hash)
+        try:
+            with open(os.path.join(entry_dir, self.META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != self.FORMAT_VERSION:
+            return None
+        entry = PdfIndexEntry(content_hash, entry_dir, meta)
+        with self._lock:
+            self._entries[content_hash] = entry
+        return entry
+
+    def lookup(self, pdf_path) -> Optional[PdfIndexEntry]:
+        """返回PDF的已有索引（文本已提取即可，缩略图可能尚未完成），没有时返回 None"""
+        try:
+            content_hash = get_pdf_conversion_cache().file_hash(pdf_path)
+        except OSError:
+            return None
+        entry = self._load_entry(content_hash)
+        if entry is not None:
+            try:
+                os.utime(os.path.join(entry.entry_dir, self.META_FILE))
+            except OSError:
+                pass
+        return entry
+
+    def entries(self) -> List[PdfIndexEntry]:
+        """全部已建立索引的PDF"""
+        result = []
+        for name in os.listdir(self.index_dir):
+            if name.startswith("."):
+                continue
+            entry = self._load_entry(name)
+            if entry is not None:
+                result.append(entry)
+        return result
+
+    def search_all(self, query: str, max_hits_per_document: int = 50):
+        """在全部已建立索引的PDF中查找，返回 [(索引, 结果列表)]，源文件已不存在的跳过"""
+        results = []
+        for entry in self.entries():
+            if not os.path.exists(entry.source_path):
+                continue
+            hits = entry.search(query, max_hits=max_hits_per_document)
+            if hits:
+                results.append((entry, hits))
+        results.sort(key=lambda item: item[0].title.lower())
+        return results
+
+    # ---- 建立 ----
+    def _write_meta(self, entry_dir, meta):
+        meta_path = os.path.join(entry_dir, self.META_FILE)
+        temp_path = meta_path + ".part"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(temp_path, meta_path)
+
+    def build(self, pdf_path, job=None, on_text_ready=None) -> PdfIndexEntry:
+        """
+        建立（或继续建立）PDF的索引，在工作线程中调用
+
+        Args:
+            pdf_path: PDF文件路径
+            job: 可选的 JobControl，用于取消和报告进度（取消时抛出 JobCancelledError）
+            on_text_ready: 可选回调 (PdfIndexEntry)，页面文本可搜索后立即调用
+
+        Returns:
+            完整的索引
+        """
+        if not PYMUPDF_AVAILABLE:
+            raise RuntimeError("PyMuPDF (fitz) 模块未安装，无法建立PDF索引。")
+        content_hash = get_pdf_conversion_cache().file_hash(pdf_path)
+        with self._lock:
+            build_lock = self._build_locks.setdefault(content_hash, threading.Lock())
+            self._building[content_hash] = self._building.get(content_hash, 0) + 1
+        try:
+            return self._build(content_hash, pdf_path, build_lock, job, on_text_ready)
+        finally:
+            with self._lock:
+                self._building[content_hash] -= 1
+                if not self._building[content_hash]:
+                    del self._building[content_hash]
+
+    def _build(self, content_hash, pdf_path, build_lock, job, on_text_ready):
+        # 同一文件在多个标签页中打开时只建立一次
+        with build_lock:
+            entry = self._load_entry(content_hash)
+            if entry is not None and entry.thumbnails_complete:
+                source_path = os.path.abspath(pdf_path)
+                if entry.source_path != source_path:
+                    # 文件被移动或复制：跨文档搜索结果打开最近一次使用的路径
+                    entry.source_path = entry.meta["source_path"] = source_path
+                    self._write_meta(entry.entry_dir, entry.meta)
+                if on_text_ready:
+                    on_text_ready(entry)
+                return entry
+            entry = self._build_locked(content_hash, pdf_path, entry, job, on_text_ready)
+        self.evict(keep=content_hash)
+        return entry
+
+    def _build_locked(self, content_hash, pdf_path, entry, job, on_text_ready):
+        entry_dir = self._entry_dir(content_hash)
+        thumbs_dir = os.path.join(entry_dir, "thumbs")
+        os.makedirs(thumbs_dir, exist_ok=True)
+        try:
+            doc = fitz.open(pdf_path)
+        except Exception as e:
+            raise RuntimeError(f"无法打开PDF文件: {e}")
+        try:
+            page_count = doc.page_count
+            meta = {
+                "version": self.FORMAT_VERSION,
+                "source_path": os.path.abspath(pdf_path),
+                "title": (doc.metadata or {}).get("title") or os.path.basename(pdf_path),
+                "page_count": page_count,
+                "created": time.time(),
+                "thumbnails_complete": False,
+            }
+            if entry is None:
+                pages = []
+                for page in doc:
+                    if job:
+                        job.check()
+                    pages.append(" ".join(page.get_text("text").split()))
+                    if job and (page.number + 1) % 20 == 0:
+                        job.report_progress(page.number + 1, page_count * 2, "提取文本")
+                meta["pages"] = pages
+                self._write_meta(entry_dir, meta)
+            else:
+                # 上次建立到一半：文本已有，只补齐缩略图；记录最近一次打开的路径
+                meta["pages"] = entry.pages
+                meta["created"] = time.time()
+            entry = PdfIndexEntry(content_hash, entry_dir, meta)
+            with self._lock:
+                self._entries[content_hash] = entry
+            if on_text_ready:
+                on_text_ready(entry)
+
+            for page in doc:
+                if job:
+                    job.check()
+                thumb_path = entry.thumbnail_path(page.number)
+                if not os.path.exists(thumb_path):
+                    zoom = self.thumbnail_width / max(page.rect.width, 1)
+                    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False)
+                    temp_path = thumb_path + ".part"
+                    pix.save(temp_path, output="png")
+                    os.replace(temp_path, thumb_path)
+                if job:
+                    job.report_progress(page_count + page.number + 1, page_count * 2, "生成缩略图")
+        finally:
+            doc.close()
+
+        meta["thumbnails_complete"] = True
+        self._write_meta(entry_dir, meta)
+        entry.thumbnails_complete = True
+        return entry
+
+    # ---- 容量 ----
+    def evict(self, keep=None):
+        """总大小超过上限时，按最近使用时间从旧到新删除索引（keep 指定的和正在建立的不删除）"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.index_dir):
+            entry_dir = self._entry_dir(name)
+            if name.startswith(".") or not os.path.isdir(entry_dir):
+                continue
+            size = 0
+            for root, _dirs, files in os.walk(entry_dir):
+                for file_name in files:
+                    try:
+                        size += os.path.getsize(os.path.join(root, file_name))
+                    except OSError:
+                        pass
+            try:
+                last_used = os.path.getmtime(os.path.join(entry_dir, self.META_FILE))
+            except OSError:
+                last_used = 0
+            entries.append((last_used, name, size))
+            total += size
+        entries.sort()
+        for _last_used, name, size in entries:
+            if total <= self.max_size_bytes:
+                break
+            if name == keep:
+                continue
+            with self._lock:
+                # 在锁内检查并删除，删除期间其他线程不能开始建立该索引
+                if name in self._building:
+                    continue
+                self._entries.pop(name, None)
+                shutil.rmtree(self._entry_dir(name), ignore_errors=True)
+            total -= size
+            print(f"PdfIndex: 已淘汰索引 {name} ({size} 字节)")
+
+
+_index_instance = None
+_index_instance_lock = threading.Lock()
+
+
+def get_pdf_index():
+    """获取全局PDF索引实例"""
+    global _index_instance
+    with _index_instance_lock:
+        if _index_instance is None:
+            _index_instance = PdfIndex()
+        return _index_instance
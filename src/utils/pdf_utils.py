@@ -4,11 +4,10 @@ import tempfile
 import shutil
 import pathlib
 import sys
-import base64
-import mimetypes
 import re
-from bs4 import BeautifulSoup
-from .pdf2html_converter import PDF2HTMLConverter
+from .pdf_html_engines import get_default_pdf_engine
+from .html_inliner import inline_html_resources
+from .job_control import JobCancelledError
 # import fitz # No longer needed for HTML conversion, but PdfViewerView still uses it for image preview
 
 def get_application_path():
@@ -22,123 +21,41 @@ def get_application_path():
     return application_path
 
 APPLICATION_ROOT = get_application_path()
-# 不再使用mupdf，改为使用pdf2htmlEX
-# PDF2HTMLConverter类会在初始化时检查工具是否存在
-
-# Helper function to embed resources found in CSS url()
-def _embed_css_resource_url(match_obj, base_dir: pathlib.Path):
-    url_content = match_obj.group(1).strip().strip("'\"")
-
-    if url_content.startswith(('data:', 'http:', 'https:')):
-        return match_obj.group(0) 
-
-    try:
-        # Resolve path, handling potential relative paths like "../fonts/" if any
-        resource_path = (base_dir / url_content).resolve()
-        
-        # Security check: ensure resolved path is still within base_dir
-        if not str(resource_path).startswith(str(base_dir.resolve())):
-            print(f"警告: CSS引用的资源路径 '{url_content}' 解析到基础目录之外，跳过嵌入。")
-            return match_obj.group(0)
-
-        if resource_path.exists() and resource_path.is_file():
-            data = base64.b64encode(resource_path.read_bytes()).decode()
-            mime_type, _ = mimetypes.guess_type(resource_path)
-            if not mime_type:
-                ext = resource_path.suffix.lower()
-                if ext == '.ttf': mime_type = 'font/ttf'
-                elif ext == '.otf': mime_type = 'font/otf'
-                elif ext == '.woff': mime_type = 'font/woff'
-                elif ext == '.woff2': mime_type = 'font/woff2'
-                elif ext == ".png": mime_type = "image/png"
-                elif ext in [".jpg", ".jpeg"]: mime_type = "image/jpeg"
-                elif ext == ".gif": mime_type = "image/gif"
-                elif ext == ".svg": mime_type = "image/svg+xml"
-                elif ext == ".webp": mime_type = "image/webp"
-                else: mime_type = 'application/octet-stream'
-            return f"url(data:{mime_type};base64,{data})"
-        else:
-            # print(f"警告: CSS引用的资源未找到: {resource_path} (原始url: {url_content})")
-            return match_obj.group(0) 
-    except Exception as e:
-        print(f"嵌入CSS资源 {url_content} 时出错: {e}")
-        return match_obj.group(0)
+# 优先使用pdf2htmlEX，不可用时（例如没有对应平台的可执行文件）退回PyMuPDF引擎
+# 引擎选择见 pdf_html_engines.get_default_pdf_engine
 
 def _inline_resources(html_text: str, base_dir_str: str) -> str:
-    base_dir = pathlib.Path(base_dir_str)
-    soup = BeautifulSoup(html_text, "lxml")
-
-    for img_tag in soup.find_all("img", src=True):
-        src_val = img_tag["src"]
-        if not src_val or src_val.startswith(('data:', 'http:', 'https:')):
-            continue
-
-        try:
-            img_path = (base_dir / src_val).resolve()
-            if not str(img_path).startswith(str(base_dir.resolve())):
-                print(f"警告: 图片路径 '{src_val}' 解析到基础目录之外，跳过嵌入。")
-                continue
-                
-            if img_path.exists() and img_path.is_file():
-                mime_type, _ = mimetypes.guess_type(img_path)
-                if not mime_type:
-                    ext = img_path.suffix.lower()
-                    if ext == ".png": mime_type = "image/png"
-                    elif ext in [".jpg", ".jpeg"]: mime_type = "image/jpeg"
-                    elif ext == ".gif": mime_type = "image/gif"
-                    elif ext == ".svg": mime_type = "image/svg+xml"
-                    elif ext == ".webp": mime_type = "image/webp"
-                    else: mime_type = "application/octet-stream"
-                
-                img_data = base64.b64encode(img_path.read_bytes()).decode()
-                img_tag["src"] = f"data:{mime_type};base64,{img_data}"
-            else:
-                # print(f"警告: 图片文件未找到，无法嵌入: {img_path} (原始src: {src_val})")
-                pass # Silently skip if not found, or could log
-        except Exception as e:
-            print(f"嵌入图片 {src_val} 时出错: {e}")
-
-    for tag_with_style in soup.find_all(style=True):
-        if tag_with_style.string: # Check if style attribute has content (it always does if attr exists)
-             tag_with_style["style"] = re.sub(
-                r'url\(([^)]+)\)',
-                lambda m: _embed_css_resource_url(m, base_dir),
-                tag_with_style["style"]
-            )
-            
-    for style_tag in soup.find_all("style"):
-        if style_tag.string:
-            style_tag.string = re.sub(
-                r'url\(([^)]+)\)',
-                lambda m: _embed_css_resource_url(m, base_dir),
-                style_tag.string
-            )
-            
-    return str(soup)
+    """把HTML引用的本地资源内联，返回自包含的HTML（实现见 html_inliner）"""
+    return inline_html_resources(html_text, base_dir_str)
 
-def extract_pdf_content(pdf_path: str) -> str:
+def extract_pdf_content(pdf_path: str, on_first_page=None, on_pages=None, engine_name=None, job=None) -> str:
     """将PDF文件转换为HTML内容
     
-    此函数保持与原有接口兼容，但内部实现已从mupdf切换到pdf2htmlEX
+    此函数保持与原有接口兼容，内部使用第一个可用的转换引擎（pdf2htmlEX 或 PyMuPDF）
     
     Args:
         pdf_path: PDF文件路径
+        on_first_page: 可选回调 (主HTML文件路径, 已完成页数, 总页数)；提供回调时渐进式转换，
+            首页完成后即调用
+        on_pages: 可选回调 (样式表路径列表, 页面HTML, 已完成页数, 总页数)，其余各段完成后调用
+        engine_name: 优先使用的引擎名称（如 "pdf2htmlex"、"pymupdf"），不可用时自动选择
+        job: 可选的 JobControl（见 job_control），用于取消转换和报告进度
         
     Returns:
         转换后的HTML内容字符串
         
     Raises:
-        FileNotFoundError: 当PDF文件或pdf2htmlEX工具不存在时
+        FileNotFoundError: 当PDF文件不存在时
         RuntimeError: 当转换过程中发生错误时
+        JobCancelledError: 当 job 被取消时
     """
     if not os.path.exists(pdf_path):
         raise FileNotFoundError(f"PDF 文件未找到: {pdf_path}")
 
     try:
-        # 使用PDF2HTMLConverter类进行转换
-        converter = PDF2HTMLConverter()
-        # convert_pdf_to_html 现在返回 (html_filename, temp_dir_path)
-        html_filename, temp_dir_path = converter.convert_pdf_to_html(pdf_path)
+        engine = get_default_pdf_engine(engine_name)
+        # 引擎返回 (html_filename, temp_dir_path)
+        html_filename, temp_dir_path = engine.convert(pdf_path, on_first_page=on_first_page, on_pages=on_pages, job=job)
         
         # 构建主HTML文件的完整路径
         full_html_path = os.path.join(temp_dir_path, html_filename)
@@ -155,6 +72,8 @@ def extract_pdf_content(pdf_path: str) -> str:
         # 返回主HTML文件的完整路径和其所在目录的路径
         return full_html_path, temp_dir_path
 
+    except JobCancelledError:
+        raise
     except Exception as e:
         # 捕获并重新抛出异常，保持与原有错误处理一致
         raise RuntimeError(f"处理 PDF 时发生意外错误: {e}") from e
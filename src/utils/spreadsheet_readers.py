@@ -0,0 +1,621 @@
+# -*- coding: utf-8 -*-
+"""
+大型表格文件（XLSX/CSV）的只读按需读取
+
+表格查看器只需要显示滚动到的几十行，因此这里不一次性读入整个文件，而是先在后台建立
+“行号 → 字节偏移”索引，显示时再按行号读取少量行：
+- CsvReader 用 mmap 映射原文件，扫描换行（跳过引号内的换行）记录每行的起始偏移，
+  读取时只解码、解析请求的那几行。
+- XlsxReader 把工作表 XML 分块送入 expat（XMLParser 的 target 回调，不建立元素树），
+  每行结束时立即写入临时行文件（由临时产物管理器管理），之后按偏移读取行文件；
+  内存占用与行数无关。共享字符串表仍用 iterparse 读取。
+索引在工作线程中建立，已索引的行立即可读（row_count 随之增长）。
+"""
+import io
+import os
+import csv
+import math
+import mmap
+import codecs
+import zipfile
+import datetime
+import posixpath
+import threading
+import collections
+import xml.etree.ElementTree as ET
+from array import array
+from typing import List, Optional
+
+from .temp_artifacts import get_temp_artifact_manager
+
+CSV_EXTENSIONS = (".csv", ".tsv")
+XLSX_EXTENSIONS = (".xlsx", ".xlsm")
+SPREADSHEET_EXTENSIONS = XLSX_EXTENSIONS + CSV_EXTENSIONS
+
+_S = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# 内置的日期/时间数字格式编号
+_BUILTIN_DATE_FORMATS = set(range(14, 23)) | set(range(27, 37)) | {45, 46, 47} | set(range(50, 59))
+
+
+def column_name(index: int) -> str:
+    """列号（从0开始）转换为 A、B、...、Z、AA 形式的列名"""
+    name = ""
+    index += 1
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(ord("A") + remainder) + name
+    return name
+
+
+def _column_index(cell_ref: str) -> int:
+    """单元格引用（如 "AB12"）中的列号（从0开始）"""
+    index = 0
+    for char in cell_ref:
+        if "A" <= char <= "Z":
+            index = index * 26 + ord(char) - ord("A") + 1
+        elif "a" <= char <= "z":
+            index = index * 26 + ord(char) - ord("a") + 1
+        else:
+            break
+    return index - 1
+
+
+class SpreadsheetReader:
+    """
+    按行号读取表格内容的基类
+
+    build_index 在工作线程中调用，逐步增加 row_count；read_rows 可在任意线程中调用，
+    只能读取已索引的行。
+    """
+
+    # 每建立这么多行的索引发布一次，使已索引的行可读
+    PUBLISH_ROWS = 5000
+
+    def __init__(self, path: str):
+        self.path = path
+        self.column_count = 0
+        self.complete = False
+        self._lock = threading.Lock()
+        self._offsets = array("Q")  # 第 i 行占 [offsets[i], offsets[i+1])
+        self._row_count = 0
+        self._building = False
+        self._closed = False
+
+    @property
+    def row_count(self) -> int:
+        """已索引（可读取）的行数"""
+        with self._lock:
+            return self._row_count
+
+    def _publish(self):
+        with self._lock:
+            self._row_count = max(0, len(self._offsets) - 1)
+
+    def build_index(self, job=None):
+        """建立行索引（在工作线程中调用），job 为可选的 JobControl"""
+        with self._lock:
+            if self._closed:
+                return
+            self._building = True
+        try:
+            self._build(job)
+            self._publish()
+            self.complete = True
+        finally:
+            with self._lock:
+                self._building = False
+                closed = self._closed
+            if closed:
+                self._release()
+
+    def read_rows(self, start: int, count: int) -> List[List[str]]:
+        """读取从 start 开始的最多 count 行（只包含已索引的行）"""
+        with self._lock:
+            if self._closed:
+                return []
+            end = min(start + count, self._row_count)
+            if start >= end:
+                return []
+            offset_start, offset_end = self._offsets[start], self._offsets[end]
+            rows = self._read_range(offset_start, offset_end, end - start)
+        # 读取时才知道的更宽的行
+        widest = max((len(row) for row in rows), default=0)
+        if widest > self.column_count:
+            self.column_count = widest
+        return rows
+
+    def iter_rows(self, start: int = 0, stop: Optional[int] = None, chunk_rows: int = 2000):
+        """按块依次读取 [start, stop) 的行，stop 为 None 时读到当前已索引的最后一行"""
+        stop = self.row_count if stop is None else min(stop, self.row_count)
+        row = start
+        while row < stop:
+            rows = self.read_rows(row, min(chunk_rows, stop - row))
+            if not rows:
+                return
+            yield from rows
+            row += len(rows)
+
+    def close(self):
+        """释放文件；正在建立索引时在索引结束后释放"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            building = self._building
+        if not building:
+            self._release()
+
+    # ---- 子类实现 ----
+    def _build(self, job):
+        raise NotImplementedError
+
+    def _read_range(self, offset_start, offset_end, row_count) -> List[List[str]]:
+        raise NotImplementedError
+
+    def _release(self):
+        pass
+
+
+class CsvReader(SpreadsheetReader):
+    """用 mmap 映射的 CSV/TSV 文件，按换行建立行偏移索引"""
+
+    CHUNK_BYTES = 4 * 1024 * 1024
+    SAMPLE_BYTES = 64 * 1024
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # 空文件无法映射
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.size = size
+        sample = self._map[:self.SAMPLE_BYTES]
+        if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            self._release()
+            raise RuntimeError("不支持 UTF-16 编码的CSV文件，请另存为 UTF-8 编码。")
+        self.encoding = self._detect_encoding(sample)
+        self._data_start = len(codecs.BOM_UTF8) if sample.startswith(codecs.BOM_UTF8) else 0
+        self.delimiter = self._detect_delimiter(sample[self._data_start:].decode(self.encoding, errors="replace"))
+        self._offsets.append(self._data_start)
+
+    @staticmethod
+    def _detect_encoding(sample: bytes) -> str:
+        for encoding in ("utf-8", "gb18030"):
+            try:
+                # 样本末尾可能截断了多字节字符
+                codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+                return encoding
+            except UnicodeDecodeError:
+                continue
+        return "latin-1"
+
+    def _detect_delimiter(self, sample_text: str) -> str:
+        if os.path.splitext(self.path)[1].lower() == ".tsv":
+            return "\t"
+        try:
+            return csv.Sniffer().sniff(sample_text, delimiters=",;\t|").delimiter
+        except csv.Error:
+            return ","
+
+    def _build(self, job):
+        data = self._map
+        offsets = self._offsets
+        pos = self._data_start
+        in_quotes = False
+        published_at = 0
+        while pos < self.size:
+            if job:
+                job.check()
+            end = min(self.size, pos + self.CHUNK_BYTES)
+            chunk = data[pos:end]
+            if not in_quotes and b'"' not in chunk:
+                # 常见情况：块内没有引号，每个换行都是行尾
+                i = chunk.find(b"\n")
+                while i != -1:
+                    offsets.append(pos + i + 1)
+                    i = chunk.find(b"\n", i + 1)
+            else:
+                # 引号内的换行属于字段内容；"" 转义不改变引号的奇偶
+                segment_start = 0
+                i = chunk.find(b"\n")
+                while i != -1:
+                    if chunk.count(b'"', segment_start, i) % 2:
+                        in_quotes = not in_quotes
+                    segment_start = i + 1
+                    if not in_quotes:
+                        offsets.append(pos + i + 1)
+                    i = chunk.find(b"\n", i + 1)
+                if chunk.count(b'"', segment_start) % 2:
+                    in_quotes = not in_quotes
+            pos = end
+            if published_at == 0 or len(offsets) - published_at >= self.PUBLISH_ROWS:
+                first_publish = published_at == 0
+                published_at = len(offsets)
+                self._publish()
+                if first_publish:
+                    # 用开头的行确定列数，更宽的行在读取时再扩展
+                    self.read_rows(0, 100)
+            if job:
+                job.report_progress(pos, self.size, "建立行索引")
+        if offsets[-1] < self.size:
+            # 最后一行没有换行符
+            offsets.append(self.size)
+        self._publish()
+        if self.column_count == 0:
+            self.read_rows(0, 100)
+
+    def _read_range(self, offset_start, offset_end, row_count):
+        text = self._map[offset_start:offset_end].decode(self.encoding, errors="replace")
+        rows = list(csv.reader(io.StringIO(text, newline=""), delimiter=self.delimiter, quotechar='"',
+                               doublequote=True, strict=False))
+        # 引号不成对等异常文件中，解析出的行数可能与索引不一致
+        if len(rows) < row_count:
+            rows.extend([] for _ in range(row_count - len(rows)))
+        return rows[:row_count]
+
+    def _release(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+
+class XlsxReader(SpreadsheetReader):
+    """流式解析 XLSX 工作表，解析出的行写入临时行文件后按偏移读取"""
+
+    def __init__(self, path: str, sheet_index: int = 0):
+        super().__init__(path)
+        self.sheet_index = sheet_index
+        try:
+            with zipfile.ZipFile(path) as package:
+                self.sheets = self._read_sheet_list(package)
+        except (zipfile.BadZipFile, KeyError, ET.ParseError) as e:
+            raise RuntimeError(f"无法读取 XLSX 文件: {e}")
+        if not self.sheets:
+            raise RuntimeError("XLSX 文件中没有工作表。")
+        if not 0 <= sheet_index < len(self.sheets):
+            raise RuntimeError(f"工作表序号超出范围: {sheet_index}")
+        self.sheet_name = self.sheets[sheet_index][0]
+        self._date1904 = False
+        self._date_styles = set()
+        self._date_cache = {}
+        self._row_file_path = get_temp_artifact_manager().create_file(suffix=".rows", prefix="xlsx_")
+        self._row_file = open(self._row_file_path, "rb")
+        self._offsets.append(0)
+
+    @staticmethod
+    def _read_sheet_list(package):
+        """[(工作表名称, 部件路径)]，按工作簿中的顺序"""
+        rels = {}
+        with package.open("xl/_rels/workbook.xml.rels") as f:
+            for rel in ET.parse(f).getroot().iter(f"{_PKG_REL}Relationship"):
+                target = rel.get("Target", "")
+                target = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+                rels[rel.get("Id")] = target
+        sheets = []
+        with package.open("xl/workbook.xml") as f:
+            for sheet in ET.parse(f).getroot().iter(f"{_S}sheet"):
+                part = rels.get(sheet.get(f"{_R}id"))
+                if part:
+                    sheets.append((sheet.get("name", ""), part))
+        return sheets
+
+    def _load_shared_strings(self, package):
+        if "xl/sharedStrings.xml" not in package.namelist():
+            return []
+        strings = []
+        with package.open("xl/sharedStrings.xml") as f:
+            for _event, element in ET.iterparse(f):
+                if element.tag == f"{_S}si":
+                    # 纯文本在 si/t 中，富文本在 si/r/t 中；不取注音（si/rPh）中的文本
+                    text = element.find(f"{_S}t")
+                    if text is not None:
+                        strings.append(text.text or "")
+                    else:
+                        strings.append("".join(t.text or "" for t in element.findall(f"{_S}r/{_S}t")))
+                    element.clear()
+        return strings
+
+    def _load_styles(self, package):
+        """记录使用日期格式的单元格样式序号，以及工作簿是否使用 1904 日期系统"""
+        with package.open("xl/workbook.xml") as f:
+            for element in ET.parse(f).getroot().iter(f"{_S}workbookPr"):
+                self._date1904 = element.get("date1904") in ("1", "true")
+        if "xl/styles.xml" not in package.namelist():
+            return
+        with package.open("xl/styles.xml") as f:
+            root = ET.parse(f).getroot()
+        custom_formats = {}
+        for num_fmt in root.iter(f"{_S}numFmt"):
+            custom_formats[int(num_fmt.get("numFmtId", "0"))] = num_fmt.get("formatCode", "")
+        cell_xfs = root.find(f"{_S}cellXfs")
+        if cell_xfs is None:
+            return
+        for style_index, xf in enumerate(cell_xfs.findall(f"{_S}xf")):
+            num_fmt_id = int(xf.get("numFmtId", "0"))
+            if num_fmt_id in _BUILTIN_DATE_FORMATS or self._is_date_format(custom_formats.get(num_fmt_id, "")):
+                self._date_styles.add(style_index)
+
+    @staticmethod
+    def _is_date_format(format_code: str) -> bool:
+        # 去掉引号中的文字和 [Red]、[$-409] 这类方括号部分后再找日期时间占位符
+        plain, in_quotes, in_brackets = [], False, False
+        for char in format_code:
+            if char == '"':
+                in_quotes = not in_quotes
+            elif not in_quotes:
+                if char == "[":
+                    in_brackets = True
+                elif char == "]":
+                    in_brackets = False
+                elif not in_brackets:
+                    plain.append(char.lower())
+        plain = "".join(plain).split(";")[0]
+        return plain != "general" and any(char in plain for char in "ymdhs")
+
+    def _format_date(self, serial: float) -> str:
+        base = datetime.datetime(1904, 1, 1) if self._date1904 else datetime.datetime(1899, 12, 30)
+        try:
+            value = base + datetime.timedelta(days=serial)
+        except OverflowError:
+            return repr(serial)
+        value = value.replace(microsecond=0) + datetime.timedelta(seconds=round(value.microsecond / 1e6))
+        if serial == int(serial):
+            return value.strftime("%Y-%m-%d")
+        if 0 <= serial < 1:
+            return value.strftime("%H:%M:%S")
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+
+    def _cell_value(self, cell_type, style, text, shared_strings) -> str:
+        if not text:
+            return ""
+        if cell_type == "s":
+            try:
+                return shared_strings[int(text)]
+            except (ValueError, IndexError):
+                return ""
+        if cell_type == "b":
+            return "TRUE" if text == "1" else "FALSE"
+        if cell_type != "n":
+            return text  # inlineStr、str（公式结果）、e（错误值）
+        try:
+            number = float(text)
+        except ValueError:
+            return text
+        if style in self._date_styles and math.isfinite(number):
+            # 日期列的值大量重复
+            formatted = self._date_cache.get(number)
+            if formatted is None:
+                if len(self._date_cache) > 100000:
+                    self._date_cache.clear()
+                formatted = self._date_cache[number] = self._format_date(number)
+            return formatted
+        if number.is_integer() and abs(number) < 1e15:
+            return str(int(number))
+        return f"{number:.15g}"
+
+    @staticmethod
+    def _encode_row(values) -> bytes:
+        # 行文件中每行一条记录，单元格以制表符分隔
+        return "\t".join(value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+                         for value in values).encode("utf-8") + b"\n"
+
+    @staticmethod
+    def _decode_row(line: bytes) -> List[str]:
+        text = line.decode("utf-8")
+        if "\\" not in text:
+            return text.split("\t")
+        values, current, i = [], [], 0
+        while i < len(text):
+            char = text[i]
+            if char == "\\" and i + 1 < len(text):
+                current.append({"t": "\t", "n": "\n", "r": "\r"}.get(text[i + 1], text[i + 1]))
+                i += 2
+                continue
+            if char == "\t":
+                values.append("".join(current))
+                current = []
+            else:
+                current.append(char)
+            i += 1
+        values.append("".join(current))
+        return values
+
+    def _build(self, job):
+        sheet_part = self.sheets[self.sheet_index][1]
+        with zipfile.ZipFile(self.path) as package, open(self._row_file_path, "wb") as out:
+            shared_strings = self._load_shared_strings(package)
+            self._load_styles(package)
+            handler = _SheetHandler(self, shared_strings, out, job)
+            # 用 expat 回调直接处理元素，不建立元素树
+            parser = ET.XMLParser(target=handler)
+            with package.open(sheet_part) as f:
+                while True:
+                    if job:
+                        job.check()
+                    data = f.read(256 * 1024)
+                    if not data:
+                        break
+                    parser.feed(data)
+            parser.close()
+            out.flush()
+
+    def _read_range(self, offset_start, offset_end, row_count):
+        self._row_file.seek(offset_start)
+        data = self._row_file.read(offset_end - offset_start)
+        return [self._decode_row(line) if line else [] for line in data.split(b"\n")[:row_count]]
+
+    def _release(self):
+        self._row_file.close()
+        get_temp_artifact_manager().remove(self._row_file_path)
+
+
+class _SheetHandler:
+    """XMLParser 的 target：逐行收集单元格，写入行文件并记录偏移"""
+
+    def __init__(self, reader, shared_strings, out, job=None):
+        self.reader = reader
+        self.shared_strings = shared_strings
+        self.out = out
+        self.job = job
+        self.position = 0
+        self.expected_rows = 0
+        self.next_row = 1
+        self.published_at = 0
+        self.values = None
+        self.cell = None        # (列号, 类型, 样式序号)
+        self.cell_text = []     # 当前单元格已收集的文本
+        self.text = None        # 正在收集的 <v>/<t> 文本，不收集时为 None
+        self.phonetic = False   # 在 <rPh> 注音中
+        self._column_cache = {}
+
+    def _column(self, ref):
+        letters = ref.rstrip("0123456789")
+        column = self._column_cache.get(letters)
+        if column is None:
+            column = self._column_cache[letters] = _column_index(letters)
+        return column
+
+    def start(self, tag, attrib):
+        if tag == f"{_S}c":
+            ref = attrib.get("r")
+            column = self._column(ref) if ref else len(self.values)
+            style = attrib.get("s")
+            self.cell = (column, attrib.get("t", "n"), int(style) if style else 0)
+            self.cell_text = []
+        elif tag == f"{_S}v" or tag == f"{_S}t":
+            if self.cell is not None and not self.phonetic:
+                self.text = []
+        elif tag == f"{_S}row":
+            self.row_number = int(attrib.get("r", self.next_row))
+            self.values = []
+        elif tag == f"{_S}rPh":
+            self.phonetic = True
+        elif tag == f"{_S}dimension":
+            # 例如 A1:J500000，用于估计进度
+            last_cell = attrib.get("ref", "").split(":")[-1]
+            digits = last_cell.lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz")
+            self.expected_rows = int(digits) if digits.isdigit() else 0
+
+    def data(self, text):
+        if self.text is not None:
+            self.text.append(text)
+
+    def end(self, tag):
+        if tag == f"{_S}v" or tag == f"{_S}t":
+            if self.text is not None:
+                self.cell_text.append("".join(self.text))
+                self.text = None
+        elif tag == f"{_S}c":
+            column, cell_type, style = self.cell
+            values = self.values
+            if column >= len(values):
+                values.extend([""] * (column - len(values) + 1))
+            values[column] = self.reader._cell_value(cell_type, style, "".join(self.cell_text), self.shared_strings)
+            self.cell = None
+        elif tag == f"{_S}row":
+            self._write_row()
+        elif tag == f"{_S}rPh":
+            self.phonetic = False
+
+    def close(self):
+        return None
+
+    def _write_row(self):
+        reader, offsets = self.reader, self.reader._offsets
+        # 工作表中省略的空行
+        for _ in range(self.next_row, self.row_number):
+            self.out.write(b"\n")
+            self.position += 1
+            offsets.append(self.position)
+        values = self.values
+        while values and not values[-1]:
+            values.pop()
+        if len(values) > reader.column_count:
+            reader.column_count = len(values)
+        line = reader._encode_row(values)
+        self.out.write(line)
+        self.position += len(line)
+        offsets.append(self.position)
+        self.next_row = self.row_number + 1
+        if len(offsets) - self.published_at >= reader.PUBLISH_ROWS:
+            if self.job:
+                self.job.report_progress(min(self.row_number, self.expected_rows), self.expected_rows, "读取工作表")
+            self.published_at = len(offsets)
+            self.out.flush()
+            reader._publish()
+
+
+def open_spreadsheet(path: str, sheet_index: int = 0) -> SpreadsheetReader:
+    """按扩展名创建读取器（尚未建立索引），无法读取时抛出 RuntimeError"""
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        if ext in XLSX_EXTENSIONS:
+            return XlsxReader(path, sheet_index)
+        if ext in CSV_EXTENSIONS:
+            return CsvReader(path)
+    except OSError as e:
+        raise RuntimeError(f"无法打开表格文件: {e}")
+    raise RuntimeError(f"不支持的表格文件类型: {ext}")
+
+
+class ColumnStats:
+    """一列的统计结果"""
+
+    def __init__(self, column: int):
+        self.column = column
+        self.rows = 0
+        self.empty = 0
+        self.numeric = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.distinct = 0
+        self.distinct_truncated = False  # 不同值过多，distinct 只是下限
+        self.top_values = []             # [(值, 次数)]
+        self.partial = False             # 统计时索引尚未完成
+
+    @property
+    def mean(self):
+        return self.total / self.numeric if self.numeric else None
+
+
+def compute_column_stats(reader: SpreadsheetReader, column: int, job=None, start_row: int = 0,
+                         max_distinct: int = 100000) -> ColumnStats:
+    """
+    统计一列（在工作线程中调用）：非空数、数值的最小/最大/平均/合计、不同值个数和最常见的值
+
+    start_row 用于跳过表头行；只统计调用时已索引的行。
+    """
+    stats = ColumnStats(column)
+    stats.partial = not reader.complete
+    stop = reader.row_count
+    counter = collections.Counter()
+    for row_index, row in enumerate(reader.iter_rows(start_row, stop), start_row):
+        if job and row_index % 5000 == 0:
+            job.check()
+            job.report_progress(row_index - start_row, stop - start_row, "统计")
+        stats.rows += 1
+        value = row[column].strip() if column < len(row) else ""
+        if not value:
+            stats.empty += 1
+            continue
+        if value in counter or len(counter) < max_distinct:
+            counter[value] += 1
+        else:
+            stats.distinct_truncated = True
+        try:
+            number = float(value.replace(",", ""))
+        except ValueError:
+            continue
+        if not math.isfinite(number):
+            continue
+        stats.numeric += 1
+        stats.total += number
+        stats.minimum = number if stats.minimum is None else min(stats.minimum, number)
+        stats.maximum = number if stats.maximum is None else max(stats.maximum, number)
+    stats.distinct = len(counter)
+    stats.top_values = counter.most_common(5)
+    return stats
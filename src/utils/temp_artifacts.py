@@ -0,0 +1,305 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+
+try:
+    import msvcrt  # Windows
+except ImportError:
+    msvcrt = None
+try:
+    import fcntl  # POSIX
+except ImportError:
+    fcntl = None
+
+
+def get_default_scratch_dir():
+    """默认临时区域：项目根目录下的 data/scratch（与转换缓存位于同一文件系统，可以使用硬链接或 reflink）"""
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    return os.path.join(project_root, "data", "scratch")
+
+
+def _path_size(path):
+    """文件或目录的总大小（字节）"""
+    if os.path.isfile(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _delete_path(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.lexists(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"TempArtifactManager: 无法删除临时文件 {path}: {e}")
+
+
+def _try_lock(handle):
+    """对打开的文件加非阻塞排他锁，成功返回 True（持有者进程退出后锁自动释放）"""
+    try:
+        if msvcrt is not None:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        elif fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(handle):
+    try:
+        if msvcrt is not None:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        elif fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    except OSError:
+        pass
+
+
+class _Artifact:
+    __slots__ = ("path", "refcount", "size", "last_used")
+
+    def __init__(self, path):
+        self.path = path
+        self.refcount = 1
+        self.size = None  # 引用计数降为 0 后内容不再变化，才缓存大小
+        self.last_used = time.time()
+
+
+class TempArtifactManager:
+    """转换输出的临时区域
+
+    PDF转HTML、Office预览等产生的临时目录和文件都在这里创建。每个进程使用一个带文件锁的
+    会话目录，进程异常退出后锁自动释放，下次启动时整个会话目录作为孤立目录被清理。
+
+    每个产物有引用计数：创建者持有一个引用，把输出交给标签页时引用随之转移，
+    标签页关闭时释放。引用计数为 0 的产物暂不删除，总大小超过上限时按最近使用时间淘汰；
+    仍被引用的产物不会被淘汰。
+    """
+
+    SESSION_PREFIX = "session-"
+    LOCK_FILE = ".session.lock"
+    # 启动时清理系统临时目录中旧版本遗留的转换目录（超过一天未修改）
+    LEGACY_PREFIXES = ("pdf2html_", "pymupdf_")
+    LEGACY_MAX_AGE = 24 * 3600
+
+    def __init__(self, root=None, max_size_bytes=512 * 1024 * 1024):
+        self.root = os.path.abspath(root or get_default_scratch_dir())
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.RLock()
+        self._artifacts = {}  # 绝对路径: _Artifact
+        self.evicted_count = 0
+        os.makedirs(self.root, exist_ok=True)
+
+        self.sweep_orphans()
+        self.session_dir = tempfile.mkdtemp(prefix=f"{self.SESSION_PREFIX}{os.getpid()}-", dir=self.root)
+        self._lock_handle = open(os.path.join(self.session_dir, self.LOCK_FILE), "a+b")
+        if not _try_lock(self._lock_handle):
+            print(f"TempArtifactManager: 无法锁定会话目录 {self.session_dir}")
+
+    # ---- 创建 ----
+    def _register(self, path):
+        with self._lock:
+            self._artifacts[path] = _Artifact(path)
+        self.enforce_budget()
+        return path
+
+    def create_dir(self, prefix="tmp_"):
+        """创建临时目录，调用者（或接手输出的标签页）持有一个引用"""
+        return self._register(tempfile.mkdtemp(prefix=prefix, dir=self.session_dir))
+
+    def create_file(self, suffix="", prefix="tmp_"):
+        """创建空的临时文件，调用者持有一个引用"""
+        fd, path = tempfile.mkstemp(suffix=suffix, prefix=prefix, dir=self.session_dir)
+        os.close(fd)
+        return self._register(path)
+
+    # ---- 引用计数 ----
+    def is_managed(self, path):
+        with self._lock:
+            return os.path.abspath(path) in self._artifacts
+
+    def acquire(self, path):
+        """增加一个引用（例如同一输出被另一个标签页使用），产物不存在时返回 False"""
+        with self._lock:
+            artifact = self._artifacts.get(os.path.abspath(path))
+            if artifact is None:
+                return False
+            artifact.refcount += 1
+            artifact.size = None
+            artifact.last_used = time.time()
+            return True
+
+    def release(self, path):
+        """
+        释放一个引用，引用计数为 0 后产物可被淘汰
+
+        不受管理的路径（例如旧版本创建的临时目录）没有其他引用者，直接删除。
+        """
+        if not path:
+            return
+        abs_path = os.path.abspath(path)
+        with self._lock:
+            artifact = self._artifacts.get(abs_path)
+            if artifact is not None:
+                artifact.refcount = max(0, artifact.refcount - 1)
+                artifact.last_used = time.time()
+        if artifact is None:
+            _delete_path(abs_path)
+            return
+        self.enforce_budget()
+
+    def remove(self, path):
+        """立即删除产物（创建者在转换失败时调用），不论引用计数"""
+        if not path:
+            return
+        abs_path = os.path.abspath(path)
+        with self._lock:
+            self._artifacts.pop(abs_path, None)
+        _delete_path(abs_path)
+
+    # ---- 容量 ----
+    def _artifact_size(self, artifact):
+        if artifact.size is not None:
+            return artifact.size
+        size = _path_size(artifact.path)
+        if artifact.refcount == 0:
+            artifact.size = size
+        return size
+
+    def total_size(self):
+        with self._lock:
+            return sum(self._artifact_size(artifact) for artifact in self._artifacts.values())
+
+    def enforce_budget(self):
+        """总大小超过上限时，按最近使用时间从旧到新删除未被引用的产物"""
+        with self._lock:
+            artifacts = list(self._artifacts.values())
+            total = sum(self._artifact_size(artifact) for artifact in artifacts)
+            if total <= self.max_size_bytes:
+                return
+            candidates = sorted((a for a in artifacts if a.refcount == 0), key=lambda a: a.last_used)
+            evicted = []
+            for artifact in candidates:
+                if total <= self.max_size_bytes:
+                    break
+                del self._artifacts[artifact.path]
+                total -= self._artifact_size(artifact)
+                evicted.append(artifact)
+            self.evicted_count += len(evicted)
+        for artifact in evicted:
+            _delete_path(artifact.path)
+            print(f"TempArtifactManager: 已淘汰临时产物 {os.path.basename(artifact.path)} ({artifact.size} 字节)")
+
+    def stats(self):
+        with self._lock:
+            artifacts = list(self._artifacts.values())
+            return {
+                "artifacts": len(artifacts),
+                "referenced": sum(1 for a in artifacts if a.refcount > 0),
+                "total_size": sum(self._artifact_size(a) for a in artifacts),
+                "max_size": self.max_size_bytes,
+                "evicted": self.evicted_count,
+            }
+
+    # ---- 清理 ----
+    def sweep_orphans(self):
+        """
+        清理孤立的临时数据，返回删除的项目数
+
+        - 临时区域中其他会话的目录：会话锁可以获得，说明创建它的进程已经退出
+        - 临时区域中不属于任何会话、超过一天未修改的项目
+        - 系统临时目录中旧版本遗留的 pdf2html_*/pymupdf_* 目录（超过一天未修改）
+        """
+        removed = 0
+        now = time.time()
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if path == getattr(self, "session_dir", None):
+                continue
+            if name.startswith(self.SESSION_PREFIX) and os.path.isdir(path):
+                if not self._session_is_orphaned(path, now):
+                    continue
+            else:
+                try:
+                    if now - os.path.getmtime(path) <= self.LEGACY_MAX_AGE:
+                        continue
+                except OSError:
+                    continue
+            _delete_path(path)
+            removed += 1
+
+        system_temp = tempfile.gettempdir()
+        try:
+            names = os.listdir(system_temp)
+        except OSError:
+            names = []
+        for name in names:
+            if not name.startswith(self.LEGACY_PREFIXES):
+                continue
+            path = os.path.join(system_temp, name)
+            try:
+                if not os.path.isdir(path) or now - os.path.getmtime(path) <= self.LEGACY_MAX_AGE:
+                    continue
+            except OSError:
+                continue
+            _delete_path(path)
+            removed += 1
+        if removed:
+            print(f"TempArtifactManager: 已清理 {removed} 个孤立的临时目录")
+        return removed
+
+    def _session_is_orphaned(self, session_dir, now):
+        lock_path = os.path.join(session_dir, self.LOCK_FILE)
+        if not os.path.exists(lock_path):
+            # 会话刚创建、尚未写入锁文件时不删除
+            try:
+                return now - os.path.getmtime(session_dir) > 60
+            except OSError:
+                return False
+        try:
+            with open(lock_path, "a+b") as handle:
+                if not _try_lock(handle):
+                    return False
+                _unlock(handle)
+                return True
+        except OSError:
+            return False
+
+    def shutdown(self):
+        """删除本会话的全部临时产物（程序退出时调用）"""
+        with self._lock:
+            self._artifacts.clear()
+        if self._lock_handle is not None:
+            _unlock(self._lock_handle)
+            self._lock_handle.close()
+            self._lock_handle = None
+        shutil.rmtree(self.session_dir, ignore_errors=True)
+
+
+_manager_instance = None
+_manager_instance_lock = threading.Lock()
+
+
+def get_temp_artifact_manager():
+    """获取全局临时产物管理器（首次调用时清理上次异常退出遗留的临时目录）"""
+    global _manager_instance
+    with _manager_instance_lock:
+        if _manager_instance is None:
+            _manager_instance = TempArtifactManager()
+        return _manager_instance
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+图片缩略图的磁盘缓存
+
+布局参考 freedesktop 缩略图规范：normal（128像素）和 large（256像素）两个尺寸目录，
+PNG 中写入 Thumb::URI、Thumb::MTime、Thumb::Size；无法生成缩略图的文件在 fail 目录中
+留下记录，不再反复尝试。与规范不同的是文件名取 (绝对路径, 修改时间, 文件大小) 的 MD5，
+文件被修改后自动使用新的缩略图，旧的缩略图按最近使用时间和容量上限淘汰。
+
+缩略图在后台线程中生成（QImage/QImageReader 可在非界面线程使用）。
+"""
+import os
+import time
+import hashlib
+import threading
+from typing import Optional
+
+from PyQt6.QtCore import QSize, QUrl
+from PyQt6.QtGui import QImage
+
+from .image_loading import ImageInfo, fit_size, decode_scaled
+
+THUMBNAIL_SIZES = {"normal": 128, "large": 256}
+
+
+def get_default_thumbnail_dir():
+    """默认缩略图目录：项目根目录下的 data/thumbnails"""
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    return os.path.join(project_root, "data", "thumbnails")
+
+
+class ThumbnailCache:
+    """按 (路径, 修改时间, 大小) 保存的缩略图"""
+
+    FAIL_DIR = "fail"
+    # 每写入这么多个缩略图检查一次总容量
+    EVICT_INTERVAL = 200
+    # 超过这个时间的 .part 临时文件视为进程中途退出留下的残留
+    STALE_PART_SECONDS = 3600
+
+    def __init__(self, cache_dir=None, max_size_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir or get_default_thumbnail_dir()
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        for name in list(THUMBNAIL_SIZES) + [self.FAIL_DIR]:
+            os.makedirs(os.path.join(self.cache_dir, name), exist_ok=True)
+        self._remove_stale_parts()
+
+    def _remove_stale_parts(self):
+        """删除之前运行中途退出留下的临时文件"""
+        cutoff = time.time() - self.STALE_PART_SECONDS
+        for name in THUMBNAIL_SIZES:
+            directory = os.path.join(self.cache_dir, name)
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            if entry.name.endswith(".part") and entry.stat().st_mtime < cutoff:
+                                os.remove(entry.path)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+
+    @staticmethod
+    def file_key(path):
+        """(绝对路径, 修改时间, 大小)，文件不存在时抛出 OSError"""
+        abs_path = os.path.abspath(path)
+        stat = os.stat(abs_path)
+        return (abs_path, stat.st_mtime_ns, stat.st_size)
+
+    def _entry_name(self, file_key):
+        digest = hashlib.md5("\0".join(str(part) for part in file_key).encode("utf-8")).hexdigest()
+        return digest + ".png"
+
+    def thumbnail_path(self, file_key, size_class="normal"):
+        return os.path.join(self.cache_dir, size_class, self._entry_name(file_key))
+
+    def _fail_path(self, file_key):
+        return os.path.join(self.cache_dir, self.FAIL_DIR, self._entry_name(file_key))
+
+    def load(self, file_key, size_class="normal") -> Optional[QImage]:
+        """读取已有的缩略图，没有时返回 None"""
+        thumb_path = self.thumbnail_path(file_key, size_class)
+        image = QImage(thumb_path)
+        if image.isNull():
+            return None
+        try:
+            os.utime(thumb_path)  # 记录最近使用时间，供容量淘汰使用
+        except OSError:
+            pass
+        return image
+
+    def get_or_create(self, path, size_class="normal") -> QImage:
+        """
+        返回图片的缩略图，没有时生成并保存（在工作线程中调用）
+
+        Raises:
+            RuntimeError: 无法生成缩略图（之前失败过的文件直接抛出）
+        """
+        try:
+            file_key = self.file_key(path)
+        except OSError as e:
+            raise RuntimeError(f"无法读取文件: {e}")
+        image = self.load(file_key, size_class)
+        if image is not None:
+            return image
+        if os.path.exists(self._fail_path(file_key)):
+            raise RuntimeError("之前生成缩略图失败")
+
+        box = THUMBNAIL_SIZES[size_class]
+        try:
+            info = ImageInfo(path)
+            image = decode_scaled(path, fit_size(info.size, QSize(box, box)))
+        except (RuntimeError, OSError) as e:
+            try:
+                open(self._fail_path(file_key), "wb").close()
+            except OSError:
+                pass
+            raise RuntimeError(f"无法生成缩略图: {e}")
+
+        image.setText("Thumb::URI", QUrl.fromLocalFile(file_key[0]).toString())
+        image.setText("Thumb::MTime", str(file_key[1] // 1_000_000_000))
+        image.setText("Thumb::Size", str(file_key[2]))
+        thumb_path = self.thumbnail_path(file_key, size_class)
+        temp_path = f"{thumb_path}.{threading.get_ident()}.part"
+        try:
+            saved = image.save(temp_path, "PNG")
+            if saved:
+                os.replace(temp_path, thumb_path)
+        except OSError as e:
+            print(f"ThumbnailCache: 保存缩略图失败: {e}")
+            saved = False
+        finally:
+            # 保存失败（或替换失败）时不留下临时文件
+            if os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+        if saved:
+            with self._lock:
+                self._writes_since_evict += 1
+                evict = self._writes_since_evict >= self.EVICT_INTERVAL
+                if evict:
+                    self._writes_since_evict = 0
+            if evict:
+                self.evict()
+        return image
+
+    def evict(self):
+        """总大小超过上限时，按最近使用时间从旧到新删除缩略图"""
+        entries = []
+        total = 0
+        for name in list(THUMBNAIL_SIZES) + [self.FAIL_DIR]:
+            directory = os.path.join(self.cache_dir, name)
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        if entry.name.endswith(".part") and stat.st_mtime < time.time() - self.STALE_PART_SECONDS:
+                            # 进程中途退出留下的临时文件
+                            entries.append((0, entry.path, stat.st_size))
+                        else:
+                            entries.append((stat.st_mtime, entry.path, stat.st_size))
+                        total += stat.st_size
+            except OSError:
+                continue
+        if total <= self.max_size_bytes:
+            return
+        entries.sort()
+        removed = 0
+        for _mtime, path, size in entries:
+            if total <= self.max_size_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        print(f"ThumbnailCache: 已淘汰 {removed} 个缩略图")
+
+
+_cache_instance = None
+_cache_instance_lock = threading.Lock()
+
+
+def get_thumbnail_cache():
+    """获取全局缩略图缓存实例"""
+    global _cache_instance
+    with _cache_instance_lock:
+        if _cache_instance is None:
+            _cache_instance = ThumbnailCache()
+        return _cache_instance